@@ -2,13 +2,24 @@
 Analytics & Cost Tracking API
 Real-time cost monitoring, usage analytics, cache statistics
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
+import hmac
 import logging
 
 from app.dependencies import get_current_user
 from app.utils.cache_manager import cache_manager
+from app.utils.cache_metrics import cache_metrics
+from app.utils.semantic_cache import semantic_cache
+from app.services.client_registry import client_registry
+from app.services.hedging import hedge_policy
+from app.services.circuit_breaker import circuit_breakers
+from app.services.llm_scheduler import llm_scheduler
+from app.services.single_flight import single_flight
+from app.services.context_cache import context_cache
+from app.services.token_budget import token_estimator
 from app.config import settings
 from firebase_admin import firestore
 
@@ -29,7 +40,7 @@ async def get_cache_stats(
     Returns cache health, hit rate, memory usage
     """
     try:
-        stats = cache_manager.get_stats()
+        stats = await cache_manager.get_stats()
         
         return {
             "success": True,
@@ -41,6 +52,216 @@ async def get_cache_stats(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/cache/metrics", response_class=PlainTextResponse)
+async def get_cache_metrics(
+    authorization: Optional[str] = Header(None)
+) -> PlainTextResponse:
+    """
+    Cache counters in Prometheus text format (per prefix and content type)
+    
+    Scraped without a user session with `Authorization: Bearer <METRICS_TOKEN>`;
+    disabled (404) until METRICS_TOKEN is set
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(authorization or "", f"Bearer {settings.METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    
+    return PlainTextResponse(cache_metrics.prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/cache/semantic")
+async def get_semantic_cache_stats(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Get semantic (near-duplicate) cache statistics
+    
+    Returns lookups, hits, hit rate and average hit similarity per content type
+    """
+    try:
+        return {
+            "success": True,
+            "data": semantic_cache.get_stats()
+        }
+    except Exception as e:
+        logger.error(f"Error fetching semantic cache stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/cache/invalidate")
+async def invalidate_cache(
+    invalidation: Dict[str, Any],
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Queue cache invalidation by tag and/or key pattern (admin only)
+    
+    Args:
+        invalidation: {"tags": ["type:blog", "user:<id>", "template:blog:1"], "pattern": "prompt:*"}
+    
+    Returns:
+        What was queued; keys are deleted in batches by the background sweeper
+    """
+    if current_user.get('subscriptionPlan', 'free') != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    tags = invalidation.get('tags') or []
+    pattern = invalidation.get('pattern')
+    if not isinstance(tags, list) or not all(isinstance(tag, str) and tag for tag in tags):
+        raise HTTPException(status_code=400, detail="tags must be a list of non-empty strings")
+    if pattern is not None and (not isinstance(pattern, str) or not pattern):
+        raise HTTPException(status_code=400, detail="pattern must be a non-empty string")
+    if not tags and pattern is None:
+        raise HTTPException(status_code=400, detail="Provide tags and/or pattern")
+    
+    cache_manager.schedule_invalidation(tags=tags, pattern=pattern)
+    return {
+        "success": True,
+        "data": {"queued_tags": tags, "queued_pattern": pattern}
+    }
+
+
+@router.get("/llm/clients")
+async def get_llm_client_stats(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Get pooled AI client statistics
+    
+    Returns clients and HTTP connections created vs reused per provider
+    (every reused connection is a skipped TCP + TLS handshake)
+    """
+    try:
+        return {
+            "success": True,
+            "data": client_registry.get_stats()
+        }
+    except Exception as e:
+        logger.error(f"Error fetching LLM client stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/llm/hedging")
+async def get_llm_hedging_stats(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Get hedged request statistics
+    
+    Returns how often the GPT-4o-mini fallback was fired against a slow
+    Gemini call, how often it won, and budget denials per tier
+    """
+    try:
+        return {
+            "success": True,
+            "data": hedge_policy.get_stats()
+        }
+    except Exception as e:
+        logger.error(f"Error fetching hedging stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/llm/circuits")
+async def get_llm_circuit_stats(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Get circuit breaker state per text model provider
+    
+    Returns state (closed/open/half_open), consecutive failures, rolling
+    error rate and how many requests skipped straight to the fallback
+    """
+    try:
+        return {
+            "success": True,
+            "data": circuit_breakers.get_stats()
+        }
+    except Exception as e:
+        logger.error(f"Error fetching circuit breaker stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/llm/scheduler")
+async def get_llm_scheduler_stats(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Get LLM scheduler queue depth and wait times
+    
+    Returns per-provider queue depth (by tier), in-flight calls, remaining
+    RPM/TPM budget and per-tier wait-time histograms
+    """
+    try:
+        return {
+            "success": True,
+            "data": llm_scheduler.get_stats()
+        }
+    except Exception as e:
+        logger.error(f"Error fetching LLM scheduler stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/llm/coalescing")
+async def get_llm_coalescing_stats(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Get single-flight coalescing statistics
+    
+    Returns how many identical in-flight generations were served from
+    another request's model call (same worker or another worker)
+    """
+    try:
+        return {
+            "success": True,
+            "data": single_flight.get_stats()
+        }
+    except Exception as e:
+        logger.error(f"Error fetching coalescing stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/llm/context-cache")
+async def get_llm_context_cache_stats(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Get Gemini context cache registry statistics
+    
+    Returns how often cached system prompts were reused (this worker or
+    the shared Redis registry) vs created, and the handles' remaining TTLs
+    """
+    try:
+        return {
+            "success": True,
+            "data": context_cache.get_stats()
+        }
+    except Exception as e:
+        logger.error(f"Error fetching context cache stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/llm/token-budget")
+async def get_llm_token_budget_stats(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Get adaptive max_output_tokens statistics
+    
+    Returns observed output lengths (p50, target percentile, max), the current
+    budget and truncation counts per content type, tone, word-count bucket and model
+    """
+    try:
+        return {
+            "success": True,
+            "data": token_estimator.get_stats()
+        }
+    except Exception as e:
+        logger.error(f"Error fetching token budget stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/cost/summary")
 async def get_cost_summary(
     days: int = 30,
@@ -379,14 +600,39 @@ def _get_cache_recommendations(stats: Dict[str, Any]) -> List[str]:
         recommendations.append("❌ Redis is unavailable. Check connection settings.")
         return recommendations
     
-    hit_rate = stats.get('hit_rate', 0)
-    
-    if hit_rate < 20:
-        recommendations.append("🔴 Cache hit rate < 20%. Consider increasing TTL or reviewing usage patterns.")
-    elif hit_rate < 40:
-        recommendations.append("🟡 Cache hit rate < 40%. Good but can improve with longer TTL.")
+    # Application-level counters (this worker's lookups), not Redis' server-wide keyspace stats
+    if not stats.get('hits') and not stats.get('misses'):
+        recommendations.append("ℹ️ No cache lookups recorded yet on this worker.")
     else:
-        recommendations.append("✅ Cache hit rate > 40%. Excellent performance!")
+        hit_rate = stats.get('hit_rate', 0)
+        if hit_rate < 20:
+            recommendations.append("🔴 Cache hit rate < 20%. Consider increasing TTL or reviewing usage patterns.")
+        elif hit_rate < 40:
+            recommendations.append("🟡 Cache hit rate < 40%. Good but can improve with longer TTL.")
+        else:
+            recommendations.append("✅ Cache hit rate > 40%. Excellent performance!")
+    
+    for content_type, counters in stats.get('by_content_type', {}).items():
+        lookups = counters['hits'] + counters['misses']
+        if lookups < 20:
+            continue  # Too few lookups to judge
+        if counters['hit_rate'] < 5:
+            recommendations.append(
+                f"🔴 {content_type} cache: {counters['hit_rate']}% hits over {lookups} lookups. "
+                f"Writes ({counters['sets']}) rarely pay off - lengthen its TTL or stop caching it."
+            )
+        elif counters['hit_rate'] >= 40:
+            recommendations.append(f"✅ {content_type} cache pays off ({counters['hit_rate']}% hits over {lookups} lookups).")
+    
+    for prefix, counters in stats.get('by_prefix', {}).items():
+        get_ms = counters['avg_latency_ms'].get('get', 0)
+        if get_ms > 10:
+            recommendations.append(f"⚠️ {prefix} cache reads average {get_ms}ms. Check Redis latency and entry size.")
+        if counters['avg_entry_bytes'] > 50 * 1024:
+            recommendations.append(
+                f"⚠️ {prefix} entries average {counters['avg_entry_bytes'] // 1024}KB. "
+                f"Check CACHE_COMPRESSION is enabled."
+            )
     
     memory_used = stats.get('memory_used_mb', 0)
     if memory_used > 100:
@@ -21,9 +21,10 @@ from app.schemas.generation import (
     HumanizationResult,
     ContentType
 )
-from app.dependencies import get_current_user, get_firebase_service
+from app.dependencies import enforce_rate_limit, get_current_user, get_firebase_service
 from app.services.firebase_service import FirebaseService
 from app.services.humanization_service import HumanizationService
+from app.services.quota_ledger import quota_ledger
 
 router = APIRouter(prefix="/api/v1/humanize", tags=["AI Humanization"])
 logger = logging.getLogger(__name__)
@@ -35,6 +36,7 @@ humanization_service = HumanizationService()
 
 @router.post(
     "/{generation_id}",
+    dependencies=[Depends(enforce_rate_limit)],
     response_model=HumanizationResult,
     status_code=status.HTTP_200_OK,
     summary="Humanize AI-generated content",
@@ -81,33 +83,31 @@ async def humanize_content(
     Humanize AI-generated content with automatic stats tracking
     
     Flow:
-    1. Check if user has humanizations left this month
+    1. Reserve a humanization from this month's quota (refunded if anything fails)
     2. Retrieve original generation from Firestore
     3. Detect current AI score
     4. Humanize content based on level
     5. Update generation document with humanization data
-    6. Increment humanization stats (usageThisMonth.humanizations++)
+    6. Increment humanization stats (usageThisMonth.humanizations++) and commit the reservation
     7. Increment lifetime stats (allTimeStats.totalHumanizations++)
     8. Return humanization result with before/after comparison
     """
+    # Check if user has humanizations left (held until the result is saved)
+    reservation = await quota_ledger.reserve(current_user, "humanizations")
+    if not reservation.granted:
+        raise HTTPException(
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail={
+                "error": "humanization_limit_reached",
+                "message": f"You've reached your monthly limit of {reservation.limit} humanizations. Upgrade to Pro for 25/month or Enterprise for unlimited.",
+                "used": reservation.used,
+                "limit": reservation.limit,
+                "resetDate": reservation.reset_date.isoformat()
+            }
+        )
+    
     try:
         user_id = current_user['uid']
-        usage_this_month = current_user.get('usageThisMonth', {})
-        humanizations_used = usage_this_month.get('humanizations', 0)
-        humanization_limit = usage_this_month.get('humanizationsLimit', 5)
-        
-        # Check if user has humanizations left
-        if humanizations_used >= humanization_limit:
-            raise HTTPException(
-                status_code=status.HTTP_402_PAYMENT_REQUIRED,
-                detail={
-                    "error": "humanization_limit_reached",
-                    "message": f"You've reached your monthly limit of {humanization_limit} humanizations. Upgrade to Pro for 25/month or Enterprise for unlimited.",
-                    "used": humanizations_used,
-                    "limit": humanization_limit,
-                    "resetDate": usage_this_month.get('resetDate')
-                }
-            )
         
         # Get original generation from Firestore
         generation = await firebase_service.get_generation_by_id(generation_id)
@@ -228,7 +228,8 @@ async def humanize_content(
         
         # Increment monthly humanization counter
         await firebase_service.increment_humanization_usage(user_id)
-        logger.info(f"Incremented humanizations for user {user_id}: {humanizations_used} -> {humanizations_used + 1}")
+        humanizations_used = await reservation.commit()
+        logger.info(f"Incremented humanizations for user {user_id}: {humanizations_used}/{reservation.limit}")
         
         # Build response
         response = HumanizationResult(
@@ -262,10 +263,13 @@ async def humanize_content(
                 "message": f"Failed to humanize content: {str(e)}"
             }
         )
+    finally:
+        await reservation.release()
 
 
 @router.post(
     "/detect/{generation_id}",
+    dependencies=[Depends(enforce_rate_limit)],
     summary="Detect AI content score",
     description="Check how AI-generated content appears without humanizing it"
 )
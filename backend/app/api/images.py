@@ -15,10 +15,12 @@ from pydantic import BaseModel, Field
 from datetime import datetime
 import logging
 
-from app.dependencies import get_current_user, get_firebase_service
+from app.dependencies import enforce_rate_limit, get_current_user, get_firebase_service
 from app.services.image_service import image_service
 from app.services.firebase_service import FirebaseService
+from app.services.quota_ledger import quota_ledger
 from app.utils.background_tasks import save_image_to_storage, save_batch_images_to_storage
+from app.constants import SubscriptionPlan
 
 router = APIRouter(prefix="/api/v1/generate/image", tags=["Image Generation"])
 logger = logging.getLogger(__name__)
@@ -69,6 +71,7 @@ class MultipleImageResponse(BaseModel):
 
 @router.post(
     "",
+    dependencies=[Depends(enforce_rate_limit)],
     response_model=ImageGenerationResponse,
     status_code=status.HTTP_201_CREATED,
     summary="Generate AI image",
@@ -107,7 +110,7 @@ async def generate_image(
     Generate single image with AI
     
     Flow:
-    1. Check user has graphics quota left
+    1. Reserve one image from the monthly graphics quota (refunded if anything fails)
     2. Enhance prompt if requested
     3. Generate image with appropriate model
     4. Save generation metadata to Firestore
@@ -115,25 +118,22 @@ async def generate_image(
     6. Background: Download & upload to Firebase Storage
     7. Background: Update generation with permanent URL
     """
+    # Check graphics quota (held until the image is saved)
+    reservation = await quota_ledger.reserve(current_user, "graphics")
+    if not reservation.granted:
+        raise HTTPException(
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail={
+                "error": "graphics_limit_reached",
+                "message": f"Monthly graphics limit reached: {reservation.limit} images",
+                "used": reservation.used,
+                "limit": reservation.limit
+            }
+        )
+    
     try:
         user_id = current_user['uid']
-        user_plan = current_user.get('subscriptionPlan', 'free')
-        
-        # Check graphics quota
-        usage_this_month = current_user.get('usageThisMonth', {})
-        graphics_used = usage_this_month.get('graphics', 0)
-        graphics_limit = current_user.get('graphicsLimit', 5)
-        
-        if graphics_used >= graphics_limit:
-            raise HTTPException(
-                status_code=status.HTTP_402_PAYMENT_REQUIRED,
-                detail={
-                    "error": "graphics_limit_reached",
-                    "message": f"Monthly graphics limit reached: {graphics_limit} images",
-                    "used": graphics_used,
-                    "limit": graphics_limit
-                }
-            )
+        user_plan = SubscriptionPlan.of(current_user)
         
         # Enhance prompt if requested
         final_prompt = request.prompt
@@ -195,8 +195,8 @@ async def generate_image(
             file_extension=file_extension
         )
         
-        # Increment graphics usage
-        # await firebase_service.increment_graphics_usage(user_id)
+        # Increment graphics usage (ledger; flushed to usageThisMonth.socialGraphics)
+        await reservation.commit()
         
         logger.info(f"✅ Image generated: {result['model']} in {result['generation_time']:.2f}s")
         logger.info(f"🔄 Background task scheduled to save image for generation {generation_id}")
@@ -221,10 +221,13 @@ async def generate_image(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail={"error": "generation_failed", "message": str(e)}
         )
+    finally:
+        await reservation.release()
 
 
 @router.post(
     "/batch",
+    dependencies=[Depends(enforce_rate_limit)],
     response_model=MultipleImageResponse,
     status_code=status.HTTP_201_CREATED,
     summary="Generate multiple images",
@@ -252,7 +255,7 @@ async def generate_multiple_images(
     Generate multiple images in parallel
     
     Flow:
-    1. Check user has enough quota
+    1. Reserve one image per prompt from the graphics quota
     2. Enhance all prompts if requested
     3. Generate all images in parallel
     4. Save generation metadata to Firestore
@@ -260,26 +263,23 @@ async def generate_multiple_images(
     6. Background: Download & upload all to Firebase Storage
     7. Background: Update generations with permanent URLs
     """
+    # Check if user has enough quota (held until the images are saved)
+    required_quota = len(request.prompts)
+    reservation = await quota_ledger.reserve(current_user, "graphics", required_quota)
+    if not reservation.granted:
+        raise HTTPException(
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail={
+                "error": "insufficient_quota",
+                "message": f"Need {required_quota} images, only {reservation.remaining} available",
+                "available": reservation.remaining,
+                "required": required_quota
+            }
+        )
+    
     try:
         user_id = current_user['uid']
-        user_plan = current_user.get('subscriptionPlan', 'free')
-        
-        # Check if user has enough quota
-        usage_this_month = current_user.get('usageThisMonth', {})
-        graphics_used = usage_this_month.get('graphics', 0)
-        graphics_limit = current_user.get('graphicsLimit', 5)
-        
-        required_quota = len(request.prompts)
-        if graphics_used + required_quota > graphics_limit:
-            raise HTTPException(
-                status_code=status.HTTP_402_PAYMENT_REQUIRED,
-                detail={
-                    "error": "insufficient_quota",
-                    "message": f"Need {required_quota} images, only {graphics_limit - graphics_used} available",
-                    "available": graphics_limit - graphics_used,
-                    "required": required_quota
-                }
-            )
+        user_plan = SubscriptionPlan.of(current_user)
         
         # Enhance prompts if requested
         final_prompts = request.prompts
@@ -357,7 +357,8 @@ async def generate_multiple_images(
             for i, r in enumerate(results)
         ]
         
-        # TODO: Increment graphics usage by len(results)
+        # Increment graphics usage by the images actually produced (the rest is refunded)
+        await reservation.commit(len(results))
         
         logger.info(f"✅ Generated {len(results)} images in {total_time:.2f}s (${total_cost:.4f})")
         logger.info(f"🔄 Background task scheduled to save {len(results)} images")
@@ -378,6 +379,8 @@ async def generate_multiple_images(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail={"error": "batch_generation_failed", "message": str(e)}
         )
+    finally:
+        await reservation.release()
 
 
 @router.get(
@@ -389,7 +392,7 @@ async def get_available_models(
     current_user: Dict[str, Any] = Depends(get_current_user)
 ) -> Dict[str, Any]:
     """Get available image generation models based on user tier"""
-    user_plan = current_user.get('subscriptionPlan', 'free')
+    user_plan = SubscriptionPlan.of(current_user)
     
     models = {
         "flux-schnell": {
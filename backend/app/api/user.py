@@ -446,7 +446,7 @@ async def request_account_deletion(
         logger.info(f"Account deletion requested for user: {user_id}")
         
         # 1. Get user data
-        user_doc = firebase_service.db.collection('users').document(user_id).get()
+        user_doc = await firebase_service.db.collection('users').document(user_id).get()
         
         if not user_doc.exists:
             raise HTTPException(
@@ -486,13 +486,14 @@ async def request_account_deletion(
             deletion_date = now + timedelta(days=1)  # Minimum 1 day
         
         # 4. Mark account for deletion
-        firebase_service.db.collection('users').document(user_id).update({
+        await firebase_service.db.collection('users').document(user_id).update({
             'deletion_requested_at': now,
             'deletion_scheduled_for': deletion_date,
             'deletion_reason': request.reason or 'No reason provided',
             'account_status': 'pending_deletion',
             'updated_at': now
         })
+        await firebase_service.invalidate_user(user_id)
         
         days_until = (deletion_date - now).days
         
@@ -559,7 +560,7 @@ async def cancel_account_deletion(
         logger.info(f"Cancelling account deletion for user: {user_id}")
         
         # 1. Get user data
-        user_doc = firebase_service.db.collection('users').document(user_id).get()
+        user_doc = await firebase_service.db.collection('users').document(user_id).get()
         
         if not user_doc.exists:
             raise HTTPException(
@@ -577,13 +578,14 @@ async def cancel_account_deletion(
             )
         
         # 3. Cancel deletion
-        firebase_service.db.collection('users').document(user_id).update({
+        await firebase_service.db.collection('users').document(user_id).update({
             'deletion_requested_at': None,
             'deletion_scheduled_for': None,
             'deletion_reason': None,
             'account_status': 'active',
             'updated_at': datetime.utcnow()
         })
+        await firebase_service.invalidate_user(user_id)
         
         logger.info(f"Account deletion cancelled for user: {user_id}")
         
@@ -3,7 +3,7 @@ Application Configuration
 Manages environment variables and settings
 """
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 import os
 from pathlib import Path
 
@@ -48,6 +48,47 @@ class Settings(BaseSettings):
     PRIMARY_IMAGE_MODEL: str = "flux-schnell"  # black-forest-labs/flux-schnell via Replicate
     PREMIUM_IMAGE_MODEL: str = "dall-e-3"  # Enterprise tier only
     
+    # LLM Call Layer (see app/services/llm_client.py)
+    LLM_EXECUTOR_MAX_WORKERS: int = 32  # Threads for sync-only model calls (native async is used when available)
+    LLM_HTTP_MAX_CONNECTIONS: int = 100  # Pooled connections per provider (see app/services/client_registry.py)
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20  # Idle keep-alive connections kept warm per provider
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = 120.0  # Seconds an idle connection stays in the pool
+    LLM_HTTP_TIMEOUT: float = 300.0  # Seconds - long-form generations can take minutes
+    LLM_WARMUP_ON_STARTUP: bool = True  # Create clients + open provider connections in lifespan startup
+    
+    # Hedged Requests (see app/services/hedging.py)
+    LLM_HEDGE_ENABLED: bool = False  # Race the fallback model against a slow primary
+    LLM_HEDGE_PERCENTILE: float = 95.0  # Hedge once the primary is slower than this percentile of recent calls
+    LLM_HEDGE_MIN_SAMPLES: int = 20  # Don't hedge until this many primary latencies are known
+    LLM_HEDGE_WINDOW: int = 200  # Rolling window of primary latencies per model
+    LLM_HEDGE_MIN_DELAY: float = 2.0  # Never hedge sooner than this (seconds)
+    LLM_HEDGE_MAX_BURST: float = 3.0  # Max hedge credits a tier can bank
+    FREE_TIER_HEDGE_BUDGET: float = 0.0  # Fraction of requests that may be hedged, per tier
+    HOBBY_TIER_HEDGE_BUDGET: float = 0.02
+    PRO_TIER_HEDGE_BUDGET: float = 0.05
+    ENTERPRISE_TIER_HEDGE_BUDGET: float = 0.10
+    
+    # Circuit Breaker (see app/services/circuit_breaker.py)
+    CIRCUIT_BREAKER_ENABLED: bool = True  # Skip a failing provider/model and go straight to fallback
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 5  # Consecutive failures that open the circuit
+    CIRCUIT_BREAKER_ERROR_RATE: float = 0.5  # Error rate (0-1) over the window that opens the circuit
+    CIRCUIT_BREAKER_MIN_REQUESTS: int = 10  # Minimum requests in the window before error rate applies
+    CIRCUIT_BREAKER_WINDOW_SECONDS: int = 60  # Rolling window for error rate
+    CIRCUIT_BREAKER_OPEN_SECONDS: int = 30  # Cooldown before a half-open recovery probe
+    CIRCUIT_BREAKER_SYNC_INTERVAL: float = 1.0  # Seconds between reads of shared state from Redis
+    
+    # LLM Scheduler (fair queueing + provider quotas)
+    LLM_SCHEDULER_ENABLED: bool = True
+    GEMINI_RPM_LIMIT: int = 1000  # Requests per minute across this worker
+    GEMINI_TPM_LIMIT: int = 2000000  # Tokens per minute (prompt + max output estimate)
+    OPENAI_RPM_LIMIT: int = 500
+    OPENAI_TPM_LIMIT: int = 200000
+    LLM_MAX_CONCURRENCY_PER_PROVIDER: int = 32  # In-flight calls per provider
+    FREE_TIER_LLM_CONCURRENCY: int = 1  # Requests per user with model calls in flight
+    HOBBY_TIER_LLM_CONCURRENCY: int = 2
+    PRO_TIER_LLM_CONCURRENCY: int = 4
+    ENTERPRISE_TIER_LLM_CONCURRENCY: int = 8
+    
     # Fact-Checking APIs
     WOLFRAM_ALPHA_API_KEY: str = ""
     GOOGLE_SCHOLAR_API_KEY: str = ""
@@ -60,6 +101,7 @@ class Settings(BaseSettings):
     FIREBASE_PROJECT_ID: str = ""
     FIREBASE_PRIVATE_KEY_PATH: str = ""
     FIREBASE_STORAGE_BUCKET: str = ""
+    FIRESTORE_CHANNEL_POOL_SIZE: int = 4  # Pooled Firestore AsyncClients (one gRPC channel each), shared round-robin
     
     # Stripe Configuration
     STRIPE_SECRET_KEY: str = ""
@@ -78,9 +120,19 @@ class Settings(BaseSettings):
     REDIS_PORT: int = 6379
     REDIS_PASSWORD: str = ""  # Optional: Redis password
     REDIS_DB: int = 0
+    REDIS_MAX_CONNECTIONS: int = 50  # Shared async pool (rate limiting, coordination and cache)
+    REDIS_SOCKET_TIMEOUT: float = 5.0  # Seconds - a slow Redis fails the call instead of stalling it
     ENABLE_CACHE: bool = True  # Master cache toggle
-    
-    # Rate Limiting
+    CACHE_SERIALIZER: str = "msgpack"  # "msgpack" or "json" (entries are tagged; either format always decodes)
+    CACHE_COMPRESSION: str = "zlib"  # "zlib" or "none"
+    CACHE_COMPRESS_MIN_BYTES: int = 1024  # Smaller payloads are stored uncompressed
+    CACHE_COMPRESSION_LEVEL: int = 6  # zlib level (1 fastest - 9 smallest)
+    L1_CACHE_ENABLED: bool = True  # In-process LRU in front of Redis for hot prefixes
+    L1_CACHE_MAX_ENTRIES: int = 2000  # Per worker; least recently used entries are evicted
+    L1_CACHE_PREFIX_TTLS: Dict[str, int] = {"prompt": 300, "user": 60}  # Key prefix → L1 TTL (seconds); other prefixes skip L1
+    L1_CACHE_RESUBSCRIBE_DELAY: float = 2.0  # Seconds before the invalidation listener reconnects
+    
+    # Rate Limiting (per-user sliding windows on AI endpoints; enterprise limits in UsageLimits)
     RATE_LIMIT_ENABLED: bool = True
     FREE_TIER_LIMIT_HOURLY: int = 10
     FREE_TIER_LIMIT_DAILY: int = 50
@@ -100,11 +152,88 @@ class Settings(BaseSettings):
     MIN_QUALITY_SCORE: float = 0.7
     AUTO_REGENERATE_THRESHOLD: float = 0.6  # Auto-regenerate with fallback model if below this
     
+    # Batch Generation Jobs (POST /api/v1/generate/batch)
+    BATCH_MAX_ITEMS: int = 1000  # Items per job (CSV rows / JSONL lines)
+    BATCH_JOB_CONCURRENCY: int = 4  # Items in flight per job (per-user LLM caps still apply)
+    BATCH_JOB_TTL: int = 604800  # 7 days - job record, items and results stay readable
+    BATCH_JOB_LOCK_TTL: int = 60  # Seconds without a heartbeat before another worker resumes the job
+    BATCH_STREAM_POLL_INTERVAL: float = 1.0  # Seconds between progress reads while streaming results
+    
+    # Best-of-N (parallel candidates instead of serial regenerate-on-low-quality)
+    BEST_OF_N_ENABLED: bool = False  # Opt-in: first candidate clearing GOOD_THRESHOLD wins, the rest are cancelled
+    BEST_OF_N_MIX_PREMIUM: bool = True  # Last candidate uses the premium model
+    FREE_TIER_BEST_OF_N: int = 1  # Max parallel candidates per tier (1 = serial regenerate path)
+    HOBBY_TIER_BEST_OF_N: int = 2
+    PRO_TIER_BEST_OF_N: int = 3
+    ENTERPRISE_TIER_BEST_OF_N: int = 4
+    
+    # Adaptive Output Token Budgets (max_output_tokens from observed output lengths)
+    TOKEN_ESTIMATOR_ENABLED: bool = True
+    TOKEN_ESTIMATOR_PERCENTILE: float = 99.0  # Budget covers this share of observed outputs
+    TOKEN_ESTIMATOR_HEADROOM: float = 0.15  # Added on top of the percentile
+    TOKEN_ESTIMATOR_MIN_SAMPLES: int = 20  # Static words→tokens formula until a key has this many samples
+    TOKEN_ESTIMATOR_WINDOW: int = 200  # Newest samples kept per key (Redis list + local copy)
+    TOKEN_ESTIMATOR_BUCKET_WORDS: int = 500  # Word counts are grouped into buckets of this size
+    TOKEN_ESTIMATOR_MIN_TOKENS: int = 1024
+    TOKEN_ESTIMATOR_MAX_TOKENS: int = 65536  # Gemini 2.5 output limit
+    TOKEN_ESTIMATOR_SYNC_INTERVAL: float = 30.0  # Seconds between refreshes of a key from Redis
+    TOKEN_ESTIMATOR_TRUNCATION_BOOST: float = 1.5  # Truncated outputs are recorded as budget × this
+    
+    # Streaming JSON Validation (structured outputs are checked while they stream)
+    STREAM_VALIDATION_RETRIES: int = 1  # Immediate regenerations after output is aborted as unrecoverable
+    STREAM_VALIDATION_MAX_PREAMBLE: int = 500  # Chars of non-JSON text tolerated before the opening brace
+    
     # Caching Configuration (for cost optimization)
     ENABLE_PROMPT_CACHING: bool = True  # Gemini caching = 90% discount on cached tokens
     CACHE_TTL_SYSTEM_PROMPTS: int = 604800  # 7 days for system prompts
     CACHE_TTL_USER_PROMPTS: int = 86400  # 24 hours for user prompts
     CACHE_TTL_GENERATIONS: int = 3600  # 1 hour for generated content
+    USER_CACHE_TTL: int = 30  # Seconds a cached user document may be served (staleness bound for writes made outside FirebaseService); 0 disables
+    CACHE_PROMPT_TEMPLATE_VERSIONS: Dict[str, str] = {}  # Content type → version ("1" if unset); bump after editing its system prompt to drop cached generations
+    CACHE_SWEEP_BATCH_SIZE: int = 500  # Keys per SCAN/SSCAN + UNLINK batch during invalidation
+    CACHE_SWEEP_PAUSE: float = 0.01  # Seconds between sweep batches so other commands interleave
+    CACHE_TAG_PRUNE_INTERVAL: int = 3600  # Seconds between sweeps that drop expired keys from tag sets (0 = off)
+    METRICS_TOKEN: str = ""  # Bearer token for /analytics/cache/metrics (Prometheus scrape); unset = endpoint disabled
+    
+    # Gemini Context Cache Registry (CachedContent handles shared via Redis)
+    CONTEXT_CACHE_REFRESH_MARGIN: int = 86400  # Extend a handle's TTL once it's within 1 day of expiry
+    CONTEXT_CACHE_REFRESH_INTERVAL: int = 3600  # Seconds between background refresh sweeps
+    CONTEXT_CACHE_LOCK_TTL: int = 60  # Seconds - one worker creates/extends a given cache
+    CONTEXT_CACHE_RETRY_AFTER: int = 600  # Seconds before retrying a failed creation (e.g. prompt too short)
+    CONTEXT_CACHE_PREWARM_ON_STARTUP: bool = True  # Create caches for static system prompts in lifespan
+    
+    # Single-Flight (coalesce identical in-flight generations)
+    SINGLE_FLIGHT_ENABLED: bool = True
+    SINGLE_FLIGHT_LOCK_TTL: int = 330  # Seconds - outlives LLM_HTTP_TIMEOUT so a live leader keeps the lock
+    SINGLE_FLIGHT_WAIT_TIMEOUT: float = 320.0  # Seconds a follower waits for another worker's leader
+    SINGLE_FLIGHT_RESULT_TTL: int = 60  # Seconds the leader's result stays readable for late followers
+    
+    # Semantic Cache (near-duplicate prompts, local MinHash fingerprints)
+    SEMANTIC_CACHE_ENABLED: bool = False  # Opt-in: serves earlier results for reworded requests
+    SEMANTIC_CACHE_THRESHOLD: float = 0.8  # Estimated Jaccard similarity needed for a hit
+    SEMANTIC_CACHE_THRESHOLD_BLOG: float = 0.85
+    SEMANTIC_CACHE_THRESHOLD_SOCIAL: float = 0.8
+    SEMANTIC_CACHE_THRESHOLD_EMAIL: float = 0.85
+    SEMANTIC_CACHE_THRESHOLD_PRODUCT: float = 0.9  # Product names differ by a word or two
+    SEMANTIC_CACHE_THRESHOLD_AD: float = 0.85
+    SEMANTIC_CACHE_NUM_PERM: int = 64  # MinHash signature length
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 50  # Newest entries kept per user + settings combination
+    
+    # Quota Ledger (reserve / commit / refund of monthly limits in Redis)
+    QUOTA_RESERVATION_TTL: int = 600  # Seconds before an uncommitted reservation is released
+    QUOTA_FLUSH_INTERVAL: float = 30.0  # Seconds between Firestore flushes of usage counters
+    QUOTA_FLUSH_BATCH_SIZE: int = 200  # Users per Firestore write batch (max 500)
+    
+    # Post-Generation Pipeline (per-stage timeouts, seconds)
+    PIPELINE_TIMEOUT_AI_ANALYSIS: float = 20.0  # Degrades to no AI suggestions
+    PIPELINE_TIMEOUT_FACT_CHECK: float = 45.0  # Degrades to an unchecked result
+    PIPELINE_TIMEOUT_SAVE: float = 15.0  # Required - generation + usage counters commit together or the request fails
+    
+    # Long-Form Blog (outline, then sections generated concurrently; opt-in - more calls, different output)
+    BLOG_LONG_FORM_ENABLED: bool = False
+    BLOG_LONG_FORM_MIN_WORDS: int = 2000  # Posts at or above this length use long-form mode
+    BLOG_LONG_FORM_INTRO_WORDS: int = 180
+    BLOG_LONG_FORM_CONCLUSION_WORDS: int = 130
     
     # Cost Tracking Configuration
     ENABLE_COST_TRACKING: bool = True  # Track AI generation costs
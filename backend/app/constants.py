@@ -21,6 +21,12 @@ class SubscriptionPlan:
     PRO = "pro"
     ENTERPRISE = "enterprise"
 
+    @staticmethod
+    def of(user: dict) -> str:
+        """Plan of a user document (stored at subscription.plan; defaults to free)"""
+        plan = (user.get("subscription") or {}).get("plan") or user.get("subscriptionPlan")
+        return plan or SubscriptionPlan.FREE
+
 class SubscriptionStatus:
     """Subscription status values"""
     ACTIVE = "active"
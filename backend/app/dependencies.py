@@ -2,18 +2,21 @@
 Shared Dependencies
 Dependency injection for FastAPI endpoints
 """
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional, Annotated
 import jwt
 
 from app.config import settings
+from app.constants import SubscriptionPlan
 from app.services.firebase_service import FirebaseService
 from app.services.auth_service import AuthService
 from app.services.openai_service import OpenAIService
 from app.services.humanization_service import HumanizationService
 from app.services.stripe_service import StripeService
 from app.services.video_generation_service import VideoGenerationService
+from app.services.llm_scheduler import llm_scheduler
+from app.services.rate_limiter import rate_limiter
 
 # Singleton instances
 _firebase_service: Optional[FirebaseService] = None
@@ -136,8 +139,9 @@ async def get_current_user(
                 detail="Invalid authentication credentials"
             )
         
-        # Fetch full user from database (includes REAL stats)
-        logger.info(f"📥 Fetching user from database: {user_id}")
+        # Full user document (includes REAL stats) - served from the user cache
+        # for up to USER_CACHE_TTL seconds, invalidated on every user write
+        logger.info(f"📥 Loading user: {user_id}")
         user = await firebase_service.get_user(user_id)
         if not user:
             logger.error(f"❌ User not found in database: {user_id}")
@@ -148,6 +152,9 @@ async def get_current_user(
         
         logger.info(f"✅ User authenticated: uid={user.get('uid')}, email={user.get('email')}")
         
+        # Attribute this request's model calls to the user for fair scheduling
+        llm_scheduler.bind_caller(user.get('uid') or user_id, SubscriptionPlan.of(user))
+        
         return user
     
     except jwt.ExpiredSignatureError as e:
@@ -172,6 +179,34 @@ async def get_current_user(
             detail=f"Authentication error: {str(e)}"
         )
 
+async def enforce_rate_limit(
+    response: Response,
+    current_user: dict = Depends(get_current_user)
+) -> None:
+    """
+    Per-user sliding-window rate limit (hourly + daily, by subscription tier)
+    Used as a route dependency on endpoints that spend AI credits
+    
+    Adds X-RateLimit-* headers to the response; rejected requests get
+    429 with Retry-After. Disabled with RATE_LIMIT_ENABLED=false.
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    
+    decision = await rate_limiter.hit(current_user['uid'], SubscriptionPlan.of(current_user))
+    headers = decision.headers()
+    if not decision.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail={
+                "error": "rate_limit_exceeded",
+                "message": f"Too many requests. Try again in {decision.retry_after} seconds or upgrade your plan.",
+                "retry_after": decision.retry_after
+            },
+            headers=headers
+        )
+    response.headers.update(headers)
+
 async def get_optional_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))
 ) -> Optional[dict]:
@@ -14,6 +14,14 @@ import logging
 from app.config import settings
 from app.middleware.logging import setup_logging
 from app.utils.redis_client import redis_client
+from app.utils.cache_manager import cache_manager
+from app.services.llm_client import llm_client
+from app.services.client_registry import client_registry
+from app.services.context_cache import context_cache
+from app.services.openai_service import openai_service
+from app.services.batch_jobs import batch_jobs
+from app.services.quota_ledger import quota_ledger
+from app.services.firebase_service import firebase_service
 from app.exceptions import AppException
 # from app.api import auth, generate, billing, user, api_keys
 
@@ -38,12 +46,31 @@ async def lifespan(app: FastAPI):
     # Initialize Redis
     await redis_client.connect()
     print(f"💾 Redis: {'✅ Connected' if redis_client.client else '⚠️ Firestore fallback'}")
+    cache_manager.start()
+    quota_ledger.start()
+    
+    # Warm up pooled AI clients (TLS handshakes happen here, not on the first request)
+    await client_registry.warm_up()
+    
+    # Share Gemini context caches across workers: adopt/create static prompts, keep them fresh
+    await openai_service.prewarm_context_caches()
+    context_cache.start()
+    
+    # Pick up batch jobs whose worker died mid-run
+    await batch_jobs.resume_pending()
     
     yield
     
     # Shutdown
     print("👋 Shutting down Summarly API...")
+    await batch_jobs.shutdown()
+    await quota_ledger.stop()
+    await context_cache.stop()
+    await cache_manager.stop()
     await redis_client.disconnect()
+    llm_client.shutdown()
+    await client_registry.aclose()
+    await firebase_service.aclose()
 
 # Initialize FastAPI app
 app = FastAPI(
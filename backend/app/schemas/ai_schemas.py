@@ -71,6 +71,31 @@ class BlogPostOutput(BaseModel):
     )
 
 
+class BlogOutlineSection(BaseModel):
+    """Planned blog section (long-form mode writes each one separately)"""
+    heading: str = Field(description="H2 heading for the section")
+    keyPoints: List[str] = Field(
+        description="2-4 points this section must cover (and no other section covers)"
+    )
+    targetWords: int = Field(description="Planned word count for this section")
+
+
+class BlogOutline(BaseModel):
+    """
+    Long-form blog plan: title, meta description and section headings
+    Sections are then generated concurrently and stitched into BlogPostOutput
+    """
+    title: str = Field(
+        description="SEO-optimized blog title with primary keyword (max 60 characters)"
+    )
+    metaDescription: str = Field(
+        description="SEO meta description, exactly 155-160 characters"
+    )
+    sections: List[BlogOutlineSection] = Field(
+        description="Main content sections in reading order"
+    )
+
+
 # ==================== EMAIL CAMPAIGN SCHEMAS ====================
 
 class EmailCampaignOutput(BaseModel):
@@ -152,6 +177,11 @@ def get_blog_post_schema():
     return BlogPostOutput.model_json_schema()
 
 
+def get_blog_outline_schema():
+    """Get long-form blog outline schema for Gemini"""
+    return BlogOutline.model_json_schema()
+
+
 def get_email_campaign_schema():
     """Get email campaign output schema for Gemini"""
     return EmailCampaignOutput.model_json_schema()
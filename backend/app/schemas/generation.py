@@ -428,6 +428,7 @@ class GenerationResponse(BaseModel):
     output: Optional[Dict[str, Any]] = Field(None, description="Structured output for video scripts (hook, script sections, etc)")
     generation_time: float
     model_used: str
+    pipeline_timings: Optional[Dict[str, Any]] = Field(None, description="Per-stage timings of the post-generation pipeline (ms)")
     exported_to: List[str] = Field(default_factory=list)
     is_favorite: bool = False
     created_at: datetime
@@ -598,3 +599,36 @@ class VideoStatusResponse(BaseModel):
                 "error_message": None
             }
         }
+
+# ==================== BATCH JOB SCHEMAS ====================
+
+class BatchJobResponse(BaseModel):
+    """Status and progress of a batch generation job"""
+    job_id: str = Field(..., description="Batch job ID")
+    content_type: str = Field(..., description="Content type of every item (product, ad, blog, ...)")
+    status: str = Field(..., description="Status: queued, running, completed, failed")
+    total: int = Field(..., description="Number of items in the job")
+    succeeded: int = 0
+    failed: int = 0
+    progress: float = Field(default=0.0, ge=0, le=100, description="Finished items in percent (0-100)")
+    results_url: str = Field(..., description="NDJSON stream of per-item results")
+    created_at: datetime
+    updated_at: datetime
+    completed_at: Optional[datetime] = None
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "job_id": "batch_3f9c2a",
+                "content_type": "product",
+                "status": "running",
+                "total": 250,
+                "succeeded": 120,
+                "failed": 2,
+                "progress": 48.8,
+                "results_url": "/api/v1/generate/batch/batch_3f9c2a/results",
+                "created_at": "2025-11-28T10:00:00Z",
+                "updated_at": "2025-11-28T10:04:10Z",
+                "completed_at": None
+            }
+        }
@@ -0,0 +1,332 @@
+"""
+Batch Jobs - Bulk generation (catalogs of products, ads, posts) as resumable jobs
+One request submits hundreds of items; results stream back as NDJSON
+
+WHY:
+    Generating a catalog meant thousands of sequential /generate/product calls,
+    each paying auth, the Firestore user fetch and a full round trip.
+
+HOW:
+    1. Submit   → items are validated up front and stored with the job record;
+                  the job runs in the background with BATCH_JOB_CONCURRENCY items
+                  in flight (the LLM scheduler still applies per-tier caps)
+    2. Checkpoint → every finished item is written to `batch:<id>:results`
+                  (index → NDJSON line) before the next counter update, so a
+                  crashed job resumes exactly where it stopped
+    3. Liveness → the running worker keeps `batch:<id>:lock` alive. On startup
+                  (lifespan) every worker scans `batch:active` and resumes jobs
+                  whose lock has expired
+    4. Results  → read back as NDJSON lines {"index", "status", "result"|"error"}
+    Without Redis jobs live in process memory (no resume after a restart).
+
+The item handler (content type + item → result dict) is registered by the
+generate router, so jobs reuse exactly the per-endpoint generation flow.
+
+Usage:
+    from app.services.batch_jobs import batch_jobs
+
+    job = await batch_jobs.create(current_user, "product", items)
+    batch_jobs.start(job["job_id"], current_user)
+    async for line in batch_jobs.stream_results(job["job_id"]): ...
+"""
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from datetime import datetime
+import asyncio
+import json
+import logging
+import uuid
+
+from app.config import settings
+from app.constants import SubscriptionPlan
+from app.utils.redis_client import redis_client
+from app.services.llm_scheduler import llm_scheduler
+
+logger = logging.getLogger(__name__)
+
+ItemHandler = Callable[[str, Dict[str, Any], Dict[str, Any]], Awaitable[Dict[str, Any]]]
+UserLoader = Callable[[str], Awaitable[Optional[Dict[str, Any]]]]
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+_ACTIVE_KEY = "batch:active"
+
+
+class BatchJobManager:
+    """
+    Creates, runs, checkpoints and resumes batch generation jobs
+    """
+
+    def __init__(self):
+        self._item_handler: Optional[ItemHandler] = None
+        self._user_loader: Optional[UserLoader] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # In-process storage when Redis is unavailable
+        self._local_jobs: Dict[str, Dict[str, Any]] = {}
+        self._local_items: Dict[str, List[Dict[str, Any]]] = {}
+        self._local_results: Dict[str, Dict[str, str]] = {}
+
+    def register(self, item_handler: ItemHandler, user_loader: UserLoader):
+        """
+        Wire in the generation flow
+
+        Args:
+            item_handler: async (content_type, item, current_user) -> JSON-serializable result
+            user_loader: async (user_id) -> user document (used when resuming after a crash)
+        """
+        self._item_handler = item_handler
+        self._user_loader = user_loader
+
+    # ==================== STORAGE ====================
+
+    @property
+    def _shared(self) -> bool:
+        return redis_client.client is not None
+
+    async def _save_job(self, job: Dict[str, Any]):
+        job["updated_at"] = datetime.utcnow().isoformat()
+        record = {key: value for key, value in job.items() if key != "progress"}
+        if self._shared:
+            await redis_client.set(f"batch:{job['job_id']}", json.dumps(record), ex=settings.BATCH_JOB_TTL)
+        else:
+            self._local_jobs[job["job_id"]] = record
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Job record with progress
+
+        Returns:
+            dict with status, total, succeeded, failed, progress (0-100) or None
+        """
+        if self._shared:
+            raw = await redis_client.get(f"batch:{job_id}")
+            job = json.loads(raw) if raw else None
+        else:
+            job = self._local_jobs.get(job_id)
+        if job is None:
+            return None
+        done = job["succeeded"] + job["failed"]
+        return {**job, "progress": round(done / job["total"] * 100, 1) if job["total"] else 100.0}
+
+    async def _load_items(self, job_id: str) -> List[Dict[str, Any]]:
+        if self._shared:
+            raw = await redis_client.get(f"batch:{job_id}:items")
+            return json.loads(raw) if raw else []
+        return self._local_items.get(job_id, [])
+
+    async def _load_results(self, job_id: str) -> Dict[int, str]:
+        if self._shared:
+            raw = await redis_client.hgetall(f"batch:{job_id}:results")
+        else:
+            raw = self._local_results.get(job_id, {})
+        return {int(index): line for index, line in raw.items()}
+
+    async def _checkpoint(self, job_id: str, index: int, line: str):
+        if self._shared:
+            await redis_client.hset(f"batch:{job_id}:results", str(index), line)
+            await redis_client.expire(f"batch:{job_id}:results", settings.BATCH_JOB_TTL)
+        else:
+            self._local_results.setdefault(job_id, {})[str(index)] = line
+
+    # ==================== LIFECYCLE ====================
+
+    async def create(self, current_user: Dict[str, Any], content_type: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Store a new job (validated items) in the queued state
+
+        Args:
+            current_user: Authenticated user
+            content_type: Generation type (product, ad, blog, ...)
+            items: Request payloads, one per item
+
+        Returns:
+            The job record
+        """
+        job_id = f"batch_{uuid.uuid4().hex}"
+        now = datetime.utcnow().isoformat()
+        job = {
+            "job_id": job_id,
+            "user_id": current_user["uid"],
+            "content_type": content_type,
+            "status": "queued",
+            "total": len(items),
+            "succeeded": 0,
+            "failed": 0,
+            "created_at": now,
+            "updated_at": now,
+            "completed_at": None
+        }
+        if self._shared:
+            await redis_client.set(f"batch:{job_id}:items", json.dumps(items), ex=settings.BATCH_JOB_TTL)
+            await redis_client.sadd(_ACTIVE_KEY, job_id)
+        else:
+            self._local_items[job_id] = items
+        await self._save_job(job)
+        logger.info(f"📦 Batch job {job_id} created: {len(items)} {content_type} items for user {job['user_id']}")
+        return job
+
+    def start(self, job_id: str, current_user: Dict[str, Any]) -> Optional[asyncio.Task]:
+        """
+        Run the job in the background (no-op if this worker already runs it)
+
+        Returns:
+            The background task
+        """
+        task = self._tasks.get(job_id)
+        if task is None or task.done():
+            task = asyncio.create_task(self._run(job_id, current_user))
+            self._tasks[job_id] = task
+            task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+        return task
+
+    async def _run(self, job_id: str, current_user: Dict[str, Any]):
+        lock_key = f"batch:{job_id}:lock"
+        if self._shared:
+            # resume_pending may have taken the lock already; otherwise take it now
+            await redis_client.set(lock_key, "1", ex=settings.BATCH_JOB_LOCK_TTL, nx=True)
+        heartbeat = asyncio.create_task(self._heartbeat(lock_key)) if self._shared else None
+
+        try:
+            job = await self.get(job_id)
+            items = await self._load_items(job_id)
+            finished = await self._load_results(job_id)
+            if job is None or self._item_handler is None:
+                logger.error(f"❌ Batch job {job_id} cannot run (missing record or handler)")
+                return
+
+            job["status"] = "running"
+            job["succeeded"] = sum(1 for line in finished.values() if json.loads(line)["status"] == "succeeded")
+            job["failed"] = len(finished) - job["succeeded"]
+            await self._save_job(job)
+            if finished:
+                logger.info(f"🔁 Resuming batch job {job_id}: {len(finished)}/{job['total']} items already done")
+
+            semaphore = asyncio.Semaphore(settings.BATCH_JOB_CONCURRENCY)
+
+            async def run_item(index: int, item: Dict[str, Any]):
+                # Each item is one request against the job owner's fair share and per-user cap
+                llm_scheduler.bind_caller(current_user["uid"], SubscriptionPlan.of(current_user))
+                async with semaphore:
+                    line = await self._generate_item(job["content_type"], index, item, current_user)
+                await self._checkpoint(job_id, index, json.dumps(line))
+                job["succeeded" if line["status"] == "succeeded" else "failed"] += 1
+                await self._save_job(job)
+
+            await asyncio.gather(*(
+                run_item(index, item)
+                for index, item in enumerate(items)
+                if index not in finished
+            ))
+
+            job["status"] = "completed" if job["succeeded"] or not job["total"] else "failed"
+            job["completed_at"] = datetime.utcnow().isoformat()
+            await self._save_job(job)
+            await redis_client.srem(_ACTIVE_KEY, job_id)
+            logger.info(f"✅ Batch job {job_id} {job['status']}: {job['succeeded']} succeeded, {job['failed']} failed")
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+                await redis_client.delete(lock_key)
+
+    async def _generate_item(
+        self,
+        content_type: str,
+        index: int,
+        item: Dict[str, Any],
+        current_user: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """One item → one NDJSON line (failures are recorded, never raised)"""
+        try:
+            result = await self._item_handler(content_type, item, current_user)
+            return {"index": index, "status": "succeeded", "result": result}
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = getattr(e, "detail", None) or {"error": "generation_failed", "message": str(e)}
+            if not isinstance(error, dict):
+                error = {"error": "generation_failed", "message": str(error)}
+            logger.warning(f"⚠️ Batch item {index} ({content_type}) failed: {error.get('message')}")
+            return {"index": index, "status": "failed", "error": error}
+
+    async def _heartbeat(self, lock_key: str):
+        """Keep the job lock alive while this worker runs the job"""
+        while True:
+            await asyncio.sleep(settings.BATCH_JOB_LOCK_TTL / 3)
+            await redis_client.expire(lock_key, settings.BATCH_JOB_LOCK_TTL)
+
+    async def resume_pending(self) -> int:
+        """
+        Resume jobs whose worker died (lifespan startup)
+
+        Returns:
+            Number of jobs resumed by this worker
+        """
+        if not self._shared or self._user_loader is None:
+            return 0
+
+        resumed = 0
+        for job_id in await redis_client.smembers(_ACTIVE_KEY):
+            job = await self.get(job_id)
+            if job is None or job["status"] in TERMINAL_STATUSES:
+                await redis_client.srem(_ACTIVE_KEY, job_id)
+                continue
+            # Lock still alive → another worker is running it
+            if not await redis_client.set(f"batch:{job_id}:lock", "1", ex=settings.BATCH_JOB_LOCK_TTL, nx=True):
+                continue
+            try:
+                user = await self._user_loader(job["user_id"])
+            except Exception as e:
+                logger.error(f"❌ Cannot resume batch job {job_id}: {e}")
+                await redis_client.delete(f"batch:{job_id}:lock")
+                continue
+            if user is None:
+                job["status"] = "failed"
+                await self._save_job(job)
+                await redis_client.srem(_ACTIVE_KEY, job_id)
+                await redis_client.delete(f"batch:{job_id}:lock")
+                continue
+            self.start(job_id, user)
+            resumed += 1
+
+        if resumed:
+            logger.info(f"🔁 Resumed {resumed} interrupted batch job(s)")
+        return resumed
+
+    async def shutdown(self):
+        """
+        Stop running jobs (lifespan shutdown). Their locks are released, so the
+        next worker to start resumes them from the last checkpoint.
+        """
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ==================== RESULTS ====================
+
+    async def stream_results(self, job_id: str, follow: bool = True) -> AsyncIterator[str]:
+        """
+        NDJSON lines as items finish
+
+        Args:
+            job_id: Job ID
+            follow: Keep streaming until the job finishes (False: only what's done now)
+
+        Yields:
+            One JSON line (newline-terminated) per item
+        """
+        sent = set()
+        while True:
+            # Status first: once it is terminal, the results read below are complete
+            job = await self.get(job_id)
+            results = await self._load_results(job_id)
+            for index in sorted(results):
+                if index not in sent:
+                    sent.add(index)
+                    yield results[index] + "\n"
+            if not follow or job is None or job["status"] in TERMINAL_STATUSES:
+                return
+            await asyncio.sleep(settings.BATCH_STREAM_POLL_INTERVAL)
+
+
+# Global batch job manager
+batch_jobs = BatchJobManager()
@@ -0,0 +1,288 @@
+"""
+Circuit Breaker - Health-aware routing for text model providers
+Stops every request from re-discovering that Gemini is down
+
+WHY:
+    Without a breaker each request in `_generate_with_ai` tries Gemini, waits for
+    the error or timeout, and only then falls back to GPT-4o-mini. During an
+    outage every user pays that penalty.
+
+STATES (one breaker per provider + model):
+    CLOSED     → requests go to the model; failures are counted
+    OPEN       → tripped after CIRCUIT_BREAKER_FAILURE_THRESHOLD consecutive failures
+                 or CIRCUIT_BREAKER_ERROR_RATE over the rolling window;
+                 requests go straight to FALLBACK_TEXT_MODEL
+    HALF_OPEN  → after CIRCUIT_BREAKER_OPEN_SECONDS a single probe request is let
+                 through; success closes the circuit, failure re-opens it
+
+SHARED STATE:
+    Open circuits are written to Redis (`circuit:<provider>:<model>`) and read back
+    at most every CIRCUIT_BREAKER_SYNC_INTERVAL seconds, so one worker tripping
+    protects all workers. The half-open probe is claimed with SET NX so only one
+    worker probes. Without Redis each worker keeps its own state.
+
+Usage:
+    from app.services.circuit_breaker import circuit_breakers
+
+    breaker = circuit_breakers.get("gemini", model_name)
+    if await breaker.allow_request():
+        result = await breaker.guard(call_primary)()
+"""
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+from collections import deque
+import json
+import logging
+import os
+import time
+
+from app.config import settings
+from app.utils.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one provider/model pair
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, provider: str, model: str):
+        self.provider = provider
+        self.model = model
+        self.key = f"circuit:{provider}:{model}"
+        self.probe_key = f"{self.key}:probe"
+
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.consecutive_failures = 0
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._shared = False  # Current open state is mirrored in Redis
+        self._last_sync = 0.0
+        self.stats: Dict[str, int] = {
+            "successes": 0,
+            "failures": 0,
+            "short_circuited": 0,
+            "opened": 0,
+            "probes": 0
+        }
+
+    # ==================== ROUTING ====================
+
+    async def allow_request(self) -> bool:
+        """
+        Should this request try the model?
+
+        Returns:
+            True when closed, or when this request is the half-open probe
+        """
+        if not settings.CIRCUIT_BREAKER_ENABLED:
+            return True
+
+        await self._sync_from_redis()
+
+        if self.state == self.CLOSED:
+            return True
+
+        if self.state == self.OPEN and time.time() - self.opened_at >= settings.CIRCUIT_BREAKER_OPEN_SECONDS:
+            if await self._acquire_probe():
+                self.state = self.HALF_OPEN
+                self.stats["probes"] += 1
+                logger.info(f"🔍 Circuit {self.key} half-open - probing recovery")
+                return True
+
+        self.stats["short_circuited"] += 1
+        return False
+
+    def guard(self, call: Callable[[], Awaitable[Optional[Dict[str, Any]]]]) -> Callable[[], Awaitable[Optional[Dict[str, Any]]]]:
+        """
+        Wrap a primary-model coroutine factory so its outcome feeds the breaker
+
+        The wrapped call follows the hedging contract: None means the provider
+        failed in a way that warrants fallback (counted as a failure). Raised
+        errors are request problems (bad input, policy) and aren't counted.
+        """
+        async def guarded() -> Optional[Dict[str, Any]]:
+            try:
+                result = await call()
+            except BaseException:
+                # Cancelled (lost a hedge race) or request error: proves nothing about health
+                await self._release_probe()
+                raise
+
+            if result is None:
+                await self.record_failure()
+            else:
+                await self.record_success()
+            return result
+
+        return guarded
+
+    # ==================== OUTCOMES ====================
+
+    async def record_success(self):
+        """Count a successful call; a successful probe closes the circuit"""
+        now = time.time()
+        self.stats["successes"] += 1
+        self.consecutive_failures = 0
+        self._add_outcome(now, True)
+
+        if self.state == self.HALF_OPEN:
+            await self._close()
+
+    async def record_failure(self):
+        """Count a provider failure; trips the circuit past the thresholds"""
+        now = time.time()
+        self.stats["failures"] += 1
+        self.consecutive_failures += 1
+        self._add_outcome(now, False)
+
+        if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self._should_trip()):
+            await self._open(now)
+
+    def _add_outcome(self, now: float, ok: bool):
+        self._outcomes.append((now, ok))
+        horizon = now - settings.CIRCUIT_BREAKER_WINDOW_SECONDS
+        while self._outcomes and self._outcomes[0][0] < horizon:
+            self._outcomes.popleft()
+
+    def error_rate(self) -> float:
+        """Failure ratio over the rolling window (0-1)"""
+        if not self._outcomes:
+            return 0.0
+        failures = sum(1 for _, ok in self._outcomes if not ok)
+        return failures / len(self._outcomes)
+
+    def _should_trip(self) -> bool:
+        if self.consecutive_failures >= settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD:
+            return True
+        return (
+            len(self._outcomes) >= settings.CIRCUIT_BREAKER_MIN_REQUESTS
+            and self.error_rate() >= settings.CIRCUIT_BREAKER_ERROR_RATE
+        )
+
+    # ==================== TRANSITIONS ====================
+
+    async def _open(self, now: float):
+        self.state = self.OPEN
+        self.opened_at = now
+        self.stats["opened"] += 1
+        logger.warning(
+            f"🔴 Circuit {self.key} OPEN ({self.consecutive_failures} consecutive failures, "
+            f"{self.error_rate():.0%} error rate) - routing to {settings.FALLBACK_TEXT_MODEL}"
+        )
+
+        payload = json.dumps({"state": self.OPEN, "opened_at": now, "worker": os.getpid()})
+        self._shared = await redis_client.set(
+            self.key, payload, ex=settings.CIRCUIT_BREAKER_OPEN_SECONDS * 10
+        )
+        await redis_client.delete(self.probe_key)
+
+    async def _close(self):
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._outcomes.clear()
+        self._shared = False
+        logger.info(f"🟢 Circuit {self.key} CLOSED - {self.provider} recovered")
+
+        await redis_client.delete(self.key)
+        await redis_client.delete(self.probe_key)
+
+    async def _acquire_probe(self) -> bool:
+        """Claim the single half-open probe (across workers when Redis is up)"""
+        if redis_client.client is None:
+            return True
+        return await redis_client.set(
+            self.probe_key, str(os.getpid()), ex=int(settings.LLM_HTTP_TIMEOUT), nx=True
+        )
+
+    async def _release_probe(self):
+        """An unfinished probe hands the circuit back to OPEN so another request can probe"""
+        if self.state != self.HALF_OPEN:
+            return
+        self.state = self.OPEN
+        await redis_client.delete(self.probe_key)
+
+    async def _sync_from_redis(self):
+        """Adopt circuits opened or closed by other workers (rate-limited)"""
+        if redis_client.client is None:
+            return
+        now = time.time()
+        if now - self._last_sync < settings.CIRCUIT_BREAKER_SYNC_INTERVAL:
+            return
+        self._last_sync = now
+
+        raw = await redis_client.get(self.key)
+        if raw:
+            try:
+                remote = json.loads(raw)
+            except (TypeError, ValueError):
+                return
+            if self.state == self.CLOSED or (self.state == self.OPEN and remote.get("opened_at", 0) > self.opened_at):
+                if self.state == self.CLOSED:
+                    logger.warning(f"🔴 Circuit {self.key} opened by worker {remote.get('worker')}")
+                self.state = self.OPEN
+                self.opened_at = remote.get("opened_at", now)
+                self._shared = True
+        elif self.state == self.OPEN and self._shared:
+            # Another worker's probe succeeded and cleared the key
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._outcomes.clear()
+            self._shared = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """State and counters for analytics"""
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "error_rate": round(self.error_rate() * 100, 2),
+            "window_requests": len(self._outcomes),
+            "opened_at": self.opened_at or None,
+            "shared": self._shared,
+            **self.stats
+        }
+
+
+class CircuitBreakerRegistry:
+    """
+    One breaker per provider/model (singleton pattern)
+    """
+    _instance: Optional['CircuitBreakerRegistry'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._breakers = {}
+        return cls._instance
+
+    def get(self, provider: str, model: str) -> CircuitBreaker:
+        """Breaker for a provider/model pair (created on first use)"""
+        key = f"{provider}:{model}"
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(provider, model)
+            self._breakers[key] = breaker
+        return breaker
+
+    def reset(self):
+        """Forget all breakers (tests)"""
+        self._breakers.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """All breakers, keyed by provider:model"""
+        breakers = {key: breaker.get_stats() for key, breaker in self._breakers.items()}
+        return {
+            "enabled": settings.CIRCUIT_BREAKER_ENABLED,
+            "shared_via_redis": redis_client.client is not None,
+            "open": [key for key, stats in breakers.items() if stats["state"] != CircuitBreaker.CLOSED],
+            "breakers": breakers
+        }
+
+
+# Singleton instance
+circuit_breakers = CircuitBreakerRegistry()
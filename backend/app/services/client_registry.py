@@ -0,0 +1,256 @@
+"""
+Client Registry - Long-lived, pooled AI provider clients
+One process-wide set of Gemini/OpenAI clients instead of one per request
+
+WHY:
+    Building `google.genai.Client(...)` or `AsyncOpenAI(...)` per generation throws
+    away the TLS session and HTTP keep-alive connections every time, so every
+    request pays a fresh TCP + TLS handshake to the provider.
+
+WHAT IS POOLED:
+    - google.genai.Client (new SDK)         → one client, shared httpx connection pool
+    - AsyncOpenAI (fallback)                → one client, shared httpx connection pool
+    - GenerativeModel (old SDK)             → keyed by model name
+    - GenerativeModel.from_cached_content   → keyed by cached-content handle name
+
+METRICS:
+    `get_stats()` reports clients created vs reused and HTTP connections
+    opened vs reused (via httpcore trace events), so the saved handshake
+    latency is visible under load at /analytics/llm/clients.
+
+Usage:
+    from app.services.client_registry import client_registry
+
+    client = client_registry.get_genai_client()
+    model = client_registry.get_generative_model(settings.PRIMARY_TEXT_MODEL)
+"""
+from typing import Dict, Any, Optional
+import logging
+import time
+
+import httpx
+import google.generativeai as genai
+from google import genai as new_genai
+from google.genai import types as genai_types
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """
+    httpx transport that records whether each request opened a new TCP connection
+    or reused a pooled keep-alive connection
+    """
+
+    def __init__(self, registry: 'ClientRegistry', provider: str, **kwargs):
+        super().__init__(**kwargs)
+        self._registry = registry
+        self._provider = provider
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        opened = False
+        upstream_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: Dict[str, Any]):
+            nonlocal opened
+            if event_name == "connection.connect_tcp.started":
+                opened = True
+            if upstream_trace is not None:
+                await upstream_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        response = await super().handle_async_request(request)
+        self._registry.record_connection(self._provider, opened)
+        return response
+
+
+class ClientRegistry:
+    """
+    Process-wide registry of AI provider clients (singleton pattern)
+    """
+    _instance: Optional['ClientRegistry'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._setup()
+        return cls._instance
+
+    def _setup(self):
+        """Initialize empty registry (runs once per process)"""
+        self._genai_client: Optional[Any] = None
+        self._genai_http: Optional[httpx.AsyncClient] = None
+        self._openai_client: Optional[AsyncOpenAI] = None
+        self._models: Dict[str, Any] = {}
+        self._cached_models: Dict[str, Any] = {}
+        self._gemini_configured = False
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Zero all counters"""
+        self.stats: Dict[str, Dict[str, Dict[str, int]]] = {
+            "clients": {
+                kind: {"created": 0, "reused": 0}
+                for kind in ("genai_client", "openai_client", "generative_model", "cached_model")
+            },
+            "connections": {
+                provider: {"created": 0, "reused": 0}
+                for provider in ("gemini", "openai")
+            }
+        }
+
+    # ==================== POOL CONFIGURATION ====================
+
+    def _build_transport(self, provider: str) -> _InstrumentedTransport:
+        """Connection pool shared by every request to one provider"""
+        return _InstrumentedTransport(
+            registry=self,
+            provider=provider,
+            limits=httpx.Limits(
+                max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY
+            )
+        )
+
+    def _count(self, kind: str, created: bool):
+        self.stats["clients"][kind]["created" if created else "reused"] += 1
+
+    def record_connection(self, provider: str, opened: bool):
+        """Record one HTTP request against a new or reused pooled connection"""
+        counters = self.stats["connections"].setdefault(provider, {"created": 0, "reused": 0})
+        counters["created" if opened else "reused"] += 1
+
+    # ==================== CLIENT ACCESSORS ====================
+
+    def get_genai_client(self) -> Any:
+        """Shared google.genai.Client (new SDK) with a pooled async HTTP client"""
+        if self._genai_client is not None:
+            self._count("genai_client", created=False)
+            return self._genai_client
+
+        http_client = httpx.AsyncClient(
+            transport=self._build_transport("gemini"),
+            timeout=settings.LLM_HTTP_TIMEOUT
+        )
+        self._genai_client = new_genai.Client(
+            api_key=settings.GEMINI_API_KEY,
+            http_options=genai_types.HttpOptions(httpx_async_client=http_client)
+        )
+        self._genai_http = http_client
+        self._count("genai_client", created=True)
+        logger.info("🔌 Created pooled google.genai client")
+        return self._genai_client
+
+    def get_openai_client(self) -> AsyncOpenAI:
+        """Shared AsyncOpenAI client (fallback provider) with a pooled HTTP client"""
+        if self._openai_client is not None:
+            self._count("openai_client", created=False)
+            return self._openai_client
+
+        self._openai_client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=DefaultAsyncHttpxClient(transport=self._build_transport("openai"))
+        )
+        self._count("openai_client", created=True)
+        logger.info("🔌 Created pooled AsyncOpenAI client")
+        return self._openai_client
+
+    def _ensure_gemini_configured(self):
+        if not self._gemini_configured:
+            genai.configure(api_key=settings.GEMINI_API_KEY)
+            self._gemini_configured = True
+
+    def get_generative_model(self, model_name: str) -> Any:
+        """GenerativeModel (old SDK) keyed by model name"""
+        model = self._models.get(model_name)
+        if model is not None:
+            self._count("generative_model", created=False)
+            return model
+
+        self._ensure_gemini_configured()
+        model = genai.GenerativeModel(model_name)
+        self._models[model_name] = model
+        self._count("generative_model", created=True)
+        return model
+
+    def get_cached_model(self, cached_content: Any) -> Any:
+        """GenerativeModel bound to a Gemini CachedContent handle, keyed by handle name"""
+        handle = getattr(cached_content, "name", None) or str(id(cached_content))
+        model = self._cached_models.get(handle)
+        if model is not None:
+            self._count("cached_model", created=False)
+            return model
+
+        self._ensure_gemini_configured()
+        model = genai.GenerativeModel.from_cached_content(cached_content)
+        self._cached_models[handle] = model
+        self._count("cached_model", created=True)
+        return model
+
+    def evict_cached_model(self, cached_content: Any):
+        """Drop a cached-content model (e.g. after the handle expired)"""
+        handle = getattr(cached_content, "name", None) or str(id(cached_content))
+        self._cached_models.pop(handle, None)
+
+    # ==================== LIFECYCLE ====================
+
+    async def warm_up(self):
+        """
+        Create clients and open provider connections at startup (lifespan)
+        so the first user request doesn't pay the TCP/TLS handshake
+        """
+        if not settings.LLM_WARMUP_ON_STARTUP:
+            return
+
+        start_time = time.time()
+        self.get_generative_model(settings.PRIMARY_TEXT_MODEL)
+        self.get_generative_model(settings.PREMIUM_TEXT_MODEL)
+        openai_client = self.get_openai_client()
+
+        # Cheap metadata calls establish keep-alive connections in the pools
+        if settings.GEMINI_API_KEY:
+            try:
+                await self.get_genai_client().aio.models.get(model=settings.PRIMARY_TEXT_MODEL)
+            except Exception as e:
+                logger.warning(f"⚠️ Gemini warm-up request failed: {e}")
+        if settings.OPENAI_API_KEY:
+            try:
+                await openai_client.models.retrieve(settings.FALLBACK_TEXT_MODEL)
+            except Exception as e:
+                logger.warning(f"⚠️ OpenAI warm-up request failed: {e}")
+
+        logger.info(f"🔥 AI clients warmed up in {time.time() - start_time:.2f}s")
+
+    async def aclose(self):
+        """Close pooled HTTP connections (lifespan shutdown)"""
+        if self._genai_http is not None:
+            await self._genai_http.aclose()
+        if self._openai_client is not None:
+            await self._openai_client.close()
+        self._setup()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Clients and connections created vs reused"""
+        connections = self.stats["connections"]
+        total_created = sum(c["created"] for c in connections.values())
+        total_reused = sum(c["reused"] for c in connections.values())
+        total = total_created + total_reused
+
+        return {
+            "clients": self.stats["clients"],
+            "connections": connections,
+            "connection_reuse_rate": round(total_reused / total * 100, 2) if total > 0 else 0,
+            "pool": {
+                "max_connections": settings.LLM_HTTP_MAX_CONNECTIONS,
+                "max_keepalive_connections": settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                "keepalive_expiry": settings.LLM_HTTP_KEEPALIVE_EXPIRY
+            }
+        }
+
+
+# Singleton instance
+client_registry = ClientRegistry()
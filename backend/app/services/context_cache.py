@@ -0,0 +1,312 @@
+"""
+Context Cache Registry - Gemini CachedContent handles shared across workers
+One cached system prompt per (content type, model, prompt) for the whole deployment
+
+WHY:
+    Cached system prompts get the 90% cached-token discount, but the handles
+    used to live in a per-process dict. Every uvicorn worker and every Cloud Run
+    cold start created (and paid storage for) its own copy, and requests ran at
+    full price until that worker's cache existed.
+
+HOW:
+    1. Registry  → `gemini_cache:<content_type>:<model>:<prompt hash>` in Redis
+                   holds {name, expire_at}; workers rehydrate the handle with
+                   CachedContent.get instead of creating a new one
+    2. Creation  → guarded by a SET NX lock so one worker creates a given cache;
+                   contenders use the uncached prompt until it exists. Failed
+                   creations (e.g. prompt below the caching minimum) are not
+                   retried for CONTEXT_CACHE_RETRY_AFTER seconds
+    3. Refresh   → a background task extends the TTL of handles that are within
+                   CONTEXT_CACHE_REFRESH_MARGIN of CACHE_TTL_SYSTEM_PROMPTS expiry
+    4. Prewarm   → static system prompts are created during lifespan startup
+    CachedContent get/create/update are blocking SDK calls and run on the
+    bounded LLM executor (llm_client.run_sync), like the generation calls.
+    Without Redis the registry still works per process (previous behaviour).
+
+Usage:
+    from app.services.context_cache import context_cache
+
+    cached = await context_cache.get("product", system_prompt, settings.PRIMARY_TEXT_MODEL)
+"""
+from typing import Any, Dict, Iterable, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+
+import google.generativeai as genai
+
+from app.config import settings
+from app.utils.redis_client import redis_client
+from app.services.client_registry import client_registry
+from app.services.llm_client import llm_client
+
+logger = logging.getLogger(__name__)
+
+# Never hand out a handle that could expire during the model call
+_MIN_REMAINING_SECONDS = 60
+
+
+class ContextCacheRegistry:
+    """
+    Process-local handles backed by a Redis registry of cached-content names
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._failed: Dict[str, float] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.worker_id = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Zero counters"""
+        self.stats: Dict[str, int] = {
+            "local_hits": 0,
+            "shared_hits": 0,
+            "created": 0,
+            "refreshed": 0,
+            "lock_contended": 0,
+            "failures": 0
+        }
+
+    @staticmethod
+    def cache_key(content_type: str, model_name: str, system_prompt: str) -> str:
+        """Registry key: content type, model and a hash of the system prompt"""
+        prompt_hash = hashlib.sha256(system_prompt.encode()).hexdigest()[:16]
+        return f"{content_type}:{model_name}:{prompt_hash}"
+
+    @staticmethod
+    def _expire_at(handle: Any) -> float:
+        """Expiry reported by the API, else now + CACHE_TTL_SYSTEM_PROMPTS"""
+        expire_time = getattr(handle, "expire_time", None)
+        if hasattr(expire_time, "timestamp"):
+            return expire_time.timestamp()
+        return time.time() + settings.CACHE_TTL_SYSTEM_PROMPTS
+
+    def _usable(self, entry: Optional[Dict[str, Any]]) -> bool:
+        return entry is not None and entry["expire_at"] - time.time() > _MIN_REMAINING_SECONDS
+
+    # ==================== LOOKUP ====================
+
+    async def get(self, content_type: str, system_prompt: str, model_name: str) -> Optional[Any]:
+        """
+        Get the cached-content handle for a system prompt, creating it if needed
+
+        Args:
+            content_type: Type of content (blog, social, etc.)
+            system_prompt: System prompt to cache
+            model_name: Gemini model the cache is bound to
+
+        Returns:
+            CachedContent handle or None (caller sends the full prompt instead)
+        """
+        key = self.cache_key(content_type, model_name, system_prompt)
+        entry = self._entries.get(key)
+        if self._usable(entry):
+            self.stats["local_hits"] += 1
+            return entry["handle"]
+
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            entry = self._entries.get(key)
+            if self._usable(entry):
+                self.stats["local_hits"] += 1
+                return entry["handle"]
+
+            handle = await self._load_shared(key, content_type, model_name)
+            if handle is not None:
+                self.stats["shared_hits"] += 1
+                return handle
+
+            if time.time() - self._failed.get(key, 0) < settings.CONTEXT_CACHE_RETRY_AFTER:
+                return None
+            return await self._create(key, content_type, system_prompt, model_name)
+
+    async def _load_shared(self, key: str, content_type: str, model_name: str) -> Optional[Any]:
+        """Rehydrate a handle another worker (or a previous process) created"""
+        raw = await redis_client.get(f"gemini_cache:{key}")
+        if not raw:
+            return None
+        try:
+            record = json.loads(raw)
+            if record["expire_at"] - time.time() <= _MIN_REMAINING_SECONDS:
+                return None
+            handle = await llm_client.run_sync(genai.caching.CachedContent.get, record["name"])
+        except Exception as e:
+            # Deleted or expired server-side: forget it so it gets recreated
+            logger.warning(f"⚠️ Shared Gemini cache for {key} is gone ({e}) - recreating")
+            await redis_client.delete(f"gemini_cache:{key}")
+            return None
+
+        self._remember(key, handle, record["expire_at"], content_type, model_name)
+        logger.debug(f"💾 Reusing shared Gemini cached prompt for {content_type} ({model_name})")
+        return handle
+
+    async def _create(self, key: str, content_type: str, system_prompt: str, model_name: str) -> Optional[Any]:
+        """Create the cache (one worker at a time) and publish it to the registry"""
+        lock_key = f"gemini_cache:{key}:lock"
+        shared = redis_client.client is not None
+        if shared and not await redis_client.set(lock_key, self.worker_id, ex=settings.CONTEXT_CACHE_LOCK_TTL, nx=True):
+            # Another worker is creating it right now
+            self.stats["lock_contended"] += 1
+            return None
+
+        try:
+            handle = await llm_client.run_sync(
+                genai.caching.CachedContent.create,
+                model=model_name,
+                contents=[{
+                    'role': 'user',
+                    'parts': [{'text': system_prompt}]
+                }],
+                ttl=settings.CACHE_TTL_SYSTEM_PROMPTS,
+                display_name=f"{content_type}_system_prompt"
+            )
+        except Exception as e:
+            self.stats["failures"] += 1
+            self._failed[key] = time.time()
+            logger.warning(f"⚠️ Failed to create Gemini cache for {content_type} ({model_name}): {e}")
+            return None
+        finally:
+            if shared and await redis_client.get(lock_key) == self.worker_id:
+                await redis_client.delete(lock_key)
+
+        expire_at = self._expire_at(handle)
+        self._remember(key, handle, expire_at, content_type, model_name)
+        await self._publish(key, handle, expire_at)
+        self.stats["created"] += 1
+        logger.info(f"✅ Created Gemini cached prompt for {content_type} ({model_name}, 90% discount until expiry)")
+        return handle
+
+    def _remember(self, key: str, handle: Any, expire_at: float, content_type: str, model_name: str):
+        self._failed.pop(key, None)
+        self._entries[key] = {
+            "handle": handle,
+            "expire_at": expire_at,
+            "content_type": content_type,
+            "model": model_name
+        }
+
+    async def _publish(self, key: str, handle: Any, expire_at: float):
+        ttl = int(expire_at - time.time())
+        if ttl > 0:
+            record = json.dumps({"name": handle.name, "expire_at": expire_at})
+            await redis_client.set(f"gemini_cache:{key}", record, ex=ttl)
+
+    def _forget(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            client_registry.evict_cached_model(entry["handle"])
+
+    # ==================== REFRESH ====================
+
+    async def refresh_expiring(self) -> int:
+        """
+        Extend handles that expire within CONTEXT_CACHE_REFRESH_MARGIN
+
+        Returns:
+            Number of handles this worker refreshed
+        """
+        refreshed = 0
+        for key, entry in list(self._entries.items()):
+            if entry["expire_at"] - time.time() > settings.CONTEXT_CACHE_REFRESH_MARGIN:
+                continue
+
+            # Another worker may already have extended it
+            raw = await redis_client.get(f"gemini_cache:{key}")
+            if raw:
+                record = json.loads(raw)
+                if record["name"] == entry["handle"].name and record["expire_at"] > entry["expire_at"]:
+                    entry["expire_at"] = record["expire_at"]
+                    if entry["expire_at"] - time.time() > settings.CONTEXT_CACHE_REFRESH_MARGIN:
+                        continue
+
+            lock_key = f"gemini_cache:{key}:lock"
+            shared = redis_client.client is not None
+            if shared and not await redis_client.set(lock_key, self.worker_id, ex=settings.CONTEXT_CACHE_LOCK_TTL, nx=True):
+                continue
+
+            try:
+                await llm_client.run_sync(entry["handle"].update, ttl=settings.CACHE_TTL_SYSTEM_PROMPTS)
+                entry["expire_at"] = self._expire_at(entry["handle"])
+                await self._publish(key, entry["handle"], entry["expire_at"])
+                refreshed += 1
+                self.stats["refreshed"] += 1
+                logger.info(f"🔄 Extended Gemini cached prompt for {entry['content_type']} ({entry['model']})")
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to extend Gemini cache for {entry['content_type']}: {e} - dropping handle")
+                self._forget(key)
+                await redis_client.delete(f"gemini_cache:{key}")
+            finally:
+                if shared and await redis_client.get(lock_key) == self.worker_id:
+                    await redis_client.delete(lock_key)
+        return refreshed
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(settings.CONTEXT_CACHE_REFRESH_INTERVAL)
+            try:
+                await self.refresh_expiring()
+            except Exception as e:
+                logger.error(f"❌ Gemini cache refresh sweep failed: {e}")
+
+    # ==================== LIFECYCLE ====================
+
+    async def prewarm(self, prompts: Iterable[Tuple[str, str, str]]) -> int:
+        """
+        Create (or adopt from the registry) caches at startup (lifespan)
+
+        Args:
+            prompts: (content_type, system_prompt, model_name) tuples
+
+        Returns:
+            Number of handles ready
+        """
+        handles = await asyncio.gather(*(
+            self.get(content_type, system_prompt, model_name)
+            for content_type, system_prompt, model_name in prompts
+        ))
+        ready = sum(1 for handle in handles if handle is not None)
+        logger.info(f"🔥 Gemini context caches ready: {ready}/{len(handles)}")
+        return ready
+
+    def start(self):
+        """Start the background refresh task"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        """Cancel the background refresh task (lifespan shutdown)"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Registry counters and the handles held by this worker"""
+        now = time.time()
+        lookups = self.stats["local_hits"] + self.stats["shared_hits"] + self.stats["created"]
+        return {
+            **self.stats,
+            "reuse_rate": round((lookups - self.stats["created"]) / lookups * 100, 2) if lookups else 0,
+            "shared": redis_client.client is not None,
+            "entries": [
+                {
+                    "content_type": entry["content_type"],
+                    "model": entry["model"],
+                    "expires_in": int(entry["expire_at"] - now)
+                }
+                for entry in self._entries.values()
+            ]
+        }
+
+
+# Global context cache registry
+context_cache = ContextCacheRegistry()
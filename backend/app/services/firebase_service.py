@@ -8,6 +8,14 @@ ARCHITECTURE PATTERN:
 3. Return Pydantic models as output (validated data with type safety)
 4. Use type hints for all methods
 5. Handle errors with proper logging and exceptions
+6. Firestore calls go through the AsyncClient (`await ref.get()`, `async for doc in
+   query.stream()`), so a request waiting on Firestore never blocks the event loop
+
+CHANNEL POOL:
+    `db` hands out one of FIRESTORE_CHANNEL_POOL_SIZE AsyncClients round-robin.
+    Each client owns one gRPC channel; a single HTTP/2 connection caps concurrent
+    streams, so a small pool keeps bursts of parallel RPCs from queueing.
+    With FIRESTORE_EMULATOR_HOST set, clients talk to the local emulator.
 
 Example Usage:
     from app.schemas.user import UserCreate
@@ -16,12 +24,19 @@ Example Usage:
     user_data = UserCreate(email="test@example.com", password="secure123")
     result = await firebase_service.create_user(user_data.model_dump())
 """
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime, timezone
+import asyncio
+import inspect
+import itertools
+import os
 import firebase_admin
 from firebase_admin import credentials, firestore, auth as firebase_auth, storage
+from google.auth.credentials import AnonymousCredentials
+from google.api_core.exceptions import NotFound
 from app.config import settings
 from app.constants import Collections, SubscriptionPlan, SubscriptionStatus
+from app.utils.cache_manager import cache_manager
 import logging
 import httpx
 import uuid
@@ -41,13 +56,21 @@ class FirebaseService:
     def __init__(self):
         if not self._initialized:
             self._initialize_firebase()
-            self.db = firestore.client()
+            self._clients = [self._create_async_client() for _ in range(max(1, settings.FIRESTORE_CHANNEL_POOL_SIZE))]
+            self._client_cycle = itertools.cycle(self._clients)
             FirebaseService._initialized = True
     
+    @staticmethod
+    def _emulator_host() -> Optional[str]:
+        return os.environ.get("FIRESTORE_EMULATOR_HOST")
+    
     def _initialize_firebase(self):
         """Initialize Firebase Admin SDK"""
         if not firebase_admin._apps:
             if not settings.FIREBASE_PRIVATE_KEY_PATH:
+                if self._emulator_host():
+                    logger.info(f"🧪 Using Firestore emulator at {self._emulator_host()} (Auth/Storage not initialized)")
+                    return
                 raise ValueError("FIREBASE_PRIVATE_KEY_PATH not configured in .env file")
             
             cred = credentials.Certificate(settings.FIREBASE_PRIVATE_KEY_PATH)
@@ -56,6 +79,48 @@ class FirebaseService:
             })
             logger.info("Firebase initialized successfully")
     
+    def _create_async_client(self) -> firestore.AsyncClient:
+        """One Firestore AsyncClient (and gRPC channel) with the Admin SDK's credentials"""
+        if self._emulator_host() and not firebase_admin._apps:
+            return firestore.AsyncClient(
+                project=settings.FIREBASE_PROJECT_ID or "demo-summarly",
+                credentials=AnonymousCredentials()
+            )
+        app = firebase_admin.get_app()
+        return firestore.AsyncClient(
+            project=app.project_id or settings.FIREBASE_PROJECT_ID,
+            credentials=app.credential.get_credential()
+        )
+    
+    @property
+    def db(self) -> firestore.AsyncClient:
+        """Next pooled Firestore AsyncClient (round-robin)"""
+        return next(self._client_cycle)
+    
+    async def aclose(self):
+        """Close pooled Firestore channels (lifespan shutdown)"""
+        for client in self._clients:
+            try:
+                result = client.close()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"⚠️ Error closing Firestore client: {e}")
+    
+    # ==================== USER CACHE ====================
+    
+    @staticmethod
+    def _user_cache_key(user_id: str) -> str:
+        return f"user:{user_id}"
+    
+    async def invalidate_user(self, user_id: str):
+        """
+        Drop a user's cached document (this worker, Redis and, via pub/sub, other workers)
+        Call after any write to the user document made outside this service.
+        """
+        if settings.USER_CACHE_TTL > 0:
+            await cache_manager.delete(self._user_cache_key(user_id))
+    
     # ==================== USER OPERATIONS ====================
     
     async def create_user(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -128,6 +193,8 @@ class FirebaseService:
                     'totalHumanizations': 0,
                     'totalGraphics': 0,
                     'averageQualityScore': 0,
+                    'qualityScoreSum': 0,
+                    'qualityScoreCount': 0,
                     'favoriteCount': 0
                 },
                 'account_status': 'active',  # active | pending_deletion | deleted
@@ -136,11 +203,11 @@ class FirebaseService:
                 'deletion_reason': None
             }
             
-            user_ref.set(user_doc)
+            await user_ref.set(user_doc)
             logger.info(f"User created: {user_data['uid']}")
             
             # Fetch the document to get the actual timestamps
-            created_doc = user_ref.get()
+            created_doc = await user_ref.get()
             if created_doc.exists:
                 return {'uid': user_data['uid'], **created_doc.to_dict()}
             else:
@@ -150,14 +217,49 @@ class FirebaseService:
             logger.error(f"Error creating user: {e}")
             raise
     
-    async def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
-        """Get user by ID"""
+    @staticmethod
+    def _with_derived_stats(user: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Fill allTimeStats.averageQualityScore from the running sum / count
+        
+        record_generation only increments qualityScoreSum / qualityScoreCount (a
+        stored average can't be updated in the same blind write), so the average
+        is derived whenever a user document is read.
+        """
+        stats = user.get('allTimeStats') or {}
+        if stats.get('qualityScoreCount'):
+            stats['averageQualityScore'] = round(stats.get('qualityScoreSum', 0) / stats['qualityScoreCount'], 2)
+        return user
+    
+    async def get_user(self, user_id: str, use_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Get user by ID
+        
+        Served from the user cache (in-process + Redis) for up to USER_CACHE_TTL
+        seconds; every write in this service invalidates the cached copy.
+        
+        Args:
+            user_id: User's Firebase UID
+            use_cache: False to force a Firestore read
+        
+        Returns:
+            User document or None
+        """
+        cache_key = self._user_cache_key(user_id)
+        if use_cache and settings.USER_CACHE_TTL > 0:
+            cached = await cache_manager.get(cache_key, content_type="user")
+            if cached is not None:
+                return cached
+        
         try:
             user_ref = self.db.collection(Collections.USERS).document(user_id)
-            user_doc = user_ref.get()
+            user_doc = await user_ref.get()
             
             if user_doc.exists:
-                return {'uid': user_id, **user_doc.to_dict()}
+                user = self._with_derived_stats({'uid': user_id, **user_doc.to_dict()})
+                if settings.USER_CACHE_TTL > 0:
+                    await cache_manager.set(cache_key, user, ttl=settings.USER_CACHE_TTL, content_type="user")
+                return user
             return None
         except Exception as e:
             logger.error(f"Error getting user {user_id}: {e}")
@@ -168,10 +270,9 @@ class FirebaseService:
         try:
             users_ref = self.db.collection(Collections.USERS)
             query = users_ref.where('email', '==', email).limit(1)
-            docs = query.stream()
             
-            for doc in docs:
-                return {'uid': doc.id, **doc.to_dict()}
+            async for doc in query.stream():
+                return self._with_derived_stats({'uid': doc.id, **doc.to_dict()})
             return None
         except Exception as e:
             logger.error(f"Error getting user by email {email}: {e}")
@@ -182,7 +283,8 @@ class FirebaseService:
         try:
             user_ref = self.db.collection(Collections.USERS).document(user_id)
             update_data['updatedAt'] = firestore.SERVER_TIMESTAMP
-            user_ref.update(update_data)
+            await user_ref.update(update_data)
+            await self.invalidate_user(user_id)
             logger.info(f"User updated: {user_id}")
             return True
         except Exception as e:
@@ -201,13 +303,14 @@ class FirebaseService:
         """
         try:
             user_ref = self.db.collection(Collections.USERS).document(user_id)
-            user_ref.update({
+            await user_ref.update({
                 'usageThisMonth.generations': firestore.Increment(1),
                 'allTimeStats.totalGenerations': firestore.Increment(1),
                 'updatedAt': firestore.SERVER_TIMESTAMP
             })
+            await self.invalidate_user(user_id)
             
-            user_doc = user_ref.get()
+            user_doc = await user_ref.get()
             return user_doc.to_dict()['usageThisMonth']
         except Exception as e:
             logger.error(f"Error incrementing usage for {user_id}: {e}")
@@ -227,14 +330,17 @@ class FirebaseService:
             raise
     
     async def reset_monthly_usage(self, user_id: str, new_limit: int):
-        """Reset user's monthly usage counter"""
+        """Reset user's monthly usage counters (called by the quota ledger when a period ends)"""
         try:
             user_ref = self.db.collection(Collections.USERS).document(user_id)
-            user_ref.update({
+            await user_ref.update({
                 'usageThisMonth.generations': 0,
+                'usageThisMonth.humanizations': 0,
+                'usageThisMonth.socialGraphics': 0,
                 'usageThisMonth.resetDate': self._get_next_month_start(),
                 'updatedAt': firestore.SERVER_TIMESTAMP
             })
+            await self.invalidate_user(user_id)
             logger.info(f"Usage reset for user: {user_id}")
         except Exception as e:
             logger.error(f"Error resetting usage for {user_id}: {e}")
@@ -242,60 +348,62 @@ class FirebaseService:
     
     # ==================== GENERATION OPERATIONS ====================
     
+    @staticmethod
+    def _build_generation_doc(generation_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Generation document - Complete schema from blueprint"""
+        return {
+            'userId': generation_data['userId'],
+            'contentType': generation_data['contentType'],
+            'userInput': generation_data['userInput'],
+            'output': generation_data['output'],
+            'settings': {
+                'tone': generation_data.get('settings', {}).get('tone', 'professional'),
+                'language': generation_data.get('settings', {}).get('language', 'english'),
+                'length': generation_data.get('settings', {}).get('length', 0),
+                'customSettings': generation_data.get('settings', {}).get('customSettings', {})
+            },
+            'qualityMetrics': {
+                'readability_score': generation_data.get('qualityMetrics', {}).get('readability_score', 0),
+                'originality_score': generation_data.get('qualityMetrics', {}).get('originality_score', 0),
+                'grammar_score': generation_data.get('qualityMetrics', {}).get('grammar_score', 0),
+                'fact_check_score': generation_data.get('qualityMetrics', {}).get('fact_check_score', 0),
+                'ai_detection_score': generation_data.get('qualityMetrics', {}).get('ai_detection_score', 0),
+                'overall_score': generation_data.get('qualityMetrics', {}).get('overall_score', 0)
+            },
+            'factCheckResults': {
+                'checked': generation_data.get('factCheckResults', {}).get('checked', False),
+                'claims': generation_data.get('factCheckResults', {}).get('claims', []),
+                'verificationTime': generation_data.get('factCheckResults', {}).get('verificationTime', 0)
+            },
+            'humanization': {
+                'applied': generation_data.get('humanization', {}).get('applied', False),
+                'level': generation_data.get('humanization', {}).get('level', None),
+                'beforeScore': generation_data.get('humanization', {}).get('beforeScore', 0),
+                'afterScore': generation_data.get('humanization', {}).get('afterScore', 0),
+                'detectionAPI': generation_data.get('humanization', {}).get('detectionAPI', None),
+                'processingTime': generation_data.get('humanization', {}).get('processingTime', 0)
+            },
+            'isContentRefresh': generation_data.get('isContentRefresh', False),
+            'originalContentId': generation_data.get('originalContentId', None),
+            'videoScriptSettings': generation_data.get('videoScriptSettings', None) if generation_data['contentType'] == 'videoScript' else None,
+            'userRating': None,
+            'regenerationCount': 0,
+            'tokensUsed': generation_data.get('tokensUsed', 0),
+            'generationTime': generation_data.get('generationTime', 0),
+            'modelUsed': generation_data.get('modelUsed', 'gpt-4o-mini'),
+            'createdAt': firestore.SERVER_TIMESTAMP,
+            'updatedAt': firestore.SERVER_TIMESTAMP,
+            'isFavorite': False,
+            'isArchived': False,
+            'tags': generation_data.get('tags', []),
+            'exportedTo': []
+        }
+    
     async def save_generation(self, generation_data: Dict[str, Any]) -> str:
-        """Save content generation to Firestore - Complete schema from blueprint"""
+        """Save content generation to Firestore (no usage counters - see record_generation)"""
         try:
             gen_ref = self.db.collection(Collections.GENERATIONS).document()
-            
-            generation_doc = {
-                'userId': generation_data['userId'],
-                'contentType': generation_data['contentType'],
-                'userInput': generation_data['userInput'],
-                'output': generation_data['output'],
-                'settings': {
-                    'tone': generation_data.get('settings', {}).get('tone', 'professional'),
-                    'language': generation_data.get('settings', {}).get('language', 'english'),
-                    'length': generation_data.get('settings', {}).get('length', 0),
-                    'customSettings': generation_data.get('settings', {}).get('customSettings', {})
-                },
-                'qualityMetrics': {
-                    'readability_score': generation_data.get('qualityMetrics', {}).get('readability_score', 0),
-                    'originality_score': generation_data.get('qualityMetrics', {}).get('originality_score', 0),
-                    'grammar_score': generation_data.get('qualityMetrics', {}).get('grammar_score', 0),
-                    'fact_check_score': generation_data.get('qualityMetrics', {}).get('fact_check_score', 0),
-                    'ai_detection_score': generation_data.get('qualityMetrics', {}).get('ai_detection_score', 0),
-                    'overall_score': generation_data.get('qualityMetrics', {}).get('overall_score', 0)
-                },
-                'factCheckResults': {
-                    'checked': generation_data.get('factCheckResults', {}).get('checked', False),
-                    'claims': generation_data.get('factCheckResults', {}).get('claims', []),
-                    'verificationTime': generation_data.get('factCheckResults', {}).get('verificationTime', 0)
-                },
-                'humanization': {
-                    'applied': generation_data.get('humanization', {}).get('applied', False),
-                    'level': generation_data.get('humanization', {}).get('level', None),
-                    'beforeScore': generation_data.get('humanization', {}).get('beforeScore', 0),
-                    'afterScore': generation_data.get('humanization', {}).get('afterScore', 0),
-                    'detectionAPI': generation_data.get('humanization', {}).get('detectionAPI', None),
-                    'processingTime': generation_data.get('humanization', {}).get('processingTime', 0)
-                },
-                'isContentRefresh': generation_data.get('isContentRefresh', False),
-                'originalContentId': generation_data.get('originalContentId', None),
-                'videoScriptSettings': generation_data.get('videoScriptSettings', None) if generation_data['contentType'] == 'videoScript' else None,
-                'userRating': None,
-                'regenerationCount': 0,
-                'tokensUsed': generation_data.get('tokensUsed', 0),
-                'generationTime': generation_data.get('generationTime', 0),
-                'modelUsed': generation_data.get('modelUsed', 'gpt-4o-mini'),
-                'createdAt': firestore.SERVER_TIMESTAMP,
-                'updatedAt': firestore.SERVER_TIMESTAMP,
-                'isFavorite': False,
-                'isArchived': False,
-                'tags': generation_data.get('tags', []),
-                'exportedTo': []
-            }
-            
-            gen_ref.set(generation_doc)
+            await gen_ref.set(self._build_generation_doc(generation_data))
             logger.info(f"Generation saved: {gen_ref.id}")
             
             return gen_ref.id
@@ -303,6 +411,80 @@ class FirebaseService:
             logger.error(f"Error saving generation: {e}")
             raise
     
+    async def record_generation(self, generation_data: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Persist a finished generation in ONE Firestore transaction
+        
+        The transaction reads the user document and writes:
+        - the generation document (set)
+        - usageThisMonth.generations + 1 / allTimeStats.totalGenerations + 1
+        - allTimeStats.qualityScoreSum + overall_score, qualityScoreCount + 1
+          (running average, only for generations with a quality score)
+        
+        The new counters are computed from the snapshot the transaction read, so
+        they come back without a second read. Concurrent generations for the same
+        user are serialized (and retried) by Firestore. Either everything is
+        written or nothing is.
+        
+        Args:
+            generation_data: Generation fields (userId, contentType, output, qualityMetrics, ...)
+        
+        Returns:
+            (generation_id, counters) - counters: generations, totalGenerations,
+            qualityScoreCount, averageQualityScore (both None for an unscored generation)
+        
+        Raises:
+            NotFound: The user document does not exist (nothing is written)
+        """
+        user_id = generation_data['userId']
+        try:
+            generation_doc = self._build_generation_doc(generation_data)
+            quality_score = generation_doc['qualityMetrics']['overall_score'] or 0
+            
+            db = self.db
+            gen_ref = db.collection(Collections.GENERATIONS).document()
+            user_ref = db.collection(Collections.USERS).document(user_id)
+            
+            @firestore.async_transactional
+            async def write(transaction) -> Dict[str, Any]:
+                snapshot = await user_ref.get(transaction=transaction)
+                if not snapshot.exists:
+                    raise NotFound(f"User {user_id} not found")
+                user = snapshot.to_dict()
+                usage = user.get('usageThisMonth') or {}
+                stats = user.get('allTimeStats') or {}
+                
+                counters = {
+                    'generations': (usage.get('generations') or 0) + 1,
+                    'totalGenerations': (stats.get('totalGenerations') or 0) + 1,
+                    'qualityScoreCount': None,
+                    'averageQualityScore': None
+                }
+                updates = {
+                    'usageThisMonth.generations': counters['generations'],
+                    'allTimeStats.totalGenerations': counters['totalGenerations'],
+                    'updatedAt': firestore.SERVER_TIMESTAMP
+                }
+                if quality_score > 0:
+                    score_sum = (stats.get('qualityScoreSum') or 0) + quality_score
+                    counters['qualityScoreCount'] = (stats.get('qualityScoreCount') or 0) + 1
+                    counters['averageQualityScore'] = round(score_sum / counters['qualityScoreCount'], 2)
+                    updates['allTimeStats.qualityScoreSum'] = score_sum
+                    updates['allTimeStats.qualityScoreCount'] = counters['qualityScoreCount']
+                
+                transaction.set(gen_ref, generation_doc)
+                transaction.update(user_ref, updates)
+                return counters
+            
+            counters = await write(db.transaction())
+            await self.invalidate_user(user_id)
+            
+            logger.info(f"Generation recorded: {gen_ref.id} (user {user_id}: {counters['generations']} this month)")
+            return gen_ref.id, counters
+        except Exception as e:
+            logger.error(f"Error recording generation for {user_id}: {e}")
+            raise
+    
     async def get_generation_by_id(self, generation_id: str) -> Optional[Dict[str, Any]]:
         """
         Get a generation document by ID
@@ -315,7 +497,7 @@ class FirebaseService:
         """
         try:
             doc_ref = self.db.collection(Collections.GENERATIONS).document(generation_id)
-            doc = doc_ref.get()
+            doc = await doc_ref.get()
             
             if doc.exists:
                 data = doc.to_dict()
@@ -340,10 +522,9 @@ class FirebaseService:
                 query = query.where('contentType', '==', content_type)
             
             query = query.order_by('createdAt', direction=firestore.Query.DESCENDING).limit(limit)
-            docs = query.stream()
             
             generations = []
-            for doc in docs:
+            async for doc in query.stream():
                 generations.append({'id': doc.id, **doc.to_dict()})
             
             return generations
@@ -355,7 +536,7 @@ class FirebaseService:
         """Get a single generation by ID"""
         try:
             gen_ref = self.db.collection(Collections.GENERATIONS).document(generation_id)
-            doc = gen_ref.get()
+            doc = await gen_ref.get()
             
             if doc.exists:
                 return {'id': doc.id, **doc.to_dict()}
@@ -369,7 +550,7 @@ class FirebaseService:
         try:
             gen_ref = self.db.collection(Collections.GENERATIONS).document(generation_id)
             updates['updatedAt'] = firestore.SERVER_TIMESTAMP
-            gen_ref.update(updates)
+            await gen_ref.update(updates)
             logger.info(f"Generation updated: {generation_id}")
         except Exception as e:
             logger.error(f"Error updating generation {generation_id}: {e}")
@@ -379,7 +560,7 @@ class FirebaseService:
         """Update generation with user rating"""
         try:
             gen_ref = self.db.collection(Collections.GENERATIONS).document(generation_id)
-            gen_ref.update({
+            await gen_ref.update({
                 'userRating': {
                     'rating': rating,
                     'feedback': feedback,
@@ -404,7 +585,8 @@ class FirebaseService:
                 'updatedAt': firestore.SERVER_TIMESTAMP
             }
             
-            user_ref.update(update_dict)
+            await user_ref.update(update_dict)
+            await self.invalidate_user(user_id)
             logger.info(f"Subscription updated for user: {user_id}")
         except Exception as e:
             logger.error(f"Error updating subscription for {user_id}: {e}")
@@ -428,7 +610,8 @@ class FirebaseService:
                 'updatedAt': firestore.SERVER_TIMESTAMP
             }
             
-            user_ref.update(update_dict)
+            await user_ref.update(update_dict)
+            await self.invalidate_user(user_id)
             logger.info(f"Usage limits updated for user {user_id}: {limits}")
         except Exception as e:
             logger.error(f"Error updating usage limits for {user_id}: {e}")
@@ -458,13 +641,14 @@ class FirebaseService:
         """Increment user's humanization count"""
         try:
             user_ref = self.db.collection(Collections.USERS).document(user_id)
-            user_ref.update({
+            await user_ref.update({
                 'usageThisMonth.humanizations': firestore.Increment(1),
                 'allTimeStats.totalHumanizations': firestore.Increment(1),
                 'updatedAt': firestore.SERVER_TIMESTAMP
             })
+            await self.invalidate_user(user_id)
             
-            user_doc = user_ref.get()
+            user_doc = await user_ref.get()
             return user_doc.to_dict()['usageThisMonth']
         except Exception as e:
             logger.error(f"Error incrementing humanization for {user_id}: {e}")
@@ -498,7 +682,8 @@ class FirebaseService:
                 update_data['onboarding.completed'] = True
                 update_data['onboarding.completedAt'] = firestore.SERVER_TIMESTAMP
             
-            user_ref.update(update_data)
+            await user_ref.update(update_data)
+            await self.invalidate_user(user_id)
             logger.info(f"Onboarding step updated for user: {user_id} - Step {step}")
         except Exception as e:
             logger.error(f"Error updating onboarding for {user_id}: {e}")
@@ -508,10 +693,11 @@ class FirebaseService:
         """Set user's primary use case during onboarding"""
         try:
             user_ref = self.db.collection(Collections.USERS).document(user_id)
-            user_ref.update({
+            await user_ref.update({
                 'settings.primaryUseCase': use_case,
                 'updatedAt': firestore.SERVER_TIMESTAMP
             })
+            await self.invalidate_user(user_id)
             logger.info(f"Primary use case set for user: {user_id} - {use_case}")
         except Exception as e:
             logger.error(f"Error setting use case for {user_id}: {e}")
@@ -523,7 +709,7 @@ class FirebaseService:
         """Save trained brand voice for user"""
         try:
             user_ref = self.db.collection(Collections.USERS).document(user_id)
-            user_ref.update({
+            await user_ref.update({
                 'brandVoice': {
                     'isConfigured': True,
                     'tone': voice_data.get('tone'),
@@ -534,6 +720,7 @@ class FirebaseService:
                 },
                 'updatedAt': firestore.SERVER_TIMESTAMP
             })
+            await self.invalidate_user(user_id)
             logger.info(f"Brand voice trained for user: {user_id}")
         except Exception as e:
             logger.error(f"Error training brand voice for {user_id}: {e}")
@@ -545,7 +732,7 @@ class FirebaseService:
         """Mark old content with outdated data that needs refreshing"""
         try:
             gen_ref = self.db.collection(Collections.GENERATIONS).document(generation_id)
-            gen_ref.update({
+            await gen_ref.update({
                 'needsRefresh': True,
                 'refreshIssues': issues,
                 'lastRefreshCheck': firestore.SERVER_TIMESTAMP,
@@ -562,7 +749,7 @@ class FirebaseService:
         """Invite team member to collaborate"""
         try:
             user_ref = self.db.collection(Collections.USERS).document(user_id)
-            user_ref.update({
+            await user_ref.update({
                 'team.invitedMembers': firestore.ArrayUnion([{
                     'email': email,
                     'role': role,
@@ -571,6 +758,7 @@ class FirebaseService:
                 }]),
                 'updatedAt': firestore.SERVER_TIMESTAMP
             })
+            await self.invalidate_user(user_id)
             logger.info(f"Team member invited: {email} to user {user_id}")
         except Exception as e:
             logger.error(f"Error inviting team member for {user_id}: {e}")
@@ -613,14 +801,15 @@ class FirebaseService:
             bucket = storage.bucket()
             blob = bucket.blob(storage_path)
             
-            # Upload image with metadata
-            blob.upload_from_string(
+            # Upload image with metadata (Storage SDK is blocking - keep it off the event loop)
+            await asyncio.to_thread(
+                blob.upload_from_string,
                 image_data,
                 content_type=f"image/{file_extension}"
             )
             
             # Make blob publicly accessible
-            blob.make_public()
+            await asyncio.to_thread(blob.make_public)
             
             # Get public URL
             public_url = blob.public_url
@@ -649,7 +838,7 @@ class FirebaseService:
         """
         try:
             generation_ref = self.db.collection(Collections.GENERATIONS).document(generation_id)
-            generation_ref.update({
+            await generation_ref.update({
                 'imageUrl': permanent_url,
                 'imageStorageStatus': 'uploaded',
                 'imageUploadedAt': firestore.SERVER_TIMESTAMP,
@@ -10,6 +10,9 @@ import google.generativeai as genai
 from dataclasses import dataclass, asdict
 import json
 
+from app.services.llm_client import llm_client
+from app.services.client_registry import client_registry
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -46,7 +49,7 @@ class GeminiQualityAnalyzer:
         
         # Use Gemini 2.0 Flash - fast and cheap
         from app.config import ModelConfig
-        self.model = genai.GenerativeModel(ModelConfig.QUALITY_ANALYZER_MODEL)
+        self.model = client_registry.get_generative_model(ModelConfig.QUALITY_ANALYZER_MODEL)
         
         logger.info("✨ Gemini Quality Analyzer initialized with 2.0 Flash")
     
@@ -76,7 +79,8 @@ class GeminiQualityAnalyzer:
             # Generate analysis with Gemini
             logger.info(f"🤖 Analyzing {content_type} content with Gemini ({len(content)} chars)...")
             
-            response = self.model.generate_content(
+            response = await llm_client.generate_content(
+                self.model,
                 prompt,
                 generation_config=genai.GenerationConfig(
                     temperature=0.3,  # Low temperature for consistent scoring
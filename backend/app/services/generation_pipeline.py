@@ -0,0 +1,175 @@
+"""
+Generation Pipeline - Dependency-graph runner for post-generation stages
+Independent stages (AI analysis, fact-check, persistence) run concurrently
+
+WHY:
+    The blog endpoint used to await every stage in series - quality analysis,
+    then fact-checking, then save, then usage increment - although most of them
+    are independent network calls. End-to-end latency was the sum of all of them.
+
+HOW:
+    Each stage declares the stages it depends on. A stage starts as soon as its
+    dependencies have finished, so the critical path (not the sum) sets latency.
+    Every stage has its own timeout:
+        - optional stages degrade to their fallback value on error/timeout
+        - required stages abort the pipeline (remaining stages are cancelled)
+    Per-stage timings are returned so the response can show where time went.
+
+Usage:
+    pipeline = GenerationPipeline("blog")
+    pipeline.add("generate", generate, required=True)
+    pipeline.add("fact_check", fact_check, depends_on=["generate"], timeout=30, fallback={})
+    result = await pipeline.run()
+    result.results["fact_check"], result.timings
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+from dataclasses import dataclass, field
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+StageFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass
+class PipelineStage:
+    """One node of the pipeline graph"""
+    name: str
+    func: StageFunc
+    depends_on: Sequence[str] = ()
+    timeout: Optional[float] = None
+    fallback: Any = None
+    required: bool = False
+
+
+@dataclass
+class PipelineResult:
+    """Stage outputs plus per-stage timings"""
+    results: Dict[str, Any]
+    timings: Dict[str, Dict[str, Any]]
+    total_ms: float
+    degraded: List[str] = field(default_factory=list)
+
+    def timings_summary(self) -> Dict[str, Any]:
+        """Timings in the shape returned to API clients"""
+        return {
+            "total_ms": self.total_ms,
+            "stages": self.timings,
+            "degraded": self.degraded
+        }
+
+
+class GenerationPipeline:
+    """
+    Runs stages as soon as their dependencies finish
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._stages: Dict[str, PipelineStage] = {}
+
+    def add(
+        self,
+        name: str,
+        func: StageFunc,
+        depends_on: Sequence[str] = (),
+        timeout: Optional[float] = None,
+        fallback: Any = None,
+        required: bool = False
+    ) -> 'GenerationPipeline':
+        """
+        Register a stage
+
+        Args:
+            name: Unique stage name (key in results/timings)
+            func: Coroutine function receiving the results of finished stages
+            depends_on: Stage names that must finish first
+            timeout: Seconds before the stage is abandoned (None = no limit)
+            fallback: Result used when an optional stage fails or times out
+            required: If True, failure aborts the whole pipeline
+
+        Returns:
+            self (for chaining)
+        """
+        if name in self._stages:
+            raise ValueError(f"Duplicate pipeline stage: {name}")
+        for dependency in depends_on:
+            if dependency not in self._stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dependency}'")
+        self._stages[name] = PipelineStage(name, func, tuple(depends_on), timeout, fallback, required)
+        return self
+
+    async def run(self) -> PipelineResult:
+        """
+        Execute the graph
+
+        Returns:
+            PipelineResult with every stage's output (or fallback) and timings
+
+        Raises:
+            The original exception of a failed required stage
+            (asyncio.TimeoutError if it timed out)
+        """
+        results: Dict[str, Any] = {}
+        timings: Dict[str, Dict[str, Any]] = {}
+        degraded: List[str] = []
+        done_events = {name: asyncio.Event() for name in self._stages}
+        aborted = False
+        pipeline_start = time.perf_counter()
+
+        async def run_stage(stage: PipelineStage):
+            nonlocal aborted
+            for dependency in stage.depends_on:
+                await done_events[dependency].wait()
+            if aborted:
+                return
+
+            started = time.perf_counter()
+            status = "ok"
+            try:
+                if stage.timeout is not None:
+                    results[stage.name] = await asyncio.wait_for(stage.func(results), timeout=stage.timeout)
+                else:
+                    results[stage.name] = await stage.func(results)
+            except asyncio.CancelledError:
+                status = "cancelled"
+                raise
+            except asyncio.TimeoutError:
+                status = "timeout"
+                if stage.required:
+                    aborted = True
+                    raise
+                logger.warning(f"⏱️ {self.name} pipeline: '{stage.name}' timed out after {stage.timeout}s - using fallback")
+                results[stage.name] = stage.fallback
+            except Exception as e:
+                status = "failed"
+                if stage.required:
+                    aborted = True
+                    raise
+                logger.error(f"⚠️ {self.name} pipeline: '{stage.name}' failed ({e}) - using fallback")
+                results[stage.name] = stage.fallback
+            finally:
+                timings[stage.name] = {
+                    "status": status,
+                    "start_ms": round((started - pipeline_start) * 1000, 1),
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+                }
+                if status != "ok":
+                    degraded.append(stage.name)
+                done_events[stage.name].set()
+
+        tasks = [asyncio.create_task(run_stage(stage)) for stage in self._stages.values()]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        total_ms = round((time.perf_counter() - pipeline_start) * 1000, 1)
+        breakdown = ", ".join(f"{name}={timing['duration_ms']}ms" for name, timing in timings.items())
+        logger.info(f"🧩 {self.name} pipeline finished in {total_ms}ms ({breakdown})")
+        return PipelineResult(results=results, timings=timings, total_ms=total_ms, degraded=degraded)
@@ -0,0 +1,233 @@
+"""
+Hedged Requests - Race the fallback model against a slow primary
+Cuts the Gemini latency tail without paying for two generations on every request
+
+WHY:
+    `_generate_with_ai` only calls GPT-4o-mini after Gemini has failed or timed out,
+    so one slow Gemini response costs the full timeout plus a full OpenAI generation.
+
+POLICY:
+    1. Start the primary (Gemini) call
+    2. If it hasn't returned within the LLM_HEDGE_PERCENTILE of its recent latencies,
+       start the fallback (GPT-4o-mini) in parallel
+    3. First successful result wins, the loser is cancelled (the fallback belongs to
+       the same request, so the scheduler's per-user cap doesn't hold it behind the primary)
+    4. Hedges draw from a per-tier credit bucket: every request earns
+       `<TIER>_TIER_HEDGE_BUDGET` credits, every hedge spends one, so the extra
+       fallback spend stays below that fraction of the tier's traffic
+
+The primary callable returns None to request a plain (non-hedged) fallback - the
+same contract the old sequential code had for rate limits and timeouts.
+
+Usage:
+    from app.services.hedging import hedge_policy
+
+    result = await hedge_policy.execute(call_gemini, call_openai, model_name=name, user_tier=tier)
+"""
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+from collections import deque
+import asyncio
+import logging
+import math
+import time
+
+from app.config import settings
+from app.constants import SubscriptionPlan
+
+logger = logging.getLogger(__name__)
+
+
+class HedgePolicy:
+    """
+    Latency-percentile hedging between the primary and fallback text models (singleton pattern)
+    """
+    _instance: Optional['HedgePolicy'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._setup()
+        return cls._instance
+
+    def _setup(self):
+        """Initialize latency windows, budgets and counters (runs once per process)"""
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._credits: Dict[str, float] = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Zero counters (latency windows and credits are kept)"""
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    # ==================== CONFIGURATION ====================
+
+    @staticmethod
+    def tier_budget(user_tier: Optional[str]) -> float:
+        """Fraction of a tier's requests that may be hedged"""
+        budgets = {
+            SubscriptionPlan.FREE: settings.FREE_TIER_HEDGE_BUDGET,
+            SubscriptionPlan.HOBBY: settings.HOBBY_TIER_HEDGE_BUDGET,
+            SubscriptionPlan.PRO: settings.PRO_TIER_HEDGE_BUDGET,
+            SubscriptionPlan.ENTERPRISE: settings.ENTERPRISE_TIER_HEDGE_BUDGET,
+        }
+        return budgets.get(user_tier or SubscriptionPlan.FREE, settings.FREE_TIER_HEDGE_BUDGET)
+
+    # ==================== LATENCY TRACKING ====================
+
+    def record_latency(self, model_name: str, seconds: float):
+        """Add one successful primary latency to the model's rolling window"""
+        window = self._latencies.get(model_name)
+        if window is None:
+            window = deque(maxlen=settings.LLM_HEDGE_WINDOW)
+            self._latencies[model_name] = window
+        window.append(seconds)
+
+    def hedge_delay(self, model_name: str) -> Optional[float]:
+        """
+        Seconds to wait for the primary before hedging
+
+        Returns:
+            LLM_HEDGE_PERCENTILE of recent latencies (floored at LLM_HEDGE_MIN_DELAY),
+            or None while there are too few samples to know what "slow" means
+        """
+        window = self._latencies.get(model_name)
+        if not window or len(window) < settings.LLM_HEDGE_MIN_SAMPLES:
+            return None
+
+        ordered = sorted(window)
+        rank = max(math.ceil(settings.LLM_HEDGE_PERCENTILE / 100 * len(ordered)) - 1, 0)
+        return max(ordered[rank], settings.LLM_HEDGE_MIN_DELAY)
+
+    # ==================== BUDGET ====================
+
+    def _earn_credit(self, tier: str):
+        budget = self.tier_budget(tier)
+        balance = self._credits.get(tier, 0.0) + budget
+        self._credits[tier] = min(balance, settings.LLM_HEDGE_MAX_BURST)
+
+    def _spend_credit(self, tier: str) -> bool:
+        if self._credits.get(tier, 0.0) < 1.0:
+            return False
+        self._credits[tier] -= 1.0
+        return True
+
+    def _count(self, tier: str, field: str):
+        counters = self.stats.setdefault(tier, {
+            "requests": 0,
+            "hedges_fired": 0,
+            "hedge_wins": 0,
+            "primary_wins": 0,
+            "budget_denied": 0,
+            "primary_fallbacks": 0
+        })
+        counters[field] += 1
+
+    # ==================== EXECUTION ====================
+
+    async def execute(
+        self,
+        primary: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+        fallback: Callable[[], Awaitable[Dict[str, Any]]],
+        model_name: str,
+        user_tier: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Run primary, hedging with fallback when the primary is slow
+
+        Args:
+            primary: Coroutine factory for the primary model; returns None to request fallback
+            fallback: Coroutine factory for the fallback model
+            model_name: Primary model name (latency window key)
+            user_tier: Subscription tier (hedge budget key)
+
+        Returns:
+            Result dict of whichever call succeeded first
+        """
+        tier = user_tier or SubscriptionPlan.FREE
+        self._count(tier, "requests")
+        self._earn_credit(tier)
+
+        start_time = time.time()
+        primary_task = asyncio.create_task(primary())
+        delay = self.hedge_delay(model_name) if settings.LLM_HEDGE_ENABLED else None
+
+        if delay is not None:
+            done, _ = await asyncio.wait({primary_task}, timeout=delay)
+            if not done:
+                if self._spend_credit(tier):
+                    return await self._race(primary_task, fallback, model_name, tier, start_time, delay)
+                self._count(tier, "budget_denied")
+
+        result = await primary_task
+        if result is None:
+            self._count(tier, "primary_fallbacks")
+            return await fallback()
+
+        self.record_latency(model_name, time.time() - start_time)
+        return result
+
+    async def _race(
+        self,
+        primary_task: 'asyncio.Task',
+        fallback: Callable[[], Awaitable[Dict[str, Any]]],
+        model_name: str,
+        tier: str,
+        start_time: float,
+        delay: float
+    ) -> Dict[str, Any]:
+        """Primary is past its latency percentile - fire the fallback and take the first success"""
+        self._count(tier, "hedges_fired")
+        logger.info(f"🏁 Hedging {model_name} after {delay:.2f}s with fallback {settings.FALLBACK_TEXT_MODEL}")
+
+        fallback_task = asyncio.create_task(fallback())
+        pending = {primary_task, fallback_task}
+        primary_error: Optional[BaseException] = None
+        fallback_error: Optional[BaseException] = None
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    result = None if error else task.result()
+                    if result is not None:
+                        if task is primary_task:
+                            self._count(tier, "primary_wins")
+                            self.record_latency(model_name, time.time() - start_time)
+                        else:
+                            self._count(tier, "hedge_wins")
+                        return result
+                    if task is primary_task:
+                        primary_error = error
+                    else:
+                        fallback_error = error
+        finally:
+            for task in pending:
+                task.cancel()
+
+        # Both legs failed: the fallback's error is the one the old sequential flow surfaced
+        raise fallback_error or primary_error
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hedge fire/win counters per tier and current per-model hedge delays"""
+        totals = {"requests": 0, "hedges_fired": 0, "hedge_wins": 0, "primary_wins": 0, "budget_denied": 0}
+        for counters in self.stats.values():
+            for field in totals:
+                totals[field] += counters.get(field, 0)
+
+        fired = totals["hedges_fired"]
+        return {
+            "enabled": settings.LLM_HEDGE_ENABLED,
+            "percentile": settings.LLM_HEDGE_PERCENTILE,
+            "tiers": self.stats,
+            "totals": totals,
+            "hedge_rate": round(fired / totals["requests"] * 100, 2) if totals["requests"] > 0 else 0,
+            "hedge_win_rate": round(totals["hedge_wins"] / fired * 100, 2) if fired > 0 else 0,
+            "hedge_delays": {
+                model: self.hedge_delay(model) for model in self._latencies
+            }
+        }
+
+
+# Singleton instance
+hedge_policy = HedgePolicy()
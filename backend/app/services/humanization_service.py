@@ -3,9 +3,8 @@ AI Content Humanization Service
 Detects AI-generated content and rewrites it to be more human-like
 """
 from typing import Dict, Any, Optional
-from openai import AsyncOpenAI
-import google.generativeai as genai
-from app.config import settings
+from app.services.llm_client import llm_client
+from app.services.client_registry import client_registry
 import logging
 import json
 import time
@@ -25,12 +24,11 @@ class HumanizationService:
     
     def __init__(self):
         if not hasattr(self, 'initialized'):
-            self.openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+            self.openai_client = client_registry.get_openai_client()
             self.openai_model = "gpt-4o-mini"
             
-            # Configure Gemini as fallback
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            self.gemini_model = genai.GenerativeModel('gemini-2.5-flash')
+            # Configure Gemini as fallback (shared model from the process-wide registry)
+            self.gemini_model = client_registry.get_generative_model('gemini-2.5-flash')
             
             self.initialized = True
             logger.info("Humanization service initialized")
@@ -94,7 +92,8 @@ Return ONLY a JSON object:
 
         # Add timeout to prevent hanging
         response = await asyncio.wait_for(
-            self.openai_client.chat.completions.create(
+            llm_client.chat_completion(
+                self.openai_client,
                 model=self.openai_model,
                 messages=[
                     {"role": "system", "content": "You are an AI content detection expert. Always return valid JSON."},
@@ -144,9 +143,7 @@ Return ONLY a JSON object:
     "reasoning": "brief explanation"
 }}"""
 
-            response = await asyncio.to_thread(
-                self.gemini_model.generate_content, prompt
-            )
+            response = await llm_client.generate_content(self.gemini_model, prompt)
             
             response_text = response.text.strip()
             # Extract JSON from markdown code blocks if present
@@ -260,7 +257,8 @@ Return ONLY the humanized content, no explanations."""
             except Exception as gemini_error:
                 logger.warning(f"Gemini humanization failed: {gemini_error}, trying OpenAI fallback...")
                 response = await asyncio.wait_for(
-                    self.openai_client.chat.completions.create(
+                    llm_client.chat_completion(
+                        self.openai_client,
                         model=self.openai_model,
                         messages=[
                             {"role": "system", "content": "You are an expert at making AI content sound naturally human-written."},
@@ -360,9 +358,7 @@ Requirements:
 
 Return ONLY the humanized content, no explanations."""
 
-        response = await asyncio.to_thread(
-            self.gemini_model.generate_content, prompt
-        )
+        response = await llm_client.generate_content(self.gemini_model, prompt)
         
         return response.text.strip()
     
@@ -429,9 +425,7 @@ Requirements:
 
 Return ONLY the humanized content, no explanations."""
 
-            response = await asyncio.to_thread(
-                self.gemini_model.generate_content, prompt
-            )
+            response = await llm_client.generate_content(self.gemini_model, prompt)
             
             humanized_content = response.text.strip()
             logger.info(f"Gemini humanization complete: {len(humanized_content)} chars")
@@ -539,7 +533,8 @@ Return JSON:
     "recommendation": "approve/revise/reject"
 }}"""
 
-            response = await self.openai_client.chat.completions.create(
+            response = await llm_client.chat_completion(
+                self.openai_client,
                 model=self.openai_model,
                 messages=[
                     {"role": "system", "content": "You are a content quality analyst. Always return valid JSON."},
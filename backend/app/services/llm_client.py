@@ -0,0 +1,231 @@
+"""
+LLM Client - Non-blocking provider call layer
+Every Gemini call in the backend is awaited through this module
+
+WHY:
+    google-generativeai's GenerativeModel.generate_content() and the new SDK's
+    client.models.generate_content() are blocking HTTP/gRPC calls. Calling them
+    directly inside an `async def` freezes the uvicorn event loop for the whole
+    LLM round trip, so one worker serves roughly one generation at a time.
+
+STRATEGY:
+    1. Native async first:
+       - OLD SDK: GenerativeModel.generate_content_async()
+       - NEW SDK: client.aio.models.generate_content()
+    2. Bounded dedicated executor for sync-only models (tests, future providers),
+       sized by settings.LLM_EXECUTOR_MAX_WORKERS so a burst of slow calls can't
+       exhaust the default asyncio executor used by the rest of the app.
+    3. Every call (Gemini and OpenAI) first takes a slot from llm_scheduler, which
+       applies provider RPM/TPM quotas, per-user concurrency and tier fairness.
+
+Usage:
+    from app.services.llm_client import llm_client
+
+    response = await llm_client.generate_content(model, prompt, generation_config=config)
+    response = await llm_client.generate_genai_content(client, model=name, contents=prompt, config=config)
+
+    async for chunk in llm_client.stream_genai_content(client, model=name, contents=prompt, config=config):
+        print(chunk.text)
+
+    response = await llm_client.chat_completion(openai_client, model=name, messages=messages)
+"""
+from typing import Any, AsyncIterator, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import logging
+
+from app.config import settings
+from app.services.llm_scheduler import llm_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(contents: Any = None, max_output_tokens: Any = None) -> int:
+    """
+    Rough token cost of a call for the scheduler's TPM bucket (~4 chars per token)
+
+    Args:
+        contents: Prompt string, contents list or chat messages
+        max_output_tokens: Completion budget if known
+
+    Returns:
+        Estimated prompt + completion tokens
+    """
+    if isinstance(contents, str):
+        prompt_chars = len(contents)
+    elif isinstance(contents, (list, tuple)):
+        prompt_chars = sum(
+            len(str(item.get("content", ""))) if isinstance(item, dict) else len(str(item))
+            for item in contents
+        )
+    else:
+        prompt_chars = len(str(contents)) if contents is not None else 0
+    try:
+        completion = int(max_output_tokens or 0)
+    except (TypeError, ValueError):
+        completion = 0
+    return prompt_chars // 4 + completion
+
+
+def _max_output_tokens(config: Any) -> Optional[int]:
+    """Read max_output_tokens from a dict or SDK config object"""
+    if config is None:
+        return None
+    if isinstance(config, dict):
+        return config.get("max_output_tokens")
+    return getattr(config, "max_output_tokens", None)
+
+
+class LLMClient:
+    """
+    Awaitable facade over the Gemini SDKs
+    Never blocks the event loop - native async where the SDK has it, bounded thread pool otherwise
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or settings.LLM_EXECUTOR_MAX_WORKERS
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Dedicated executor for sync-only model calls (created lazily)"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="llm-call"
+            )
+        return self._executor
+
+    async def run_sync(self, func, *args, **kwargs) -> Any:
+        """
+        Run a blocking provider call on the dedicated LLM executor
+
+        Args:
+            func: Blocking callable (e.g. model.generate_content)
+            *args, **kwargs: Forwarded to func
+
+        Returns:
+            Whatever func returns
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def generate_content(self, model: Any, contents: Any, **kwargs) -> Any:
+        """
+        Await a google.generativeai GenerativeModel call without blocking the loop
+
+        Args:
+            model: GenerativeModel (or any object exposing generate_content / generate_content_async)
+            contents: Prompt or contents list
+            **kwargs: generation_config, safety_settings, request_options, ...
+
+        Returns:
+            Provider response object
+        """
+        tokens = estimate_tokens(contents, _max_output_tokens(kwargs.get("generation_config")))
+        async with llm_scheduler.slot("gemini", tokens=tokens):
+            native_async = getattr(model, "generate_content_async", None)
+            if native_async is not None and asyncio.iscoroutinefunction(native_async):
+                return await native_async(contents, **kwargs)
+
+            logger.debug(f"Model {type(model).__name__} has no async surface - using LLM executor")
+            return await self.run_sync(model.generate_content, contents, **kwargs)
+
+    async def stream_content(self, model: Any, contents: Any, **kwargs) -> AsyncIterator[Any]:
+        """
+        Stream a google.generativeai GenerativeModel generation chunk by chunk
+
+        Args:
+            model: GenerativeModel
+            contents: Prompt or contents list
+            **kwargs: generation_config, safety_settings, request_options, ...
+
+        Yields:
+            Response chunks as the provider emits them (closing the generator
+            early releases the scheduler slot and drops the provider stream)
+        """
+        tokens = estimate_tokens(contents, _max_output_tokens(kwargs.get("generation_config")))
+        async with llm_scheduler.slot("gemini", tokens=tokens):
+            native_async = getattr(model, "generate_content_async", None)
+            if native_async is not None and asyncio.iscoroutinefunction(native_async):
+                response = await native_async(contents, stream=True, **kwargs)
+                async for chunk in response:
+                    yield chunk
+                return
+
+            # Sync-only model: no incremental delivery, surface the whole response as one chunk
+            yield await self.run_sync(model.generate_content, contents, **kwargs)
+
+    async def generate_genai_content(self, client: Any, **kwargs) -> Any:
+        """
+        Await a google.genai Client call (new SDK) without blocking the loop
+
+        Args:
+            client: google.genai.Client
+            **kwargs: model, contents, config
+
+        Returns:
+            GenerateContentResponse
+        """
+        tokens = estimate_tokens(kwargs.get("contents"), _max_output_tokens(kwargs.get("config")))
+        async with llm_scheduler.slot("gemini", tokens=tokens):
+            aio = getattr(client, "aio", None)
+            if aio is not None:
+                return await aio.models.generate_content(**kwargs)
+
+            return await self.run_sync(client.models.generate_content, **kwargs)
+
+    async def stream_genai_content(self, client: Any, **kwargs) -> AsyncIterator[Any]:
+        """
+        Stream a google.genai Client generation chunk by chunk (new SDK)
+
+        Args:
+            client: google.genai.Client
+            **kwargs: model, contents, config
+
+        Yields:
+            GenerateContentResponse chunks as the provider emits them
+        """
+        tokens = estimate_tokens(kwargs.get("contents"), _max_output_tokens(kwargs.get("config")))
+        async with llm_scheduler.slot("gemini", tokens=tokens):
+            aio = getattr(client, "aio", None)
+            if aio is not None:
+                stream = await aio.models.generate_content_stream(**kwargs)
+                try:
+                    async for chunk in stream:
+                        yield chunk
+                finally:
+                    # Consumer stopped early (validation abort, client gone) - close the HTTP stream
+                    close = getattr(stream, "aclose", None)
+                    if close is not None:
+                        await close()
+                return
+
+            # Sync-only client: no incremental delivery, surface the whole response as one chunk
+            yield await self.run_sync(client.models.generate_content, **kwargs)
+
+    async def chat_completion(self, client: Any, **kwargs) -> Any:
+        """
+        Scheduled OpenAI chat completion
+
+        Args:
+            client: openai.AsyncOpenAI
+            **kwargs: model, messages, max_tokens, temperature, ...
+
+        Returns:
+            ChatCompletion
+        """
+        tokens = estimate_tokens(kwargs.get("messages"), kwargs.get("max_tokens"))
+        async with llm_scheduler.slot("openai", tokens=tokens):
+            return await client.chat.completions.create(**kwargs)
+
+    def shutdown(self):
+        """Release executor threads (called on app shutdown)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Singleton instance
+llm_client = LLMClient()
@@ -0,0 +1,368 @@
+"""
+LLM Scheduler - Tier-aware fair scheduling for outbound model calls
+Every Gemini/OpenAI call waits here for a slot before it hits the provider
+
+WHY:
+    Nothing bounded concurrency, so bursts hit Gemini's quota (ResourceExhausted)
+    and one user's batch could starve everyone else.
+
+WHAT IT ENFORCES:
+    1. Provider quotas    → RPM and TPM token buckets per provider
+                            (GEMINI_RPM_LIMIT/GEMINI_TPM_LIMIT, OPENAI_RPM_LIMIT/OPENAI_TPM_LIMIT)
+    2. Provider capacity  → at most LLM_MAX_CONCURRENCY_PER_PROVIDER calls in flight
+    3. Per-user caps      → <TIER>_TIER_LLM_CONCURRENCY requests with calls in flight per user;
+                            once a request holds a slot its other calls (parallel sections,
+                            hedges, best-of-N candidates) join it without waiting on the cap
+    4. Fairness           → weighted fair queueing across users; each user's weight
+                            comes from their plan's hourly limit in Settings
+                            (sqrt-compressed so higher tiers get more, not everything)
+
+WHO IS CALLING:
+    `get_current_user` binds (user_id, plan) into a context variable for the
+    request, so services don't have to thread it through every call. Each
+    bind starts a new request for the per-user cap.
+
+METRICS:
+    Queue depth per provider/tier and wait-time histograms per tier at
+    /analytics/llm/scheduler.
+
+Usage:
+    from app.services.llm_scheduler import llm_scheduler
+
+    async with llm_scheduler.slot("gemini", tokens=estimated_tokens):
+        response = await model.generate_content_async(prompt)
+"""
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+
+from app.config import settings
+from app.constants import SubscriptionPlan, UsageLimits
+
+logger = logging.getLogger(__name__)
+
+# (user_id, subscription plan) of the request currently being served
+_current_caller: ContextVar[Optional[Tuple[str, str]]] = ContextVar("llm_caller", default=None)
+# Id of that request - calls sharing it count once against the per-user cap
+_current_request: ContextVar[Optional[int]] = ContextVar("llm_request", default=None)
+_request_ids = itertools.count(1)
+
+# Wait-time histogram bucket upper bounds (seconds)
+WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class TokenBucket:
+    """Refilling token bucket sized for a per-minute quota"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(max(per_minute, 1))
+        self.tokens = self.capacity
+        self.refill_rate = self.capacity / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_rate
+
+    def consume(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+
+@dataclass(order=True)
+class _Ticket:
+    """One queued call, ordered by weighted-fair-queueing finish tag"""
+    finish_tag: float
+    seq: int
+    user_key: str = field(compare=False)
+    tier: str = field(compare=False)
+    capped: bool = field(compare=False)
+    request_id: Optional[int] = field(compare=False)
+    tokens: int = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+
+class _ProviderState:
+    """Queue, buckets and in-flight count for one provider"""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.queue: List[_Ticket] = []
+        self.active = 0
+        self.rpm = TokenBucket(rpm)
+        self.tpm = TokenBucket(tpm)
+        self.virtual_time = 0.0
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.max_depth = 0
+        self.dispatched = 0
+
+
+class LLMScheduler:
+    """
+    Weighted fair queueing + rate limiting in front of every provider call (singleton pattern)
+    """
+    _instance: Optional['LLMScheduler'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._setup()
+        return cls._instance
+
+    def _setup(self):
+        """Initialize provider queues (runs once per process, and on reset)"""
+        self._providers: Dict[str, _ProviderState] = {
+            "gemini": _ProviderState(settings.GEMINI_RPM_LIMIT, settings.GEMINI_TPM_LIMIT),
+            "openai": _ProviderState(settings.OPENAI_RPM_LIMIT, settings.OPENAI_TPM_LIMIT),
+        }
+        # user → {request id → calls in flight}
+        self._user_active: Dict[str, Dict[int, int]] = {}
+        self._flow_finish: Dict[str, float] = {}
+        self._seq = itertools.count()
+        self.reset_stats()
+
+    def reset(self):
+        """Drop queues and counters (tests)"""
+        self._setup()
+
+    def reset_stats(self):
+        """Zero wait histograms"""
+        self._wait_histograms: Dict[str, List[int]] = {}
+        self._wait_totals: Dict[str, List[float]] = {}
+
+    # ==================== CALLER CONTEXT ====================
+
+    @staticmethod
+    def bind_caller(user_id: Optional[str], plan: Optional[str]):
+        """Attribute LLM calls made while serving this request to a user and plan"""
+        if user_id:
+            _current_caller.set((user_id, plan or SubscriptionPlan.FREE))
+            _current_request.set(next(_request_ids))
+
+    @staticmethod
+    def current_caller() -> Optional[Tuple[str, str]]:
+        return _current_caller.get()
+
+    # ==================== TIER POLICY ====================
+
+    @staticmethod
+    def tier_weight(tier: str) -> float:
+        """Fair-share weight from the plan's hourly limit, relative to free (sqrt-compressed)"""
+        hourly = {
+            SubscriptionPlan.FREE: settings.FREE_TIER_LIMIT_HOURLY,
+            SubscriptionPlan.HOBBY: settings.HOBBY_TIER_LIMIT_HOURLY,
+            SubscriptionPlan.PRO: settings.PRO_TIER_LIMIT_HOURLY,
+            SubscriptionPlan.ENTERPRISE: UsageLimits.ENTERPRISE_HOURLY,
+        }
+        base = max(settings.FREE_TIER_LIMIT_HOURLY, 1)
+        return math.sqrt(max(hourly.get(tier, base), 1) / base)
+
+    @staticmethod
+    def tier_concurrency(tier: str) -> int:
+        """Max requests per user on this plan with model calls in flight"""
+        caps = {
+            SubscriptionPlan.FREE: settings.FREE_TIER_LLM_CONCURRENCY,
+            SubscriptionPlan.HOBBY: settings.HOBBY_TIER_LLM_CONCURRENCY,
+            SubscriptionPlan.PRO: settings.PRO_TIER_LLM_CONCURRENCY,
+            SubscriptionPlan.ENTERPRISE: settings.ENTERPRISE_TIER_LLM_CONCURRENCY,
+        }
+        return caps.get(tier, settings.FREE_TIER_LLM_CONCURRENCY)
+
+    # ==================== SLOTS ====================
+
+    @asynccontextmanager
+    async def slot(self, provider: str, tokens: int = 1) -> AsyncIterator[None]:
+        """
+        Hold one provider slot for the duration of a model call
+
+        Args:
+            provider: "gemini" or "openai"
+            tokens: Estimated prompt + completion tokens (charged to the TPM bucket)
+        """
+        if not settings.LLM_SCHEDULER_ENABLED:
+            yield
+            return
+
+        ticket = await self._acquire(provider, max(int(tokens), 1))
+        try:
+            yield
+        finally:
+            self._release(provider, ticket)
+
+    async def _acquire(self, provider: str, tokens: int) -> _Ticket:
+        state = self._providers[provider]
+        caller = _current_caller.get()
+        user_key, tier = caller if caller else ("anonymous", SubscriptionPlan.FREE)
+
+        # Start-time fair queueing: a flow's next tag starts where its last one finished
+        start_tag = max(state.virtual_time, self._flow_finish.get(user_key, 0.0))
+        finish_tag = start_tag + tokens / self.tier_weight(tier)
+        self._flow_finish[user_key] = finish_tag
+        if len(self._flow_finish) > 10_000:
+            self._flow_finish = {k: v for k, v in self._flow_finish.items() if v > state.virtual_time}
+
+        ticket = _Ticket(
+            finish_tag=finish_tag,
+            seq=next(self._seq),
+            user_key=user_key,
+            tier=tier,
+            capped=caller is not None,
+            request_id=_current_request.get(),
+            tokens=tokens,
+            future=asyncio.get_running_loop().create_future(),
+            enqueued_at=time.monotonic()
+        )
+        heapq.heappush(state.queue, ticket)
+        state.max_depth = max(state.max_depth, len(state.queue))
+        self._dispatch(provider)
+
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.future.done() and not ticket.future.cancelled():
+                # Granted right before cancellation - hand the slot back
+                self._release(provider, ticket)
+            else:
+                self._remove(state, ticket)
+            raise
+        return ticket
+
+    def _release(self, provider: str, ticket: _Ticket):
+        state = self._providers[provider]
+        state.active -= 1
+        if ticket.capped:
+            requests = self._user_active.get(ticket.user_key, {})
+            remaining = requests.get(ticket.request_id, 1) - 1
+            if remaining > 0:
+                requests[ticket.request_id] = remaining
+            else:
+                requests.pop(ticket.request_id, None)
+            if not requests:
+                self._user_active.pop(ticket.user_key, None)
+        # A freed user slot can unblock tickets on any provider
+        for name in self._providers:
+            self._dispatch(name)
+
+    def _remove(self, state: _ProviderState, ticket: _Ticket):
+        if ticket in state.queue:
+            state.queue.remove(ticket)
+            heapq.heapify(state.queue)
+
+    def _dispatch(self, provider: str):
+        """Grant slots in finish-tag order while capacity, user caps and quotas allow"""
+        state = self._providers[provider]
+        while state.queue and state.active < settings.LLM_MAX_CONCURRENCY_PER_PROVIDER:
+            ticket = None
+            for candidate in sorted(state.queue):
+                if candidate.future.done():
+                    continue
+                if candidate.capped and not self._admitted(candidate):
+                    continue
+                ticket = candidate
+                break
+            state.queue = [t for t in state.queue if not t.future.done()]
+            heapq.heapify(state.queue)
+            if ticket is None:
+                return
+
+            now = time.monotonic()
+            wait = max(state.rpm.wait_time(1, now), state.tpm.wait_time(ticket.tokens, now))
+            if wait > 0:
+                if state.timer is None:
+                    state.timer = asyncio.get_running_loop().call_later(wait, self._on_timer, provider)
+                return
+
+            state.rpm.consume(1)
+            state.tpm.consume(ticket.tokens)
+            self._remove(state, ticket)
+            state.active += 1
+            state.dispatched += 1
+            state.virtual_time = max(state.virtual_time, ticket.finish_tag)
+            if ticket.capped:
+                requests = self._user_active.setdefault(ticket.user_key, {})
+                requests[ticket.request_id] = requests.get(ticket.request_id, 0) + 1
+            self._record_wait(ticket.tier, now - ticket.enqueued_at)
+            ticket.future.set_result(None)
+
+    def _admitted(self, ticket: _Ticket) -> bool:
+        """True if the ticket's request already holds a slot or its user is under the cap"""
+        requests = self._user_active.get(ticket.user_key, {})
+        return ticket.request_id in requests or len(requests) < self.tier_concurrency(ticket.tier)
+
+    def _on_timer(self, provider: str):
+        self._providers[provider].timer = None
+        self._dispatch(provider)
+
+    # ==================== METRICS ====================
+
+    def _record_wait(self, tier: str, seconds: float):
+        histogram = self._wait_histograms.setdefault(tier, [0] * (len(WAIT_BUCKETS) + 1))
+        for i, bound in enumerate(WAIT_BUCKETS):
+            if seconds <= bound:
+                histogram[i] += 1
+                break
+        else:
+            histogram[-1] += 1
+        totals = self._wait_totals.setdefault(tier, [0, 0.0])
+        totals[0] += 1
+        totals[1] += seconds
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth, in-flight calls, bucket levels and wait histograms"""
+        providers = {}
+        for name, state in self._providers.items():
+            depth_by_tier: Dict[str, int] = {}
+            for ticket in state.queue:
+                if not ticket.future.done():
+                    depth_by_tier[ticket.tier] = depth_by_tier.get(ticket.tier, 0) + 1
+            now = time.monotonic()
+            state.rpm.wait_time(0, now)
+            state.tpm.wait_time(0, now)
+            providers[name] = {
+                "queue_depth": sum(depth_by_tier.values()),
+                "queue_depth_by_tier": depth_by_tier,
+                "max_queue_depth": state.max_depth,
+                "active": state.active,
+                "dispatched": state.dispatched,
+                "rpm_available": int(state.rpm.tokens),
+                "tpm_available": int(state.tpm.tokens)
+            }
+
+        bucket_labels = [f"le_{bound}" for bound in WAIT_BUCKETS] + ["le_inf"]
+        wait_times = {}
+        for tier, histogram in self._wait_histograms.items():
+            count, total = self._wait_totals[tier]
+            wait_times[tier] = {
+                "histogram": dict(zip(bucket_labels, histogram)),
+                "count": count,
+                "avg_wait_seconds": round(total / count, 4) if count else 0
+            }
+
+        return {
+            "enabled": settings.LLM_SCHEDULER_ENABLED,
+            "providers": providers,
+            "active_users": len(self._user_active),
+            "wait_times": wait_times,
+            "tier_weights": {
+                tier: round(self.tier_weight(tier), 2)
+                for tier in (SubscriptionPlan.FREE, SubscriptionPlan.HOBBY, SubscriptionPlan.PRO, SubscriptionPlan.ENTERPRISE)
+            }
+        }
+
+
+# Singleton instance
+llm_scheduler = LLMScheduler()
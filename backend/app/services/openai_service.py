@@ -15,9 +15,8 @@ Decision: Gemini 2.0 Flash chosen for:
 See backend/AI_MODELS_CONFIG.md for full analysis
 Updated: November 25, 2025
 """
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator, Awaitable, Callable
 import asyncio
-from openai import AsyncOpenAI
 from openai import (
     APIError as OpenAIAPIError,
     RateLimitError as OpenAIRateLimitError,
@@ -31,8 +30,18 @@ from google.api_core import exceptions as google_exceptions
 from app.config import settings
 from app.utils.cache_manager import cache_manager
 from app.utils.quality_scorer import quality_scorer, QualityScore
+from app.utils.json_stream import IncrementalJSONParser, SchemaStreamValidator, StreamValidationError
 from app.services.gemini_quality_analyzer import GeminiQualityAnalyzer, AIQualityAnalysis
 from app.services.smart_fact_checker import SmartFactChecker, FactCheckResult
+from app.services.llm_client import llm_client
+from app.services.client_registry import client_registry
+from app.services.hedging import hedge_policy
+from app.services.circuit_breaker import circuit_breakers
+from app.services.single_flight import single_flight
+from app.services.context_cache import context_cache
+from app.services.token_budget import token_estimator
+from app.utils.semantic_cache import semantic_cache
+from app.utils.sse import emit, suppress_events
 from app.exceptions import (
     AIServiceError,
     RateLimitError,
@@ -46,10 +55,20 @@ from app.exceptions import (
 import logging
 import json
 import time
-from typing import Tuple
+from typing import Tuple, Type
+from contextlib import aclosing
+from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
 
+# System prompts that don't depend on the request (content type → prompt).
+# Their Gemini context caches are pre-created at startup (see prewarm_context_caches)
+STATIC_SYSTEM_PROMPTS: Dict[str, str] = {
+    "product": "You are an e-commerce copywriting expert. Always return valid JSON.",
+    "ad": "You are a conversion copywriting expert. Always return valid JSON.",
+    "generic": "You are a content quality analyst. Always return valid JSON.",
+}
+
 # ==================== HELPER FUNCTIONS ====================
 
 # NOTE: clean_json_response() was removed - now using Gemini's native response_schema
@@ -106,7 +125,9 @@ def calculate_max_tokens(target_word_count: int) -> int:
 def get_generation_config_for_word_count(
     word_count: int,
     tone: str,
-    response_schema: Optional[Dict[str, Any]] = None
+    response_schema: Optional[Dict[str, Any]] = None,
+    content_type: str = "blog",
+    model_name: Optional[str] = None
 ) -> Tuple[Dict[str, Any], int]:
     """
     Get optimized GenerationConfig parameters based on word count and tone
@@ -115,12 +136,16 @@ def get_generation_config_for_word_count(
         word_count: Target word count
         tone: Content tone (professional, casual, friendly, humorous, etc.)
         response_schema: Optional JSON schema for structured output
+        content_type: Content type the budget is learned for
+        model_name: Generating model (enables the adaptive token budget)
     
     Returns:
         Tuple of (config_dict, max_tokens)
     """
-    # Calculate optimal token limit
+    # Calculate optimal token limit (learned from observed outputs once enough exist)
     max_tokens = calculate_max_tokens(word_count)
+    if model_name:
+        max_tokens = token_estimator.max_tokens(content_type, tone, word_count, model_name, default=max_tokens)
     
     # Phase 2: Enhanced tone-specific configurations with top_k
     # NOTE: presence_penalty and frequency_penalty are NOT supported by gemini-2.5-flash
@@ -256,7 +281,8 @@ PRIMARY KEYWORD: \"{primary}\"
 """
     
     if secondary:
-        context += f"\nSECONDARY KEYWORDS: {', '.join(f'\"{k}\"' for k in secondary)}"
+        quoted_secondary = ', '.join(f'"{k}"' for k in secondary)
+        context += f"\nSECONDARY KEYWORDS: {quoted_secondary}"
         context += "\n- Use each 1-2 times naturally"
         context += "\n- Weave into content seamlessly\n"
     
@@ -480,6 +506,9 @@ class OpenAIService:
     """
     _instance: Optional['OpenAIService'] = None
     
+    # Top-level BlogPostOutput fields surfaced as their own SSE events while streaming
+    BLOG_STREAM_FIELDS = ('title', 'metaDescription', 'introduction', 'conclusion', 'wordCount')
+    
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
@@ -487,21 +516,17 @@ class OpenAIService:
     
     def __init__(self):
         # PRIMARY: Gemini 2.5 Flash - Use this by default
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.gemini_model = genai.GenerativeModel(settings.PRIMARY_TEXT_MODEL)
-        self.gemini_premium_model = genai.GenerativeModel(settings.PREMIUM_TEXT_MODEL)
+        # Models and clients are long-lived and pooled process-wide (see client_registry)
+        self.gemini_model = client_registry.get_generative_model(settings.PRIMARY_TEXT_MODEL)
+        self.gemini_premium_model = client_registry.get_generative_model(settings.PREMIUM_TEXT_MODEL)
         
         # FALLBACK: OpenAI GPT-4o-mini - Use only on errors or quality issues
-        self.openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.openai_client = client_registry.get_openai_client()
         self.openai_model = settings.FALLBACK_TEXT_MODEL
         
         # NOTE: Removed self.use_fallback - now handled per-request in _generate_with_ai
         # This prevents persistent fallback state across requests
         
-        # Gemini cached system prompts (90% discount after 7-day TTL)
-        # These are reused across all generations of the same content type
-        self._cached_system_prompts: Dict[str, Any] = {}
-        
         # AI-powered quality enhancement (Gemini 2.0 Flash + Google Custom Search)
         # Cost: ~$0.0001 per analysis (grammar, style, tone, engagement)
         # Optional fact-checking: ~$0.0005 per check (only for important content)
@@ -554,6 +579,218 @@ class OpenAIService:
         # Free/Hobby tiers always use standard model
         return False
     
+    @staticmethod
+    def _best_of_n_count(user_tier: Optional[str]) -> int:
+        """
+        Number of parallel candidates a tier may generate (1 = serial regenerate path)
+        
+        Args:
+            user_tier: Subscription tier (defaults to the plan bound for this request)
+            
+        Returns:
+            Candidate count capped by <TIER>_TIER_BEST_OF_N
+        """
+        if not settings.BEST_OF_N_ENABLED:
+            return 1
+        
+        from app.constants import SubscriptionPlan
+        from app.services.llm_scheduler import llm_scheduler
+        if user_tier is None:
+            caller = llm_scheduler.current_caller()
+            user_tier = caller[1] if caller else None
+        caps = {
+            SubscriptionPlan.FREE: settings.FREE_TIER_BEST_OF_N,
+            SubscriptionPlan.HOBBY: settings.HOBBY_TIER_BEST_OF_N,
+            SubscriptionPlan.PRO: settings.PRO_TIER_BEST_OF_N,
+            SubscriptionPlan.ENTERPRISE: settings.ENTERPRISE_TIER_BEST_OF_N,
+        }
+        return max(1, caps.get(user_tier or SubscriptionPlan.FREE, settings.FREE_TIER_BEST_OF_N))
+    
+    @staticmethod
+    def _quality_text(result: Dict[str, Any], content_type: str) -> str:
+        """Text the quality scorer sees (JSON outputs: their content field)"""
+        try:
+            if content_type in ['blog', 'email', 'product', 'ad']:
+                # JSON output - extract content field
+                output = json.loads(result['content'])
+                return output.get('content', '') or str(output)
+            # Direct text
+            return result['content']
+        except (json.JSONDecodeError, KeyError, AttributeError) as e:
+            # If JSON parsing fails, use raw content
+            logger.debug(f"JSON parsing failed for quality check: {e}")
+            return result['content']
+    
+    async def _generate_best_of_n(
+        self,
+        candidate: Callable[[bool], Awaitable[Dict[str, Any]]],
+        n: int,
+        use_premium: bool,
+        content_type: str,
+        user_prompt: str,
+        user_id: Optional[str],
+        metadata: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], QualityScore]:
+        """
+        Race N candidates; the first to clear GOOD_THRESHOLD wins, the rest are cancelled
+        
+        Replaces "generate, score, regenerate with premium" (two serial model
+        calls for unlucky requests) with one round trip. When no candidate
+        clears the bar, the best-scoring one is returned. Candidates belong
+        to the caller's request, so the per-user LLM cap doesn't serialize them.
+        
+        Args:
+            candidate: Coroutine factory (use_premium) -> generation result, uncached
+            n: Number of candidates
+            use_premium: Model for the first candidate
+            content_type: Type of content for quality scoring
+            user_prompt: User request (cache key)
+            user_id: User ID for caching/coalescing
+            metadata: Metadata for quality scoring
+            
+        Returns:
+            (winning result with best_of_n details, its quality score)
+        """
+        if user_id and settings.ENABLE_CACHE:
+            cached_result = await cache_manager.get_cached_generation(
+                content_type=content_type,
+                prompt=user_prompt,
+                user_id=user_id
+            )
+            if cached_result:
+                logger.info(f"💾 Cache HIT: Returning cached {content_type} generation")
+                cached_result['cached'] = True
+                return cached_result, quality_scorer.score_content(
+                    content=self._quality_text(cached_result, content_type),
+                    content_type=content_type,
+                    metadata=metadata
+                )
+        
+        # Requested model first; the last candidate upgrades to premium (what a regenerate would use)
+        models = [use_premium] * n
+        if settings.BEST_OF_N_MIX_PREMIUM and n > 1:
+            models[-1] = True
+        
+        async def run_candidate(index: int, premium: bool):
+            # Interleaved candidates would garble a streamed response; the winner is sent whole
+            suppress_events()
+            return index, premium, await candidate(premium)
+        
+        async def race() -> Dict[str, Any]:
+            start_time = time.time()
+            tasks = [asyncio.create_task(run_candidate(i, premium)) for i, premium in enumerate(models)]
+            best = None
+            completed = 0
+            last_error: Optional[Exception] = None
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    try:
+                        index, premium, result = await next_done
+                    except Exception as e:
+                        last_error = e
+                        logger.warning(f"⚠️ Best-of-{n} candidate failed: {e}")
+                        continue
+                    
+                    completed += 1
+                    score = quality_scorer.score_content(
+                        content=self._quality_text(result, content_type),
+                        content_type=content_type,
+                        metadata=metadata
+                    )
+                    logger.info(f"🎯 Best-of-{n} candidate {index} ({result.get('model')}): {score.overall:.2f}")
+                    if best is None or score.overall > best[3].overall:
+                        best = (index, premium, result, score)
+                    if score.overall >= quality_scorer.GOOD_THRESHOLD:
+                        break
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+            
+            if best is None:
+                raise last_error or AIServiceError("All best-of-N candidates failed", "AI")
+            
+            index, premium, result, score = best
+            result['best_of_n'] = {
+                'candidates': n,
+                'completed': completed,
+                'winner': index,
+                'winner_premium': premium,
+                'cleared_threshold': score.overall >= quality_scorer.GOOD_THRESHOLD,
+                'latency_ms': round((time.time() - start_time) * 1000, 1)
+            }
+            logger.info(f"🏁 Best-of-{n}: candidate {index} won with {score.overall:.2f} after {completed} scored")
+            
+            if user_id and settings.ENABLE_CACHE:
+                await cache_manager.cache_generation(
+                    content_type=content_type,
+                    prompt=user_prompt,
+                    result=result,
+                    user_id=user_id,
+                    ttl=settings.CACHE_TTL_GENERATIONS
+                )
+            return result
+        
+        if user_id:
+            # Identical request already racing (double-click, client retry) - share its winner
+            result = await single_flight.run(
+                cache_manager.generation_cache_key(content_type, user_prompt, user_id),
+                race
+            )
+        else:
+            result = await race()
+        
+        # Scoring is deterministic and cheap - rescoring gives the caller the score object
+        return result, quality_scorer.score_content(
+            content=self._quality_text(result, content_type),
+            content_type=content_type,
+            metadata=metadata
+        )
+    
+    async def _apply_ai_analysis(
+        self,
+        result: Dict[str, Any],
+        quality_score: QualityScore,
+        content_text: str,
+        content_type: str,
+        metadata: Dict[str, Any]
+    ):
+        """
+        AI-powered deep analysis (optional, ~$0.0001 per analysis)
+        Blends the AI grammar score into quality_score and sets result['ai_analysis']
+        """
+        if not (self.ai_analysis_enabled and self.ai_analyzer):
+            result['ai_analysis'] = None
+            return
+        
+        try:
+            ai_analysis = await self.ai_analyzer.analyze_quality(
+                content=content_text,
+                content_type=content_type,
+                metadata=metadata
+            )
+            
+            # Blend AI scores with basic scores (50/50 weight for grammar)
+            # Keep other scores from basic analysis (they're reliable)
+            original_grammar = quality_score.grammar
+            quality_score.grammar = (original_grammar * 0.5 + ai_analysis.grammar_score * 0.5)
+            
+            # Add AI analysis to result for API response
+            result['ai_analysis'] = {
+                'grammar_score': ai_analysis.grammar_score,
+                'style_score': ai_analysis.style_score,
+                'tone_score': ai_analysis.tone_score,
+                'engagement_score': ai_analysis.engagement_score,
+                'overall_ai_score': ai_analysis.overall_ai_score,
+                'improvements': ai_analysis.improvements,
+                'strengths': ai_analysis.strengths
+            }
+            
+            logger.info(f"✨ AI Analysis: {ai_analysis.overall_ai_score:.2f} (grammar: {ai_analysis.grammar_score:.2f}, style: {ai_analysis.style_score:.2f}, tone: {ai_analysis.tone_score:.2f})")
+        except Exception as e:
+            logger.error(f"AI analysis failed (using basic scores only): {e}")
+            result['ai_analysis'] = None
+    
     async def _generate_with_quality_check_v2(
         self,
         system_prompt: str,
@@ -563,7 +800,8 @@ class OpenAIService:
         content_type: str,
         user_id: Optional[str],
         metadata: Optional[Dict[str, Any]] = None,
-        max_regenerations: int = 1
+        max_regenerations: int = 1,
+        user_tier: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Generate content with quality checking and new generation_config dict
@@ -578,6 +816,30 @@ class OpenAIService:
         current_use_premium = use_premium
         max_tokens = generation_config.get('max_output_tokens', 4000)
         
+        # Best-of-N: race candidates instead of regenerating serially
+        candidates = self._best_of_n_count(user_tier)
+        if candidates > 1:
+            result, quality_score = await self._generate_best_of_n(
+                lambda premium: self._generate_with_ai_v2(
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt,
+                    generation_config=generation_config,
+                    use_premium=premium,
+                    content_type=content_type,
+                    user_tier=user_tier
+                ),
+                n=candidates,
+                use_premium=use_premium,
+                content_type=content_type,
+                user_prompt=user_prompt,
+                user_id=user_id,
+                metadata=metadata
+            )
+            await self._apply_ai_analysis(result, quality_score, self._quality_text(result, content_type), content_type, metadata)
+            result['quality_score'] = quality_score.to_dict()
+            result['regeneration_count'] = 0
+            return result
+        
         while attempts <= max_regenerations:
             attempts += 1
             
@@ -588,19 +850,12 @@ class OpenAIService:
                 generation_config=generation_config,
                 use_premium=current_use_premium,
                 content_type=content_type,
-                user_id=user_id
+                user_id=user_id,
+                user_tier=user_tier
             )
             
             # Parse content for quality check
-            try:
-                if content_type in ['blog', 'email', 'product', 'ad']:
-                    output = json.loads(result['content'])
-                    content_text = output.get('content', '') or str(output)
-                else:
-                    content_text = result['content']
-            except (json.JSONDecodeError, KeyError) as e:
-                logger.debug(f"JSON parsing failed for quality check: {e}")
-                content_text = result['content']
+            content_text = self._quality_text(result, content_type)
             
             # Phase 1: Basic quality scoring (regex-based - fast and free)
             quality_score = quality_scorer.score_content(
@@ -610,37 +865,7 @@ class OpenAIService:
             )
             
             # Phase 2: AI-powered deep analysis (optional, ~$0.0001 per analysis)
-            ai_analysis = None
-            if self.ai_analysis_enabled and self.ai_analyzer:
-                try:
-                    ai_analysis = await self.ai_analyzer.analyze_quality(
-                        content=content_text,
-                        content_type=content_type,
-                        metadata=metadata
-                    )
-                    
-                    # Blend AI scores with basic scores (50/50 weight for grammar)
-                    # Keep other scores from basic analysis (they're reliable)
-                    original_grammar = quality_score.grammar
-                    quality_score.grammar = (original_grammar * 0.5 + ai_analysis.grammar_score * 0.5)
-                    
-                    # Add AI analysis to result for API response
-                    result['ai_analysis'] = {
-                        'grammar_score': ai_analysis.grammar_score,
-                        'style_score': ai_analysis.style_score,
-                        'tone_score': ai_analysis.tone_score,
-                        'engagement_score': ai_analysis.engagement_score,
-                        'overall_ai_score': ai_analysis.overall_ai_score,
-                        'improvements': ai_analysis.improvements,
-                        'strengths': ai_analysis.strengths
-                    }
-                    
-                    logger.info(f"✨ AI Analysis: {ai_analysis.overall_ai_score:.2f} (grammar: {ai_analysis.grammar_score:.2f}, style: {ai_analysis.style_score:.2f}, tone: {ai_analysis.tone_score:.2f})")
-                except Exception as e:
-                    logger.error(f"AI analysis failed (using basic scores only): {e}")
-                    result['ai_analysis'] = None
-            else:
-                result['ai_analysis'] = None
+            await self._apply_ai_analysis(result, quality_score, content_text, content_type, metadata)
             
             logger.info(f"Quality score: {quality_score.overall:.2f} (grade: {quality_score._get_grade()}) - Attempt {attempts}")
             
@@ -676,7 +901,8 @@ class OpenAIService:
         content_type: str,
         user_id: Optional[str],
         metadata: Optional[Dict[str, Any]] = None,
-        max_regenerations: int = 1
+        max_regenerations: int = 1,
+        user_tier: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Generate content with automatic quality checking and regeneration
@@ -692,6 +918,7 @@ class OpenAIService:
             user_id: User ID for caching
             metadata: Metadata for quality scoring (keywords, target_length, etc.)
             max_regenerations: Maximum number of regeneration attempts
+            user_tier: Subscription tier (hedge budget)
         
         Returns:
             Generation result with quality score
@@ -700,6 +927,29 @@ class OpenAIService:
         attempts = 0
         current_use_premium = use_premium
         
+        # Best-of-N: race candidates instead of regenerating serially
+        candidates = self._best_of_n_count(user_tier)
+        if candidates > 1:
+            result, quality_score = await self._generate_best_of_n(
+                lambda premium: self._generate_with_ai(
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt,
+                    max_tokens=max_tokens,
+                    use_premium=premium,
+                    content_type=content_type,
+                    user_tier=user_tier
+                ),
+                n=candidates,
+                use_premium=use_premium,
+                content_type=content_type,
+                user_prompt=user_prompt,
+                user_id=user_id,
+                metadata=metadata
+            )
+            result['quality_score'] = quality_score.to_dict()
+            result['regeneration_count'] = 0
+            return result
+        
         while attempts <= max_regenerations:
             attempts += 1
             
@@ -710,22 +960,12 @@ class OpenAIService:
                 max_tokens=max_tokens,
                 use_premium=current_use_premium,
                 content_type=content_type,
-                user_id=user_id
+                user_id=user_id,
+                user_tier=user_tier
             )
             
             # Parse content for quality check
-            try:
-                if content_type in ['blog', 'email', 'product', 'ad']:
-                    # JSON output - extract content field
-                    output = json.loads(result['content'])
-                    content_text = output.get('content', '') or str(output)
-                else:
-                    # Direct text
-                    content_text = result['content']
-            except (json.JSONDecodeError, KeyError) as e:
-                # If JSON parsing fails, use raw content
-                logger.debug(f"JSON parsing failed for quality check: {e}")
-                content_text = result['content']
+            content_text = self._quality_text(result, content_type)
             
             # Score quality
             quality_score = quality_scorer.score_content(
@@ -760,10 +1000,11 @@ class OpenAIService:
         result['regeneration_count'] = attempts - 1
         return result
     
-    def _get_cached_system_content(self, content_type: str, system_prompt: str, use_premium: bool = False) -> Optional[Any]:
+    async def _get_cached_system_content(self, content_type: str, system_prompt: str, use_premium: bool = False) -> Optional[Any]:
         """
         Get or create cached system prompt for Gemini
-        Gemini prompt caching provides 90% discount on cached tokens
+        Gemini prompt caching provides 90% discount on cached tokens.
+        Handles are shared across workers and restarts (see context_cache).
         
         Args:
             content_type: Type of content (blog, social, etc.)
@@ -776,30 +1017,22 @@ class OpenAIService:
         if not settings.ENABLE_PROMPT_CACHING:
             return None
         
-        cache_key = f"{content_type}_{'premium' if use_premium else 'standard'}"
-        
-        # Return existing cached prompt if available
-        if cache_key in self._cached_system_prompts:
-            logger.debug(f"💾 Using cached system prompt for {cache_key}")
-            return self._cached_system_prompts[cache_key]
+        model_name = settings.PREMIUM_TEXT_MODEL if use_premium else settings.PRIMARY_TEXT_MODEL
+        return await context_cache.get(content_type, system_prompt, model_name)
+    
+    async def prewarm_context_caches(self) -> int:
+        """
+        Create Gemini caches for the static system prompts (lifespan startup)
         
-        # Create new cached content for Gemini
-        try:
-            cached_content = genai.caching.CachedContent.create(
-                model=settings.PREMIUM_TEXT_MODEL if use_premium else settings.PRIMARY_TEXT_MODEL,
-                contents=[{
-                    'role': 'user',
-                    'parts': [{'text': system_prompt}]
-                }],
-                ttl=settings.CACHE_TTL_SYSTEM_PROMPTS,  # 7 days
-                display_name=f"{content_type}_system_prompt"
-            )
-            self._cached_system_prompts[cache_key] = cached_content
-            logger.info(f"✅ Created Gemini cached prompt for {cache_key} (90% discount for 7 days)")
-            return cached_content
-        except Exception as e:
-            logger.warning(f"⚠️ Failed to create Gemini cache for {cache_key}: {e}")
-            return None
+        Returns:
+            Number of caches ready
+        """
+        if not settings.ENABLE_PROMPT_CACHING or not settings.CONTEXT_CACHE_PREWARM_ON_STARTUP:
+            return 0
+        return await context_cache.prewarm(
+            (content_type, system_prompt, settings.PRIMARY_TEXT_MODEL)
+            for content_type, system_prompt in STATIC_SYSTEM_PROMPTS.items()
+        )
     
     async def _generate_with_ai(
         self, 
@@ -808,14 +1041,16 @@ class OpenAIService:
         max_tokens: int = 2000,
         use_premium: bool = False,
         content_type: str = "generic",
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        user_tier: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Generate content with AI
         PRIMARY: Gemini 2.0 Flash (default) - 75% cheaper, excellent quality
-        FALLBACK: GPT-4o-mini (on errors only)
+        FALLBACK: GPT-4o-mini (on errors, or hedged when Gemini is unusually slow)
         PREMIUM: Gemini 2.5 Flash (Enterprise tier, complex content)
         CACHING: Redis for generations + Gemini prompt caching (90% discount)
+        COALESCING: identical in-flight requests share one model call (single-flight)
         
         Args:
             system_prompt: System instructions for the model
@@ -824,6 +1059,7 @@ class OpenAIService:
             use_premium: If True, use premium model (Gemini 2.5 Flash)
             content_type: Type of content for caching
             user_id: User ID for personalized caching
+            user_tier: Subscription tier (hedge budget)
         
         Returns:
             Dict with content, tokens used, model name, and cache stats
@@ -831,7 +1067,7 @@ class OpenAIService:
         # Check Redis cache first for identical generations
         cache_key = None
         if user_id and settings.ENABLE_CACHE:
-            cached_result = cache_manager.get_cached_generation(
+            cached_result = await cache_manager.get_cached_generation(
                 content_type=content_type,
                 prompt=user_prompt,
                 user_id=user_id
@@ -843,141 +1079,179 @@ class OpenAIService:
         
         start_time = time.time()
         
-        # Try PRIMARY model first (Gemini 2.5 Flash)
-        try:
-            # Select model based on premium flag
-            model_name = settings.PREMIUM_TEXT_MODEL if use_premium else settings.PRIMARY_TEXT_MODEL
-            
-            # Get cached system prompt (90% discount)
-            cached_system = self._get_cached_system_content(
-                content_type=content_type,
-                system_prompt=system_prompt,
-                use_premium=use_premium
-            )
-            
-            # Generate with Gemini using cached system prompt
-            if cached_system:
-                # Use model with cached system prompt
-                model = genai.GenerativeModel.from_cached_content(cached_system)
-                response = model.generate_content(
-                    user_prompt,
-                    generation_config=genai.types.GenerationConfig(
-                        max_output_tokens=max_tokens,
-                        temperature=0.7,
-                    )
+        model_name = settings.PREMIUM_TEXT_MODEL if use_premium else settings.PRIMARY_TEXT_MODEL
+        
+        async def call_primary() -> Optional[Dict[str, Any]]:
+            """PRIMARY model (Gemini); returns None when the error warrants the OpenAI fallback"""
+            try:
+                # Get cached system prompt (90% discount)
+                cached_system = await self._get_cached_system_content(
+                    content_type=content_type,
+                    system_prompt=system_prompt,
+                    use_premium=use_premium
                 )
-            else:
-                # Fallback to regular generation without caching
-                model = self.gemini_premium_model if use_premium else self.gemini_model
-                full_prompt = f"{system_prompt}\n\n{user_prompt}"
-                response = model.generate_content(
-                    full_prompt,
-                    generation_config=genai.types.GenerationConfig(
-                        max_output_tokens=max_tokens,
-                        temperature=0.7,
-                    )
+                
+                # Generate with Gemini using cached system prompt
+                if cached_system:
+                    # Use model with cached system prompt
+                    model = client_registry.get_cached_model(cached_system)
+                    prompt = user_prompt
+                else:
+                    # Fallback to regular generation without caching
+                    model = self.gemini_premium_model if use_premium else self.gemini_model
+                    prompt = f"{system_prompt}\n\n{user_prompt}"
+                
+                # Streamed through the JSON validator: malformed output is cancelled and
+                # regenerated mid-response; markdown fences around the object are dropped
+                parser, _ = await self._stream_validated_json(
+                    lambda: llm_client.stream_content(
+                        model,
+                        prompt,
+                        generation_config=genai.types.GenerationConfig(
+                            max_output_tokens=max_tokens,
+                            temperature=0.7,
+                        )
+                    ),
+                    label=content_type
                 )
-            
-            # Clean response (remove markdown code blocks if present)
-            content = response.text.strip()
-            
-            # Extract JSON from markdown code blocks
-            if '```json' in content:
-                start = content.find('```json') + 7
-                end = content.find('```', start)
-                if end > start:
-                    content = content[start:end].strip()
-            elif '```' in content:
-                start = content.find('```') + 3
-                end = content.find('```', start)
-                if end > start:
-                    content = content[start:end].strip()
-            
-            # Additional cleanup - find first { and last }
-            if '{' in content and '}' in content:
-                first_brace = content.find('{')
-                last_brace = content.rfind('}')
-                content = content[first_brace:last_brace + 1]
-            
-            generation_time = time.time() - start_time
-            logger.info(f"✅ Generated with {model_name} in {generation_time:.2f}s (cached_prompt: {cached_system is not None})")
-            
-            result = {
-                'content': content,
-                'tokensUsed': 0,  # Gemini doesn't expose token count easily
-                'model': model_name,
-                'cached': False,
-                'cached_prompt': cached_system is not None,
-                'generation_time': generation_time
-            }
-            
-            # Cache the result in Redis
-            if user_id and settings.ENABLE_CACHE:
-                cache_manager.cache_generation(
-                    content_type=content_type,
-                    prompt=user_prompt,
-                    result=result,
-                    user_id=user_id,
-                    ttl=settings.CACHE_TTL_GENERATIONS
+                if not parser.finished:
+                    raise StreamValidationError("Output ended before the JSON document was complete", len(parser.buffer))
+                content = parser.json_text()
+                
+                generation_time = time.time() - start_time
+                logger.info(f"✅ Generated with {model_name} in {generation_time:.2f}s (cached_prompt: {cached_system is not None})")
+                
+                result = {
+                    'content': content,
+                    'tokensUsed': 0,  # Gemini doesn't expose token count easily
+                    'model': model_name,
+                    'cached': False,
+                    'cached_prompt': cached_system is not None,
+                    'generation_time': generation_time
+                }
+                
+                return result
+                    
+            except google_exceptions.ResourceExhausted as e:
+                # Gemini rate limit (429) - fallback to OpenAI for this request only
+                logger.warning(f"⚠️ Gemini rate limited: {e}. Falling back to OpenAI for this request.")
+            except google_exceptions.Unauthenticated as e:
+                # Invalid API key (401)
+                logger.error(f"❌ Gemini authentication failed: {e}")
+                raise InvalidAPIKeyError("Gemini")
+            except google_exceptions.InvalidArgument as e:
+                # Invalid request (400) - possibly content policy or token limit
+                logger.error(f"❌ Gemini invalid request: {e}")
+                if "content" in str(e).lower() and "policy" in str(e).lower():
+                    raise ContentPolicyViolationError("Gemini", str(e))
+                raise AIServiceError(str(e), "Gemini")
+            except google_exceptions.DeadlineExceeded as e:
+                # Timeout - fallback to OpenAI for this request only
+                logger.warning(f"⚠️ Gemini timeout: {e}. Falling back to OpenAI for this request.")
+            except google_exceptions.NotFound as e:
+                # Model not found (404)
+                logger.error(f"❌ Gemini model not found: {e}")
+                raise AIModelNotFoundError(
+                    settings.PREMIUM_TEXT_MODEL if use_premium else settings.PRIMARY_TEXT_MODEL,
+                    "Gemini"
                 )
+            except Exception as e:
+                # Unexpected Gemini error - fallback for this request only
+                logger.warning(f"⚠️ Gemini error, falling back to OpenAI (GPT-4o-mini) for this request: {e}")
             
-            return result
+            return None
+        
+        async def call_fallback() -> Dict[str, Any]:
+            """FALLBACK to OpenAI GPT-4o-mini"""
+            try:
+                response = await llm_client.chat_completion(
+                    self.openai_client,
+                    model=self.openai_model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=0.7,
+                    max_tokens=max_tokens
+                )
+                content = response.choices[0].message.content
                 
-        except google_exceptions.ResourceExhausted as e:
-            # Gemini rate limit (429) - fallback to OpenAI for this request only
-            logger.warning(f"⚠️ Gemini rate limited: {e}. Falling back to OpenAI for this request.")
-        except google_exceptions.Unauthenticated as e:
-            # Invalid API key (401)
-            logger.error(f"❌ Gemini authentication failed: {e}")
-            raise InvalidAPIKeyError("Gemini")
-        except google_exceptions.InvalidArgument as e:
-            # Invalid request (400) - possibly content policy or token limit
-            logger.error(f"❌ Gemini invalid request: {e}")
-            if "content" in str(e).lower() and "policy" in str(e).lower():
-                raise ContentPolicyViolationError("Gemini", str(e))
-            raise AIServiceError(str(e), "Gemini")
-        except google_exceptions.DeadlineExceeded as e:
-            # Timeout - fallback to OpenAI for this request only
-            logger.warning(f"⚠️ Gemini timeout: {e}. Falling back to OpenAI for this request.")
-        except google_exceptions.NotFound as e:
-            # Model not found (404)
-            logger.error(f"❌ Gemini model not found: {e}")
-            raise AIModelNotFoundError(
-                settings.PREMIUM_TEXT_MODEL if use_premium else settings.PRIMARY_TEXT_MODEL,
-                "Gemini"
-            )
-        except Exception as e:
-            # Unexpected Gemini error - fallback for this request only
-            logger.warning(f"⚠️ Gemini error, falling back to OpenAI (GPT-4o-mini) for this request: {e}")
+                generation_time = time.time() - start_time
+                logger.info(f"✅ Generated with fallback {self.openai_model} in {generation_time:.2f}s")
+                
+                result = {
+                    'content': content,
+                    'tokensUsed': response.usage.total_tokens,
+                    'model': self.openai_model,
+                    'cached': False,
+                    'cached_prompt': False,
+                    'generation_time': generation_time
+                }
+                
+                return result
+            except OpenAIRateLimitError as e:
+                # OpenAI rate limit (429)
+                logger.error(f"❌ Both Gemini and OpenAI rate limited: {e}")
+                raise RateLimitError(
+                    service="OpenAI",
+                    retry_after=getattr(e, 'retry_after', None),
+                    limit="tokens or requests per minute"
+                )
+            except AuthenticationError as e:
+                # Invalid API key (401)
+                logger.error(f"❌ OpenAI authentication failed: {e}")
+                raise InvalidAPIKeyError("OpenAI")
+            except BadRequestError as e:
+                # Invalid request (400) - token limit or content policy
+                error_msg = str(e)
+                logger.error(f"❌ OpenAI bad request: {error_msg}")
+                if "maximum context length" in error_msg.lower():
+                    raise TokenLimitExceededError(
+                        service="OpenAI",
+                        requested=max_tokens,
+                        limit=4096  # Default context window
+                    )
+                elif "content" in error_msg.lower() and "policy" in error_msg.lower():
+                    raise ContentPolicyViolationError("OpenAI", error_msg)
+                raise AIServiceError(error_msg, "OpenAI")
+            except OpenAITimeoutError as e:
+                # Timeout
+                logger.error(f"❌ OpenAI timeout: {e}")
+                raise AITimeoutError("OpenAI", timeout_seconds=60)
+            except APIConnectionError as e:
+                # Network error
+                logger.error(f"❌ OpenAI connection error: {e}")
+                raise NetworkError("OpenAI", str(e))
+            except OpenAIAPIError as e:
+                # Generic OpenAI API error (500, 502, 503)
+                logger.error(f"❌ OpenAI API error: {e}")
+                raise AIServiceError(str(e), "OpenAI")
+            except Exception as e:
+                logger.error(f"❌ Both Gemini and OpenAI failed with unexpected error: {e}", exc_info=True)
+                raise AIServiceError(
+                    f"All AI services failed. Please try again later. Error: {str(e)}",
+                    "AI"
+                )
         
-        # FALLBACK to OpenAI GPT-4o-mini
-        try:
-            response = await self.openai_client.chat.completions.create(
-                model=self.openai_model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.7,
-                max_tokens=max_tokens
-            )
-            content = response.choices[0].message.content
-            
-            generation_time = time.time() - start_time
-            logger.info(f"✅ Generated with fallback {self.openai_model} in {generation_time:.2f}s")
-            
-            result = {
-                'content': content,
-                'tokensUsed': response.usage.total_tokens,
-                'model': self.openai_model,
-                'cached': False,
-                'cached_prompt': False,
-                'generation_time': generation_time
-            }
+        async def generate() -> Dict[str, Any]:
+            """Model call with circuit breaker + hedging, cached on success"""
+            # Circuit open: Gemini is known to be failing - go straight to the fallback
+            breaker = circuit_breakers.get("gemini", model_name)
+            if await breaker.allow_request():
+                # Gemini first; GPT-4o-mini races it when Gemini is slower than its recent tail (hedging)
+                result = await hedge_policy.execute(
+                    breaker.guard(call_primary),
+                    call_fallback,
+                    model_name=model_name,
+                    user_tier=user_tier
+                )
+            else:
+                logger.info(f"⚡ Circuit open for {model_name} - using {self.openai_model} directly")
+                result = await call_fallback()
             
-            # Cache OpenAI result too
+            # Cache the result in Redis
             if user_id and settings.ENABLE_CACHE:
-                cache_manager.cache_generation(
+                await cache_manager.cache_generation(
                     content_type=content_type,
                     prompt=user_prompt,
                     result=result,
@@ -986,49 +1260,14 @@ class OpenAIService:
                 )
             
             return result
-        except OpenAIRateLimitError as e:
-            # OpenAI rate limit (429)
-            logger.error(f"❌ Both Gemini and OpenAI rate limited: {e}")
-            raise RateLimitError(
-                service="OpenAI",
-                retry_after=getattr(e, 'retry_after', None),
-                limit="tokens or requests per minute"
-            )
-        except AuthenticationError as e:
-            # Invalid API key (401)
-            logger.error(f"❌ OpenAI authentication failed: {e}")
-            raise InvalidAPIKeyError("OpenAI")
-        except BadRequestError as e:
-            # Invalid request (400) - token limit or content policy
-            error_msg = str(e)
-            logger.error(f"❌ OpenAI bad request: {error_msg}")
-            if "maximum context length" in error_msg.lower():
-                raise TokenLimitExceededError(
-                    service="OpenAI",
-                    requested=max_tokens,
-                    limit=4096  # Default context window
-                )
-            elif "content" in error_msg.lower() and "policy" in error_msg.lower():
-                raise ContentPolicyViolationError("OpenAI", error_msg)
-            raise AIServiceError(error_msg, "OpenAI")
-        except OpenAITimeoutError as e:
-            # Timeout
-            logger.error(f"❌ OpenAI timeout: {e}")
-            raise AITimeoutError("OpenAI", timeout_seconds=60)
-        except APIConnectionError as e:
-            # Network error
-            logger.error(f"❌ OpenAI connection error: {e}")
-            raise NetworkError("OpenAI", str(e))
-        except OpenAIAPIError as e:
-            # Generic OpenAI API error (500, 502, 503)
-            logger.error(f"❌ OpenAI API error: {e}")
-            raise AIServiceError(str(e), "OpenAI")
-        except Exception as e:
-            logger.error(f"❌ Both Gemini and OpenAI failed with unexpected error: {e}", exc_info=True)
-            raise AIServiceError(
-                f"All AI services failed. Please try again later. Error: {str(e)}",
-                "AI"
+        
+        if user_id:
+            # Identical request already running (double-click, client retry) - share its result
+            return await single_flight.run(
+                cache_manager.generation_cache_key(content_type, user_prompt, user_id),
+                generate
             )
+        return await generate()
     
     async def _generate_with_ai_v2(
         self,
@@ -1037,7 +1276,8 @@ class OpenAIService:
         generation_config: Dict[str, Any],
         use_premium: bool = False,
         content_type: str = "generic",
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        user_tier: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         V2: Generate content with enhanced configuration (Phase 1 improvements)
@@ -1056,13 +1296,14 @@ class OpenAIService:
             use_premium: Use premium model
             content_type: Type of content for caching
             user_id: User ID for caching
+            user_tier: Subscription tier (hedge budget)
         
         Returns:
             Dict with content, tokens, model, cache stats
         """
         # Check Redis cache first
         if user_id and settings.ENABLE_CACHE:
-            cached_result = cache_manager.get_cached_generation(
+            cached_result = await cache_manager.get_cached_generation(
                 content_type=content_type,
                 prompt=user_prompt,
                 user_id=user_id
@@ -1075,117 +1316,194 @@ class OpenAIService:
         start_time = time.time()
         max_tokens = generation_config.get('max_output_tokens', 4000)
         
-        # Try PRIMARY model first (Gemini 2.5 Flash)
-        try:
-            model_name = settings.PREMIUM_TEXT_MODEL if use_premium else settings.PRIMARY_TEXT_MODEL
-            
-            # Get cached system prompt (90% discount)
-            cached_system = self._get_cached_system_content(
-                content_type=content_type,
-                system_prompt=system_prompt,
-                use_premium=use_premium
-            )
-            
-            # Convert config dict to GenerationConfig object
-            gemini_config = genai.types.GenerationConfig(**generation_config)
-            
-            # Generate with Gemini
-            if cached_system:
-                model = genai.GenerativeModel.from_cached_content(cached_system)
-                response = model.generate_content(
-                    user_prompt,
-                    generation_config=gemini_config
+        model_name = settings.PREMIUM_TEXT_MODEL if use_premium else settings.PRIMARY_TEXT_MODEL
+        
+        async def call_primary() -> Optional[Dict[str, Any]]:
+            """PRIMARY model (Gemini); returns None when the error warrants the OpenAI fallback"""
+            try:
+                # Get cached system prompt (90% discount)
+                cached_system = await self._get_cached_system_content(
+                    content_type=content_type,
+                    system_prompt=system_prompt,
+                    use_premium=use_premium
                 )
-            else:
-                model = self.gemini_premium_model if use_premium else self.gemini_model
-                full_prompt = f"{system_prompt}\n\n{user_prompt}"
-                response = model.generate_content(
-                    full_prompt,
-                    generation_config=gemini_config
-            )
-            
-            # Check response validity
-            if not response.candidates or len(response.candidates) == 0:
-                raise Exception("No candidates in response")
-            
-            candidate = response.candidates[0]
-            finish_reason = candidate.finish_reason
-            
-            # Check for blocked/failed responses
-            # finish_reason: 1=STOP (success), 2=MAX_TOKENS, 3=SAFETY, 4=RECITATION, 5=OTHER
-            if finish_reason != 1:  # Not STOP
-                error_msg = f"Generation stopped with finish_reason={finish_reason}"
-                if finish_reason == 2:
-                    error_msg += " (MAX_TOKENS: increase max_output_tokens)"
-                elif finish_reason == 3:
-                    error_msg += " (SAFETY: content filtered by safety settings)"
-                elif finish_reason == 4:
-                    error_msg += " (RECITATION: copyrighted content detected)"
+                
+                # Convert config dict to GenerationConfig object
+                gemini_config = genai.types.GenerationConfig(**generation_config)
+                
+                # Generate with Gemini
+                if cached_system:
+                    model = client_registry.get_cached_model(cached_system)
+                    response = await llm_client.generate_content(
+                        model,
+                        user_prompt,
+                        generation_config=gemini_config
+                    )
                 else:
-                    error_msg += " (OTHER: unknown reason)"
+                    model = self.gemini_premium_model if use_premium else self.gemini_model
+                    full_prompt = f"{system_prompt}\n\n{user_prompt}"
+                    response = await llm_client.generate_content(
+                        model,
+                        full_prompt,
+                        generation_config=gemini_config
+                    )
+                
+                # Check response validity
+                if not response.candidates or len(response.candidates) == 0:
+                    raise Exception("No candidates in response")
+                
+                candidate = response.candidates[0]
+                finish_reason = candidate.finish_reason
+                
+                # Check for blocked/failed responses
+                # finish_reason: 1=STOP (success), 2=MAX_TOKENS, 3=SAFETY, 4=RECITATION, 5=OTHER
+                if finish_reason != 1:  # Not STOP
+                    error_msg = f"Generation stopped with finish_reason={finish_reason}"
+                    if finish_reason == 2:
+                        error_msg += " (MAX_TOKENS: increase max_output_tokens)"
+                    elif finish_reason == 3:
+                        error_msg += " (SAFETY: content filtered by safety settings)"
+                    elif finish_reason == 4:
+                        error_msg += " (RECITATION: copyrighted content detected)"
+                    else:
+                        error_msg += " (OTHER: unknown reason)"
+                    
+                    # Check for prompt feedback (safety issues)
+                    if hasattr(response, 'prompt_feedback'):
+                        error_msg += f". Prompt feedback: {response.prompt_feedback}"
+                    
+                    raise Exception(error_msg)
+                
+                # Handle response based on whether response_schema was used
+                try:
+                    # Try to access .text first (works for text responses)
+                    content = response.text.strip()
+                    
+                    # Extract JSON from markdown code blocks if present
+                    if '```json' in content:
+                        start_idx = content.find('```json') + 7
+                        end_idx = content.find('```', start_idx)
+                        if end_idx > start_idx:
+                            content = content[start_idx:end_idx].strip()
+                    elif '```' in content:
+                        start_idx = content.find('```') + 3
+                        end_idx = content.find('```', start_idx)
+                        if end_idx > start_idx:
+                            content = content[start_idx:end_idx].strip()
+                    
+                    # Additional cleanup - find first { and last }
+                    if '{' in content and '}' in content:
+                        first_brace = content.find('{')
+                        last_brace = content.rfind('}')
+                        content = content[first_brace:last_brace + 1]
+                except Exception as text_error:
+                    # If .text fails, try accessing content from parts directly
+                    if candidate.content and candidate.content.parts:
+                        content = candidate.content.parts[0].text
+                    else:
+                        raise Exception(f"No content in response parts. Finish reason: {finish_reason}")
+                
+                generation_time = time.time() - start_time
                 
-                # Check for prompt feedback (safety issues)
-                if hasattr(response, 'prompt_feedback'):
-                    error_msg += f". Prompt feedback: {response.prompt_feedback}"
+                # Estimate token count (Gemini doesn't expose usage metadata)
+                # Formula: ~1.3 tokens per word (industry standard for English)
+                prompt_tokens = (len(system_prompt.split()) + len(user_prompt.split())) * 1.3
+                completion_tokens = len(content.split()) * 1.3
+                estimated_tokens = int(prompt_tokens + completion_tokens)
                 
-                raise Exception(error_msg)
+                # Log detailed info
+                logger.info(f"✅ Generated with {model_name} in {generation_time:.2f}s")
+                logger.info(f"📊 Estimated tokens: {estimated_tokens} (prompt: {int(prompt_tokens)}, completion: {int(completion_tokens)})")
+                logger.debug(f"Config: temp={generation_config.get('temperature')}, "
+                           f"presence_penalty={generation_config.get('presence_penalty')}, "
+                           f"frequency_penalty={generation_config.get('frequency_penalty')}")
+                
+                result = {
+                    'content': content,
+                    'tokensUsed': estimated_tokens,  # 📊 Estimated token count for Gemini
+                    'model': model_name,
+                    'cached': False,
+                    'cached_prompt': cached_system is not None,
+                    'generation_time': generation_time
+                }
+                
+                return result
+                    
+            except google_exceptions.ResourceExhausted as e:
+                # Gemini rate limit - fallback to OpenAI for this request only
+                logger.warning(f"⚠️ Gemini rate limited: {e}. Falling back to OpenAI for this request.")
+            except google_exceptions.Unauthenticated as e:
+                logger.error(f"❌ Gemini authentication failed: {e}")
+                raise InvalidAPIKeyError("Gemini")
+            except google_exceptions.InvalidArgument as e:
+                logger.error(f"❌ Gemini invalid request: {e}")
+                if "content" in str(e).lower() and "policy" in str(e).lower():
+                    raise ContentPolicyViolationError("Gemini", str(e))
+                raise AIServiceError(str(e), "Gemini")
+            except google_exceptions.DeadlineExceeded as e:
+                # Timeout - fallback to OpenAI for this request only
+                logger.warning(f"⚠️ Gemini timeout: {e}. Falling back to OpenAI for this request.")
+            except google_exceptions.NotFound as e:
+                logger.error(f"❌ Gemini model not found: {e}")
+                raise AIModelNotFoundError(model_name, "Gemini")
+            except Exception as e:
+                # Unexpected Gemini error - fallback for this request only
+                logger.warning(f"⚠️ Gemini error, falling back to OpenAI for this request: {e}")
             
-            # Handle response based on whether response_schema was used
+            return None
+        
+        async def call_fallback() -> Dict[str, Any]:
+            """FALLBACK to OpenAI GPT-4o-mini"""
             try:
-                # Try to access .text first (works for text responses)
-                content = response.text.strip()
+                temperature = generation_config.get('temperature', 0.7)
+                response = await llm_client.chat_completion(
+                    self.openai_client,
+                    model=self.openai_model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+                content = response.choices[0].message.content
                 
-                # Extract JSON from markdown code blocks if present
-                if '```json' in content:
-                    start_idx = content.find('```json') + 7
-                    end_idx = content.find('```', start_idx)
-                    if end_idx > start_idx:
-                        content = content[start_idx:end_idx].strip()
-                elif '```' in content:
-                    start_idx = content.find('```') + 3
-                    end_idx = content.find('```', start_idx)
-                    if end_idx > start_idx:
-                        content = content[start_idx:end_idx].strip()
+                generation_time = time.time() - start_time
+                logger.info(f"✅ Generated with fallback {self.openai_model} in {generation_time:.2f}s")
                 
-                # Additional cleanup - find first { and last }
-                if '{' in content and '}' in content:
-                    first_brace = content.find('{')
-                    last_brace = content.rfind('}')
-                    content = content[first_brace:last_brace + 1]
-            except Exception as text_error:
-                # If .text fails, try accessing content from parts directly
-                if candidate.content and candidate.content.parts:
-                    content = candidate.content.parts[0].text
-                else:
-                    raise Exception(f"No content in response parts. Finish reason: {finish_reason}")
-            
-            generation_time = time.time() - start_time
-            
-            # Estimate token count (Gemini doesn't expose usage metadata)
-            # Formula: ~1.3 tokens per word (industry standard for English)
-            prompt_tokens = (len(system_prompt.split()) + len(user_prompt.split())) * 1.3
-            completion_tokens = len(content.split()) * 1.3
-            estimated_tokens = int(prompt_tokens + completion_tokens)
-            
-            # Log detailed info
-            logger.info(f"✅ Generated with {model_name} in {generation_time:.2f}s")
-            logger.info(f"📊 Estimated tokens: {estimated_tokens} (prompt: {int(prompt_tokens)}, completion: {int(completion_tokens)})")
-            logger.debug(f"Config: temp={generation_config.get('temperature')}, "
-                       f"presence_penalty={generation_config.get('presence_penalty')}, "
-                       f"frequency_penalty={generation_config.get('frequency_penalty')}")
-            
-            result = {
-                'content': content,
-                'tokensUsed': estimated_tokens,  # 📊 Estimated token count for Gemini
-                'model': model_name,
-                'cached': False,
-                'cached_prompt': cached_system is not None,
-                'generation_time': generation_time
-            }
+                result = {
+                    'content': content,
+                    'tokensUsed': response.usage.total_tokens,
+                    'model': self.openai_model,
+                    'cached': False,
+                    'cached_prompt': False,
+                    'generation_time': generation_time
+                }
+                
+                return result
+            except Exception as e:
+                logger.error(f"❌ Fallback also failed: {e}", exc_info=True)
+                raise AIServiceError(f"All AI services failed: {str(e)}", "AI")
+        
+        async def generate() -> Dict[str, Any]:
+            """Model call with circuit breaker + hedging, cached on success"""
+            # Circuit open: Gemini is known to be failing - go straight to the fallback
+            breaker = circuit_breakers.get("gemini", model_name)
+            if await breaker.allow_request():
+                # Gemini first; GPT-4o-mini races it when Gemini is slower than its recent tail (hedging)
+                result = await hedge_policy.execute(
+                    breaker.guard(call_primary),
+                    call_fallback,
+                    model_name=model_name,
+                    user_tier=user_tier
+                )
+            else:
+                logger.info(f"⚡ Circuit open for {model_name} - using {self.openai_model} directly")
+                result = await call_fallback()
             
-            # Cache the result
+            # Cache the result in Redis
             if user_id and settings.ENABLE_CACHE:
-                cache_manager.cache_generation(
+                await cache_manager.cache_generation(
                     content_type=content_type,
                     prompt=user_prompt,
                     result=result,
@@ -1194,72 +1512,152 @@ class OpenAIService:
                 )
             
             return result
-                
-        except google_exceptions.ResourceExhausted as e:
-            # Gemini rate limit - fallback to OpenAI for this request only
-            logger.warning(f"⚠️ Gemini rate limited: {e}. Falling back to OpenAI for this request.")
-        except google_exceptions.Unauthenticated as e:
-            logger.error(f"❌ Gemini authentication failed: {e}")
-            raise InvalidAPIKeyError("Gemini")
-        except google_exceptions.InvalidArgument as e:
-            logger.error(f"❌ Gemini invalid request: {e}")
-            if "content" in str(e).lower() and "policy" in str(e).lower():
-                raise ContentPolicyViolationError("Gemini", str(e))
-            raise AIServiceError(str(e), "Gemini")
-        except google_exceptions.DeadlineExceeded as e:
-            # Timeout - fallback to OpenAI for this request only
-            logger.warning(f"⚠️ Gemini timeout: {e}. Falling back to OpenAI for this request.")
-        except google_exceptions.NotFound as e:
-            logger.error(f"❌ Gemini model not found: {e}")
-            raise AIModelNotFoundError(model_name, "Gemini")
-        except Exception as e:
-            # Unexpected Gemini error - fallback for this request only
-            logger.warning(f"⚠️ Gemini error, falling back to OpenAI for this request: {e}")
         
-        # FALLBACK to OpenAI GPT-4o-mini
-        try:
-            temperature = generation_config.get('temperature', 0.7)
-            response = await self.openai_client.chat.completions.create(
-                model=self.openai_model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=temperature,
-                max_tokens=max_tokens
+        if user_id:
+            # Identical request already running (double-click, client retry) - share its result
+            return await single_flight.run(
+                cache_manager.generation_cache_key(content_type, user_prompt, user_id),
+                generate
             )
-            content = response.choices[0].message.content
-            
-            generation_time = time.time() - start_time
-            logger.info(f"✅ Generated with fallback {self.openai_model} in {generation_time:.2f}s")
-            
-            result = {
-                'content': content,
-                'tokensUsed': response.usage.total_tokens,
-                'model': self.openai_model,
-                'cached': False,
-                'cached_prompt': False,
-                'generation_time': generation_time
+        return await generate()
+    
+    # ==================== CONTENT GENERATION ====================
+    
+    @staticmethod
+    def _blog_context_notes(
+        writing_style: Optional[str],
+        include_examples: bool,
+        target_audience: Optional[str],
+        enable_fact_check: bool
+    ) -> Tuple[str, str, str, str]:
+        """
+        Optional prompt notes shared by the single-call and long-form blog generators
+        
+        Returns:
+            Tuple of (style_note, examples_note, audience_note, factual_note)
+        """
+        style_note = ""
+        if writing_style:
+            style_map = {
+                "narrative": "storytelling with narrative arc",
+                "listicle": "numbered list format",
+                "how-to": "step-by-step guide",
+                "case-study": "problem-solution-results",
+                "comparison": "pros/cons analysis"
             }
+            style_note = f"\nWriting Style: {style_map.get(writing_style, 'standard article')}"
+        
+        examples_note = "\nInclude Examples: 2-3 concrete real-world examples" if include_examples else ""
+        audience_note = f"\nTarget Audience: {target_audience}" if target_audience else ""
+        
+        # Add factual requirement when fact-checking is enabled
+        factual_note = ""
+        if enable_fact_check:
+            factual_note = """
+**IMPORTANT - FACT-CHECKING ENABLED:**
+This content will be fact-checked with AI. Please include:
+- Specific statistics, numbers, and data points (with years/dates)
+- Historical facts and dates
+- Research findings and study results
+- Verifiable claims that can be fact-checked
+- Avoid pure opinions, predictions, or subjective statements
+- Focus on concrete, verifiable information
+"""
+        return style_note, examples_note, audience_note, factual_note
+    
+    @staticmethod
+    def _extract_genai_text(response: Any) -> Tuple[Optional[str], Any]:
+        """
+        Text of a google.genai response, falling back to candidate parts
+        (response.text is None when generation stops on MAX_TOKENS)
+        
+        Returns:
+            Tuple of (text or None, finish_reason)
+        """
+        text = None
+        finish_reason = None
+        
+        # Try to get text from response
+        if hasattr(response, 'text') and response.text:
+            text = response.text
+        
+        # If text is None, try to get from parts (happens with MAX_TOKENS)
+        if not text and hasattr(response, 'candidates') and response.candidates:
+            candidate = response.candidates[0]
+            finish_reason = getattr(candidate, 'finish_reason', None)
             
-            # Cache OpenAI result
-            if user_id and settings.ENABLE_CACHE:
-                cache_manager.cache_generation(
-                    content_type=content_type,
-                    prompt=user_prompt,
-                    result=result,
-                    user_id=user_id,
-                    ttl=settings.CACHE_TTL_GENERATIONS
-                )
-            
-            return result
-        except Exception as e:
-            logger.error(f"❌ Fallback also failed: {e}", exc_info=True)
-            raise AIServiceError(f"All AI services failed: {str(e)}", "AI")
+            if hasattr(candidate, 'content') and hasattr(candidate.content, 'parts'):
+                parts = candidate.content.parts
+                if parts and len(parts) > 0:
+                    # Concatenate all parts
+                    text = ''.join([part.text for part in parts if hasattr(part, 'text')])
+        
+        return text, finish_reason
     
-    # ==================== CONTENT GENERATION ====================
+    @staticmethod
+    def _chunk_text(chunk: Any) -> str:
+        """Text of one streamed chunk ('' for metadata-only or blocked chunks)"""
+        try:
+            return getattr(chunk, 'text', None) or ''
+        except ValueError:
+            return ''  # google.generativeai raises when a chunk has no parts
     
-    async def generate_blog_post(
+    async def _stream_validated_json(
+        self,
+        open_stream: Callable[[], AsyncIterator[Any]],
+        label: str,
+        schema: Optional[Type[BaseModel]] = None
+    ) -> Tuple[Any, Any]:
+        """
+        Stream a JSON generation through the incremental validator
+        The provider call is cancelled the moment the output can no longer be
+        valid, and regenerated right away (STREAM_VALIDATION_RETRIES times)
+        
+        Inside a streaming request, every validated delta is emitted as a `token`
+        event and every finished field/list item as `field`/`item`; an aborted
+        attempt emits `retry` so the client can drop what it has shown.
+        
+        Args:
+            open_stream: Starts a fresh provider stream (called once per attempt)
+            label: Content type (logs)
+            schema: ai_schemas model the output must match (None: any JSON object)
+        
+        Returns:
+            Tuple of (parser/validator holding the output, last chunk for usage and finish_reason)
+            The document may still be incomplete (truncated) - check `finished`
+        
+        Raises:
+            StreamValidationError: Every attempt was aborted
+        """
+        attempts = settings.STREAM_VALIDATION_RETRIES + 1
+        for attempt in range(1, attempts + 1):
+            if schema is not None:
+                validator = SchemaStreamValidator(schema, max_preamble=settings.STREAM_VALIDATION_MAX_PREAMBLE)
+            else:
+                validator = IncrementalJSONParser(max_preamble=settings.STREAM_VALIDATION_MAX_PREAMBLE)
+            last_chunk = None
+            try:
+                async with aclosing(open_stream()) as stream:
+                    async for chunk in stream:
+                        last_chunk = chunk
+                        text = self._chunk_text(chunk)
+                        parsed = validator.feed(text)
+                        if text:
+                            emit('token', {'text': text})
+                        for event in parsed:
+                            if event[0] == 'field':
+                                emit('field', {'name': event[1], 'value': event[2]})
+                            else:
+                                emit('item', {'name': event[1], 'index': event[2], 'value': event[3]})
+                return validator, last_chunk
+            except StreamValidationError as e:
+                logger.warning(f"🧯 Aborted malformed {label} output after {len(validator.buffer)} chars "
+                               f"(attempt {attempt}/{attempts}): {e}")
+                if attempt == attempts:
+                    raise
+                emit('retry', {'attempt': attempt + 1, 'reason': str(e)})
+    
+    def _build_blog_request(
         self,
         topic: str,
         keywords: List[str],
@@ -1267,30 +1665,21 @@ class OpenAIService:
         word_count: int,
         sections: Optional[List[str]] = None,
         user_tier: Optional[str] = None,
-        user_id: Optional[str] = None,
         target_audience: Optional[str] = None,
         writing_style: Optional[str] = None,
         include_examples: bool = True,
         enable_fact_check: bool = False
     ) -> Dict[str, Any]:
         """
-        Generate SEO-optimized blog post using new Gemini SDK with Pydantic schemas
-        Uses guaranteed JSON structure with native Pydantic validation
+        Build model, prompt and generation config for a blog post
+        Shared by the blocking and the streaming blog generators
         
-        Features:
-        - ✅ New google.genai.Client() with response_json_schema
-        - ✅ Pydantic BlogPostOutput model validation
-        - ✅ Tone-specific generation configs with top_k
-        - ✅ XML-structured prompts with keyword strategy
-        - ✅ Few-shot examples for quality
-        - ✅ Post-generation validation
-        - ✅ Target audience and writing style support
-        - ✅ Fact-checking context integration
+        Returns:
+            Dict with model, contents, config and max_tokens
         """
         
-        # Import new SDK and schemas
-        from google import genai as new_genai
-        from app.schemas.ai_schemas import BlogPostOutput, get_blog_post_schema
+        # Import schemas
+        from app.schemas.ai_schemas import get_blog_post_schema
         
         # Smart routing: Use premium model for Enterprise or long-form content
         use_premium = self._should_use_premium_model(
@@ -1305,7 +1694,8 @@ class OpenAIService:
         generation_config, max_tokens = get_generation_config_for_word_count(
             word_count=word_count,
             tone=tone,
-            response_schema=None  # Not needed for new SDK
+            response_schema=None,  # Not needed for new SDK
+            model_name=model_name
         )
         
         # Build system prompt with few-shot examples
@@ -1332,33 +1722,12 @@ SECONDARY KEYWORDS: {', '.join(f'"{k}"' for k in secondary_keywords) if secondar
 """
         
         # Build additional context
-        style_note = ""
-        if writing_style:
-            style_map = {
-                "narrative": "storytelling with narrative arc",
-                "listicle": "numbered list format",
-                "how-to": "step-by-step guide",
-                "case-study": "problem-solution-results",
-                "comparison": "pros/cons analysis"
-            }
-            style_note = f"\nWriting Style: {style_map.get(writing_style, 'standard article')}"
-        
-        examples_note = "\nInclude Examples: 2-3 concrete real-world examples" if include_examples else ""
-        audience_note = f"\nTarget Audience: {target_audience}" if target_audience else ""
-        
-        # Add factual requirement when fact-checking is enabled
-        factual_note = ""
-        if enable_fact_check:
-            factual_note = """
-**IMPORTANT - FACT-CHECKING ENABLED:**
-This content will be fact-checked with AI. Please include:
-- Specific statistics, numbers, and data points (with years/dates)
-- Historical facts and dates
-- Research findings and study results
-- Verifiable claims that can be fact-checked
-- Avoid pure opinions, predictions, or subjective statements
-- Focus on concrete, verifiable information
-"""
+        style_note, examples_note, audience_note, factual_note = self._blog_context_notes(
+            writing_style=writing_style,
+            include_examples=include_examples,
+            target_audience=target_audience,
+            enable_fact_check=enable_fact_check
+        )
         
         # Build user prompt with explicit word count instruction
         user_prompt = f"""<context>
@@ -1390,114 +1759,537 @@ The output will automatically follow the required JSON structure.
 </task>
 """
 
+        return {
+            'model': model_name,
+            'contents': f"{system_prompt}\n\n{user_prompt}",
+            'config': {
+                "temperature": generation_config["temperature"],
+                "top_p": generation_config["top_p"],
+                "top_k": generation_config.get("top_k"),
+                "max_output_tokens": max_tokens,
+                "response_mime_type": "application/json",
+                "response_schema": get_blog_post_schema()
+            },
+            'max_tokens': max_tokens
+        }
+    
+    def _finalize_blog_result(
+        self,
+        json_text: str,
+        finish_reason: Any,
+        model_name: str,
+        word_count: int,
+        max_tokens: int,
+        tokens_used: int,
+        generation_time: float
+    ) -> Dict[str, Any]:
+        """
+        Validate Gemini's blog JSON against BlogPostOutput and score it
+        
+        Returns:
+            Generation result dict (output, tokensUsed, model, quality_score, validation, ...)
+        """
+        from app.schemas.ai_schemas import BlogPostOutput
+        
+        # Log response details for debugging
+        logger.info(f"📝 Response length: {len(json_text)} chars, finish_reason: {finish_reason}")
+        
+        # Validate with Pydantic model
+        try:
+            blog_output = BlogPostOutput.model_validate_json(json_text)
+        except Exception as validation_error:
+            # Log JSON parsing error with context
+            logger.error(f"❌ JSON validation failed: {validation_error}")
+            logger.error(f"🔍 Finish reason: {finish_reason}")
+            logger.error(f"📏 JSON length: {len(json_text)} chars")
+            logger.error(f"🔚 Last 200 chars: ...{json_text[-200:]}")
+            
+            # If MAX_TOKENS, provide helpful error message
+            if finish_reason and "MAX_TOKENS" in str(finish_reason):
+                raise ValueError(
+                    f"Blog generation incomplete due to MAX_TOKENS limit. "
+                    f"Requested {max_tokens} tokens but response was truncated. "
+                    f"Try reducing word count or simplifying requirements."
+                )
+            
+            # Re-raise original error with context
+            raise ValueError(f"Invalid JSON response: {validation_error}") from validation_error
+        
+        # Convert to dict for return
+        output = blog_output.model_dump()
+        
+        # Validate output quality
+        validation = validate_blog_output(output, word_count)
+        
+        logger.info(f"✅ Blog generated: {validation['word_count_accuracy']}% word count accuracy, "
+                   f"{tokens_used} tokens, {generation_time:.2f}s")
+        logger.info(f"📊 Validation: quality_score={validation['quality_score']}, valid={validation['valid']}")
+        
+        return {
+            'output': output,
+            'tokensUsed': tokens_used,
+            'model': model_name,
+            'cached': False,
+            'cached_prompt': False,
+            'quality_score': validation['quality_score'],
+            'regeneration_count': 0,
+            'validation': validation,
+            'generation_time': generation_time
+        }
+    
+    async def generate_blog_post(
+        self,
+        topic: str,
+        keywords: List[str],
+        tone: str,
+        word_count: int,
+        sections: Optional[List[str]] = None,
+        user_tier: Optional[str] = None,
+        user_id: Optional[str] = None,
+        target_audience: Optional[str] = None,
+        writing_style: Optional[str] = None,
+        include_examples: bool = True,
+        enable_fact_check: bool = False,
+        request_text: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate SEO-optimized blog post using new Gemini SDK with Pydantic schemas
+        Uses guaranteed JSON structure with native Pydantic validation
+        
+        Features:
+        - ✅ New google.genai.Client() with response_json_schema
+        - ✅ Pydantic BlogPostOutput model validation
+        - ✅ Tone-specific generation configs with top_k
+        - ✅ XML-structured prompts with keyword strategy
+        - ✅ Few-shot examples for quality
+        - ✅ Post-generation validation
+        - ✅ Target audience and writing style support
+        - ✅ Fact-checking context integration
+        
+        request_text is the user's own topic for the semantic cache; `topic` may be
+        the enhanced prompt, whose shared boilerplate makes unrelated topics look alike.
+        """
+        
+        # Near-duplicate of a recent request with the same settings (opt-in)
+        cache_text = request_text or topic
+        semantic_params = {
+            'tone': tone,
+            'word_count': word_count,
+            'sections': sections or [],
+            'target_audience': target_audience,
+            'writing_style': writing_style,
+            'include_examples': include_examples,
+            'enable_fact_check': enable_fact_check
+        }
+        cached_result = await semantic_cache.lookup('blog', cache_text, user_id, params=semantic_params, keywords=keywords)
+        if cached_result:
+            return cached_result
+        
+        # Long posts: outline first, then all sections concurrently (latency ≈ one section, not the whole post)
+        if settings.BLOG_LONG_FORM_ENABLED and word_count >= settings.BLOG_LONG_FORM_MIN_WORDS:
+            result = await self._generate_long_form_blog(
+                topic=topic,
+                keywords=keywords,
+                tone=tone,
+                word_count=word_count,
+                sections=sections,
+                user_tier=user_tier,
+                target_audience=target_audience,
+                writing_style=writing_style,
+                include_examples=include_examples,
+                enable_fact_check=enable_fact_check
+            )
+            await semantic_cache.store('blog', cache_text, user_id, result, params=semantic_params, keywords=keywords)
+            return result
+        
+        request = self._build_blog_request(
+            topic=topic,
+            keywords=keywords,
+            tone=tone,
+            word_count=word_count,
+            sections=sections,
+            user_tier=user_tier,
+            target_audience=target_audience,
+            writing_style=writing_style,
+            include_examples=include_examples,
+            enable_fact_check=enable_fact_check
+        )
+        model_name = request['model']
+        max_tokens = request['max_tokens']
+
         try:
             # Log generation config for debugging
             logger.info(f"📝 Generating blog: {word_count} words, tone: {tone}, model: {model_name}")
-            logger.info(f"🔧 Config: temp={generation_config['temperature']}, "
-                       f"top_p={generation_config['top_p']}, "
-                       f"top_k={generation_config.get('top_k', 'N/A')}, "
+            logger.info(f"🔧 Config: temp={request['config']['temperature']}, "
+                       f"top_p={request['config']['top_p']}, "
+                       f"top_k={request['config'].get('top_k') or 'N/A'}, "
                        f"max_output_tokens={max_tokens}")
             
-            # Initialize new Gemini client
-            client = new_genai.Client(api_key=settings.GEMINI_API_KEY)
+            # Shared, pooled Gemini client (keeps TLS sessions alive across requests)
+            client = client_registry.get_genai_client()
             
             # Start timing
             start_time = time.time()
             
             # Generate with new SDK using Pydantic schema
-            response = await asyncio.to_thread(
-                client.models.generate_content,
+            response = await llm_client.generate_genai_content(
+                client,
                 model=model_name,
-                contents=f"{system_prompt}\n\n{user_prompt}",
-                config={
-                    "temperature": generation_config["temperature"],
-                    "top_p": generation_config["top_p"],
-                    "top_k": generation_config.get("top_k"),
-                    "max_output_tokens": max_tokens,
-                    "response_mime_type": "application/json",
-                    "response_schema": get_blog_post_schema()
-                }
+                contents=request['contents'],
+                config=request['config']
             )
             
             # Calculate generation time
             generation_time = time.time() - start_time
             
             # Extract JSON text with better error handling
-            json_text = None
-            finish_reason = None
-            
-            # Try to get text from response
-            if hasattr(response, 'text') and response.text:
-                json_text = response.text
-            
-            # If text is None, try to get from parts (happens with MAX_TOKENS)
-            if not json_text and hasattr(response, 'candidates') and response.candidates:
-                candidate = response.candidates[0]
-                finish_reason = getattr(candidate, 'finish_reason', None)
-                
-                if hasattr(candidate, 'content') and hasattr(candidate.content, 'parts'):
-                    parts = candidate.content.parts
-                    if parts and len(parts) > 0:
-                        # Concatenate all parts
-                        json_text = ''.join([part.text for part in parts if hasattr(part, 'text')])
+            json_text, finish_reason = self._extract_genai_text(response)
             
             if not json_text:
                 logger.error(f"❌ No text in response. Response type: {type(response)}")
                 logger.error(f"Finish reason: {finish_reason}")
                 raise ValueError(f"Gemini returned empty response. Finish reason: {finish_reason}")
             
-            # Log response details for debugging
-            logger.info(f"📝 Response length: {len(json_text)} chars, finish_reason: {finish_reason}")
-            
-            # Validate with Pydantic model
-            try:
-                blog_output = BlogPostOutput.model_validate_json(json_text)
-            except Exception as validation_error:
-                # Log JSON parsing error with context
-                logger.error(f"❌ JSON validation failed: {validation_error}")
-                logger.error(f"🔍 Finish reason: {finish_reason}")
-                logger.error(f"📏 JSON length: {len(json_text)} chars")
-                logger.error(f"🔚 Last 200 chars: ...{json_text[-200:]}")
-                
-                # If MAX_TOKENS, provide helpful error message
-                if finish_reason and "MAX_TOKENS" in str(finish_reason):
-                    raise ValueError(
-                        f"Blog generation incomplete due to MAX_TOKENS limit. "
-                        f"Requested {max_tokens} tokens but response was truncated. "
-                        f"Try reducing word count or simplifying requirements."
-                    )
-                
-                # Re-raise original error with context
-                raise ValueError(f"Invalid JSON response: {validation_error}") from validation_error
-            
-            # Convert to dict for return
-            output = blog_output.model_dump()
-            
             # Get token usage
             tokens_used = response.usage_metadata.total_token_count if hasattr(response, 'usage_metadata') else 0
+            await token_estimator.record(
+                'blog', tone, word_count, model_name,
+                output_tokens=getattr(getattr(response, 'usage_metadata', None), 'candidates_token_count', None),
+                max_tokens=max_tokens,
+                finish_reason=finish_reason
+            )
             
-            # Validate output quality
-            validation = validate_blog_output(output, word_count)
-            
-            logger.info(f"✅ Blog generated: {validation['word_count_accuracy']}% word count accuracy, "
-                       f"{tokens_used} tokens, {generation_time:.2f}s")
-            logger.info(f"📊 Validation: quality_score={validation['quality_score']}, valid={validation['valid']}")
-            
-            return {
-                'output': output,
-                'tokensUsed': tokens_used,
-                'model': model_name,
-                'cached': False,
-                'cached_prompt': False,
-                'quality_score': validation['quality_score'],
-                'regeneration_count': 0,
-                'validation': validation,
-                'generation_time': generation_time
-            }
+            result = self._finalize_blog_result(
+                json_text=json_text,
+                finish_reason=finish_reason,
+                model_name=model_name,
+                word_count=word_count,
+                max_tokens=max_tokens,
+                tokens_used=tokens_used,
+                generation_time=generation_time
+            )
+            await semantic_cache.store('blog', cache_text, user_id, result, params=semantic_params, keywords=keywords)
+            return result
         except Exception as e:
             logger.error(f"❌ Error generating blog post: {e}")
             raise
     
+    async def _generate_long_form_blog(
+        self,
+        topic: str,
+        keywords: List[str],
+        tone: str,
+        word_count: int,
+        sections: Optional[List[str]] = None,
+        user_tier: Optional[str] = None,
+        target_audience: Optional[str] = None,
+        writing_style: Optional[str] = None,
+        include_examples: bool = True,
+        enable_fact_check: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Long-form blog (BLOG_LONG_FORM_MIN_WORDS+): outline, then parallel sections
+        
+        One 4000-word call streams ~12K output tokens sequentially. Instead:
+        1. Outline call → BlogOutline (title, meta description, headings + key points)
+        2. Introduction, every section and the conclusion are written concurrently,
+           each prompt starting with the same shared brief + outline (so sections
+           don't overlap, and the repeated prefix is eligible for prompt caching)
+        3. Parts are stitched into BlogPostOutput and validated like a single-call post
+        
+        Opt-in (BLOG_LONG_FORM_ENABLED): one outline plus ~6-10 part calls, and the
+        stitched post reads differently from a single-call one. Output tokens are
+        recorded per part ('blog_outline' / 'blog_part') so the budgets adapt; like
+        the single-call blog there is no fallback model, so the circuit breaker is
+        not consulted.
+        
+        Returns:
+            Same result dict as generate_blog_post (plus 'long_form' timing details)
+        """
+        from app.schemas.ai_schemas import BlogOutline, BlogPostOutput, get_blog_outline_schema
+        
+        use_premium = self._should_use_premium_model(user_tier=user_tier, content_complexity="complex")
+        model_name = "gemini-2.5-pro" if use_premium else "gemini-2.5-flash"
+        generation_config, _ = get_generation_config_for_word_count(word_count=word_count, tone=tone)
+        sampling = {
+            "temperature": generation_config["temperature"],
+            "top_p": generation_config["top_p"],
+            "top_k": generation_config.get("top_k")
+        }
+        
+        intro_words = settings.BLOG_LONG_FORM_INTRO_WORDS
+        conclusion_words = settings.BLOG_LONG_FORM_CONCLUSION_WORDS
+        body_words = max(word_count - intro_words - conclusion_words, 300)
+        section_count = len(sections) if sections else max(4, min(8, round(body_words / 400)))
+        
+        style_note, examples_note, audience_note, factual_note = self._blog_context_notes(
+            writing_style=writing_style,
+            include_examples=include_examples,
+            target_audience=target_audience,
+            enable_fact_check=enable_fact_check
+        )
+        primary_keyword = keywords[0] if keywords else topic
+        brief = f"""You are an expert SEO blog writer.
+
+<context>
+Topic: {topic}
+Keywords: {', '.join(keywords)}
+Primary keyword: "{primary_keyword}" (use in the title, meta description, introduction and at least 2 headings)
+Tone: {tone}
+Total length: {word_count} words{style_note}{examples_note}{audience_note}
+</context>
+{factual_note}"""
+        
+        client = client_registry.get_genai_client()
+        start_time = time.time()
+        
+        # ---- 1. Outline ----
+        requested_sections = (
+            f"Use exactly these section headings, in order: {', '.join(sections)}"
+            if sections else f"Plan exactly {section_count} sections"
+        )
+        outline_max_tokens = token_estimator.max_tokens('blog_outline', tone, None, model_name, default=2048)
+        outline_response = await llm_client.generate_genai_content(
+            client,
+            model=model_name,
+            contents=f"""{brief}
+<task>
+Plan this blog post. Return the title, the meta description (155-160 characters)
+and the main sections. {requested_sections}. For each section give the heading,
+2-4 key points that no other section covers, and targetWords so that all sections
+add up to about {body_words} words. Introduction and conclusion are written separately.
+</task>
+""",
+            config={
+                **sampling,
+                "max_output_tokens": outline_max_tokens,
+                "response_mime_type": "application/json",
+                "response_schema": get_blog_outline_schema()
+            }
+        )
+        outline_text, finish_reason = self._extract_genai_text(outline_response)
+        await token_estimator.record(
+            'blog_outline', tone, None, model_name,
+            output_tokens=getattr(getattr(outline_response, 'usage_metadata', None), 'candidates_token_count', None),
+            max_tokens=outline_max_tokens,
+            finish_reason=finish_reason
+        )
+        if not outline_text:
+            raise ValueError(f"Gemini returned an empty blog outline. Finish reason: {finish_reason}")
+        outline = BlogOutline.model_validate_json(outline_text)
+        if not outline.sections:
+            raise ValueError("Gemini returned a blog outline without sections")
+        outline_time = time.time() - start_time
+        
+        # Spread the body budget over sections in proportion to the plan
+        planned = [max(section.targetWords, 50) for section in outline.sections]
+        budgets = [max(120, round(body_words * words / sum(planned))) for words in planned]
+        
+        outline_block = "\n".join(
+            f"{i + 1}. {section.heading} - {'; '.join(section.keyPoints)}"
+            for i, section in enumerate(outline.sections)
+        )
+        # Identical prefix for every part - only the trailing <task> differs
+        shared_context = f"""{brief}
+<outline>
+Title: {outline.title}
+{outline_block}
+</outline>
+"""
+        
+        async def write_part(task: str, words: int) -> Tuple[str, int]:
+            max_tokens = token_estimator.max_tokens('blog_part', tone, words, model_name, default=int(words * 2.5) + 256)
+            response = await llm_client.generate_genai_content(
+                client,
+                model=model_name,
+                contents=f"""{shared_context}
+<task>
+{task}
+Write about {words} words of plain markdown paragraphs (### subheadings allowed).
+Do not repeat the heading and do not add an introduction or conclusion of your own.
+</task>
+""",
+                config={
+                    **sampling,
+                    "max_output_tokens": max_tokens
+                }
+            )
+            text, reason = self._extract_genai_text(response)
+            await token_estimator.record(
+                'blog_part', tone, words, model_name,
+                output_tokens=getattr(getattr(response, 'usage_metadata', None), 'candidates_token_count', None),
+                max_tokens=max_tokens,
+                finish_reason=reason
+            )
+            if not text:
+                raise ValueError(f"Gemini returned an empty blog part. Finish reason: {reason}")
+            tokens = response.usage_metadata.total_token_count if getattr(response, 'usage_metadata', None) else 0
+            return text.strip(), tokens or 0
+        
+        # ---- 2. All parts concurrently ----
+        parts_start = time.time()
+        tasks = [write_part("Write the INTRODUCTION: hook the reader, state what the post covers, use the primary keyword.", intro_words)]
+        for i, section in enumerate(outline.sections):
+            tasks.append(write_part(
+                f'Write ONLY section {i + 1}: "{section.heading}". Cover: {"; ".join(section.keyPoints)}.',
+                budgets[i]
+            ))
+        tasks.append(write_part("Write the CONCLUSION: summarize the key takeaways and end with a clear call to action.", conclusion_words))
+        
+        parts = await asyncio.gather(*tasks, return_exceptions=True)
+        for part in parts:
+            if isinstance(part, BaseException):
+                raise part
+        sections_time = time.time() - parts_start
+        
+        # ---- 3. Stitch into the single-call schema ----
+        introduction, conclusion = parts[0][0], parts[-1][0]
+        section_texts = [text for text, _ in parts[1:-1]]
+        actual_words = sum(len(text.split()) for text in [introduction, conclusion, *section_texts])
+        tokens_used = sum(tokens for _, tokens in parts)
+        if getattr(outline_response, 'usage_metadata', None):
+            tokens_used += outline_response.usage_metadata.total_token_count or 0
+        
+        blog = BlogPostOutput(
+            title=outline.title,
+            metaDescription=outline.metaDescription,
+            introduction=introduction,
+            sections=[
+                {'heading': section.heading, 'content': text}
+                for section, text in zip(outline.sections, section_texts)
+            ],
+            conclusion=conclusion,
+            wordCount=actual_words
+        )
+        generation_time = time.time() - start_time
+        logger.info(f"📚 Long-form blog: outline {outline_time:.2f}s + {len(tasks)} parallel parts {sections_time:.2f}s")
+        
+        result = self._finalize_blog_result(
+            json_text=blog.model_dump_json(),
+            finish_reason=None,
+            model_name=model_name,
+            word_count=word_count,
+            max_tokens=sum(budgets),
+            tokens_used=tokens_used,
+            generation_time=generation_time
+        )
+        result['long_form'] = {
+            'sections': len(outline.sections),
+            'outline_time': round(outline_time, 2),
+            'sections_time': round(sections_time, 2)
+        }
+        return result
+    
+    async def stream_blog_post(
+        self,
+        topic: str,
+        keywords: List[str],
+        tone: str,
+        word_count: int,
+        sections: Optional[List[str]] = None,
+        user_tier: Optional[str] = None,
+        user_id: Optional[str] = None,
+        target_audience: Optional[str] = None,
+        writing_style: Optional[str] = None,
+        include_examples: bool = True,
+        enable_fact_check: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a blog post as Gemini produces it (same prompt and schema as generate_blog_post)
+        
+        Yields events:
+        - {'event': 'start', 'data': {model}}                      → before the model call
+        - {'event': 'token', 'data': {text}}                       → every raw text delta
+        - {'event': 'title' | 'metaDescription' | 'introduction' | 'conclusion', 'data': {value}}
+        - {'event': 'section', 'data': {index, heading, content}}  → each finished section
+        - {'event': 'complete', 'data': result}                    → same dict generate_blog_post returns
+        """
+        request = self._build_blog_request(
+            topic=topic,
+            keywords=keywords,
+            tone=tone,
+            word_count=word_count,
+            sections=sections,
+            user_tier=user_tier,
+            target_audience=target_audience,
+            writing_style=writing_style,
+            include_examples=include_examples,
+            enable_fact_check=enable_fact_check
+        )
+        model_name = request['model']
+        
+        logger.info(f"📡 Streaming blog: {word_count} words, tone: {tone}, model: {model_name}")
+        yield {'event': 'start', 'data': {'model': model_name, 'word_count': word_count}}
+        
+        from app.schemas.ai_schemas import BlogPostOutput
+        
+        client = client_registry.get_genai_client()
+        # Events carry only schema-valid fields; broken output stops the stream (and the paid call) early
+        parser = SchemaStreamValidator(BlogPostOutput, max_preamble=settings.STREAM_VALIDATION_MAX_PREAMBLE)
+        start_time = time.time()
+        first_token_time = None
+        finish_reason = None
+        tokens_used = 0
+        output_tokens = None
+        
+        try:
+            async with aclosing(llm_client.stream_genai_content(
+                client,
+                model=model_name,
+                contents=request['contents'],
+                config=request['config']
+            )) as stream:
+                async for chunk in stream:
+                    if getattr(chunk, 'usage_metadata', None) is not None:
+                        tokens_used = chunk.usage_metadata.total_token_count or tokens_used
+                        output_tokens = getattr(chunk.usage_metadata, 'candidates_token_count', None) or output_tokens
+                    if getattr(chunk, 'candidates', None):
+                        finish_reason = getattr(chunk.candidates[0], 'finish_reason', None) or finish_reason
+                    
+                    text = getattr(chunk, 'text', None)
+                    if not text:
+                        continue
+                    if first_token_time is None:
+                        first_token_time = time.time() - start_time
+                        logger.info(f"⚡ First blog token after {first_token_time:.2f}s")
+                    
+                    yield {'event': 'token', 'data': {'text': text}}
+                    
+                    for parsed in parser.feed(text):
+                        if parsed[0] == 'item' and parsed[1] == 'sections':
+                            section = parsed[3] if isinstance(parsed[3], dict) else {}
+                            yield {'event': 'section', 'data': {
+                                'index': parsed[2],
+                                'heading': section.get('heading', ''),
+                                'content': section.get('content', '')
+                            }}
+                        elif parsed[0] == 'field' and parsed[1] in self.BLOG_STREAM_FIELDS:
+                            yield {'event': parsed[1], 'data': {'value': parsed[2]}}
+        except Exception as e:
+            logger.error(f"❌ Error streaming blog post: {e}")
+            raise
+        
+        if not parser.buffer:
+            raise ValueError(f"Gemini returned empty response. Finish reason: {finish_reason}")
+        await token_estimator.record(
+            'blog', tone, word_count, model_name,
+            output_tokens=output_tokens,
+            max_tokens=request['max_tokens'],
+            finish_reason=finish_reason
+        )
+        
+        result = self._finalize_blog_result(
+            json_text=parser.buffer,
+            finish_reason=finish_reason,
+            model_name=model_name,
+            word_count=word_count,
+            max_tokens=request['max_tokens'],
+            tokens_used=tokens_used,
+            generation_time=time.time() - start_time
+        )
+        result['time_to_first_token'] = first_token_time
+        yield {'event': 'complete', 'data': result}
+    
     async def generate_social_media(
         self,
         content_description: str,
@@ -1508,17 +2300,32 @@ The output will automatically follow the required JSON structure.
         include_hashtags: bool = True,
         include_emoji: bool = True,
         user_tier: Optional[str] = None,
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        request_text: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Generate platform-optimized social media captions using new Gemini SDK
         Uses Pydantic schemas for guaranteed JSON structure
+        (request_text: the user's own description for the semantic cache)
         """
         
-        # Import new SDK and schemas
-        from google import genai as new_genai
+        # Import schemas
         from app.schemas.ai_schemas import SocialMediaOutput, get_social_media_schema
         
+        # Near-duplicate of a recent request with the same settings (opt-in)
+        cache_text = request_text or content_description
+        semantic_params = {
+            'platform': platform,
+            'target_audience': target_audience,
+            'tone': tone,
+            'include_cta': include_cta,
+            'include_hashtags': include_hashtags,
+            'include_emoji': include_emoji
+        }
+        cached_result = await semantic_cache.lookup('social', cache_text, user_id, params=semantic_params)
+        if cached_result:
+            return cached_result
+        
         # Social media captions use standard model (quick, cost-effective)
         use_premium = self._should_use_premium_model(user_tier=user_tier, content_complexity="standard")
         
@@ -1589,51 +2396,46 @@ CAPTION VARIETY (use these 3 different approaches):
 3. Value/Actionable: Provide tips, insights, or data-driven content"""
 
         try:
-            # Initialize new Gemini client
-            client = new_genai.Client(api_key=settings.GEMINI_API_KEY)
+            # Shared, pooled Gemini client (keeps TLS sessions alive across requests)
+            client = client_registry.get_genai_client()
             
             # Select model
             model_name = settings.PREMIUM_TEXT_MODEL if use_premium else settings.PRIMARY_TEXT_MODEL
             
-            # Generate with Pydantic schema
-            response = client.models.generate_content(
-                model=model_name,
-                contents=prompt,
-                config={
-                    "response_mime_type": "application/json",
-                    "response_json_schema": get_social_media_schema(),
-                }
+            # Generate with Pydantic schema, validated while it streams
+            # (response = last chunk, which carries usage)
+            validator, response = await self._stream_validated_json(
+                lambda: llm_client.stream_genai_content(
+                    client,
+                    model=model_name,
+                    contents=prompt,
+                    config={
+                        "response_mime_type": "application/json",
+                        "response_json_schema": get_social_media_schema(),
+                    }
+                ),
+                label='social',
+                schema=SocialMediaOutput
             )
             
-            # Extract JSON text with better error handling
-            json_text = None
-            if hasattr(response, 'text') and response.text:
-                json_text = response.text
-            elif hasattr(response, 'candidates') and response.candidates:
-                candidate = response.candidates[0]
-                if hasattr(candidate, 'content') and hasattr(candidate.content, 'parts'):
-                    parts = candidate.content.parts
-                    if parts and len(parts) > 0:
-                        json_text = ''.join([part.text for part in parts if hasattr(part, 'text')])
-            
-            if not json_text:
+            if not validator.buffer:
                 logger.error(f"❌ No text in response for social media generation")
                 raise ValueError("Gemini returned empty response. The model may have hit a safety filter or content policy.")
             
-            # Parse and validate using Pydantic
-            result = SocialMediaOutput.model_validate_json(json_text)
+            # Complete document (fields were already checked as they streamed)
+            result = validator.validate()
             
             # Convert to dict for response
             output = result.model_dump()
             
             # Count tokens (new SDK structure)
             tokens_used = 0
-            if hasattr(response, 'usage_metadata'):
+            if getattr(response, 'usage_metadata', None):
                 tokens_used = response.usage_metadata.total_token_count
             
             logger.info(f"✅ Generated {platform} content: {len(output['captions'])} captions, {len(output['hashtags'])} hashtags")
             
-            return {
+            result = {
                 'output': output,
                 'tokensUsed': tokens_used,
                 'model': model_name,
@@ -1642,12 +2444,14 @@ CAPTION VARIETY (use these 3 different approaches):
                 'quality_score': None,
                 'regeneration_count': 0
             }
+            await semantic_cache.store('social', cache_text, user_id, result, params=semantic_params)
+            return result
             
         except Exception as e:
             logger.error(f"Error generating social media content with new SDK: {e}")
             # Log details for debugging
-            if 'response' in locals():
-                logger.error(f"Response text: {response.text[:500]}")
+            if 'validator' in locals():
+                logger.error(f"Response text: {validator.buffer[:500]}")
             raise
     
     async def generate_email_campaign(
@@ -1658,20 +2462,33 @@ CAPTION VARIETY (use these 3 different approaches):
         goal: str,
         tone: str,
         user_tier: Optional[str] = None,
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        request_text: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Generate email campaign content using new Gemini SDK with Pydantic schemas
         Uses guaranteed JSON structure with native Pydantic validation
+        (request_text: the user's own product/service text for the semantic cache)
         """
         
-        # Import new SDK and schemas
-        from google import genai as new_genai
+        # Import schemas
         from app.schemas.ai_schemas import EmailCampaignOutput, get_email_campaign_schema
         
         # Import ModelConfig
         from app.config import ModelConfig
         
+        # Near-duplicate of a recent request with the same settings (opt-in)
+        cache_text = request_text or product_service
+        semantic_params = {
+            'campaign_type': campaign_type,
+            'target_audience': target_audience,
+            'goal': goal,
+            'tone': tone
+        }
+        cached_result = await semantic_cache.lookup('email', cache_text, user_id, params=semantic_params)
+        if cached_result:
+            return cached_result
+        
         # Email campaigns use standard model (quick, cost-effective)
         use_premium = self._should_use_premium_model(user_tier=user_tier, content_complexity="standard")
         
@@ -1728,60 +2545,65 @@ Create a compelling email campaign that:
 The output will automatically follow the required JSON structure.
 </task>"""
 
+        # Emails have no length target - the budget is learned per tone and model
+        max_tokens = token_estimator.max_tokens('email', tone, None, model_name, default=2000)
+        
         try:
             logger.info(f"📧 Generating email: {campaign_type}, tone: {tone}, model: {model_name}")
             
-            # Initialize new Gemini client
-            client = new_genai.Client(api_key=settings.GEMINI_API_KEY)
+            # Shared, pooled Gemini client (keeps TLS sessions alive across requests)
+            client = client_registry.get_genai_client()
             
             # Start timing
             start_time = time.time()
             
-            # Generate with new SDK using Pydantic schema
-            response = await asyncio.to_thread(
-                client.models.generate_content,
-                model=model_name,
-                contents=f"{system_prompt}\n\n{user_prompt}",
-                config={
-                    "temperature": 0.80,
-                    "top_p": 0.92,
-                    "top_k": 45,
-                    "max_output_tokens": 2000,
-                    "response_mime_type": "application/json",
-                    "response_schema": get_email_campaign_schema()
-                }
+            # Generate with new SDK using Pydantic schema, validated while it streams
+            # (response = last chunk, which carries usage and finish_reason)
+            validator, response = await self._stream_validated_json(
+                lambda: llm_client.stream_genai_content(
+                    client,
+                    model=model_name,
+                    contents=f"{system_prompt}\n\n{user_prompt}",
+                    config={
+                        "temperature": 0.80,
+                        "top_p": 0.92,
+                        "top_k": 45,
+                        "max_output_tokens": max_tokens,
+                        "response_mime_type": "application/json",
+                        "response_schema": get_email_campaign_schema()
+                    }
+                ),
+                label='email',
+                schema=EmailCampaignOutput
             )
             
             # Calculate generation time
             generation_time = time.time() - start_time
             
-            # Extract JSON text with better error handling
-            json_text = None
-            if hasattr(response, 'text') and response.text:
-                json_text = response.text
-            elif hasattr(response, 'candidates') and response.candidates:
-                candidate = response.candidates[0]
-                if hasattr(candidate, 'content') and hasattr(candidate.content, 'parts'):
-                    parts = candidate.content.parts
-                    if parts and len(parts) > 0:
-                        json_text = ''.join([part.text for part in parts if hasattr(part, 'text')])
-            
-            if not json_text:
+            if not validator.buffer:
                 logger.error(f"❌ No text in response for email generation")
                 raise ValueError("Gemini returned empty response. The model may have hit a safety filter or content policy.")
             
-            # Validate with Pydantic model
-            email_output = EmailCampaignOutput.model_validate_json(json_text)
+            # Before validation, so a truncated (invalid) response still raises the budget
+            await token_estimator.record(
+                'email', tone, None, model_name,
+                output_tokens=getattr(getattr(response, 'usage_metadata', None), 'candidates_token_count', None),
+                max_tokens=max_tokens,
+                finish_reason=getattr(response.candidates[0], 'finish_reason', None) if getattr(response, 'candidates', None) else None
+            )
+            
+            # Complete document (fields were already checked as they streamed)
+            email_output = validator.validate()
             
             # Convert to dict for return
             output = email_output.model_dump()
             
             # Get token usage
-            tokens_used = response.usage_metadata.total_token_count if hasattr(response, 'usage_metadata') else 0
+            tokens_used = response.usage_metadata.total_token_count if getattr(response, 'usage_metadata', None) else 0
             
             logger.info(f"✅ Email generated: {tokens_used} tokens, {generation_time:.2f}s")
             
-            return {
+            result = {
                 'output': output,
                 'tokensUsed': tokens_used,
                 'model': model_name,
@@ -1791,6 +2613,8 @@ The output will automatically follow the required JSON structure.
                 'regeneration_count': 0,
                 'generation_time': generation_time
             }
+            await semantic_cache.store('email', cache_text, user_id, result, params=semantic_params)
+            return result
         except Exception as e:
             logger.error(f"❌ Error generating email campaign: {e}")
             raise
@@ -1802,10 +2626,20 @@ The output will automatically follow the required JSON structure.
         platform: str,
         include_seo: bool = True,
         user_tier: Optional[str] = None,
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        request_text: Optional[str] = None
     ) -> Dict[str, Any]:
         """Generate e-commerce product descriptions with smart model routing and caching"""
         
+        # Near-duplicate of a recent request with the same settings (opt-in),
+        # fingerprinted on the user's own product name (request_text) when given
+        fingerprint = dict(product_details, name=request_text) if request_text else product_details
+        product_text = ' '.join(str(value) for value in fingerprint.values())
+        semantic_params = {'target_customer': target_customer, 'platform': platform, 'include_seo': include_seo}
+        cached_result = await semantic_cache.lookup('product', product_text, user_id, params=semantic_params)
+        if cached_result:
+            return cached_result
+        
         # Product descriptions use standard model
         use_premium = self._should_use_premium_model(user_tier=user_tier, content_complexity="standard")
         
@@ -1828,18 +2662,19 @@ Format as JSON:
 
         try:
             result = await self._generate_with_quality_check(
-                system_prompt="You are an e-commerce copywriting expert. Always return valid JSON.",
+                system_prompt=STATIC_SYSTEM_PROMPTS["product"],
                 user_prompt=prompt,
                 max_tokens=1500,
                 use_premium=use_premium,
                 content_type="product",
                 user_id=user_id,
                 metadata={'target_length': 400},
-                max_regenerations=1
+                max_regenerations=1,
+                user_tier=user_tier
             )
             
             output = json.loads(result['content'])
-            return {
+            generation = {
                 'output': output,
                 'tokensUsed': result['tokensUsed'],
                 'model': result['model'],
@@ -1848,6 +2683,8 @@ Format as JSON:
                 'quality_score': result.get('quality_score'),
                 'regeneration_count': result.get('regeneration_count', 0)
             }
+            await semantic_cache.store('product', product_text, user_id, generation, params=semantic_params)
+            return generation
         except Exception as e:
             logger.error(f"Error generating product description: {e}")
             raise
@@ -1859,10 +2696,19 @@ Format as JSON:
         platform: str,
         campaign_goal: str,
         user_tier: Optional[str] = None,
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        request_text: Optional[str] = None
     ) -> Dict[str, Any]:
         """Generate conversion-optimized ad copy with smart model routing and caching"""
         
+        # Near-duplicate of a recent request with the same settings (opt-in),
+        # fingerprinted on the user's own product/service text (request_text) when given
+        cache_text = request_text or product_service
+        semantic_params = {'target_audience': target_audience, 'platform': platform, 'campaign_goal': campaign_goal}
+        cached_result = await semantic_cache.lookup('ad', cache_text, user_id, params=semantic_params)
+        if cached_result:
+            return cached_result
+        
         # Ad copy uses standard model (quick conversions)
         use_premium = self._should_use_premium_model(user_tier=user_tier, content_complexity="standard")
         
@@ -1891,18 +2737,19 @@ Format as JSON:
 
         try:
             result = await self._generate_with_quality_check(
-                system_prompt="You are a conversion copywriting expert. Always return valid JSON.",
+                system_prompt=STATIC_SYSTEM_PROMPTS["ad"],
                 user_prompt=prompt,
                 max_tokens=2000,
                 use_premium=use_premium,
                 content_type="ad",
                 user_id=user_id,
                 metadata={'target_length': 150},
-                max_regenerations=1
+                max_regenerations=1,
+                user_tier=user_tier
             )
             
             output = json.loads(result['content'])
-            return {
+            generation = {
                 'output': output,
                 'tokensUsed': result['tokensUsed'],
                 'model': result['model'],
@@ -1911,6 +2758,8 @@ Format as JSON:
                 'quality_score': result.get('quality_score'),
                 'regeneration_count': result.get('regeneration_count', 0)
             }
+            await semantic_cache.store('ad', cache_text, user_id, generation, params=semantic_params)
+            return generation
         except Exception as e:
             logger.error(f"Error generating ad copy: {e}")
             raise
@@ -1931,8 +2780,7 @@ Format as JSON:
         Uses guaranteed JSON structure with native Pydantic validation
         """
         
-        # Import new SDK and schemas
-        from google import genai as new_genai
+        # Import schemas
         from app.schemas.ai_schemas import VideoScriptOutput, get_video_script_schema
         
         # Video scripts use complex model for long-form content
@@ -2032,8 +2880,8 @@ The output will automatically follow the required JSON structure with sections,
         try:
             logger.info(f"🎥 Generating video script: {duration_seconds}s, platform: {platform}, model: {model_name}")
             
-            # Initialize new Gemini client
-            client = new_genai.Client(api_key=settings.GEMINI_API_KEY)
+            # Shared, pooled Gemini client (keeps TLS sessions alive across requests)
+            client = client_registry.get_genai_client()
             
             # Start timing
             start_time = time.time()
@@ -2053,42 +2901,37 @@ The output will automatically follow the required JSON structure with sections,
             
             logger.info(f"📊 Token allocation: {max_tokens} tokens ({base_tokens} script + {json_overhead} overhead)")
             
-            # Generate with new SDK using Pydantic schema
-            response = await asyncio.to_thread(
-                client.models.generate_content,
-                model=model_name,
-                contents=f"{system_prompt}\n\n{user_prompt}",
-                config={
-                    "temperature": 0.85,
-                    "top_p": 0.93,
-                    "top_k": 48,
-                    "max_output_tokens": max_tokens,
-                    "response_mime_type": "application/json",
-                    "response_schema": get_video_script_schema()
-                }
+            # Generate with new SDK using Pydantic schema, validated while it streams
+            # (response = last chunk, which carries usage and finish_reason)
+            validator, response = await self._stream_validated_json(
+                lambda: llm_client.stream_genai_content(
+                    client,
+                    model=model_name,
+                    contents=f"{system_prompt}\n\n{user_prompt}",
+                    config={
+                        "temperature": 0.85,
+                        "top_p": 0.93,
+                        "top_k": 48,
+                        "max_output_tokens": max_tokens,
+                        "response_mime_type": "application/json",
+                        "response_schema": get_video_script_schema()
+                    }
+                ),
+                label='video',
+                schema=VideoScriptOutput
             )
             
             # Calculate generation time
             generation_time = time.time() - start_time
             
-            # Extract JSON text
-            json_text = response.text if hasattr(response, 'text') and response.text else None
-            
+            json_text = validator.buffer
             if not json_text:
-                # Check if response has candidates
-                if hasattr(response, 'candidates') and response.candidates:
-                    candidate = response.candidates[0]
-                    if hasattr(candidate, 'content') and candidate.content:
-                        if hasattr(candidate.content, 'parts') and candidate.content.parts:
-                            json_text = candidate.content.parts[0].text
-                
-                if not json_text:
-                    logger.error(f"❌ No text in response. Response: {response}")
-                    raise ValueError("No text content in API response")
+                logger.error(f"❌ No text in response. Response: {response}")
+                raise ValueError("No text content in API response")
             
-            # Validate with Pydantic model
+            # Complete document (fields were already checked as they streamed)
             try:
-                video_output = VideoScriptOutput.model_validate_json(json_text)
+                video_output = validator.validate()
             except Exception as validation_error:
                 logger.error(f"❌ JSON validation failed. Response length: {len(json_text)} chars")
                 logger.error(f"First 500 chars: {json_text[:500]}")
@@ -2100,7 +2943,7 @@ The output will automatically follow the required JSON structure with sections,
             output = video_output.model_dump()
             
             # Get token usage
-            tokens_used = response.usage_metadata.total_token_count if hasattr(response, 'usage_metadata') else 0
+            tokens_used = response.usage_metadata.total_token_count if getattr(response, 'usage_metadata', None) else 0
             
             logger.info(f"✅ Video script generated: {len(output.get('sections', []))} sections, "
                        f"{tokens_used} tokens, {generation_time:.2f}s")
@@ -2142,7 +2985,7 @@ Format as JSON:
 
         try:
             result = await self._generate_with_ai(
-                system_prompt="You are a content quality analyst. Always return valid JSON.",
+                system_prompt=STATIC_SYSTEM_PROMPTS["generic"],
                 user_prompt=prompt,
                 max_tokens=500
             )
@@ -0,0 +1,624 @@
+"""
+Quota Ledger - atomic monthly usage limits (generations, humanizations, graphics)
+Reserve before the work, commit after it succeeds, refund when it fails
+
+WHY:
+    Limit checks compared usageThisMonth counters on the (cached) user document
+    with the limit. Concurrent requests from one user all saw the same count and
+    all passed, and the counter only moved once the work was done - a user with
+    one generation left could start ten.
+
+HOW (Redis, one Lua script per step so every check-and-update is atomic):
+    quota:<uid>:<period>        hash  <kind>:used / <kind>:reserved
+    quota:<uid>:<period>:res    zset  open reservations ("<id>|<kind>|<amount>", score = expiry)
+    quota:dirty                 set   "<uid>|<period>" with commits not yet in Firestore
+
+    reserve → used + reserved + amount is checked against the limit, and the amount is held
+    commit  → the reservation becomes usage; the user is marked dirty
+    refund  → the reservation is released (failed generation)
+    Every script first releases expired reservations (QUOTA_RESERVATION_TTL),
+    so a worker that dies mid-generation can't leak quota.
+
+    period: usageThisMonth.resetDate (YYYY-MM-DD). Once it has passed, the
+    ledger starts a fresh period at zero and resets the Firestore counters once.
+    Cold start: a missing <kind>:used is seeded from the user document inside
+    the reserve script. Limits always come from the user document, so plan
+    changes apply on the next request.
+    Flush: every QUOTA_FLUSH_INTERVAL seconds the dirty users' counts are
+    written to usageThisMonth in Firestore write batches. A failed batch is
+    retried user by user; users whose document is gone are dropped.
+    Without Redis (or when a script call fails) the same ledger runs in process
+    memory, and a reservation is committed/refunded where it was made.
+    commit_after(save) shields the save and the commit from cancellation: a
+    timeout or disconnect after the save lands must not refund it.
+
+Usage:
+    reservation = await quota_ledger.reserve(current_user, "generations")
+    if not reservation.granted: ...402...
+    try:
+        ...generate...
+        result = await reservation.commit_after(save())   # or: save, then await reservation.commit()
+    finally:
+        await reservation.release()   # refunds unless committed
+"""
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
+from datetime import datetime, timezone
+import asyncio
+import logging
+import time
+import uuid
+
+from google.api_core.exceptions import NotFound
+
+from app.config import settings
+from app.constants import Collections
+from app.utils.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# kind → (usageThisMonth counter field, usageThisMonth limit field, default limit)
+KINDS: Dict[str, Tuple[str, str, int]] = {
+    "generations": ("generations", "limit", 5),
+    "humanizations": ("humanizations", "humanizationsLimit", 5),
+    "graphics": ("socialGraphics", "socialGraphicsLimit", 5),
+}
+
+_DIRTY_KEY = "quota:dirty"
+
+# Firestore rejects write batches with more than 500 writes
+_FIRESTORE_BATCH_LIMIT = 500
+
+# Releases expired reservations; shared prefix of every script
+_PURGE_LUA = """
+local function purge(hash, res, now)
+    local expired = redis.call('ZRANGEBYSCORE', res, '-inf', now)
+    for _, member in ipairs(expired) do
+        local kind, amount = string.match(member, '^[^|]*|([^|]*)|(%d+)$')
+        if kind then
+            redis.call('HINCRBY', hash, kind .. ':reserved', -tonumber(amount))
+        end
+    end
+    if #expired > 0 then
+        redis.call('ZREMRANGEBYSCORE', res, '-inf', now)
+    end
+end
+"""
+
+# KEYS: hash, res | ARGV: kind, amount, limit (<0 = unlimited), seed, now, member, expires_at, ttl
+# Returns {granted (0/1), used, reserved}
+_RESERVE_LUA = _PURGE_LUA + """
+purge(KEYS[1], KEYS[2], ARGV[5])
+local used_field = ARGV[1] .. ':used'
+local reserved_field = ARGV[1] .. ':reserved'
+local amount = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('HSETNX', KEYS[1], used_field, ARGV[4])
+local used = tonumber(redis.call('HGET', KEYS[1], used_field))
+local reserved = tonumber(redis.call('HGET', KEYS[1], reserved_field) or '0')
+if limit >= 0 and used + reserved + amount > limit then
+    return {0, used, reserved}
+end
+redis.call('HINCRBY', KEYS[1], reserved_field, amount)
+redis.call('ZADD', KEYS[2], ARGV[7], ARGV[6])
+redis.call('EXPIRE', KEYS[1], ARGV[8])
+redis.call('EXPIRE', KEYS[2], ARGV[8])
+return {1, used, reserved + amount}
+"""
+
+# KEYS: hash, res, dirty | ARGV: member, kind, amount used, now, dirty member
+# Returns the new used count. An expired reservation is still counted - the work was done.
+_COMMIT_LUA = _PURGE_LUA + """
+purge(KEYS[1], KEYS[2], ARGV[4])
+if redis.call('ZREM', KEYS[2], ARGV[1]) == 1 then
+    local held = tonumber(string.match(ARGV[1], '|(%d+)$'))
+    redis.call('HINCRBY', KEYS[1], ARGV[2] .. ':reserved', -held)
+end
+local used = redis.call('HINCRBY', KEYS[1], ARGV[2] .. ':used', ARGV[3])
+redis.call('SADD', KEYS[3], ARGV[5])
+return used
+"""
+
+# KEYS: hash, res | ARGV: member, kind, now
+_REFUND_LUA = _PURGE_LUA + """
+purge(KEYS[1], KEYS[2], ARGV[3])
+if redis.call('ZREM', KEYS[2], ARGV[1]) == 1 then
+    local held = tonumber(string.match(ARGV[1], '|(%d+)$'))
+    redis.call('HINCRBY', KEYS[1], ARGV[2] .. ':reserved', -held)
+    return 1
+end
+return 0
+"""
+
+
+def _next_month_start(now: datetime) -> datetime:
+    """Same boundary FirebaseService._get_next_month_start writes as resetDate"""
+    if now.month == 12:
+        return datetime(now.year + 1, 1, 1, tzinfo=timezone.utc)
+    return datetime(now.year, now.month + 1, 1, tzinfo=timezone.utc)
+
+
+def _as_datetime(value: Any) -> Optional[datetime]:
+    """resetDate as an aware datetime (Firestore timestamp, datetime or ISO string)"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class Reservation:
+    """
+    Quota held for one piece of work
+
+    granted=False means the limit was reached; commit/release are then no-ops.
+    """
+
+    def __init__(
+        self,
+        ledger: "QuotaLedger",
+        user_id: str,
+        period: str,
+        kind: str,
+        amount: int,
+        granted: bool,
+        used: int,
+        limit: int,
+        reset_date: Optional[datetime],
+        member: Optional[str] = None,
+        seed: int = 0,
+        local: bool = False
+    ):
+        self.ledger = ledger
+        self.user_id = user_id
+        self.period = period
+        self.kind = kind
+        self.amount = amount
+        self.granted = granted
+        self.used = used
+        self.limit = limit
+        self.reset_date = reset_date
+        self.member = member
+        # Used count from the user document, for an in-process commit of a Redis reservation
+        self.seed = seed
+        # Held by the in-process ledger (no Redis, or Redis failed at reserve time)
+        self.local = local
+        self.committed = False
+        # Shielded save + commit still running (commit_after)
+        self._settling: Optional[asyncio.Future] = None
+
+    @property
+    def remaining(self) -> int:
+        """Units that were available when this reservation was requested"""
+        return max(self.limit - self.used, 0)
+
+    async def commit(self, amount: Optional[int] = None) -> int:
+        """
+        Turn the reservation into usage
+
+        Args:
+            amount: Units actually used (default: all reserved; the rest is released)
+
+        Returns:
+            New used count for the period
+        """
+        if not self.granted or self.committed:
+            return self.used
+        amount = self.amount if amount is None else min(amount, self.amount)
+        self.used = await self.ledger._commit(self, amount)
+        self.committed = True
+        return self.used
+
+    async def commit_after(self, work: Awaitable[Any]) -> Any:
+        """
+        Run the save this reservation pays for, then commit - shielded from cancellation
+
+        A caller cancelled mid-save (stage timeout, client disconnect) leaves both
+        steps running; the reservation is committed if the save lands and refunded
+        if it fails, so a saved result is never refunded.
+
+        Args:
+            work: Coroutine persisting the result
+
+        Returns:
+            Result of `work`
+        """
+        self._settling = asyncio.ensure_future(self._settle(work))
+        return await asyncio.shield(self._settling)
+
+    async def _settle(self, work: Awaitable[Any]) -> Any:
+        try:
+            result = await work
+        except BaseException:
+            await self._release()
+            raise
+        await self.commit()
+        return result
+
+    async def release(self):
+        """Refund the reservation unless it was committed (safe to call from `finally`)"""
+        if self._settling is not None and not self._settling.done():
+            return  # commit_after commits or refunds once the save finishes
+        await self._release()
+
+    async def _release(self):
+        if not self.granted or self.committed:
+            return
+        self.committed = True
+        try:
+            await self.ledger._refund(self)
+        except Exception as e:
+            # The reservation still expires after QUOTA_RESERVATION_TTL
+            logger.error(f"❌ Quota refund failed for user {self.user_id} ({self.kind}): {e}")
+
+
+class QuotaLedger:
+    """
+    Atomic per-user monthly quotas with reserve / commit / refund
+    """
+
+    def __init__(self):
+        self._scripts: Dict[str, Any] = {}
+        self._scripts_client = None
+        self._flusher: Optional[asyncio.Task] = None
+        # In-process ledger when Redis is unavailable
+        self._local: Dict[str, Dict[str, int]] = {}
+        self._local_reservations: Dict[str, Dict[str, float]] = {}
+        self._local_dirty: set = set()
+        self._local_resets: set = set()
+
+    # ==================== KEYS & PERIODS ====================
+
+    @staticmethod
+    def _hash_key(user_id: str, period: str) -> str:
+        return f"quota:{user_id}:{period}"
+
+    @staticmethod
+    def _resolve_period(current_user: Dict[str, Any]) -> Tuple[str, datetime, bool]:
+        """
+        Current quota period of a user
+
+        Returns:
+            (period id, period end, rolled_over) - rolled_over means the stored
+            resetDate has passed, so the document's counters belong to an old period
+        """
+        usage = current_user.get('usageThisMonth') or {}
+        now = datetime.now(timezone.utc)
+        reset_date = _as_datetime(usage.get('resetDate'))
+        rolled_over = reset_date is not None and reset_date <= now
+        if reset_date is None or rolled_over:
+            reset_date = _next_month_start(now)
+        return reset_date.strftime("%Y-%m-%d"), reset_date, rolled_over
+
+    def _key_ttl(self, period_end: datetime) -> int:
+        """Ledger keys outlive their period by a day (late commits, final flush)"""
+        return max(int((period_end - datetime.now(timezone.utc)).total_seconds()), 0) + 86400
+
+    def _script(self, name: str, source: str):
+        client = redis_client.client
+        if client is not self._scripts_client:
+            self._scripts = {}
+            self._scripts_client = client
+        if name not in self._scripts:
+            self._scripts[name] = client.register_script(source)
+        return self._scripts[name]
+
+    # ==================== RESERVE / COMMIT / REFUND ====================
+
+    async def reserve(self, current_user: Dict[str, Any], kind: str, amount: int = 1) -> Reservation:
+        """
+        Hold `amount` units of a monthly quota
+
+        Args:
+            current_user: User document (limits, usage seed and resetDate)
+            kind: "generations", "humanizations" or "graphics"
+            amount: Units the work will use
+
+        Returns:
+            Reservation (check .granted)
+        """
+        used_field, limit_field, default_limit = KINDS[kind]
+        user_id = current_user['uid']
+        usage = current_user.get('usageThisMonth') or {}
+        limit = int(usage.get(limit_field, default_limit))
+        period, period_end, rolled_over = self._resolve_period(current_user)
+        seed = 0 if rolled_over else int(usage.get(used_field, 0) or 0)
+        if rolled_over:
+            await self._reset_period(user_id, period, period_end, limit)
+
+        now = time.time()
+        member = f"{uuid.uuid4().hex}|{kind}|{amount}"
+        expires_at = now + settings.QUOTA_RESERVATION_TTL
+        key = self._hash_key(user_id, period)
+
+        local = redis_client.client is None
+        if not local:
+            try:
+                granted, used, reserved = await self._script("reserve", _RESERVE_LUA)(
+                    keys=[key, f"{key}:res"],
+                    args=[kind, amount, limit, seed, now, member, expires_at, self._key_ttl(period_end)]
+                )
+                granted, used, reserved = bool(int(granted)), int(used), int(reserved)
+            except Exception as e:
+                logger.warning(f"⚠️ Redis quota ledger unavailable, reserving in-process: {e}")
+                local = True
+        if local:
+            granted, used, reserved = self._local_reserve(key, kind, amount, limit, seed, now, member, expires_at)
+
+        if not granted:
+            logger.info(f"🚫 Quota reached for user {user_id}: {kind} {used} used + {reserved} reserved of {limit}")
+        return Reservation(
+            ledger=self,
+            user_id=user_id,
+            period=period,
+            kind=kind,
+            amount=amount,
+            granted=granted,
+            # Units committed or held by other in-flight work
+            used=used + reserved - (amount if granted else 0),
+            limit=limit,
+            reset_date=period_end,
+            member=member if granted else None,
+            seed=seed,
+            local=local
+        )
+
+    async def _commit(self, reservation: Reservation, amount: int) -> int:
+        key = self._hash_key(reservation.user_id, reservation.period)
+        dirty_member = f"{reservation.user_id}|{reservation.period}"
+        now = time.time()
+        if not reservation.local and redis_client.client is not None:
+            try:
+                used = await self._script("commit", _COMMIT_LUA)(
+                    keys=[key, f"{key}:res", _DIRTY_KEY],
+                    args=[reservation.member, reservation.kind, amount, now, dirty_member]
+                )
+                return int(used)
+            except Exception as e:
+                # The work is done, so count it here; the Redis hold expires on its own
+                logger.warning(f"⚠️ Redis quota ledger unavailable, committing in-process: {e}")
+        self._local_purge(key, now)
+        state = self._local.setdefault(key, {})
+        if self._local_reservations.get(key, {}).pop(reservation.member, None) is not None:
+            state[f"{reservation.kind}:reserved"] -= reservation.amount
+        used_field = f"{reservation.kind}:used"
+        state[used_field] = state.get(used_field, reservation.seed) + amount
+        self._local_dirty.add(dirty_member)
+        return state[used_field]
+
+    async def _refund(self, reservation: Reservation):
+        key = self._hash_key(reservation.user_id, reservation.period)
+        now = time.time()
+        if not reservation.local and redis_client.client is not None:
+            await self._script("refund", _REFUND_LUA)(
+                keys=[key, f"{key}:res"],
+                args=[reservation.member, reservation.kind, now]
+            )
+            return
+        self._local_purge(key, now)
+        if self._local_reservations.get(key, {}).pop(reservation.member, None) is not None:
+            self._local[key][f"{reservation.kind}:reserved"] -= reservation.amount
+
+    async def usage(self, current_user: Dict[str, Any], kind: str) -> Dict[str, int]:
+        """
+        Read-only view of a quota (no reservation)
+
+        Returns:
+            dict: used, reserved, limit, remaining
+        """
+        used_field, limit_field, default_limit = KINDS[kind]
+        usage = current_user.get('usageThisMonth') or {}
+        limit = int(usage.get(limit_field, default_limit))
+        period, _, rolled_over = self._resolve_period(current_user)
+        key = self._hash_key(current_user['uid'], period)
+        used = reserved = None
+        if redis_client.client is not None:
+            try:
+                used, reserved = await redis_client.client.hmget(key, f"{kind}:used", f"{kind}:reserved")
+            except Exception as e:
+                logger.warning(f"⚠️ Redis quota ledger unavailable, reading in-process: {e}")
+        if used is None:
+            state = self._local.get(key, {})
+            used, reserved = state.get(f"{kind}:used"), state.get(f"{kind}:reserved")
+        if used is None:
+            used = 0 if rolled_over else usage.get(used_field, 0) or 0
+        used, reserved = int(used), int(reserved or 0)
+        return {"used": used, "reserved": reserved, "limit": limit, "remaining": max(limit - used - reserved, 0)}
+
+    # ==================== IN-PROCESS FALLBACK ====================
+
+    def _local_purge(self, key: str, now: float):
+        reservations = self._local_reservations.get(key, {})
+        for member, expires_at in list(reservations.items()):
+            if expires_at <= now:
+                _, kind, amount = member.split("|")
+                self._local[key][f"{kind}:reserved"] -= int(amount)
+                del reservations[member]
+
+    def _local_reserve(
+        self, key: str, kind: str, amount: int, limit: int, seed: int, now: float, member: str, expires_at: float
+    ) -> Tuple[bool, int, int]:
+        self._local_purge(key, now)
+        state = self._local.setdefault(key, {})
+        used = state.setdefault(f"{kind}:used", seed)
+        reserved = state.setdefault(f"{kind}:reserved", 0)
+        if limit >= 0 and used + reserved + amount > limit:
+            return False, used, reserved
+        state[f"{kind}:reserved"] = reserved + amount
+        self._local_reservations.setdefault(key, {})[member] = expires_at
+        return True, used, reserved + amount
+
+    # ==================== MONTHLY RESET ====================
+
+    async def _reset_period(self, user_id: str, period: str, period_end: datetime, limit: int):
+        """Zero the Firestore monthly counters once per user and period (first worker to get here)"""
+        marker = f"{self._hash_key(user_id, period)}:reset"
+        if redis_client.client is not None:
+            if not await redis_client.set(marker, "1", ex=self._key_ttl(period_end), nx=True):
+                return
+        else:
+            if marker in self._local_resets:
+                return
+            self._local_resets.add(marker)
+
+        from app.services.firebase_service import firebase_service
+        try:
+            await firebase_service.reset_monthly_usage(user_id, limit)
+            logger.info(f"🔄 Monthly quota period {period} started for user {user_id}")
+        except Exception as e:
+            logger.error(f"❌ Monthly usage reset failed for user {user_id}: {e}")
+
+    # ==================== FIRESTORE FLUSH ====================
+
+    async def _pop_dirty(self, count: int, local: bool) -> List[str]:
+        if not local:
+            return list(await redis_client.client.spop(_DIRTY_KEY, count) or [])
+        members = []
+        while self._local_dirty and len(members) < count:
+            members.append(self._local_dirty.pop())
+        return members
+
+    async def _restore_dirty(self, members: List[str], local: bool):
+        if not local:
+            await redis_client.client.sadd(_DIRTY_KEY, *members)
+        else:
+            self._local_dirty.update(members)
+
+    async def _read_counts(self, keys: List[str], local: bool) -> List[Dict[str, int]]:
+        fields = [f"{kind}:used" for kind in KINDS]
+        if not local:
+            pipe = redis_client.client.pipeline(transaction=False)
+            for key in keys:
+                pipe.hmget(key, *fields)
+            rows = await pipe.execute()
+        else:
+            rows = [[self._local.get(key, {}).get(field) for field in fields] for key in keys]
+        return [
+            {kind: int(value) for kind, value in zip(KINDS, row) if value is not None}
+            for row in rows
+        ]
+
+    async def flush(self) -> int:
+        """
+        Write committed counts of dirty users to Firestore (usageThisMonth.*)
+
+        Counts are absolute, so a repeated or overlapping flush is harmless.
+        Periods that have already ended are skipped - their reset owns the counters.
+
+        Returns:
+            Number of user documents written
+        """
+        written = 0
+        if redis_client.client is not None:
+            try:
+                written += await self._flush_dirty(local=False)
+            except Exception as e:
+                logger.error(f"❌ Quota flush from Redis failed: {e}")
+        # Commits made in process memory (no Redis, or while it was failing)
+        return written + await self._flush_dirty(local=True)
+
+    async def _flush_dirty(self, local: bool) -> int:
+        """Flush one dirty set (Redis or in-process) in Firestore-sized batches"""
+        from app.services.firebase_service import firebase_service
+
+        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        batch_size = min(settings.QUOTA_FLUSH_BATCH_SIZE, _FIRESTORE_BATCH_LIMIT)
+        written = 0
+        while True:
+            members = await self._pop_dirty(batch_size, local)
+            if not members:
+                return written
+            entries = [(member, *member.split("|", 1)) for member in members]
+            entries = [(member, user_id, period) for member, user_id, period in entries if period > today]
+            counts = await self._read_counts([self._hash_key(user_id, period) for _, user_id, period in entries], local)
+
+            # (dirty member, user id, usageThisMonth update)
+            updates = [
+                (member, user_id, {f"usageThisMonth.{KINDS[kind][0]}": used for kind, used in kinds.items()})
+                for (member, user_id, _), kinds in zip(entries, counts)
+                if kinds
+            ]
+            if not updates:
+                continue
+
+            db = firebase_service.db
+            batch = db.batch()
+            for _, user_id, data in updates:
+                batch.update(db.collection(Collections.USERS).document(user_id), data)
+            try:
+                await batch.commit()
+            except Exception as e:
+                # One bad document (e.g. a deleted user) fails the whole batch
+                logger.warning(f"⚠️ Quota flush batch of {len(updates)} users failed, retrying one by one: {e}")
+                flushed, retry_later = await self._flush_each(updates, local)
+                written += flushed
+                if retry_later:
+                    return written
+                continue
+            for _, user_id, _ in updates:
+                await firebase_service.invalidate_user(user_id)
+            written += len(updates)
+            logger.debug(f"💾 Flushed quota counters for {len(updates)} users")
+
+    async def _flush_each(self, updates: List[Tuple[str, str, Dict[str, int]]], local: bool) -> Tuple[int, bool]:
+        """
+        Write users one at a time after a failed batch
+
+        Returns:
+            (documents written, whether any user was put back for the next flush)
+        """
+        from app.services.firebase_service import firebase_service
+
+        db = firebase_service.db
+        written = 0
+        failed: List[str] = []
+        for member, user_id, data in updates:
+            try:
+                await db.collection(Collections.USERS).document(user_id).update(data)
+            except NotFound:
+                logger.warning(f"⚠️ Dropping quota counters of user {user_id}: document no longer exists")
+                continue
+            except Exception as e:
+                logger.error(f"❌ Quota flush failed for user {user_id}: {e}")
+                failed.append(member)
+                continue
+            await firebase_service.invalidate_user(user_id)
+            written += 1
+        if failed:
+            await self._restore_dirty(failed, local)
+        return written, bool(failed)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(settings.QUOTA_FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Quota flush failed: {e}")
+
+    def start(self):
+        """Start the periodic Firestore flush (lifespan startup, after redis_client.connect)"""
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the flush loop and write what's left (lifespan shutdown, before Redis disconnects)"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"❌ Final quota flush failed: {e}")
+
+
+# Global instance
+quota_ledger = QuotaLedger()
@@ -0,0 +1,245 @@
+"""
+Rate Limiter - per-user sliding-window request limits by subscription tier
+Hourly and daily windows from settings (FREE/HOBBY/PRO_TIER_LIMIT_HOURLY/DAILY)
+
+WHY:
+    RATE_LIMIT_ENABLED and the tier limits were configured but nothing enforced
+    them. A plain INCR followed by EXPIRE is two round trips and leaks a key
+    that never expires if the worker dies in between.
+
+HOW (sliding window counter):
+    Each window keeps one counter per fixed bucket: ratelimit:<uid>:<window>:<bucket>.
+    The request count over the last `window` seconds is estimated as
+        previous bucket × (share of the previous bucket still inside the window) + current bucket
+    One Lua script per request reads both buckets of every window, rejects if
+    any estimate would exceed its limit, and otherwise increments the current
+    buckets and sets their TTL (2 × window) - atomic, and every key expires.
+    Two counters per window regardless of traffic (a request log in a sorted
+    set would grow to the daily limit per user).
+
+    Without Redis (or when a call fails) the same algorithm runs per worker
+    in process memory, so limits still apply - per worker instead of globally.
+
+Usage:
+    decision = await rate_limiter.hit(user_id, "free")
+    if not decision.allowed: ...429 with decision.headers()...
+"""
+from typing import Dict, List, Optional, Tuple
+import logging
+import math
+import time
+
+from app.config import settings
+from app.constants import SubscriptionPlan, UsageLimits
+from app.utils.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+HOUR = 3600
+DAY = 86400
+
+# Expired in-process buckets are dropped every this many hits
+_LOCAL_SWEEP_EVERY = 1000
+
+# KEYS: current + previous bucket per window (2 per window)
+# ARGV: window count, then per window: window seconds, limit, seconds elapsed in the current bucket
+# Returns {allowed (0/1), current_1, previous_1, current_2, previous_2, ...} - current counts include this hit
+_SLIDING_WINDOW_LUA = """
+local windows = tonumber(ARGV[1])
+local counts = {}
+local allowed = 1
+for i = 1, windows do
+    local window = tonumber(ARGV[i * 3 - 1])
+    local limit = tonumber(ARGV[i * 3])
+    local elapsed = tonumber(ARGV[i * 3 + 1])
+    local current = tonumber(redis.call('GET', KEYS[i * 2 - 1]) or '0')
+    local previous = tonumber(redis.call('GET', KEYS[i * 2]) or '0')
+    if previous * (window - elapsed) / window + current + 1 > limit then
+        allowed = 0
+    end
+    counts[i * 2 - 1] = current
+    counts[i * 2] = previous
+end
+if allowed == 1 then
+    for i = 1, windows do
+        counts[i * 2 - 1] = redis.call('INCR', KEYS[i * 2 - 1])
+        redis.call('EXPIRE', KEYS[i * 2 - 1], tonumber(ARGV[i * 3 - 1]) * 2)
+    end
+end
+local result = {allowed}
+for i = 1, windows * 2 do
+    result[i + 1] = counts[i]
+end
+return result
+"""
+
+
+class WindowState:
+    """Usage of one window after a hit"""
+
+    def __init__(self, window: int, limit: int, elapsed: float, current: int, previous: int):
+        self.window = window
+        self.limit = limit
+        self.elapsed = elapsed
+        self.current = current
+        self.previous = previous
+
+    @property
+    def estimate(self) -> float:
+        """Requests counted in the last `window` seconds"""
+        return self.previous * (self.window - self.elapsed) / self.window + self.current
+
+    @property
+    def remaining(self) -> int:
+        return max(int(self.limit - self.estimate), 0)
+
+    @property
+    def reset_after(self) -> int:
+        """Seconds until the current bucket rolls over"""
+        return max(math.ceil(self.window - self.elapsed), 1)
+
+    def retry_after(self) -> int:
+        """Seconds until one more request fits (this window only)"""
+        excess = self.estimate + 1 - self.limit
+        if excess <= 0:
+            return 0
+        if self.previous and self.current + 1 <= self.limit:
+            # Wait for enough of the previous bucket to slide out of the window
+            return max(math.ceil(excess / self.previous * self.window), 1)
+        return self.reset_after
+
+
+class RateLimitDecision:
+    """Outcome of one rate-limit check"""
+
+    def __init__(self, allowed: bool, windows: List[WindowState]):
+        self.allowed = allowed
+        self.windows = windows
+
+    @property
+    def retry_after(self) -> int:
+        if self.allowed:
+            return 0
+        return max(state.retry_after() for state in self.windows)
+
+    def headers(self) -> Dict[str, str]:
+        """X-RateLimit-* for the most constrained window, plus Retry-After when rejected"""
+        tightest = min(self.windows, key=lambda state: (state.remaining, state.window))
+        headers = {
+            "X-RateLimit-Limit": str(tightest.limit),
+            "X-RateLimit-Remaining": str(tightest.remaining),
+            "X-RateLimit-Reset": str(tightest.reset_after),
+            "X-RateLimit-Window": str(tightest.window),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+class RateLimiter:
+    """
+    Sliding-window limiter shared by all workers through Redis
+    """
+
+    def __init__(self):
+        self._script = None
+        self._script_client = None
+        # In-process fallback: bucket key → (count, expires_at)
+        self._local: Dict[str, Tuple[int, float]] = {}
+        self._local_hits = 0
+
+    @staticmethod
+    def tier_limits(tier: Optional[str]) -> Dict[int, int]:
+        """window seconds → request limit for a subscription plan"""
+        limits = {
+            SubscriptionPlan.FREE: (settings.FREE_TIER_LIMIT_HOURLY, settings.FREE_TIER_LIMIT_DAILY),
+            SubscriptionPlan.HOBBY: (settings.HOBBY_TIER_LIMIT_HOURLY, settings.HOBBY_TIER_LIMIT_DAILY),
+            SubscriptionPlan.PRO: (settings.PRO_TIER_LIMIT_HOURLY, settings.PRO_TIER_LIMIT_DAILY),
+            SubscriptionPlan.ENTERPRISE: (UsageLimits.ENTERPRISE_HOURLY, UsageLimits.ENTERPRISE_DAILY),
+        }
+        hourly, daily = limits.get(tier, limits[SubscriptionPlan.FREE])
+        return {HOUR: hourly, DAY: daily}
+
+    @staticmethod
+    def _bucket_keys(user_id: str, window: int, now: float) -> Tuple[str, str, float]:
+        """(current key, previous key, seconds elapsed in the current bucket)"""
+        bucket = int(now // window)
+        return (
+            f"ratelimit:{user_id}:{window}:{bucket}",
+            f"ratelimit:{user_id}:{window}:{bucket - 1}",
+            now - bucket * window
+        )
+
+    async def hit(self, user_id: str, tier: Optional[str]) -> RateLimitDecision:
+        """
+        Count one request against every window of the user's tier
+
+        Args:
+            user_id: User's Firebase UID
+            tier: Subscription plan (unknown plans get free-tier limits)
+
+        Returns:
+            RateLimitDecision (rejected requests are not counted)
+        """
+        now = time.time()
+        limits = self.tier_limits(tier)
+        keys: List[str] = []
+        args: List[float] = [len(limits)]
+        elapsed: List[float] = []
+        for window, limit in limits.items():
+            current_key, previous_key, seconds = self._bucket_keys(user_id, window, now)
+            keys += [current_key, previous_key]
+            args += [window, limit, seconds]
+            elapsed.append(seconds)
+
+        result = None
+        client = redis_client.client
+        if client is not None:
+            try:
+                if self._script is None or self._script_client is not client:
+                    self._script = client.register_script(_SLIDING_WINDOW_LUA)
+                    self._script_client = client
+                result = [int(value) for value in await self._script(keys=keys, args=args)]
+            except Exception as e:
+                logger.warning(f"⚠️ Redis rate limiter unavailable, limiting in-process: {e}")
+        if result is None:
+            result = self._local_hit(keys, limits, elapsed, now)
+
+        windows = [
+            WindowState(window, limit, elapsed[i], result[i * 2 + 1], result[i * 2 + 2])
+            for i, (window, limit) in enumerate(limits.items())
+        ]
+        decision = RateLimitDecision(bool(result[0]), windows)
+        if not decision.allowed:
+            logger.info(f"🚦 Rate limit hit for user {user_id} ({tier}), retry after {decision.retry_after}s")
+        return decision
+
+    # ==================== IN-PROCESS FALLBACK ====================
+
+    def _local_count(self, key: str, now: float) -> int:
+        count, expires_at = self._local.get(key, (0, 0.0))
+        return count if expires_at > now else 0
+
+    def _local_hit(self, keys: List[str], limits: Dict[int, int], elapsed: List[float], now: float) -> List[int]:
+        """Same decision as the Lua script, on this worker's counters"""
+        self._local_hits += 1
+        if self._local_hits % _LOCAL_SWEEP_EVERY == 0:
+            self._local = {key: entry for key, entry in self._local.items() if entry[1] > now}
+
+        counts: List[int] = []
+        allowed = True
+        for i, (window, limit) in enumerate(limits.items()):
+            current = self._local_count(keys[i * 2], now)
+            previous = self._local_count(keys[i * 2 + 1], now)
+            if previous * (window - elapsed[i]) / window + current + 1 > limit:
+                allowed = False
+            counts += [current, previous]
+        if allowed:
+            for i, window in enumerate(limits):
+                counts[i * 2] += 1
+                self._local[keys[i * 2]] = (counts[i * 2], now + window * 2)
+        return [int(allowed)] + counts
+
+
+# Global instance
+rate_limiter = RateLimiter()
@@ -0,0 +1,201 @@
+"""
+Single-Flight - Coalesce identical in-flight generations
+A double-click or client retry shares one model call instead of billing twice
+
+WHY:
+    cache_manager.get_cached_generation only helps once a generation has
+    finished. Two identical requests that arrive while the first is still
+    running both miss the cache and both call Gemini.
+
+HOW (keyed by cache_manager.generation_cache_key, same hash as the generation cache):
+    1. In-process  → the first request (leader) registers a future; identical
+                     requests in the same worker await it
+    2. Cross-worker → the leader takes `singleflight:<key>:lock` with SET NX.
+                     Followers in other workers subscribe to `singleflight:<key>`
+                     and get the leader's result via pub/sub (or from the
+                     short-lived `singleflight:<key>:result` if they subscribed late)
+    3. Safety nets → if the leader fails in another worker, dies (lock expires)
+                     or SINGLE_FLIGHT_WAIT_TIMEOUT passes, the follower runs the
+                     call itself. Without Redis only in-process coalescing applies.
+                     A cancelled leader (client disconnect) hands the call to
+                     its local followers instead of cancelling them.
+
+Usage:
+    from app.services.single_flight import single_flight
+
+    result = await single_flight.run(key, generate)
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import copy
+import json
+import logging
+import os
+import uuid
+
+from app.config import settings
+from app.utils.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderCancelled(Exception):
+    """The leader was cancelled before finishing; local followers retry the call"""
+
+
+class SingleFlight:
+    """
+    One in-flight call per key - followers reuse the leader's result
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.worker_id = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Zero counters"""
+        self.stats: Dict[str, int] = {
+            "leaders": 0,
+            "local_followers": 0,
+            "remote_followers": 0,
+            "remote_fallbacks": 0
+        }
+
+    async def run(self, key: str, call: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Run `call` once per key across concurrent identical requests
+
+        Args:
+            key: Request identity (generation cache key)
+            call: Coroutine factory producing a JSON-serializable result
+
+        Returns:
+            The leader's result (followers get their own copy)
+        """
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return await call()
+
+        pending = self._inflight.get(key)
+        while pending is not None:
+            self.stats["local_followers"] += 1
+            logger.info(f"🔗 Joining in-flight generation {key}")
+            try:
+                # shield: a cancelled follower must not cancel the leader's future
+                return copy.deepcopy(await asyncio.shield(pending))
+            except LeaderCancelled:
+                # The leader's client went away - the first follower to wake up leads instead
+                self.stats["local_followers"] -= 1
+                pending = self._inflight.get(key)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._run_across_workers(key, call)
+        except BaseException as e:
+            # Followers must not inherit the leader's cancellation - they retry instead
+            future.set_exception(LeaderCancelled() if isinstance(e, asyncio.CancelledError) else e)
+            future.exception()  # Mark retrieved - there may be no local followers
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    # ==================== CROSS-WORKER ====================
+
+    async def _run_across_workers(self, key: str, call: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        if redis_client.client is None:
+            self.stats["leaders"] += 1
+            return await call()
+
+        lock_key = f"singleflight:{key}:lock"
+        if await redis_client.set(lock_key, self.worker_id, ex=settings.SINGLE_FLIGHT_LOCK_TTL, nx=True):
+            return await self._lead(key, lock_key, call)
+
+        result = await self._follow(key, lock_key)
+        if result is not None:
+            self.stats["remote_followers"] += 1
+            logger.info(f"🔗 Reused generation {key} from another worker")
+            return result
+
+        # Leader failed, vanished or took too long - do the work ourselves
+        self.stats["remote_fallbacks"] += 1
+        logger.warning(f"⚠️ No result from leader for {key} - generating locally")
+        return await call()
+
+    async def _lead(self, key: str, lock_key: str, call: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Run the call and hand the outcome to followers in other workers"""
+        self.stats["leaders"] += 1
+        try:
+            result = await call()
+        except BaseException:
+            await redis_client.publish(f"singleflight:{key}", json.dumps({"ok": False}))
+            raise
+        else:
+            payload = json.dumps({"ok": True, "result": result})
+            await redis_client.set(f"singleflight:{key}:result", payload, ex=settings.SINGLE_FLIGHT_RESULT_TTL)
+            await redis_client.publish(f"singleflight:{key}", payload)
+            return result
+        finally:
+            if await redis_client.get(lock_key) == self.worker_id:
+                await redis_client.delete(lock_key)
+
+    async def _follow(self, key: str, lock_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Wait for another worker's leader
+
+        Returns:
+            Leader's result, or None if it failed, vanished or timed out
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.SINGLE_FLIGHT_WAIT_TIMEOUT
+        pubsub = redis_client.client.pubsub()
+        try:
+            await pubsub.subscribe(f"singleflight:{key}")
+            # Subscribed - a leader that finished before this point left its result behind
+            raw = await redis_client.get(f"singleflight:{key}:result")
+            while raw is None:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return None
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=min(remaining, 1.0))
+                if message is not None:
+                    raw = message["data"]
+                elif not await redis_client.exists(lock_key):
+                    # Lock released without a message reaching us (or leader died)
+                    raw = await redis_client.get(f"singleflight:{key}:result")
+                    if raw is None:
+                        return None
+        except Exception as e:
+            logger.error(f"Single-flight follow error for {key}: {e}")
+            return None
+        finally:
+            try:
+                await pubsub.unsubscribe(f"singleflight:{key}")
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+        try:
+            outcome = json.loads(raw)
+        except (TypeError, ValueError):
+            return None
+        return outcome.get("result") if outcome.get("ok") else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Coalescing counters"""
+        coalesced = self.stats["local_followers"] + self.stats["remote_followers"]
+        total = self.stats["leaders"] + coalesced
+        return {
+            "enabled": settings.SINGLE_FLIGHT_ENABLED,
+            "in_flight": len(self._inflight),
+            "coalesced": coalesced,
+            "coalesce_rate": round(coalesced / total * 100, 2) if total > 0 else 0,
+            **self.stats
+        }
+
+
+# Singleton instance
+single_flight = SingleFlight()
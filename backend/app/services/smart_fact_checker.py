@@ -13,6 +13,10 @@ import hashlib
 import json
 from datetime import datetime, timedelta
 
+from app.services.llm_client import llm_client
+from app.services.client_registry import client_registry
+from app.utils.cache_metrics import cache_metrics
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -78,7 +82,7 @@ class SmartFactChecker:
         
         genai.configure(api_key=api_key)
         from app.config import ModelConfig
-        self.gemini_model = genai.GenerativeModel(ModelConfig.FACT_CHECK_MODEL)
+        self.gemini_model = client_registry.get_generative_model(ModelConfig.FACT_CHECK_MODEL)
         
         # Google Custom Search API
         self.search_api_key = os.getenv('GOOGLE_SEARCH_API_KEY')
@@ -258,7 +262,8 @@ If no verifiable claims found, return empty array: []
 """
         
         try:
-            response = self.gemini_model.generate_content(
+            response = await llm_client.generate_content(
+                self.gemini_model,
                 prompt,
                 generation_config=genai.GenerationConfig(
                     temperature=0.1,
@@ -286,6 +291,7 @@ If no verifiable claims found, return empty array: []
         cache_key = self._get_cache_key(claim)
         if cache_key in self._cache:
             cached_verified, cached_sources, cached_confidence = self._cache[cache_key]
+            cache_metrics.record_get("factcheck", "fact_check", hit=True, tier="l1")
             logger.info(f"💾 Cache hit for claim: {claim[:50]}...")
             return FactCheckClaim(
                 claim=claim,
@@ -295,9 +301,10 @@ If no verifiable claims found, return empty array: []
                 evidence=f"Verified via {len(cached_sources)} sources" if cached_verified else "No supporting evidence found"
             )
         
+        cache_metrics.record_get("factcheck", "fact_check", hit=False, tier="l1")
         try:
-            # Search Google for evidence
-            search_results = self._google_search(claim)
+            # Search Google for evidence (blocking HTTP call - keep it off the event loop)
+            search_results = await llm_client.run_sync(self._google_search, claim)
             
             if not search_results:
                 result = FactCheckClaim(
@@ -333,6 +340,7 @@ If no verifiable claims found, return empty array: []
             
             # Cache result
             self._cache[cache_key] = (result.verified, result.sources, result.confidence)
+            cache_metrics.record_set("factcheck", "fact_check")
             
             return result
             
@@ -416,7 +424,8 @@ Respond with JSON ONLY:
 """
         
         try:
-            response = self.gemini_model.generate_content(
+            response = await llm_client.generate_content(
+                self.gemini_model,
                 prompt,
                 generation_config=genai.GenerationConfig(
                     temperature=0.1,
@@ -0,0 +1,241 @@
+"""
+Token Budget - Adaptive max_output_tokens from observed output lengths
+Budgets follow what the model actually writes instead of a static words→tokens formula
+
+WHY:
+    calculate_max_tokens maps word counts to fixed budgets. Some tones run past
+    them (truncated JSON → failed validation → retry) while others use a
+    fraction (over-sized budgets reserve TPM in the LLM scheduler and queue
+    other requests for nothing).
+
+HOW (per content type, tone, word-count bucket and model):
+    1. Every finished generation records its output (candidate) token count.
+       Truncated responses (finish_reason MAX_TOKENS) are recorded as
+       budget × TOKEN_ESTIMATOR_TRUNCATION_BOOST and flagged
+    2. Once TOKEN_ESTIMATOR_MIN_SAMPLES are known, the budget is the
+       TOKEN_ESTIMATOR_PERCENTILE of the window plus TOKEN_ESTIMATOR_HEADROOM,
+       and never below a truncated sample still in the window (one truncation
+       is rarer than the percentile but must not repeat); until then the
+       static formula applies
+    3. Samples live in Redis lists (`token_budget:<key>`, newest first, capped at
+       TOKEN_ESTIMATOR_WINDOW) shared by all workers and restarts; each worker
+       refreshes its copy at most every TOKEN_ESTIMATOR_SYNC_INTERVAL seconds
+
+Usage:
+    from app.services.token_budget import token_estimator
+
+    max_tokens = token_estimator.max_tokens("blog", tone, word_count, model_name, default=8000)
+    await token_estimator.record("blog", tone, word_count, model_name, output_tokens, max_tokens, finish_reason)
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import deque
+import asyncio
+import logging
+import math
+import time
+
+from app.config import settings
+from app.utils.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+def _percentile(ordered: List[int], percentile: float) -> int:
+    rank = max(math.ceil(percentile / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def _encode(tokens: int, truncated: bool) -> str:
+    return f"{tokens}:t" if truncated else str(tokens)
+
+
+def _decode(raw: str) -> Tuple[int, bool]:
+    tokens, _, flag = raw.partition(":")
+    return int(tokens), flag == "t"
+
+
+class OutputTokenEstimator:
+    """
+    Online percentile estimate of output tokens per request shape
+    """
+
+    def __init__(self):
+        self._samples: Dict[str, deque] = {}  # key → (tokens, truncated), oldest first
+        self._last_sync: Dict[str, float] = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Zero counters"""
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def bucket(word_count: Optional[int]) -> int:
+        """Word counts rounded up to TOKEN_ESTIMATOR_BUCKET_WORDS (0 for length-less content)"""
+        if not word_count:
+            return 0
+        size = settings.TOKEN_ESTIMATOR_BUCKET_WORDS
+        return int(math.ceil(word_count / size) * size)
+
+    def key(self, content_type: str, tone: Optional[str], word_count: Optional[int], model_name: str) -> str:
+        """Stats key: content type, tone, word-count bucket, model"""
+        return f"{content_type}:{(tone or 'default').lower()}:{self.bucket(word_count)}:{model_name}"
+
+    def _window(self, key: str) -> deque:
+        window = self._samples.get(key)
+        if window is None:
+            window = deque(maxlen=settings.TOKEN_ESTIMATOR_WINDOW)
+            self._samples[key] = window
+        return window
+
+    def _count(self, key: str, field: str):
+        counters = self.stats.setdefault(key, {"adaptive": 0, "static": 0, "recorded": 0, "truncated": 0})
+        counters[field] += 1
+
+    # ==================== ESTIMATE ====================
+
+    def estimate(self, key: str) -> Optional[int]:
+        """
+        Adaptive budget for a key
+
+        Returns:
+            Percentile of observed output tokens plus headroom, or None while
+            there are fewer than TOKEN_ESTIMATOR_MIN_SAMPLES samples
+        """
+        window = self._samples.get(key)
+        if not window or len(window) < settings.TOKEN_ESTIMATOR_MIN_SAMPLES:
+            return None
+        observed = _percentile(sorted(tokens for tokens, _ in window), settings.TOKEN_ESTIMATOR_PERCENTILE)
+        budget = int(math.ceil(round(observed * (1 + settings.TOKEN_ESTIMATOR_HEADROOM), 6)))
+        budget = max([budget] + [tokens for tokens, truncated in window if truncated])
+        return max(settings.TOKEN_ESTIMATOR_MIN_TOKENS, min(budget, settings.TOKEN_ESTIMATOR_MAX_TOKENS))
+
+    def max_tokens(
+        self,
+        content_type: str,
+        tone: Optional[str],
+        word_count: Optional[int],
+        model_name: str,
+        default: int
+    ) -> int:
+        """
+        max_output_tokens for a request
+
+        Args:
+            content_type: Type of content (blog, email, ...)
+            tone: Content tone
+            word_count: Target word count (None if the content has no length target)
+            model_name: Model that will generate
+            default: Static budget used until enough samples exist
+
+        Returns:
+            Adaptive budget, or default
+        """
+        if not settings.TOKEN_ESTIMATOR_ENABLED:
+            return default
+        key = self.key(content_type, tone, word_count, model_name)
+        self._schedule_sync(key)
+        budget = self.estimate(key)
+        if budget is None:
+            self._count(key, "static")
+            return default
+        self._count(key, "adaptive")
+        logger.debug(f"🎚️ Adaptive max_output_tokens for {key}: {budget} (static: {default})")
+        return budget
+
+    # ==================== RECORD ====================
+
+    async def record(
+        self,
+        content_type: str,
+        tone: Optional[str],
+        word_count: Optional[int],
+        model_name: str,
+        output_tokens: Optional[int],
+        max_tokens: int,
+        finish_reason: Any = None
+    ):
+        """
+        Record one finished generation
+
+        Args:
+            content_type: Type of content
+            tone: Content tone
+            word_count: Target word count
+            model_name: Model that generated
+            output_tokens: Candidate (output) tokens reported by the API
+            max_tokens: Budget the call ran with
+            finish_reason: Finish reason (MAX_TOKENS = truncated)
+        """
+        if not settings.TOKEN_ESTIMATOR_ENABLED or not output_tokens:
+            return
+
+        key = self.key(content_type, tone, word_count, model_name)
+        truncated = finish_reason is not None and "MAX_TOKENS" in str(finish_reason)
+        sample = int(output_tokens)
+        if truncated:
+            # The real length is unknown (only that it exceeded the budget) - push the estimate past it
+            sample = int(max(sample, max_tokens) * settings.TOKEN_ESTIMATOR_TRUNCATION_BOOST)
+            self._count(key, "truncated")
+            logger.warning(f"✂️ Output truncated at {max_tokens} tokens for {key} - raising its budget")
+        self._count(key, "recorded")
+
+        self._window(key).append((sample, truncated))
+        await redis_client.lpush_trim(f"token_budget:{key}", _encode(sample, truncated), settings.TOKEN_ESTIMATOR_WINDOW)
+        await self._sync(key)
+
+    def _stale(self, key: str) -> bool:
+        last_sync = self._last_sync.get(key)
+        return redis_client.client is not None and (
+            last_sync is None or time.monotonic() - last_sync >= settings.TOKEN_ESTIMATOR_SYNC_INTERVAL
+        )
+
+    def _schedule_sync(self, key: str):
+        """Refresh from Redis in the background (budgets are read from sync code)"""
+        if not self._stale(key):
+            return
+        try:
+            asyncio.get_running_loop().create_task(self._sync(key))
+        except RuntimeError:
+            pass  # No event loop (scripts/tests) - the next record() syncs
+
+    async def _sync(self, key: str):
+        """Adopt samples recorded by other workers (rate-limited)"""
+        if not self._stale(key):
+            return
+        self._last_sync[key] = time.monotonic()
+
+        shared = await redis_client.lrange(f"token_budget:{key}", 0, settings.TOKEN_ESTIMATOR_WINDOW - 1)
+        if shared:
+            window = deque(maxlen=settings.TOKEN_ESTIMATOR_WINDOW)
+            window.extend(_decode(sample) for sample in reversed(shared))  # Oldest first
+            self._samples[key] = window
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Observed output lengths and current budgets per key
+
+        Returns:
+            dict keyed by content_type:tone:bucket:model
+        """
+        keys = {}
+        for key in sorted(set(self._samples) | set(self.stats)):
+            window = sorted(tokens for tokens, _ in self._samples.get(key, ()))
+            keys[key] = {
+                "samples": len(window),
+                "p50": _percentile(window, 50) if window else None,
+                "p_target": _percentile(window, settings.TOKEN_ESTIMATOR_PERCENTILE) if window else None,
+                "max": window[-1] if window else None,
+                "budget": self.estimate(key),
+                **self.stats.get(key, {})
+            }
+        return {
+            "enabled": settings.TOKEN_ESTIMATOR_ENABLED,
+            "percentile": settings.TOKEN_ESTIMATOR_PERCENTILE,
+            "headroom": settings.TOKEN_ESTIMATOR_HEADROOM,
+            "min_samples": settings.TOKEN_ESTIMATOR_MIN_SAMPLES,
+            "keys": keys
+        }
+
+
+# Global output token estimator
+token_estimator = OutputTokenEstimator()
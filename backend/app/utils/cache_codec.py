@@ -0,0 +1,156 @@
+"""
+Cache Codec - compact binary encoding for cached values
+Serializer + optional compression, tagged per entry so formats can change safely
+
+WHY:
+    A cached 4000-word blog with its quality_score / ai_analysis dicts is tens
+    of KB of JSON text per key. msgpack drops the JSON punctuation and quoting,
+    and zlib shrinks the (highly repetitive) prose further - less Redis memory
+    and less time on the wire.
+
+FORMAT:
+    b"\\x1e" + serializer tag + compressor tag + payload
+        serializer: "j" json, "m" msgpack
+        compressor: "-" none, "z" zlib
+    Anything without the leading \\x1e (never the first byte of JSON text) is
+    a legacy plain-JSON entry and still decodes.
+
+    msgpack also round-trips timezone-aware datetimes (Firestore timestamps in
+    cached user documents) as msgpack Timestamps; JSON still rejects them.
+
+    Payloads smaller than CACHE_COMPRESS_MIN_BYTES are not compressed - zlib's
+    header and the CPU cost outweigh the savings on small values.
+
+Usage:
+    payload = cache_codec.encode({"content": "..."})   # bytes for Redis
+    value = cache_codec.decode(payload)
+"""
+from typing import Any, Callable, Dict, Tuple, Union
+from datetime import datetime
+import json
+import zlib
+
+import msgpack
+
+from app.config import settings
+
+MAGIC = b"\x1e"
+HEADER_SIZE = 3
+
+
+class CacheDecodeError(ValueError):
+    """Cached payload is corrupt or uses an unknown format"""
+
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _msgpack_default(value: Any) -> Any:
+    # datetime subclasses (Firestore's DatetimeWithNanoseconds) aren't packed natively
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return msgpack.Timestamp.from_datetime(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not cacheable")
+
+
+def _msgpack_dumps(value: Any) -> bytes:
+    return msgpack.packb(value, use_bin_type=True, datetime=True, default=_msgpack_default)
+
+
+def _msgpack_loads(payload: bytes) -> Any:
+    return msgpack.unpackb(payload, raw=False, strict_map_key=False, timestamp=3)
+
+
+# tag → (dumps, loads); register new formats here, never reuse a tag
+SERIALIZERS: Dict[bytes, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    b"j": (_json_dumps, json.loads),
+    b"m": (_msgpack_dumps, _msgpack_loads),
+}
+SERIALIZER_TAGS = {"json": b"j", "msgpack": b"m"}
+
+# tag → (compress(data, level), decompress)
+COMPRESSORS: Dict[bytes, Tuple[Callable[[bytes, int], bytes], Callable[[bytes], bytes]]] = {
+    b"-": (lambda data, level: data, lambda data: data),
+    b"z": (zlib.compress, zlib.decompress),
+}
+COMPRESSOR_TAGS = {"none": b"-", "zlib": b"z"}
+
+
+class CacheCodec:
+    """
+    Encodes values with the configured serializer/compressor and decodes
+    whatever format an entry was written in
+    """
+
+    def __init__(
+        self,
+        serializer: str = "msgpack",
+        compression: str = "zlib",
+        compress_min_bytes: int = 1024,
+        compression_level: int = 6
+    ):
+        if serializer not in SERIALIZER_TAGS:
+            raise ValueError(f"Unknown cache serializer '{serializer}' (expected one of {list(SERIALIZER_TAGS)})")
+        if compression not in COMPRESSOR_TAGS:
+            raise ValueError(f"Unknown cache compression '{compression}' (expected one of {list(COMPRESSOR_TAGS)})")
+        self.serializer_tag = SERIALIZER_TAGS[serializer]
+        self.compressor_tag = COMPRESSOR_TAGS[compression]
+        self.compress_min_bytes = compress_min_bytes
+        self.compression_level = compression_level
+
+    def encode(self, value: Any) -> bytes:
+        """
+        Serialize (and, above the size threshold, compress) a value
+
+        Args:
+            value: JSON-compatible value
+
+        Returns:
+            Tagged payload
+
+        Raises:
+            TypeError / ValueError / OverflowError: value can't be serialized
+        """
+        dumps, _ = SERIALIZERS[self.serializer_tag]
+        payload = dumps(value)
+        compressor_tag = b"-"
+        if self.compressor_tag != b"-" and len(payload) >= self.compress_min_bytes:
+            compress, _ = COMPRESSORS[self.compressor_tag]
+            compressed = compress(payload, self.compression_level)
+            if len(compressed) < len(payload):
+                payload, compressor_tag = compressed, self.compressor_tag
+        return MAGIC + self.serializer_tag + compressor_tag + payload
+
+    @staticmethod
+    def decode(payload: Union[bytes, str]) -> Any:
+        """
+        Decode a tagged payload or a legacy plain-JSON entry
+
+        Raises:
+            CacheDecodeError: corrupt payload or unknown tags
+        """
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        try:
+            if not payload.startswith(MAGIC):
+                return json.loads(payload)
+            serializer_tag = payload[1:2]
+            compressor_tag = payload[2:3]
+            if serializer_tag not in SERIALIZERS or compressor_tag not in COMPRESSORS:
+                raise CacheDecodeError(f"Unknown cache format {payload[:HEADER_SIZE]!r}")
+            _, decompress = COMPRESSORS[compressor_tag]
+            _, loads = SERIALIZERS[serializer_tag]
+            return loads(decompress(payload[HEADER_SIZE:]))
+        except CacheDecodeError:
+            raise
+        except (ValueError, zlib.error) as e:
+            raise CacheDecodeError(str(e)) from e
+
+
+# Global instance
+cache_codec = CacheCodec(
+    serializer=settings.CACHE_SERIALIZER,
+    compression=settings.CACHE_COMPRESSION,
+    compress_min_bytes=settings.CACHE_COMPRESS_MIN_BYTES,
+    compression_level=settings.CACHE_COMPRESSION_LEVEL
+)
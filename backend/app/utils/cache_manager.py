@@ -1,25 +1,107 @@
 """
 Cache Manager for AI Content Generator
 Handles Redis caching with Firestore fallback for AI generations and prompts.
+
+Runs on the shared async RedisClient (redis.asyncio, one ConnectionPool per
+process), so a slow Redis never blocks the event loop, and batches multi-key
+lookups into single MGET / pipelined SET round trips.
+
+Two tiers:
+    L1 → in-process LRU (L1_CACHE_MAX_ENTRIES) for hot, rarely-changing key
+         prefixes listed in L1_CACHE_PREFIX_TTLS (enhanced prompts, user
+         profiles), each with its own TTL
+    L2 → Redis, shared by all workers
+    Every set/delete of an L1 prefix is published on `cache:invalidate`; other
+    workers drop their copy. L1 is only used while this worker is subscribed,
+    so a missed invalidation can't serve stale data past a reconnect.
+
+Invalidation never uses KEYS (O(N), blocks the server):
+    - Generations are tagged (user:<id>, type:<content_type>,
+      template:<content_type>:<version>); each tag is a Redis set of keys
+      `cache:tag:<tag>`, swept with SSCAN + UNLINK in small batches
+    - clear_pattern walks the keyspace with SCAN in the same batches
+    - A background sweeper runs queued invalidations, and at startup sweeps
+      generations made with a prompt template version that was since bumped
+      (CACHE_PROMPT_TEMPLATE_VERSIONS)
+    - Every CACHE_TAG_PRUNE_INTERVAL seconds the sweeper also drops expired keys
+      from the tag sets (busy tags like type:blog are re-extended on every write,
+      so expiry alone would never shrink them)
+
+Values are stored through cache_codec (msgpack + zlib above a size threshold,
+tagged per entry, legacy JSON entries still readable), in both tiers.
 """
 
+import asyncio
+import fnmatch
 import json
 import hashlib
-from typing import Optional, Any, Dict
-from datetime import timedelta
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional, Any, Dict, Iterable, List, Tuple
 import logging
 
-try:
-    import redis
-    from redis.exceptions import RedisError
-    REDIS_AVAILABLE = True
-except ImportError:
-    REDIS_AVAILABLE = False
+from redis.asyncio.client import NEVER_DECODE
+from redis.exceptions import RedisError
 
 from app.config import settings
+from app.utils.cache_codec import CacheDecodeError, cache_codec
+from app.utils.cache_metrics import cache_metrics
+from app.utils.redis_client import redis_client
 
 logger = logging.getLogger(__name__)
 
+INVALIDATION_CHANNEL = "cache:invalidate"
+TAG_KEY_PREFIX = "cache:tag:"
+TEMPLATE_VERSIONS_KEY = "cache:template_versions"
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU with per-entry expiry (the L1 tier)
+    Values are kept encoded, so every hit returns a fresh copy
+    """
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self.evictions = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """Encoded value of a live entry (refreshes its LRU position), else None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expire_at, raw = entry
+        if expire_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return raw
+    
+    def set(self, key: str, raw: bytes, ttl: float):
+        """Store an encoded value for ttl seconds, evicting the least recently used entries"""
+        self._entries[key] = (time.monotonic() + ttl, raw)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def delete(self, keys: Iterable[str]):
+        for key in keys:
+            self._entries.pop(key, None)
+    
+    def delete_matching(self, pattern: str):
+        """Drop entries whose key matches a Redis-style glob pattern"""
+        self.delete([key for key in self._entries if fnmatch.fnmatchcase(key, pattern)])
+    
+    def clear(self):
+        self._entries.clear()
+
 
 class CacheManager:
     """
@@ -27,34 +109,296 @@ class CacheManager:
     """
     
     def __init__(self):
-        """Initialize cache manager with Redis client."""
-        self.redis_client = None
+        """Initialize cache manager (the connection is opened by redis_client in lifespan)."""
         self.cache_enabled = settings.ENABLE_CACHE
-        
-        if self.cache_enabled and REDIS_AVAILABLE:
+        self.worker_id = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.local_cache = LocalCache(settings.L1_CACHE_MAX_ENTRIES)
+        self._subscribed = False
+        self._listener: Optional[asyncio.Task] = None
+        self._sweeper: Optional[asyncio.Task] = None
+        self._sweep_queue: "asyncio.Queue[Tuple[str, str]]" = asyncio.Queue()
+        self.reset_stats()
+        if not self.cache_enabled:
+            logger.info("ℹ️ Cache disabled in configuration")
+    
+    def reset_stats(self):
+        """Zero per-tier hit counters"""
+        self.stats: Dict[str, Dict[str, int]] = {
+            "l1": {"hits": 0, "misses": 0},
+            "l2": {"hits": 0, "misses": 0}
+        }
+        self.sweep_stats = {"sweeps": 0, "keys_deleted": 0, "tag_members_pruned": 0}
+    
+    @property
+    def client(self):
+        """Shared redis.asyncio client, or None when caching is off or Redis is down"""
+        if not self.cache_enabled:
+            return None
+        return redis_client.client
+    
+    @property
+    def available(self) -> bool:
+        return self.client is not None
+    
+    # ==================== L1 (IN-PROCESS) ====================
+    
+    def _l1_ttl(self, key: str) -> Optional[int]:
+        """L1 TTL for a key's prefix, or None when the key is not held in-process"""
+        if not settings.L1_CACHE_ENABLED or not self._subscribed:
+            return None
+        return settings.L1_CACHE_PREFIX_TTLS.get(key.split(":", 1)[0])
+    
+    def _l1_get(self, key: str) -> Optional[bytes]:
+        if self._l1_ttl(key) is None:
+            return None
+        raw = self.local_cache.get(key)
+        self.stats["l1"]["hits" if raw is not None else "misses"] += 1
+        return raw
+    
+    def _l1_set(self, key: str, raw: bytes, ttl: Optional[int] = None):
+        l1_ttl = self._l1_ttl(key)
+        if l1_ttl:
+            self.local_cache.set(key, raw, min(l1_ttl, ttl) if ttl else l1_ttl)
+    
+    def _count_l2(self, hit: bool):
+        self.stats["l2"]["hits" if hit else "misses"] += 1
+    
+    async def _invalidate(self, keys: Iterable[str] = (), pattern: Optional[str] = None):
+        """Drop keys (or a pattern) from L1 here and, over pub/sub, in every other worker"""
+        keys = [key for key in keys if settings.L1_CACHE_PREFIX_TTLS.get(key.split(":", 1)[0])]
+        if pattern is not None:
+            self.local_cache.delete_matching(pattern)
+        else:
+            self.local_cache.delete(keys)
+            if not keys:
+                return
+        message = {"origin": self.worker_id, "keys": keys, "pattern": pattern}
+        await redis_client.publish(INVALIDATION_CHANNEL, json.dumps(message))
+    
+    def _apply_invalidation(self, raw: str):
+        try:
+            message = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+        if message.get("origin") == self.worker_id:
+            return
+        if message.get("pattern"):
+            self.local_cache.delete_matching(message["pattern"])
+        self.local_cache.delete(message.get("keys") or [])
+    
+    async def _listen(self):
+        """Apply other workers' invalidations; L1 is bypassed while unsubscribed"""
+        while True:
+            client = self.client
+            if client is None:
+                await asyncio.sleep(settings.L1_CACHE_RESUBSCRIBE_DELAY)
+                continue
+            pubsub = client.pubsub()
             try:
-                # Initialize Redis client
-                self.redis_client = redis.Redis(
-                    host=settings.REDIS_HOST,
-                    port=settings.REDIS_PORT,
-                    password=settings.REDIS_PASSWORD,
-                    db=settings.REDIS_DB,
-                    decode_responses=True,
-                    socket_timeout=5,
-                    socket_connect_timeout=5
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                self._subscribed = True
+                logger.info(f"📡 L1 cache subscribed to {INVALIDATION_CHANNEL}")
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message and message.get("type") == "message":
+                        self._apply_invalidation(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ L1 invalidation listener lost ({e}) - L1 bypassed until resubscribed")
+            finally:
+                # Invalidations may have been missed - nothing in L1 can be trusted any more
+                self._subscribed = False
+                self.local_cache.clear()
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+            await asyncio.sleep(settings.L1_CACHE_RESUBSCRIBE_DELAY)
+    
+    def start(self):
+        """Start the L1 invalidation listener and the sweeper (lifespan startup, after redis_client.connect)"""
+        if settings.L1_CACHE_ENABLED and (self._listener is None or self._listener.done()):
+            self._listener = asyncio.create_task(self._listen())
+        if self.cache_enabled and (self._sweeper is None or self._sweeper.done()):
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+    
+    async def stop(self):
+        """Stop background tasks (lifespan shutdown); unfinished sweeps are dropped"""
+        for task in (self._listener, self._sweeper):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._listener = None
+        self._sweeper = None
+    
+    # ==================== TAGS & SWEEPING ====================
+    
+    @staticmethod
+    def template_version(content_type: str) -> str:
+        """Current prompt template version for a content type"""
+        return settings.CACHE_PROMPT_TEMPLATE_VERSIONS.get(content_type, "1")
+    
+    def generation_tags(self, content_type: str, user_id: Optional[str]) -> List[str]:
+        """Tags attached to a cached generation"""
+        tags = [f"type:{content_type}", f"template:{content_type}:{self.template_version(content_type)}"]
+        if user_id:
+            tags.append(f"user:{user_id}")
+        return tags
+    
+    async def _delete_batch(self, client, keys: List[str], tag_key: Optional[str] = None) -> int:
+        """UNLINK one batch (freed in the background by Redis) and drop it from its tag set"""
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.unlink(*keys)
+            if tag_key:
+                pipe.srem(tag_key, *keys)
+            deleted = (await pipe.execute())[0]
+        await self._invalidate(keys)
+        self.sweep_stats["keys_deleted"] += deleted
+        await asyncio.sleep(settings.CACHE_SWEEP_PAUSE)
+        return deleted
+    
+    async def invalidate_tag(self, tag: str) -> int:
+        """
+        Delete every key carrying a tag, SSCAN batch by SSCAN batch.
+        
+        Args:
+            tag: Tag (e.g., 'user:abc', 'type:blog', 'template:blog:3')
+        
+        Returns:
+            int: Number of keys deleted
+        """
+        client = self.client
+        if client is None:
+            return 0
+        
+        tag_key = f"{TAG_KEY_PREFIX}{tag}"
+        deleted = 0
+        cursor = 0
+        try:
+            while True:
+                cursor, keys = await client.sscan(tag_key, cursor=cursor, count=settings.CACHE_SWEEP_BATCH_SIZE)
+                if keys:
+                    deleted += await self._delete_batch(client, list(keys), tag_key)
+                if not cursor:
+                    break
+        except RedisError as e:
+            logger.error(f"Redis tag invalidation error for {tag}: {e}")
+        self.sweep_stats["sweeps"] += 1
+        logger.info(f"🧹 Cache INVALIDATE tag {tag} ({deleted} keys)")
+        return deleted
+    
+    def schedule_invalidation(self, tags: Iterable[str] = (), pattern: Optional[str] = None):
+        """Queue tag / pattern invalidations for the background sweeper (returns immediately)"""
+        for tag in tags:
+            self._sweep_queue.put_nowait(("tag", tag))
+        if pattern is not None:
+            self._sweep_queue.put_nowait(("pattern", pattern))
+    
+    async def _sweep_stale_templates(self):
+        """Sweep generations made with prompt template versions that have since been bumped"""
+        client = self.client
+        if client is None:
+            return
+        try:
+            recorded = await client.hgetall(TEMPLATE_VERSIONS_KEY)
+            current = {
+                content_type: self.template_version(content_type)
+                for content_type in set(recorded) | set(settings.CACHE_PROMPT_TEMPLATE_VERSIONS)
+            }
+            # Content types never recorded were on the default version "1"
+            changed = {ct: version for ct, version in current.items() if recorded.get(ct, "1") != version}
+            if not changed:
+                return
+            await client.hset(TEMPLATE_VERSIONS_KEY, mapping=changed)
+        except RedisError as e:
+            logger.error(f"Redis template version check error: {e}")
+            return
+        for content_type, version in changed.items():
+            previous = recorded.get(content_type, "1")
+            logger.info(f"🧹 Prompt template for {content_type} changed "
+                        f"({previous} → {version}) - sweeping old generations")
+            self.schedule_invalidation(tags=[f"template:{content_type}:{previous}"])
+    
+    async def prune_tags(self) -> int:
+        """
+        Drop keys that no longer exist from every tag set (SCAN over the tag
+        sets, then SSCAN + EXISTS per set, in CACHE_SWEEP_BATCH_SIZE batches).
+        
+        Returns:
+            int: Number of tag set members removed
+        """
+        client = self.client
+        if client is None:
+            return 0
+        
+        removed = 0
+        cursor = 0
+        try:
+            while True:
+                cursor, tag_keys = await client.scan(
+                    cursor=cursor, match=f"{TAG_KEY_PREFIX}*", count=settings.CACHE_SWEEP_BATCH_SIZE
                 )
-                # Test connection
-                self.redis_client.ping()
-                logger.info("✅ Redis cache connected successfully")
+                for tag_key in tag_keys:
+                    removed += await self._prune_tag_set(client, tag_key)
+                if not cursor:
+                    break
+        except RedisError as e:
+            logger.error(f"Redis tag prune error: {e}")
+        self.sweep_stats["tag_members_pruned"] += removed
+        logger.info(f"🧹 Cache PRUNE tag sets ({removed} expired members)")
+        return removed
+    
+    async def _prune_tag_set(self, client, tag_key: str) -> int:
+        """SREM the members of one tag set whose keys have expired"""
+        removed = 0
+        cursor = 0
+        while True:
+            cursor, keys = await client.sscan(tag_key, cursor=cursor, count=settings.CACHE_SWEEP_BATCH_SIZE)
+            if keys:
+                keys = list(keys)
+                async with client.pipeline(transaction=False) as pipe:
+                    for key in keys:
+                        pipe.exists(key)
+                    alive = await pipe.execute()
+                expired = [key for key, exists in zip(keys, alive) if not exists]
+                if expired:
+                    removed += await client.srem(tag_key, *expired)
+                await asyncio.sleep(settings.CACHE_SWEEP_PAUSE)
+            if not cursor:
+                return removed
+    
+    async def _sweep_loop(self):
+        """Run queued invalidations (and periodic tag pruning) one at a time so sweeps never pile up on Redis"""
+        await self._sweep_stale_templates()
+        interval = settings.CACHE_TAG_PRUNE_INTERVAL
+        next_prune = time.monotonic() + interval
+        while True:
+            try:
+                if interval > 0:
+                    timeout = max(next_prune - time.monotonic(), 0)
+                    kind, target = await asyncio.wait_for(self._sweep_queue.get(), timeout)
+                else:
+                    kind, target = await self._sweep_queue.get()
+            except asyncio.TimeoutError:
+                kind, target = "prune", ""
+                next_prune = time.monotonic() + interval
+            try:
+                if kind == "tag":
+                    await self.invalidate_tag(target)
+                elif kind == "pattern":
+                    await self.clear_pattern(target)
+                else:
+                    await self.prune_tags()
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                logger.warning(f"⚠️ Redis connection failed: {e}. Caching disabled.")
-                self.redis_client = None
-        else:
-            if not self.cache_enabled:
-                logger.info("ℹ️ Cache disabled in configuration")
-            elif not REDIS_AVAILABLE:
-                logger.warning("⚠️ Redis library not available. Install with: pip install redis")
+                logger.error(f"❌ Cache sweep of {kind} {target} failed: {e}")
     
+    # ==================== L1 + L2 OPERATIONS ====================
     def _generate_cache_key(self, prefix: str, **kwargs) -> str:
         """
         Generate a unique cache key from prefix and parameters.
@@ -62,7 +406,7 @@ class CacheManager:
         Args:
             prefix: Cache key prefix (e.g., 'generation', 'prompt')
             **kwargs: Parameters to include in key generation
-            
+        
         Returns:
             str: Unique cache key (e.g., 'generation:abc123def456')
         """
@@ -72,39 +416,63 @@ class CacheManager:
         hash_value = hashlib.sha256(param_str.encode()).hexdigest()[:16]
         return f"{prefix}:{hash_value}"
     
-    def get(self, key: str) -> Optional[Any]:
+    @staticmethod
+    def _decode(key: str, value: Optional[bytes]) -> Optional[Any]:
+        if not value:
+            return None
+        try:
+            return cache_codec.decode(value)
+        except CacheDecodeError as e:
+            logger.error(f"Cache decode error for key {key}: {e}")
+            return None
+    
+    async def get(self, key: str, content_type: Optional[str] = None) -> Optional[Any]:
         """
         Retrieve value from cache.
         
         Args:
             key: Cache key
-            
+            content_type: Content type label for cache metrics
+        
         Returns:
             Cached value or None if not found
         """
-        if not self.cache_enabled or not self.redis_client:
+        client = self.client
+        if client is None:
             return None
         
+        prefix = cache_metrics.prefix_of(key)
+        raw = self._l1_get(key)
+        if raw is not None:
+            logger.debug(f"✅ Cache HIT (L1): {key}")
+            cache_metrics.record_get(prefix, content_type, hit=True, tier="l1")
+            return self._decode(key, raw)
+        
         try:
-            value = self.redis_client.get(key)
-            if value:
-                logger.debug(f"✅ Cache HIT: {key}")
-                return json.loads(value)
-            else:
-                logger.debug(f"❌ Cache MISS: {key}")
-                return None
+            started = time.perf_counter()
+            # Entries are binary; the shared client decodes responses to str by default
+            value = await client.execute_command("GET", key, **{NEVER_DECODE: True})
         except RedisError as e:
             logger.error(f"Redis get error for key {key}: {e}")
             return None
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error for key {key}: {e}")
-            return None
+        
+        cache_metrics.record_get(
+            prefix, content_type, hit=bool(value), nbytes=len(value or b""),
+            seconds=time.perf_counter() - started
+        )
+        self._count_l2(bool(value))
+        logger.debug(f"{'✅ Cache HIT' if value else '❌ Cache MISS'}: {key}")
+        if value:
+            self._l1_set(key, value)
+        return self._decode(key, value)
     
-    def set(
-        self, 
-        key: str, 
-        value: Any, 
-        ttl: Optional[int] = None
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None,
+        content_type: Optional[str] = None
     ) -> bool:
         """
         Store value in cache with optional TTL.
@@ -113,117 +481,305 @@ class CacheManager:
             key: Cache key
             value: Value to cache (must be JSON serializable)
             ttl: Time to live in seconds (None = no expiration)
-            
+            tags: Tags to register the key under (see invalidate_tag)
+            content_type: Content type label for cache metrics
+        
         Returns:
             bool: True if successful, False otherwise
         """
-        if not self.cache_enabled or not self.redis_client:
+        client = self.client
+        if client is None:
             return False
         
         try:
-            value_json = json.dumps(value)
-            if ttl:
-                self.redis_client.setex(key, ttl, value_json)
+            raw = cache_codec.encode(value)
+            started = time.perf_counter()
+            if tags:
+                async with client.pipeline(transaction=False) as pipe:
+                    pipe.set(key, raw, ex=ttl or None)
+                    for tag in tags:
+                        pipe.sadd(f"{TAG_KEY_PREFIX}{tag}", key)
+                        if ttl:
+                            # A tag set lives as long as its newest member (generations share one TTL)
+                            pipe.expire(f"{TAG_KEY_PREFIX}{tag}", ttl)
+                    await pipe.execute()
             else:
-                self.redis_client.set(key, value_json)
-            logger.debug(f"✅ Cache SET: {key} (TTL: {ttl}s)")
-            return True
-        except (RedisError, TypeError, ValueError) as e:
+                await client.set(key, raw, ex=ttl or None)
+            cache_metrics.record_set(
+                cache_metrics.prefix_of(key), content_type, nbytes=len(raw),
+                seconds=time.perf_counter() - started
+            )
+            logger.debug(f"✅ Cache SET: {key} ({len(raw)} bytes, TTL: {ttl}s)")
+        except (RedisError, TypeError, ValueError, OverflowError) as e:
             logger.error(f"Redis set error for key {key}: {e}")
             return False
+        
+        await self._invalidate([key])
+        self._l1_set(key, raw, ttl)
+        return True
     
-    def delete(self, key: str) -> bool:
+    async def mget(self, keys: List[str], content_type: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Retrieve several values in one round trip (MGET).
+        
+        Args:
+            keys: Cache keys
+            content_type: Content type label for cache metrics
+        
+        Returns:
+            dict: key → cached value, for the keys that were found
+        """
+        client = self.client
+        if client is None or not keys:
+            return {}
+        
+        found = {}
+        remote = []
+        for key in keys:
+            raw = self._l1_get(key)
+            if raw is not None:
+                found[key] = self._decode(key, raw)
+                cache_metrics.record_get(cache_metrics.prefix_of(key), content_type, hit=True, tier="l1")
+            else:
+                remote.append(key)
+        if not remote:
+            return found
+        
+        try:
+            started = time.perf_counter()
+            values = await client.execute_command("MGET", *remote, **{NEVER_DECODE: True})
+        except RedisError as e:
+            logger.error(f"Redis mget error for {len(remote)} keys: {e}")
+            return found
+        
+        cache_metrics.record_latency(cache_metrics.prefix_of(remote[0]), content_type, "mget", time.perf_counter() - started)
+        for key, value in zip(remote, values):
+            cache_metrics.record_get(cache_metrics.prefix_of(key), content_type, hit=bool(value), nbytes=len(value or b""))
+            self._count_l2(bool(value))
+            decoded = self._decode(key, value)
+            if decoded is not None:
+                found[key] = decoded
+                self._l1_set(key, value)
+        logger.debug(f"✅ Cache MGET: {len(found)}/{len(keys)} hits ({len(keys) - len(remote)} from L1)")
+        return found
+    
+    async def mset(
+        self,
+        items: Dict[str, Any],
+        ttl: Optional[int] = None,
+        content_type: Optional[str] = None
+    ) -> bool:
+        """
+        Store several values in one round trip (pipelined SET with TTL).
+        
+        Args:
+            items: key → value (JSON serializable)
+            ttl: Time to live in seconds for every key (None = no expiration)
+            content_type: Content type label for cache metrics
+        
+        Returns:
+            bool: True if all were stored
+        """
+        client = self.client
+        if client is None or not items:
+            return False
+        
+        try:
+            raw_items = {key: cache_codec.encode(value) for key, value in items.items()}
+            started = time.perf_counter()
+            async with client.pipeline(transaction=False) as pipe:
+                for key, raw in raw_items.items():
+                    pipe.set(key, raw, ex=ttl or None)
+                await pipe.execute()
+            cache_metrics.record_latency(cache_metrics.prefix_of(next(iter(raw_items))), content_type, "mset", time.perf_counter() - started)
+            for key, raw in raw_items.items():
+                cache_metrics.record_set(cache_metrics.prefix_of(key), content_type, nbytes=len(raw))
+            logger.debug(f"✅ Cache MSET: {len(items)} keys (TTL: {ttl}s)")
+        except (RedisError, TypeError, ValueError, OverflowError) as e:
+            logger.error(f"Redis mset error for {len(items)} keys: {e}")
+            return False
+        
+        await self._invalidate(raw_items)
+        for key, raw in raw_items.items():
+            self._l1_set(key, raw, ttl)
+        return True
+    
+    async def delete(self, key: str) -> bool:
         """
         Delete value from cache.
         
         Args:
             key: Cache key
-            
+        
         Returns:
             bool: True if deleted, False otherwise
         """
-        if not self.cache_enabled or not self.redis_client:
+        client = self.client
+        if client is None:
             return False
         
         try:
-            deleted = self.redis_client.delete(key)
+            deleted = await client.delete(key)
             logger.debug(f"🗑️ Cache DELETE: {key} (deleted: {deleted})")
+            await self._invalidate([key])
             return bool(deleted)
         except RedisError as e:
             logger.error(f"Redis delete error for key {key}: {e}")
             return False
     
-    def clear_pattern(self, pattern: str) -> int:
+    async def clear_pattern(self, pattern: str) -> int:
         """
-        Delete all keys matching pattern.
+        Delete all keys matching pattern, SCAN batch by SCAN batch
+        (never KEYS, which blocks Redis for the whole keyspace walk).
         
         Args:
             pattern: Redis key pattern (e.g., 'generation:*')
-            
+        
         Returns:
             int: Number of keys deleted
         """
-        if not self.cache_enabled or not self.redis_client:
+        client = self.client
+        if client is None:
             return 0
         
+        deleted = 0
+        cursor = 0
         try:
-            keys = self.redis_client.keys(pattern)
-            if keys:
-                deleted = self.redis_client.delete(*keys)
-                logger.info(f"🗑️ Cache CLEAR: {pattern} ({deleted} keys)")
-                return deleted
-            return 0
+            await self._invalidate(pattern=pattern)
+            while True:
+                cursor, keys = await client.scan(cursor=cursor, match=pattern, count=settings.CACHE_SWEEP_BATCH_SIZE)
+                if keys:
+                    deleted += await self._delete_batch(client, list(keys))
+                if not cursor:
+                    break
         except RedisError as e:
             logger.error(f"Redis clear pattern error for {pattern}: {e}")
-            return 0
+        self.sweep_stats["sweeps"] += 1
+        logger.info(f"🗑️ Cache CLEAR: {pattern} ({deleted} keys)")
+        return deleted
+    
+    def tier_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit rates seen by this worker, per tier (L2 counts only lookups that missed L1)"""
+        tiers = {}
+        for tier, counts in self.stats.items():
+            total = counts["hits"] + counts["misses"]
+            tiers[tier] = {
+                **counts,
+                "hit_rate": round(counts["hits"] / total * 100, 2) if total else 0
+            }
+        tiers["l1"].update({
+            "enabled": settings.L1_CACHE_ENABLED,
+            "subscribed": self._subscribed,
+            "entries": len(self.local_cache),
+            "max_entries": self.local_cache.max_entries,
+            "evictions": self.local_cache.evictions
+        })
+        return tiers
     
-    def get_stats(self) -> Dict[str, Any]:
+    async def get_stats(self) -> Dict[str, Any]:
         """
         Get cache statistics.
         
         Returns:
-            dict: Cache statistics (keys, memory, hit_rate, etc.)
+            dict: Cache statistics. hits / misses / hit_rate and the by_prefix /
+            by_content_type breakdowns are this worker's own lookups; `server`
+            holds Redis' keyspace counters (every client, every key type)
         """
-        if not self.cache_enabled or not self.redis_client:
+        client = self.client
+        app_stats = cache_metrics.snapshot()
+        if client is None:
             return {
-                "enabled": False,
-                "available": False
+                "enabled": self.cache_enabled,
+                "available": False,
+                **app_stats,
+                "tiers": self.tier_stats(),
+                "sweeps": dict(self.sweep_stats)
             }
         
         try:
-            info = self.redis_client.info()
-            stats = self.redis_client.info('stats')
+            info = await client.info()
+            stats = await client.info('stats')
             
-            # Calculate hit rate
+            # Server-wide hit rate (includes rate limiting and coordination keys)
             hits = stats.get('keyspace_hits', 0)
             misses = stats.get('keyspace_misses', 0)
             total = hits + misses
             hit_rate = (hits / total * 100) if total > 0 else 0
             
+            pool = redis_client.pool
             return {
                 "enabled": True,
                 "available": True,
-                "keys": info.get('db0', {}).get('keys', 0),
+                "keys": info.get(f'db{settings.REDIS_DB}', {}).get('keys', 0),
                 "memory_used_mb": round(info.get('used_memory', 0) / 1024 / 1024, 2),
-                "hits": hits,
-                "misses": misses,
-                "hit_rate": round(hit_rate, 2),
-                "connected_clients": info.get('connected_clients', 0)
+                **app_stats,
+                "server": {
+                    "keyspace_hits": hits,
+                    "keyspace_misses": misses,
+                    "hit_rate": round(hit_rate, 2)
+                },
+                "connected_clients": info.get('connected_clients', 0),
+                "pool_max_connections": pool.max_connections if pool else None,
+                "tiers": self.tier_stats(),
+                "sweeps": dict(self.sweep_stats)
             }
         except RedisError as e:
             logger.error(f"Redis stats error: {e}")
             return {
                 "enabled": True,
                 "available": False,
+                **app_stats,
                 "error": str(e)
             }
     
     # Helper methods for specific cache types
     
-    def cache_generation(
-        self, 
-        content_type: str, 
-        prompt: str, 
+    def generation_cache_key(
+        self,
+        content_type: str,
+        prompt: str,
+        user_id: Optional[str]
+    ) -> str:
+        """
+        Cache key for a generation (also used to coalesce identical in-flight requests).
+        
+        Args:
+            content_type: Type of content
+            prompt: User prompt
+            user_id: User ID
+        
+        Returns:
+            str: Cache key (e.g., 'generation:abc123def456')
+        """
+        return self._generate_cache_key(
+            "generation",
+            content_type=content_type,
+            prompt=prompt,
+            user_id=user_id,
+            template=self.template_version(content_type)
+        )
+    
+    def prompt_cache_key(self, content_type: str, raw_prompt: str) -> str:
+        """
+        Cache key for an enhanced prompt.
+        
+        Args:
+            content_type: Content type
+            raw_prompt: Original user prompt
+        
+        Returns:
+            str: Cache key (e.g., 'prompt:abc123def456')
+        """
+        return self._generate_cache_key(
+            "prompt",
+            content_type=content_type,
+            raw_prompt=raw_prompt
+        )
+    
+    async def cache_generation(
+        self,
+        content_type: str,
+        prompt: str,
         result: Dict[str, Any],
         user_id: str,
         ttl: int = 3600  # 1 hour default
@@ -237,21 +793,18 @@ class CacheManager:
             result: Generation result
             user_id: User ID
             ttl: Cache duration in seconds
-            
+        
         Returns:
             bool: True if cached successfully
         """
-        key = self._generate_cache_key(
-            "generation",
-            content_type=content_type,
-            prompt=prompt,
-            user_id=user_id
+        key = self.generation_cache_key(content_type, prompt, user_id)
+        return await self.set(
+            key, result, ttl=ttl, tags=self.generation_tags(content_type, user_id), content_type=content_type
         )
-        return self.set(key, result, ttl=ttl)
     
-    def get_cached_generation(
-        self, 
-        content_type: str, 
+    async def get_cached_generation(
+        self,
+        content_type: str,
         prompt: str,
         user_id: str
     ) -> Optional[Dict[str, Any]]:
@@ -262,21 +815,37 @@ class CacheManager:
             content_type: Type of content
             prompt: User prompt
             user_id: User ID
-            
+        
         Returns:
             Cached result or None
         """
-        key = self._generate_cache_key(
-            "generation",
-            content_type=content_type,
-            prompt=prompt,
-            user_id=user_id
-        )
-        return self.get(key)
+        key = self.generation_cache_key(content_type, prompt, user_id)
+        return await self.get(key, content_type=content_type)
+    
+    async def get_cached_generations(
+        self,
+        content_type: str,
+        prompts: List[str],
+        user_id: str
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Retrieve cached results for several prompts in one round trip.
+        
+        Args:
+            content_type: Type of content
+            prompts: User prompts
+            user_id: User ID
+        
+        Returns:
+            dict: prompt → cached result, for the prompts that were cached
+        """
+        keys = {self.generation_cache_key(content_type, prompt, user_id): prompt for prompt in prompts}
+        found = await self.mget(list(keys), content_type=content_type)
+        return {keys[key]: result for key, result in found.items()}
     
-    def cache_enhanced_prompt(
-        self, 
-        content_type: str, 
+    async def cache_enhanced_prompt(
+        self,
+        content_type: str,
         raw_prompt: str,
         enhanced_prompt: str,
         ttl: int = 86400  # 24 hours
@@ -289,20 +858,17 @@ class CacheManager:
             raw_prompt: Original user prompt
             enhanced_prompt: Enhanced prompt
             ttl: Cache duration
-            
+        
         Returns:
             bool: True if cached
         """
-        key = self._generate_cache_key(
-            "prompt",
-            content_type=content_type,
-            raw_prompt=raw_prompt
+        return await self.set(
+            self.prompt_cache_key(content_type, raw_prompt), enhanced_prompt, ttl=ttl, content_type=content_type
         )
-        return self.set(key, enhanced_prompt, ttl=ttl)
     
-    def get_cached_prompt(
-        self, 
-        content_type: str, 
+    async def get_cached_prompt(
+        self,
+        content_type: str,
         raw_prompt: str
     ) -> Optional[str]:
         """
@@ -311,16 +877,11 @@ class CacheManager:
         Args:
             content_type: Content type
             raw_prompt: Original prompt
-            
+        
         Returns:
             Enhanced prompt or None
         """
-        key = self._generate_cache_key(
-            "prompt",
-            content_type=content_type,
-            raw_prompt=raw_prompt
-        )
-        return self.get(key)
+        return await self.get(self.prompt_cache_key(content_type, raw_prompt), content_type=content_type)
 
 
 # Global cache manager instance
@@ -0,0 +1,258 @@
+"""
+Cache Metrics - application-level cache counters per key prefix and content type
+Hits, misses, sets, bytes and get/set latency as seen by this worker
+
+WHY:
+    Redis' keyspace_hits / keyspace_misses are server-wide: rate limiting,
+    coordination keys and every other client are mixed in, and nothing says
+    whether the blog, social or fact-check caches actually pay off. These
+    counters are recorded by CacheManager (and the fact checker's in-memory
+    cache) with the key prefix and content type of every lookup.
+
+EXPORTED:
+    snapshot()    → dict for /analytics/cache/stats (by_prefix, by_content_type, totals)
+    prometheus()  → text exposition format for /analytics/cache/metrics
+
+Usage:
+    cache_metrics.record_get("generation", "blog", hit=True, tier="l2", nbytes=812, seconds=0.0012)
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import defaultdict
+import threading
+
+# Latency histogram upper bounds (seconds) - Redis round trips are sub-ms to a few ms
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+METRIC_PREFIX = "summarly_cache"
+
+
+class _Histogram:
+    """Cumulative-bucket latency histogram (Prometheus semantics)"""
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.sum += seconds
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+
+    def avg_ms(self) -> float:
+        return round(self.sum / self.count * 1000, 3) if self.count else 0.0
+
+
+class _Series:
+    """Counters for one (prefix, content_type) label pair"""
+
+    def __init__(self):
+        self.hits = 0
+        self.l1_hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.latency = defaultdict(_Histogram)  # operation → histogram
+
+    def summary(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "l1_hits": self.l1_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups * 100, 2) if lookups else 0,
+            "sets": self.sets,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "avg_entry_bytes": round(self.bytes_written / self.sets) if self.sets else 0,
+            "avg_latency_ms": {operation: hist.avg_ms() for operation, hist in self.latency.items()}
+        }
+
+
+class CacheMetrics:
+    """
+    Per-worker cache counters keyed by (prefix, content_type)
+    content_type is "-" when the caller can't attribute a key to one
+    """
+
+    def __init__(self):
+        # Updated from the event loop and from threads (fact checker), so guard writes
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Zero every counter"""
+        with self._lock:
+            self._series: Dict[Tuple[str, str], _Series] = defaultdict(_Series)
+
+    @staticmethod
+    def prefix_of(key: str) -> str:
+        """Key prefix used as the metric label ('generation:ab12…' → 'generation')"""
+        return key.split(":", 1)[0]
+
+    # ==================== RECORDING ====================
+
+    def record_get(
+        self,
+        prefix: str,
+        content_type: Optional[str],
+        hit: bool,
+        tier: str = "l2",
+        nbytes: int = 0,
+        seconds: Optional[float] = None,
+        operation: str = "get"
+    ):
+        """
+        Record one lookup
+
+        Args:
+            prefix: Key prefix
+            content_type: Content type (None if unknown)
+            hit: Whether a value was found
+            tier: "l1" (in-process) or "l2" (Redis)
+            nbytes: Payload size read from Redis
+            seconds: Round-trip latency (None for in-process lookups)
+            operation: Latency label ("get" or "mget")
+        """
+        with self._lock:
+            series = self._series[(prefix, content_type or "-")]
+            if hit:
+                series.hits += 1
+                if tier == "l1":
+                    series.l1_hits += 1
+            else:
+                series.misses += 1
+            series.bytes_read += nbytes
+            if seconds is not None:
+                series.latency[operation].observe(seconds)
+
+    def record_latency(self, prefix: str, content_type: Optional[str], operation: str, seconds: float):
+        """Record a round trip that covered several keys (mget / mset)"""
+        with self._lock:
+            self._series[(prefix, content_type or "-")].latency[operation].observe(seconds)
+
+    def record_set(
+        self,
+        prefix: str,
+        content_type: Optional[str],
+        nbytes: int = 0,
+        seconds: Optional[float] = None,
+        operation: str = "set"
+    ):
+        """
+        Record one write
+
+        Args:
+            prefix: Key prefix
+            content_type: Content type (None if unknown)
+            nbytes: Encoded payload size
+            seconds: Round-trip latency (None to skip, e.g. batched writes)
+            operation: Latency label ("set" or "mset")
+        """
+        with self._lock:
+            series = self._series[(prefix, content_type or "-")]
+            series.sets += 1
+            series.bytes_written += nbytes
+            if seconds is not None:
+                series.latency[operation].observe(seconds)
+
+    # ==================== EXPORT ====================
+
+    def _grouped(self, index: int) -> Dict[str, Dict[str, Any]]:
+        """Summaries merged over one label (0 = prefix, 1 = content_type)"""
+        merged: Dict[str, _Series] = defaultdict(_Series)
+        for labels, series in self._series.items():
+            target = merged[labels[index]]
+            target.hits += series.hits
+            target.l1_hits += series.l1_hits
+            target.misses += series.misses
+            target.sets += series.sets
+            target.bytes_read += series.bytes_read
+            target.bytes_written += series.bytes_written
+            for operation, hist in series.latency.items():
+                combined = target.latency[operation]
+                combined.count += hist.count
+                combined.sum += hist.sum
+        return {label: series.summary() for label, series in sorted(merged.items())}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Counters for the stats endpoint
+
+        Returns:
+            dict: hits/misses/hit_rate totals plus by_prefix and by_content_type breakdowns
+        """
+        with self._lock:
+            by_prefix = self._grouped(0)
+            by_content_type = self._grouped(1)
+        by_content_type.pop("-", None)
+        hits = sum(s["hits"] for s in by_prefix.values())
+        misses = sum(s["misses"] for s in by_prefix.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses) * 100, 2) if hits + misses else 0,
+            "by_prefix": by_prefix,
+            "by_content_type": by_content_type
+        }
+
+    def prometheus(self) -> str:
+        """
+        Prometheus text exposition format (version 0.0.4)
+
+        Returns:
+            str: Metrics document
+        """
+        lines: List[str] = []
+
+        def header(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+
+        def labels(prefix: str, content_type: str, **extra: str) -> str:
+            pairs = {"prefix": prefix, "content_type": content_type, **extra}
+            return ",".join(f'{key}="{_escape(value)}"' for key, value in pairs.items())
+
+        with self._lock:
+            series = sorted(self._series.items())
+
+            header("requests_total", "counter", "Cache lookups by result and serving tier")
+            for (prefix, content_type), s in series:
+                lines.append(f"{METRIC_PREFIX}_requests_total{{{labels(prefix, content_type, result='hit', tier='l1')}}} {s.l1_hits}")
+                lines.append(f"{METRIC_PREFIX}_requests_total{{{labels(prefix, content_type, result='hit', tier='l2')}}} {s.hits - s.l1_hits}")
+                lines.append(f"{METRIC_PREFIX}_requests_total{{{labels(prefix, content_type, result='miss', tier='l2')}}} {s.misses}")
+
+            header("sets_total", "counter", "Cache writes")
+            for (prefix, content_type), s in series:
+                lines.append(f"{METRIC_PREFIX}_sets_total{{{labels(prefix, content_type)}}} {s.sets}")
+
+            header("bytes_total", "counter", "Encoded payload bytes moved to/from Redis")
+            for (prefix, content_type), s in series:
+                lines.append(f"{METRIC_PREFIX}_bytes_total{{{labels(prefix, content_type, direction='read')}}} {s.bytes_read}")
+                lines.append(f"{METRIC_PREFIX}_bytes_total{{{labels(prefix, content_type, direction='write')}}} {s.bytes_written}")
+
+            header("operation_seconds", "histogram", "Redis round-trip latency of cache operations")
+            for (prefix, content_type), s in series:
+                for operation, hist in sorted(s.latency.items()):
+                    for bound, count in zip(LATENCY_BUCKETS, hist.buckets):
+                        lines.append(f"{METRIC_PREFIX}_operation_seconds_bucket"
+                                     f"{{{labels(prefix, content_type, operation=operation, le=repr(bound))}}} {count}")
+                    lines.append(f"{METRIC_PREFIX}_operation_seconds_bucket"
+                                 f"{{{labels(prefix, content_type, operation=operation, le='+Inf')}}} {hist.count}")
+                    lines.append(f"{METRIC_PREFIX}_operation_seconds_sum"
+                                 f"{{{labels(prefix, content_type, operation=operation)}}} {hist.sum:.6f}")
+                    lines.append(f"{METRIC_PREFIX}_operation_seconds_count"
+                                 f"{{{labels(prefix, content_type, operation=operation)}}} {hist.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Global instance
+cache_metrics = CacheMetrics()
@@ -0,0 +1,318 @@
+"""
+Incremental JSON Parser for streamed LLM output
+Surfaces completed fields of a structured (JSON-mode) response while tokens are still arriving
+
+WHY:
+    Gemini's structured output is one JSON object. Waiting for the whole object
+    before showing anything means a 4000-word blog post is invisible for 30-60s.
+    This parser is fed raw text chunks and reports every top-level field - and
+    every element of a top-level array - the moment its closing token arrives.
+
+    It is also a validator: as soon as the text can no longer become valid JSON
+    (stray character, bad escape, mismatched bracket, prose instead of an
+    object) `feed` raises StreamValidationError, so the caller can cancel the
+    provider call instead of paying for the rest of a broken response.
+    SchemaStreamValidator additionally checks each finished field against the
+    `app.schemas.ai_schemas` Pydantic model the output must match.
+
+EVENTS:
+    ("field", key, value)        → top-level `"key": value` finished
+    ("item", key, index, value)  → element `index` of top-level array `key` finished
+
+Usage:
+    validator = SchemaStreamValidator(BlogPostOutput)
+    async for chunk in stream:
+        for event in validator.feed(chunk.text):   # raises StreamValidationError
+            ...
+    blog = validator.validate()
+"""
+from typing import Annotated, Any, Dict, List, Optional, Tuple, Type, get_args, get_origin
+import json
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+_SCALAR_START = set("-0123456789tfn")
+_SCALAR_END = set(",}] \t\r\n")
+_WHITESPACE = set(" \t\r\n")
+_ESCAPES = set('"\\/bfnrtu')
+
+# Noise tolerated before the opening `{` (markdown fences, "Here is the JSON:")
+DEFAULT_MAX_PREAMBLE = 500
+
+
+class StreamValidationError(ValueError):
+    """Streamed output can no longer become a valid document"""
+
+    def __init__(self, message: str, position: int):
+        super().__init__(f"{message} (at char {position})")
+        self.position = position
+
+
+class IncrementalJSONParser:
+    """
+    Character-level JSON scanner that never re-parses the whole buffer
+    Leading noise before the first `{` (e.g. markdown fences) is ignored
+    """
+
+    def __init__(self, max_preamble: int = DEFAULT_MAX_PREAMBLE):
+        self.buffer = ""
+        self.max_preamble = max_preamble
+        self._pos = 0
+        # Each frame: [container_char, state, item_index]
+        # Object states: key_or_end → colon → value → comma (→ key → colon ...)
+        # Array states: value_or_end → comma (→ value → comma ...)
+        self._stack: List[list] = []
+        self._in_string = False
+        self._escape = False
+        self._string_is_key = False
+        self._in_scalar = False
+        self._scalar_start = 0
+        # Start offset of the open value at each tracked depth (1 = field, 2 = array item)
+        self._value_starts: Dict[int, int] = {}
+        self._current_key: Optional[str] = None
+        self._key_start = 0
+        self._root_start = 0
+        self.started = False
+        self.finished = False
+        self.error: Optional[StreamValidationError] = None
+
+    def feed(self, chunk: str) -> List[Tuple]:
+        """
+        Consume the next chunk of model output
+
+        Args:
+            chunk: Raw text delta from the stream
+
+        Returns:
+            List of ("field", ...) / ("item", ...) events completed by this chunk
+
+        Raises:
+            StreamValidationError: The output can no longer become valid JSON
+        """
+        if self.error is not None:
+            raise self.error
+        events: List[Tuple] = []
+        if not chunk or self.finished:
+            return events
+
+        self.buffer += chunk
+        try:
+            while self._pos < len(self.buffer) and not self.finished:
+                self._step(self.buffer[self._pos], self._pos, events)
+                self._pos += 1
+        except StreamValidationError as e:
+            self.error = e
+            raise
+        return events
+
+    def _fail(self, message: str, pos: int):
+        raise StreamValidationError(message, pos)
+
+    # ==================== STATE MACHINE ====================
+
+    def _step(self, char: str, pos: int, events: List[Tuple]):
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+                if char not in _ESCAPES:
+                    self._fail(f"Invalid escape '\\{char}'", pos)
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if self._string_is_key:
+                    self._stack[-1][1] = "colon"
+                    if len(self._stack) == 1:
+                        self._current_key = json.loads(self.buffer[self._key_start:pos + 1])
+                else:
+                    self._complete_value(pos + 1, len(self._stack), events)
+            elif char < " ":
+                self._fail("Unescaped control character in string", pos)
+            return
+
+        if self._in_scalar:
+            if char not in _SCALAR_END:
+                return
+            self._in_scalar = False
+            try:
+                json.loads(self.buffer[self._scalar_start:pos])
+            except json.JSONDecodeError:
+                self._fail(f"Invalid literal {self.buffer[self._scalar_start:pos]!r}", self._scalar_start)
+            self._complete_value(pos, len(self._stack), events)
+
+        if not self._stack:
+            if char == "{":
+                self.started = True
+                self._root_start = pos
+                self._stack.append(["{", "key_or_end", 0])
+            elif pos >= self.max_preamble:
+                self._fail("No JSON object in the output", pos)
+            return
+
+        if char in _WHITESPACE:
+            return
+
+        frame = self._stack[-1]
+        state = frame[1]
+        if char == "}" or char == "]":
+            expected_end = "key_or_end" if char == "}" else "value_or_end"
+            if frame[0] != ("{" if char == "}" else "[") or state not in (expected_end, "comma"):
+                self._fail(f"Unexpected '{char}'", pos)
+            self._stack.pop()
+            if not self._stack:
+                self.finished = True
+            else:
+                self._complete_value(pos + 1, len(self._stack), events)
+        elif state == "colon":
+            if char != ":":
+                self._fail(f"Expected ':' but got '{char}'", pos)
+            frame[1] = "value"
+        elif state == "comma":
+            if char != ",":
+                self._fail(f"Expected ',' but got '{char}'", pos)
+            frame[1] = "key" if frame[0] == "{" else "value"
+        elif state in ("key", "key_or_end"):
+            if char != '"':
+                self._fail(f"Expected a key but got '{char}'", pos)
+            self._in_string = True
+            self._string_is_key = True
+            self._key_start = pos
+        else:
+            # value / value_or_end: a value starts here
+            if char == '"':
+                self._in_string = True
+                self._string_is_key = False
+                self._begin_value(pos)
+            elif char in "{[":
+                self._begin_value(pos)
+                self._stack.append([char, "key_or_end" if char == "{" else "value_or_end", 0])
+            elif char in _SCALAR_START:
+                self._begin_value(pos)
+                self._in_scalar = True
+                self._scalar_start = pos
+            else:
+                self._fail(f"Unexpected '{char}'", pos)
+
+    def _is_tracked_depth(self, depth: int) -> bool:
+        """Top-level object fields (depth 1) and elements of its arrays (depth 2)"""
+        if depth == 1:
+            return True
+        return depth == 2 and self._stack[1][0] == "["
+
+    def _begin_value(self, pos: int):
+        depth = len(self._stack)
+        if self._is_tracked_depth(depth):
+            self._value_starts[depth] = pos
+
+    def _complete_value(self, end: int, depth: int, events: List[Tuple]):
+        # The enclosing container now expects a separator or its closing bracket
+        self._stack[depth - 1][1] = "comma"
+
+        start = self._value_starts.pop(depth, None)
+        if start is None:
+            return
+
+        value = json.loads(self.buffer[start:end])
+        if depth == 1:
+            events.append(("field", self._current_key, value))
+        else:
+            array_frame = self._stack[1]
+            events.append(("item", self._current_key, array_frame[2], value))
+            array_frame[2] += 1
+
+    # ==================== RESULT ====================
+
+    def json_text(self) -> str:
+        """The JSON document without surrounding noise (only valid once `finished` is True)"""
+        return self.buffer[self._root_start:self._pos]
+
+    def result(self) -> Any:
+        """Fully parsed document (only valid once `finished` is True)"""
+        return json.loads(self.json_text())
+
+
+class SchemaStreamValidator:
+    """
+    IncrementalJSONParser that also checks every finished top-level field (and
+    array element) against a Pydantic model, so a wrong-typed field aborts the
+    stream as early as a syntax error does. Events carry only fields that passed.
+    """
+
+    _adapters: Dict[Tuple[Type[BaseModel], str, bool], TypeAdapter] = {}
+
+    def __init__(self, model: Type[BaseModel], max_preamble: int = DEFAULT_MAX_PREAMBLE):
+        self.model = model
+        self.parser = IncrementalJSONParser(max_preamble=max_preamble)
+        self.fields: Dict[str, Any] = {}
+
+    @property
+    def buffer(self) -> str:
+        return self.parser.buffer
+
+    @property
+    def finished(self) -> bool:
+        return self.parser.finished
+
+    @classmethod
+    def _adapter(cls, model: Type[BaseModel], name: str, item: bool) -> Optional[TypeAdapter]:
+        """TypeAdapter for a field (with its constraints) or for one element of a list field"""
+        key = (model, name, item)
+        if key not in cls._adapters:
+            info = model.model_fields.get(name)
+            adapter = None
+            if info is not None:
+                if not item:
+                    adapter = TypeAdapter(Annotated[(info.annotation, *info.metadata)] if info.metadata else info.annotation)
+                elif get_origin(info.annotation) is list:
+                    adapter = TypeAdapter(get_args(info.annotation)[0])
+            cls._adapters[key] = adapter
+        return cls._adapters[key]
+
+    def feed(self, chunk: str) -> List[Tuple]:
+        """
+        Consume the next chunk of model output
+
+        Returns:
+            Events for fields/items that are valid against the schema
+
+        Raises:
+            StreamValidationError: Invalid JSON, or a finished field that violates the schema
+        """
+        events = []
+        for event in self.parser.feed(chunk):
+            name = event[1]
+            adapter = self._adapter(self.model, name, item=event[0] == "item")
+            if adapter is None:
+                continue  # Unknown field (ignored by the model) or item of a non-list field
+            value = event[-1]
+            try:
+                adapter.validate_python(value)
+            except ValidationError as e:
+                label = name if event[0] == "field" else f"{name}[{event[2]}]"
+                error = StreamValidationError(
+                    f"Field '{label}' does not match {self.model.__name__}: {e.errors()[0]['msg']}",
+                    self.parser._pos
+                )
+                self.parser.error = error
+                raise error
+            if event[0] == "field":
+                self.fields[name] = value
+            events.append(event)
+        return events
+
+    def validate(self) -> BaseModel:
+        """
+        The complete document as a model instance
+
+        Raises:
+            StreamValidationError: Output ended early or misses required fields
+        """
+        if not self.parser.finished:
+            raise StreamValidationError("Output ended before the JSON document was complete", len(self.buffer))
+        try:
+            return self.model.model_validate_json(self.parser.json_text())
+        except ValidationError as e:
+            raise StreamValidationError(
+                f"Output does not match {self.model.__name__}: {e.errors()[0]['msg']}",
+                len(self.buffer)
+            )
@@ -2,7 +2,7 @@
 Redis Client - Rate Limiting & Caching
 Connection manager for Redis operations
 """
-from typing import Optional
+from typing import Dict, List, Optional, Set
 import redis.asyncio as redis
 from app.config import settings
 import logging
@@ -10,8 +10,13 @@ import logging
 logger = logging.getLogger(__name__)
 
 class RedisClient:
+    """
+    One redis.asyncio client over one shared ConnectionPool per process
+    (rate limiting, coordination and the generation cache all use it)
+    """
     _instance: Optional['RedisClient'] = None
     _client: Optional[redis.Redis] = None
+    _pool: Optional[redis.ConnectionPool] = None
     
     def __new__(cls):
         if cls._instance is None:
@@ -22,29 +27,48 @@ class RedisClient:
         """Initialize Redis connection"""
         if self._client is None:
             try:
-                self._client = redis.Redis(
+                self._pool = redis.ConnectionPool(
                     host=settings.REDIS_HOST,
                     port=settings.REDIS_PORT,
+                    password=settings.REDIS_PASSWORD or None,
                     db=settings.REDIS_DB,
-                    decode_responses=True
+                    decode_responses=True,
+                    max_connections=settings.REDIS_MAX_CONNECTIONS,
+                    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                    socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT
                 )
+                self._client = redis.Redis(connection_pool=self._pool)
                 await self._client.ping()
-                logger.info(f"Redis connected: {settings.REDIS_HOST}:{settings.REDIS_PORT}")
+                logger.info(f"Redis connected: {settings.REDIS_HOST}:{settings.REDIS_PORT} "
+                            f"(pool of {settings.REDIS_MAX_CONNECTIONS})")
             except Exception as e:
                 logger.warning(f"Redis connection failed: {e}. Rate limiting will use Firestore only.")
+                await self._close_pool()
                 self._client = None
     
     async def disconnect(self):
         """Close Redis connection"""
         if self._client:
             await self._client.close()
+            await self._close_pool()
+            self._client = None
             logger.info("Redis disconnected")
     
+    async def _close_pool(self):
+        if self._pool is not None:
+            await self._pool.disconnect()
+            self._pool = None
+    
     @property
     def client(self) -> Optional[redis.Redis]:
         """Get Redis client instance"""
         return self._client
     
+    @property
+    def pool(self) -> Optional[redis.ConnectionPool]:
+        """Shared connection pool (None until connected)"""
+        return self._pool
+    
     async def get(self, key: str) -> Optional[str]:
         """Get value from Redis"""
         if not self._client:
@@ -55,17 +79,26 @@ class RedisClient:
             logger.error(f"Redis GET error: {e}")
             return None
     
-    async def set(self, key: str, value: str, ex: Optional[int] = None) -> bool:
-        """Set value in Redis with optional expiration"""
+    async def set(self, key: str, value: str, ex: Optional[int] = None, nx: bool = False) -> bool:
+        """Set value in Redis with optional expiration (nx=True: only if the key doesn't exist)"""
         if not self._client:
             return False
         try:
-            await self._client.set(key, value, ex=ex)
-            return True
+            return bool(await self._client.set(key, value, ex=ex, nx=nx))
         except Exception as e:
             logger.error(f"Redis SET error: {e}")
             return False
     
+    async def publish(self, channel: str, message: str) -> int:
+        """Publish message to a channel (returns number of subscribers reached)"""
+        if not self._client:
+            return 0
+        try:
+            return await self._client.publish(channel, message)
+        except Exception as e:
+            logger.error(f"Redis PUBLISH error: {e}")
+            return 0
+    
     async def incr(self, key: str) -> Optional[int]:
         """Increment counter in Redis"""
         if not self._client:
@@ -117,6 +150,81 @@ class RedisClient:
         except Exception as e:
             logger.error(f"Redis TTL error: {e}")
             return -2
+    
+    async def hset(self, key: str, field: str, value: str) -> bool:
+        """Set one field of a hash"""
+        if not self._client:
+            return False
+        try:
+            await self._client.hset(key, field, value)
+            return True
+        except Exception as e:
+            logger.error(f"Redis HSET error: {e}")
+            return False
+    
+    async def hgetall(self, key: str) -> Dict[str, str]:
+        """Get all fields of a hash"""
+        if not self._client:
+            return {}
+        try:
+            return await self._client.hgetall(key)
+        except Exception as e:
+            logger.error(f"Redis HGETALL error: {e}")
+            return {}
+    
+    async def sadd(self, key: str, member: str) -> bool:
+        """Add member to a set"""
+        if not self._client:
+            return False
+        try:
+            await self._client.sadd(key, member)
+            return True
+        except Exception as e:
+            logger.error(f"Redis SADD error: {e}")
+            return False
+    
+    async def srem(self, key: str, member: str) -> bool:
+        """Remove member from a set"""
+        if not self._client:
+            return False
+        try:
+            await self._client.srem(key, member)
+            return True
+        except Exception as e:
+            logger.error(f"Redis SREM error: {e}")
+            return False
+    
+    async def smembers(self, key: str) -> Set[str]:
+        """Get all members of a set"""
+        if not self._client:
+            return set()
+        try:
+            return await self._client.smembers(key)
+        except Exception as e:
+            logger.error(f"Redis SMEMBERS error: {e}")
+            return set()
+    
+    async def lpush_trim(self, key: str, value: str, max_length: int) -> bool:
+        """Push to the head of a list and keep only the newest max_length entries"""
+        if not self._client:
+            return False
+        try:
+            async with self._client.pipeline(transaction=True) as pipe:
+                await pipe.lpush(key, value).ltrim(key, 0, max_length - 1).execute()
+            return True
+        except Exception as e:
+            logger.error(f"Redis LPUSH error: {e}")
+            return False
+    
+    async def lrange(self, key: str, start: int = 0, end: int = -1) -> List[str]:
+        """Get a range of list entries (newest first for lpush lists)"""
+        if not self._client:
+            return []
+        try:
+            return await self._client.lrange(key, start, end)
+        except Exception as e:
+            logger.error(f"Redis LRANGE error: {e}")
+            return []
 
 # Singleton instance
 redis_client = RedisClient()
@@ -0,0 +1,307 @@
+"""
+Semantic Cache for AI Content Generator
+Serves a cached generation when a user re-asks the same thing in different words.
+
+The exact generation cache only hits on byte-identical prompts, so
+"10 tips for remote work" and "10 tips for working remotely" both pay for a
+model call. This tier fingerprints the normalized request locally (MinHash over
+stemmed words, no embedding service) and returns an earlier result once the
+estimated Jaccard similarity clears the content type's threshold.
+
+Layout in Redis (through cache_manager):
+    semantic:<content_type>:<partition>  → index: [{id, sig}] (newest last, capped)
+    semantic:entry:<id>                  → cached generation result
+
+The partition hashes user + exact-match parameters (tone, platform, word count
+bucket, ...), so only requests with the same settings are ever compared.
+Keywords are soft: they join the fingerprint instead of the partition.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from app.config import settings
+from app.utils.cache_manager import cache_manager
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_STOPWORDS = {
+    "a", "an", "the", "and", "or", "but", "of", "for", "to", "in", "on", "at", "by",
+    "with", "about", "from", "into", "is", "are", "be", "it", "its", "this", "that",
+    "how", "what", "why", "my", "your", "our", "me", "i", "we", "you", "some", "any",
+    "please", "write", "create", "generate", "make", "give",
+}
+
+_SUFFIXES = ("ingly", "ation", "ness", "ment", "ing", "ly", "ies", "ied", "ed", "es", "s")
+
+
+def _stem(word: str) -> str:
+    """Strip common English suffixes (good enough to match 'working remotely' with 'remote work')"""
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            if suffix in ("ies", "ied"):
+                word += "y"
+            break
+    if word.endswith("e") and len(word) > 3:
+        word = word[:-1]
+    return word
+
+
+def normalize_text(text: str) -> List[str]:
+    """
+    Lowercase, strip punctuation and stopwords, stem.
+
+    Args:
+        text: Raw prompt text
+
+    Returns:
+        List of normalized tokens
+    """
+    words = re.findall(r"[a-z0-9]+", (text or "").lower())
+    return [_stem(word) for word in words if word not in _STOPWORDS]
+
+
+class MinHasher:
+    """
+    MinHash signatures - the fraction of equal slots estimates Jaccard similarity.
+    """
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._perms = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+
+    @staticmethod
+    def _base_hash(shingle: str) -> int:
+        return int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+
+    def signature(self, shingles: Iterable[str]) -> List[int]:
+        """
+        MinHash signature of a shingle set.
+
+        Args:
+            shingles: Set of strings
+
+        Returns:
+            List of num_perm ints (all max for an empty set)
+        """
+        signature = [_MAX_HASH] * self.num_perm
+        for shingle in set(shingles):
+            value = self._base_hash(shingle)
+            for i, (a, b) in enumerate(self._perms):
+                hashed = ((a * value + b) % _MERSENNE_PRIME) & _MAX_HASH
+                if hashed < signature[i]:
+                    signature[i] = hashed
+        return signature
+
+    @staticmethod
+    def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+        """Estimated Jaccard similarity of two signatures (0-1)"""
+        if not sig_a or len(sig_a) != len(sig_b):
+            return 0.0
+        return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+class SemanticCache:
+    """
+    Near-duplicate generation cache (opt-in via SEMANTIC_CACHE_ENABLED).
+    """
+
+    def __init__(self):
+        """Initialize hasher and hit-rate counters."""
+        self.hasher = MinHasher(num_perm=settings.SEMANTIC_CACHE_NUM_PERM)
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Zero hit-rate counters."""
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return settings.SEMANTIC_CACHE_ENABLED and cache_manager.available
+
+    def threshold(self, content_type: str) -> float:
+        """
+        Similarity needed to serve a cached result for this content type.
+
+        Args:
+            content_type: blog, social, email, product, ad, ...
+
+        Returns:
+            float: SEMANTIC_CACHE_THRESHOLD_<TYPE> or the global SEMANTIC_CACHE_THRESHOLD
+        """
+        return getattr(
+            settings,
+            f"SEMANTIC_CACHE_THRESHOLD_{content_type.upper()}",
+            settings.SEMANTIC_CACHE_THRESHOLD
+        )
+
+    # ==================== FINGERPRINTS ====================
+
+    @staticmethod
+    def _normalize_param(value: Any) -> Any:
+        if isinstance(value, bool) or value is None:
+            return value
+        if isinstance(value, (int, float)):
+            # Bucket to 2 significant digits so 1000 and 1020 words share a partition
+            return float(f"{value:.2g}")
+        if isinstance(value, (list, tuple, set)):
+            return sorted(str(item).strip().lower() for item in value)
+        return str(value).strip().lower()
+
+    def _partition(self, content_type: str, user_id: str, params: Optional[Dict[str, Any]]) -> str:
+        exact = {key: self._normalize_param(value) for key, value in (params or {}).items()}
+        raw = json.dumps({"user": user_id, "params": exact}, sort_keys=True)
+        return f"semantic:{content_type}:{hashlib.sha256(raw.encode()).hexdigest()[:16]}"
+
+    def _shingles(self, text: str, keywords: Optional[List[str]]) -> Set[str]:
+        shingles = set(normalize_text(text))
+        for keyword in keywords or []:
+            shingles.update(f"kw:{token}" for token in normalize_text(keyword))
+        return shingles
+
+    # ==================== LOOKUP / STORE ====================
+
+    async def lookup(
+        self,
+        content_type: str,
+        text: str,
+        user_id: Optional[str],
+        params: Optional[Dict[str, Any]] = None,
+        keywords: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached generation for a near-identical request.
+
+        Args:
+            content_type: Type of content
+            text: The user's free-text request (topic, description, ...)
+            user_id: User ID (entries are never shared across users)
+            params: Settings that must match exactly (tone, platform, word count, ...)
+            keywords: Keywords folded into the fingerprint
+
+        Returns:
+            Copy of the cached result (with cached/semantic_similarity set) or None
+        """
+        if not self.enabled or not user_id:
+            return None
+
+        counters = self.stats.setdefault(content_type, {"lookups": 0, "hits": 0, "similarity_total": 0.0})
+        counters["lookups"] += 1
+
+        index = await cache_manager.get(self._partition(content_type, user_id, params), content_type=content_type) or []
+        if not index:
+            return None
+
+        signature = self.hasher.signature(self._shingles(text, keywords))
+        best_id, best_score = None, 0.0
+        for entry in index:
+            score = MinHasher.similarity(signature, entry.get("sig", []))
+            if score > best_score:
+                best_id, best_score = entry.get("id"), score
+
+        if best_id is None or best_score < self.threshold(content_type):
+            return None
+
+        result = await cache_manager.get(f"semantic:entry:{best_id}", content_type=content_type)
+        if result is None:
+            return None
+
+        counters["hits"] += 1
+        counters["similarity_total"] += best_score
+        logger.info(f"🧠 Semantic cache HIT: {content_type} (similarity {best_score:.2f})")
+
+        result = copy.deepcopy(result)
+        result["cached"] = True
+        result["semantic_similarity"] = round(best_score, 3)
+        return result
+
+    async def store(
+        self,
+        content_type: str,
+        text: str,
+        user_id: Optional[str],
+        result: Dict[str, Any],
+        params: Optional[Dict[str, Any]] = None,
+        keywords: Optional[List[str]] = None
+    ) -> bool:
+        """
+        Remember a generation for future near-duplicate requests.
+
+        Args:
+            content_type: Type of content
+            text: The user's free-text request
+            user_id: User ID
+            result: Generation result (JSON serializable)
+            params: Settings that must match exactly
+            keywords: Keywords folded into the fingerprint
+
+        Returns:
+            bool: True if stored
+        """
+        if not self.enabled or not user_id:
+            return False
+
+        entry_id = uuid.uuid4().hex
+        ttl = settings.CACHE_TTL_GENERATIONS
+        if not await cache_manager.set(f"semantic:entry:{entry_id}", result, ttl=ttl, content_type=content_type):
+            return False
+
+        partition = self._partition(content_type, user_id, params)
+        index = await cache_manager.get(partition, content_type=content_type) or []
+        index.append({
+            "id": entry_id,
+            "sig": self.hasher.signature(self._shingles(text, keywords)),
+            "ts": int(time.time())
+        })
+        # Entries older than the TTL have expired anyway; keep the newest N
+        horizon = time.time() - ttl
+        index = [entry for entry in index if entry.get("ts", 0) >= horizon][-settings.SEMANTIC_CACHE_MAX_ENTRIES:]
+        return await cache_manager.set(partition, index, ttl=ttl, content_type=content_type)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Hit rates per content type.
+
+        Returns:
+            dict: lookups, hits, hit_rate and average hit similarity per content type
+        """
+        by_type = {}
+        for content_type, counters in self.stats.items():
+            lookups, hits = counters["lookups"], counters["hits"]
+            by_type[content_type] = {
+                "lookups": lookups,
+                "hits": hits,
+                "misses": lookups - hits,
+                "hit_rate": round(hits / lookups * 100, 2) if lookups else 0,
+                "avg_similarity": round(counters["similarity_total"] / hits, 3) if hits else None,
+                "threshold": self.threshold(content_type)
+            }
+        total_lookups = sum(item["lookups"] for item in by_type.values())
+        total_hits = sum(item["hits"] for item in by_type.values())
+        return {
+            "enabled": settings.SEMANTIC_CACHE_ENABLED,
+            "available": self.enabled,
+            "lookups": total_lookups,
+            "hits": total_hits,
+            "hit_rate": round(total_hits / total_lookups * 100, 2) if total_lookups else 0,
+            "by_content_type": by_type
+        }
+
+
+# Global semantic cache instance
+semantic_cache = SemanticCache()
@@ -0,0 +1,67 @@
+"""
+Server-Sent Events helpers for streaming generation endpoints
+
+Generators that stream model output report progress with emit(); the events
+land in the queue of the streaming request that started them (start_streamed)
+and are dropped everywhere else, so blocking endpoints pay nothing.
+"""
+from contextvars import ContextVar
+from typing import Any, Awaitable, Optional, Tuple
+import asyncio
+import json
+
+# Keep proxies (nginx, Cloud Run) from buffering the stream and delaying the first byte
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no"
+}
+
+# (event, data) queue of the response being streamed, if any
+_stream_events: ContextVar[Optional["asyncio.Queue[Tuple[str, Any]]"]] = ContextVar("sse_events", default=None)
+
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Encode one SSE frame
+
+    Args:
+        event: Event name (title, section, quality, generation, error, ...)
+        data: JSON-serializable payload
+
+    Returns:
+        "event: <name>\\ndata: <json>\\n\\n"
+    """
+    payload = json.dumps(data, default=str, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def emit(event: str, data: Any):
+    """Queue an event for the response being streamed (no-op outside a streaming request)"""
+    queue = _stream_events.get()
+    if queue is not None:
+        queue.put_nowait((event, data))
+
+
+def suppress_events():
+    """Stop emit() for the rest of the current task (e.g. parallel candidates would interleave)"""
+    _stream_events.set(None)
+
+
+def start_streamed(work: Awaitable[Any]) -> Tuple["asyncio.Task", "asyncio.Queue[Tuple[str, Any]]"]:
+    """
+    Run `work` as a task whose emit() calls land in the returned queue
+
+    Args:
+        work: Coroutine to run (typically a blocking generation endpoint)
+
+    Returns:
+        (task, queue of (event, data) tuples)
+    """
+    queue: "asyncio.Queue[Tuple[str, Any]]" = asyncio.Queue()
+    token = _stream_events.set(queue)
+    try:
+        task = asyncio.ensure_future(work)
+    finally:
+        _stream_events.reset(token)
+    return task, queue
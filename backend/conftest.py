@@ -4,11 +4,19 @@ Pytest configuration and shared fixtures for all tests.
 import os
 import sys
 import asyncio
+import copy
+import fnmatch
+import json
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
 from typing import AsyncGenerator, Generator
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import Mock, AsyncMock, patch
 
+from google.api_core.exceptions import NotFound
+
 # Add the backend directory to the Python path
 sys.path.insert(0, os.path.dirname(__file__))
 
@@ -61,6 +69,7 @@ def mock_redis():
     """Mock Redis client."""
     mock_redis = Mock()
     mock_redis.get = AsyncMock(return_value=None)
+    mock_redis.execute_command = AsyncMock(return_value=None)
     mock_redis.set = AsyncMock(return_value=True)
     mock_redis.delete = AsyncMock(return_value=1)
     mock_redis.exists = AsyncMock(return_value=0)
@@ -191,10 +200,459 @@ def sample_quality_score():
 def mock_cache_manager(mock_redis):
     """Mock cache manager with Redis."""
     from app.utils.cache_manager import cache_manager
-    original_redis = cache_manager.redis_client
-    cache_manager.redis_client = mock_redis
+    from app.utils.redis_client import redis_client
+    original_redis = redis_client._client
+    redis_client._client = mock_redis
     yield cache_manager
-    cache_manager.redis_client = original_redis
+    redis_client._client = original_redis
+
+
+# ==================== SHARED FAKES ====================
+
+class FakeRedis:
+    """
+    In-memory stand-in for the redis.asyncio client.
+    Strings, hashes, sets, lists, pipelines, SCAN/SSCAN and pub/sub; keys never expire.
+    Counts round trips and can add latency to each one.
+    """
+
+    def __init__(self, delay=0.0):
+        self.data = {}
+        self.hashes = {}
+        self.sets = {}
+        self.lists = {}
+        self.ttls = {}
+        self.round_trips = 0
+        self.delay = delay
+        self.published = []  # (channel, decoded message)
+        self.subscribers = {}  # channel → FakePubSub queues
+        self.batches = []  # keys per UNLINK
+        self.info_stats = {"keyspace_hits": 0, "keyspace_misses": 0}
+
+    async def _trip(self):
+        self.round_trips += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+
+    # Commands shared with pipelines (applied synchronously)
+
+    def _set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        self.ttls[key] = ex
+        return True
+
+    def _delete(self, *keys):
+        return sum(
+            any(space.pop(key, None) is not None for space in (self.data, self.hashes, self.sets, self.lists))
+            for key in keys
+        )
+
+    def _unlink(self, *keys):
+        self.batches.append(len(keys))
+        return self._delete(*keys)
+
+    def _exists(self, *keys):
+        return sum(any(key in space for space in (self.data, self.hashes, self.sets, self.lists)) for key in keys)
+
+    def _expire(self, key, seconds):
+        self.ttls[key] = seconds
+        return True
+
+    def _sadd(self, key, *members):
+        members = set(members) - self.sets.get(key, set())
+        self.sets.setdefault(key, set()).update(members)
+        return len(members)
+
+    def _srem(self, key, *members):
+        present = self.sets.get(key, set()) & set(members)
+        self.sets.get(key, set()).difference_update(present)
+        return len(present)
+
+    def _hset(self, key, field=None, value=None, mapping=None):
+        values = dict(mapping or {})
+        if field is not None:
+            values[field] = value
+        self.hashes.setdefault(key, {}).update(values)
+        return len(values)
+
+    def _lpush(self, key, *values):
+        for value in values:
+            self.lists.setdefault(key, []).insert(0, value)
+        return len(self.lists[key])
+
+    def _ltrim(self, key, start, end):
+        values = self.lists.get(key, [])
+        self.lists[key] = values[start:] if end == -1 else values[start:end + 1]
+        return True
+
+    async def get(self, key):
+        await self._trip()
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None, nx=False):
+        await self._trip()
+        return self._set(key, value, ex=ex, nx=nx)
+
+    async def mget(self, keys):
+        await self._trip()
+        return [self.data.get(key) for key in keys]
+
+    async def execute_command(self, command, *args, **options):
+        # cache_manager reads binary entries through execute_command(..., NEVER_DECODE=True)
+        return await {"GET": self.get, "MGET": lambda *keys: self.mget(list(keys))}[command](*args)
+
+    async def delete(self, *keys):
+        await self._trip()
+        return self._delete(*keys)
+
+    async def exists(self, *keys):
+        await self._trip()
+        return self._exists(*keys)
+
+    async def expire(self, key, seconds):
+        await self._trip()
+        return self._expire(key, seconds)
+
+    async def sadd(self, key, *members):
+        await self._trip()
+        return self._sadd(key, *members)
+
+    async def srem(self, key, *members):
+        await self._trip()
+        return self._srem(key, *members)
+
+    async def smembers(self, key):
+        await self._trip()
+        return set(self.sets.get(key, set()))
+
+    async def hset(self, key, field=None, value=None, mapping=None):
+        await self._trip()
+        return self._hset(key, field, value, mapping)
+
+    async def hgetall(self, key):
+        await self._trip()
+        return dict(self.hashes.get(key, {}))
+
+    async def lrange(self, key, start, end):
+        await self._trip()
+        values = self.lists.get(key, [])
+        return values[start:] if end == -1 else values[start:end + 1]
+
+    @staticmethod
+    def _iterate(snapshot, cursor, count, match="*"):
+        # Like SCAN: COUNT elements examined per call, deletions don't shift the cursor
+        examined = snapshot[cursor:cursor + count]
+        next_cursor = cursor + count if cursor + count < len(snapshot) else 0
+        return next_cursor, [key for key in examined if fnmatch.fnmatchcase(key, match)]
+
+    async def scan(self, cursor=0, match="*", count=10):
+        await self._trip()
+        if cursor == 0:
+            self._scan_snapshot = sorted(set(self.data) | set(self.hashes) | set(self.sets) | set(self.lists))
+        return self._iterate(self._scan_snapshot, cursor, count, match)
+
+    async def sscan(self, key, cursor=0, count=10):
+        await self._trip()
+        if cursor == 0:
+            self._sscan_snapshot = sorted(self.sets.get(key, ()))
+        return self._iterate(self._sscan_snapshot, cursor, count)
+
+    async def keys(self, pattern):
+        raise AssertionError("KEYS must not be used")
+
+    async def info(self, section=None):
+        if section == "stats":
+            return dict(self.info_stats)
+        return {"db0": {"keys": len(self.data)}, "used_memory": 1024 * 1024}
+
+    async def publish(self, channel, message):
+        self.published.append((channel, json.loads(message)))
+        queues = self.subscribers.get(channel, [])
+        for queue in queues:
+            queue.put_nowait({"type": "message", "data": message})
+        return len(queues)
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Queues commands; execute() applies them in one round trip."""
+
+    COMMANDS = ("set", "delete", "unlink", "exists", "expire", "sadd", "srem", "hset", "lpush", "ltrim")
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        if name not in self.COMMANDS:
+            raise AttributeError(name)
+
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self):
+        await self.redis._trip()
+        commands, self.commands = self.commands, []
+        return [getattr(self.redis, f"_{name}")(*args, **kwargs) for name, args, kwargs in commands]
+
+
+class FakePubSub:
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.queue = asyncio.Queue()
+
+    async def subscribe(self, channel):
+        self.redis.subscribers.setdefault(channel, []).append(self.queue)
+
+    async def unsubscribe(self, channel):
+        self.redis.subscribers.get(channel, []).remove(self.queue)
+
+    async def get_message(self, ignore_subscribe_messages=True, timeout=None):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def aclose(self):
+        pass
+
+
+@pytest.fixture(scope="function")
+def fake_redis(monkeypatch):
+    """In-memory Redis installed as the shared redis_client connection."""
+    from app.utils.redis_client import redis_client
+    fake = FakeRedis()
+    monkeypatch.setattr(redis_client, "_client", fake)
+    return fake
+
+
+class FakeSnapshot:
+
+    def __init__(self, data):
+        self.exists = data is not None
+        self._data = copy.deepcopy(data)
+
+    def to_dict(self):
+        return self._data
+
+
+class FakeDocument:
+
+    def __init__(self, store, doc_id):
+        self.store = store
+        self.id = doc_id
+
+    async def get(self, transaction=None):
+        self.store.reads += 1
+        return FakeSnapshot(self.store.docs.get(self.id))
+
+    async def set(self, data):
+        self.store.docs[self.id] = copy.deepcopy(data)
+
+    async def update(self, data):
+        if self.id not in self.store.docs:
+            raise NotFound(f"No document to update: {self.id}")
+        self.apply_update(data)
+
+    def apply_update(self, data):
+        """Apply dotted-path updates (Increment and SERVER_TIMESTAMP included)"""
+        doc = self.store.docs[self.id]
+        for path, value in data.items():
+            target = doc
+            *parents, leaf = path.split(".")
+            for part in parents:
+                target = target.setdefault(part, {})
+            if type(value).__name__ == "Increment":
+                target[leaf] = target.get(leaf, 0) + value.value
+            elif type(value).__name__ == "Sentinel":
+                target[leaf] = datetime.now(timezone.utc)
+            else:
+                target[leaf] = value
+
+
+class FakeBatch:
+
+    def __init__(self, store):
+        self.store = store
+        self.writes = []
+
+    def set(self, ref, data):
+        self.writes.append(("set", ref, data))
+
+    def update(self, ref, data):
+        self.writes.append(("update", ref, data))
+
+    def _apply(self):
+        for op, ref, _ in self.writes:
+            if op == "update" and ref.id not in self.store.docs:
+                raise NotFound(f"No document to update: {ref.id}")  # Nothing is applied
+        for op, ref, data in self.writes:
+            if op == "set":
+                self.store.docs[ref.id] = copy.deepcopy(data)
+            else:
+                ref.apply_update(data)
+
+    async def commit(self):
+        self.store.commits += 1
+        self._apply()
+        return [object() for _ in self.writes]
+
+
+class FakeTransaction(FakeBatch):
+    """Just enough of AsyncTransaction for firestore.async_transactional"""
+
+    _read_only = False
+    _max_attempts = 5
+    _id = b"fake-transaction"
+
+    def _clean_up(self):
+        self.writes = []
+
+    async def _begin(self, retry_id=None):
+        self.store.transactions += 1
+
+    async def _commit(self):
+        self.store.commits += 1
+        self._apply()
+
+    async def _rollback(self):
+        self.writes = []
+
+
+class FakeFirestore:
+
+    def __init__(self):
+        self.docs = {}
+        self.reads = 0
+        self.commits = 0
+        self.transactions = 0
+
+    def collection(self, name):
+        return self
+
+    def document(self, doc_id=None):
+        return FakeDocument(self, doc_id or uuid.uuid4().hex)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+
+@pytest.fixture(scope="function")
+def firebase_service():
+    """The FirebaseService singleton, initialized without credentials.
+
+    Without a service-account key, FirebaseService only initializes against the
+    emulator; callers replace its clients, so no emulator has to be running.
+    """
+    emulator_host = os.environ.get("FIRESTORE_EMULATOR_HOST")
+    os.environ.setdefault("FIRESTORE_EMULATOR_HOST", "localhost:8080")
+    try:
+        from app.services.firebase_service import firebase_service
+    finally:
+        if emulator_host is None:
+            os.environ.pop("FIRESTORE_EMULATOR_HOST")
+    return firebase_service
+
+
+@pytest.fixture(scope="function")
+def firestore(monkeypatch, fake_redis, firebase_service):
+    """In-memory Firestore behind FirebaseService, seeded with one free-plan user."""
+    from app.config import settings
+    fake = FakeFirestore()
+    fake.docs["user-1"] = {
+        "email": "a@example.com",
+        "subscription": {"plan": "free", "currentPeriodStart": datetime(2026, 10, 1, tzinfo=timezone.utc)},
+        "usageThisMonth": {"generations": 0, "limit": 5}
+    }
+    monkeypatch.setattr(firebase_service, "_client_cycle", iter(lambda: fake, None))
+    monkeypatch.setattr(settings, "USER_CACHE_TTL", 30)
+    return fake
+
+
+class FakeGenaiUsage:
+
+    def __init__(self, total_token_count=100, candidates_token_count=90):
+        self.total_token_count = total_token_count
+        self.candidates_token_count = candidates_token_count
+
+
+class FakeGenaiResponse:
+    """Response or streamed chunk of google.genai."""
+
+    def __init__(self, text, usage_metadata=None):
+        self.text = text
+        self.candidates = None
+        self.usage_metadata = usage_metadata
+
+
+class FakeGenaiClient:
+    """
+    google.genai.Client stand-in (`client.aio.models.generate_content[_stream]`).
+    `respond(model, contents, config)` returns the text of each call; streams
+    split it into `chunk_size` chunks with usage on the last one.
+    """
+
+    def __init__(self, respond, delay=0.0, chunk_size=20, total_tokens=100, output_tokens=90):
+        self.respond = respond
+        self.delay = delay
+        self.chunk_size = chunk_size
+        self.usage = FakeGenaiUsage(total_tokens, output_tokens)
+        self.prompts = []
+        self.in_flight = 0
+        self.peak = 0
+        self.aio = SimpleNamespace(models=self)
+
+    async def generate_content(self, model, contents, config=None):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        self.prompts.append(contents)
+        try:
+            await asyncio.sleep(self.delay)
+            return FakeGenaiResponse(self.respond(model, contents, config or {}), self.usage)
+        finally:
+            self.in_flight -= 1
+
+    async def generate_content_stream(self, model, contents, config=None):
+        self.prompts.append(contents)
+        text = self.respond(model, contents, config or {})
+        parts = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+
+        async def stream():
+            for i, part in enumerate(parts):
+                await asyncio.sleep(self.delay)
+                yield FakeGenaiResponse(part, self.usage if i == len(parts) - 1 else None)
+        return stream()
+
+
+@pytest.fixture(scope="function")
+def fake_genai_client(monkeypatch):
+    """Installs a FakeGenaiClient as the pooled Gemini client: fake_genai_client(respond, delay=...)"""
+    from app.services.client_registry import client_registry
+
+    def install(respond, **options):
+        client = FakeGenaiClient(respond, **options)
+        monkeypatch.setattr(client_registry, "get_genai_client", lambda: client)
+        return client
+    return install
 
 
 @pytest.fixture(scope="function")
@@ -211,15 +669,12 @@ def test_client():
 def reset_singletons():
     """Reset singleton instances between tests."""
     yield
-    # Reset cache manager stats
+    # Reset cache manager stats and the in-process tier
     from app.utils.cache_manager import cache_manager
-    cache_manager.stats = {
-        "hits": 0,
-        "misses": 0,
-        "sets": 0,
-        "deletes": 0,
-        "errors": 0
-    }
+    cache_manager.reset_stats()
+    cache_manager.local_cache.clear()
+    from app.utils.cache_metrics import cache_metrics
+    cache_metrics.reset()
 
 
 # Pytest hooks for custom behavior
@@ -0,0 +1,117 @@
+"""
+Unit tests for batch generation jobs (bounded fan-out, checkpoints, resume).
+"""
+import asyncio
+import json
+import pytest
+
+from app.config import settings
+from app.services.batch_jobs import BatchJobManager
+from app.services.llm_scheduler import llm_scheduler
+from app.utils.redis_client import redis_client
+
+USER = {"uid": "user-1", "subscription": {"plan": "pro"}}
+
+
+class FakeHandler:
+    """Generates `name` back; items named 'bad' fail like a quota/AI error would."""
+
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = []
+        self.callers = []
+
+    async def __call__(self, content_type, item, current_user):
+        self.callers.append(llm_scheduler.current_caller())
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        self.calls.append(item["name"])
+        try:
+            await asyncio.sleep(self.delay)
+            if item["name"] == "bad":
+                raise ValueError("AI service unavailable")
+            return {"content": f"{content_type}: {item['name']}"}
+        finally:
+            self.in_flight -= 1
+
+
+async def _load_user(user_id):
+    return USER
+
+
+def _lines(chunks):
+    return [json.loads(chunk) for chunk in chunks]
+
+
+class TestBatchJobs:
+
+    @pytest.mark.asyncio
+    async def test_bounded_concurrency_and_results(self, monkeypatch):
+        monkeypatch.setattr(redis_client, "_client", None)
+        monkeypatch.setattr(settings, "BATCH_JOB_CONCURRENCY", 3)
+        handler = FakeHandler()
+        manager = BatchJobManager()
+        manager.register(handler, _load_user)
+        items = [{"name": f"item-{i}"} for i in range(9)] + [{"name": "bad"}]
+
+        job = await manager.create(USER, "product", items)
+        await manager.start(job["job_id"], USER)
+
+        status = await manager.get(job["job_id"])
+        assert handler.peak == 3
+        assert set(handler.callers) == {("user-1", "pro")}
+        assert status["status"] == "completed"
+        assert (status["succeeded"], status["failed"], status["progress"]) == (9, 1, 100.0)
+
+        lines = _lines([chunk async for chunk in manager.stream_results(job["job_id"])])
+        assert sorted(line["index"] for line in lines) == list(range(10))
+        assert lines[9] == {"index": 9, "status": "failed",
+                            "error": {"error": "generation_failed", "message": "AI service unavailable"}}
+        assert lines[0]["result"] == {"content": "product: item-0"}
+
+    @pytest.mark.asyncio
+    async def test_stream_follows_running_job(self, monkeypatch):
+        monkeypatch.setattr(redis_client, "_client", None)
+        monkeypatch.setattr(settings, "BATCH_JOB_CONCURRENCY", 1)
+        monkeypatch.setattr(settings, "BATCH_STREAM_POLL_INTERVAL", 0.01)
+        manager = BatchJobManager()
+        manager.register(FakeHandler(delay=0.02), _load_user)
+
+        job = await manager.create(USER, "ad", [{"name": f"item-{i}"} for i in range(4)])
+        manager.start(job["job_id"], USER)
+        lines = _lines([chunk async for chunk in manager.stream_results(job["job_id"])])
+
+        assert [line["index"] for line in lines] == [0, 1, 2, 3]
+
+    @pytest.mark.asyncio
+    async def test_resume_skips_checkpointed_items(self, fake_redis):
+        crashed = BatchJobManager()
+        job = await crashed.create(USER, "product", [{"name": f"item-{i}"} for i in range(5)])
+        # Worker died after checkpointing items 0 and 1 (its lock has since expired)
+        for index in (0, 1):
+            line = {"index": index, "status": "succeeded", "result": {"content": "done"}}
+            await fake_redis.hset(f"batch:{job['job_id']}:results", str(index), json.dumps(line))
+
+        handler = FakeHandler()
+        restarted = BatchJobManager()
+        restarted.register(handler, _load_user)
+        assert await restarted.resume_pending() == 1
+        await asyncio.gather(*restarted._tasks.values())
+
+        status = await restarted.get(job["job_id"])
+        assert sorted(handler.calls) == ["item-2", "item-3", "item-4"]
+        assert (status["status"], status["succeeded"]) == ("completed", 5)
+        assert job["job_id"] not in fake_redis.sets["batch:active"]
+        assert f"batch:{job['job_id']}:lock" not in fake_redis.data
+
+    @pytest.mark.asyncio
+    async def test_live_job_not_resumed_twice(self, fake_redis):
+        job = await BatchJobManager().create(USER, "product", [{"name": "item-0"}])
+        await fake_redis.set(f"batch:{job['job_id']}:lock", "1")  # Another worker is running it
+
+        manager = BatchJobManager()
+        manager.register(FakeHandler(), _load_user)
+
+        assert await manager.resume_pending() == 0
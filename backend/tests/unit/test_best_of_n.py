@@ -0,0 +1,121 @@
+"""
+Unit tests for best-of-N parallel candidate generation.
+"""
+import asyncio
+import json
+import time
+import pytest
+
+from app.config import settings
+from app.constants import SubscriptionPlan
+from app.services import openai_service as module
+from app.services.llm_scheduler import llm_scheduler
+from app.utils.quality_scorer import QualityScore
+
+
+def _score(overall):
+    return QualityScore(overall=overall, readability=0.8, completeness=0.8, seo=0.8, grammar=0.8, details={})
+
+
+@pytest.fixture
+def candidates(monkeypatch):
+    """Candidate i sleeps delays[i] and scores scores[i]; records cancellations."""
+    monkeypatch.setattr(settings, "BEST_OF_N_ENABLED", True)
+    plan = {"delays": [], "scores": [], "calls": [], "cancelled": []}
+
+    async def fake_generate(system_prompt, user_prompt, max_tokens, use_premium, content_type, user_tier, user_id=None):
+        index = len(plan["calls"])
+        plan["calls"].append(use_premium)
+        try:
+            async with llm_scheduler.slot("gemini"):
+                await asyncio.sleep(plan["delays"][index])
+        except asyncio.CancelledError:
+            plan["cancelled"].append(index)
+            raise
+        return {"content": json.dumps({"content": f"candidate {index}"}), "model": f"model-{index}", "tokensUsed": 10}
+
+    def fake_score(content, content_type, metadata):
+        index = int(content.split()[-1])
+        return _score(plan["scores"][index])
+
+    monkeypatch.setattr(module.openai_service, "_generate_with_ai", fake_generate)
+    monkeypatch.setattr(module.quality_scorer, "score_content", fake_score)
+    return plan
+
+
+async def _generate(user_tier):
+    return await module.openai_service._generate_with_quality_check(
+        system_prompt="system", user_prompt="prompt", max_tokens=500, use_premium=False,
+        content_type="ad", user_id=None, user_tier=user_tier
+    )
+
+
+class TestBestOfN:
+
+    @pytest.mark.asyncio
+    async def test_first_good_candidate_wins_and_rest_cancelled(self, candidates):
+        candidates["delays"] = [0.02, 0.05, 1.0]
+        candidates["scores"] = [0.5, 0.75, 0.95]
+
+        start = time.perf_counter()
+        result = await _generate("pro")
+
+        assert time.perf_counter() - start < 0.5
+        assert result["best_of_n"]["winner"] == 1
+        assert result["best_of_n"]["cleared_threshold"] is True
+        assert result["quality_score"]["overall"] == 0.75
+        assert candidates["cancelled"] == [2]
+        # Requested model first, last candidate upgraded to premium
+        assert candidates["calls"] == [False, False, True]
+
+    @pytest.mark.asyncio
+    async def test_best_candidate_returned_when_none_clears(self, candidates):
+        candidates["delays"] = [0.01, 0.02]
+        candidates["scores"] = [0.55, 0.65]
+
+        result = await _generate("hobby")
+
+        assert result["best_of_n"]["winner"] == 1
+        assert result["best_of_n"]["completed"] == 2
+        assert result["best_of_n"]["cleared_threshold"] is False
+        assert result["regeneration_count"] == 0
+
+    @pytest.mark.asyncio
+    async def test_free_tier_keeps_serial_path(self, candidates):
+        candidates["delays"] = [0.01, 0.01]
+        candidates["scores"] = [0.9, 0.9]
+
+        result = await _generate("free")
+
+        assert len(candidates["calls"]) == 1
+        assert "best_of_n" not in result
+
+    @pytest.mark.asyncio
+    async def test_candidates_overlap_at_user_cap(self, candidates, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_SCHEDULER_ENABLED", True)
+        monkeypatch.setattr(settings, "PRO_TIER_LLM_CONCURRENCY", 1)
+        llm_scheduler.reset()
+        candidates["delays"] = [0.2, 0.2, 0.2]
+        candidates["scores"] = [0.6, 0.65, 0.7]
+
+        # Tier comes from the plan bound for the request (subscription.plan)
+        llm_scheduler.bind_caller("user-1", SubscriptionPlan.of({"subscription": {"plan": "pro"}}))
+        start = time.perf_counter()
+        try:
+            result = await _generate(None)
+        finally:
+            llm_scheduler.reset()
+
+        assert result["best_of_n"]["completed"] == 3
+        assert time.perf_counter() - start < 0.5
+
+    def test_tier_caps(self, monkeypatch):
+        service = module.openai_service
+        monkeypatch.setattr(settings, "BEST_OF_N_ENABLED", True)
+        monkeypatch.setattr(settings, "ENTERPRISE_TIER_BEST_OF_N", 4)
+
+        assert service._best_of_n_count("free") == 1
+        assert service._best_of_n_count(None) == 1
+        assert service._best_of_n_count("enterprise") == 4
+        monkeypatch.setattr(settings, "BEST_OF_N_ENABLED", False)
+        assert service._best_of_n_count("enterprise") == 1
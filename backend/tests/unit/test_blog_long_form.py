@@ -0,0 +1,144 @@
+"""
+Unit tests for long-form (outline + parallel sections) blog generation.
+"""
+import json
+import time
+import pytest
+
+from app.config import settings
+from app.constants import SubscriptionPlan
+from app.services.llm_scheduler import llm_scheduler
+
+OUTLINE = {
+    "title": "Remote Work Done Right",
+    "metaDescription": "m" * 157,
+    "sections": [
+        {"heading": f"Part {i}", "keyPoints": [f"point {i}a", f"point {i}b"], "targetWords": 600}
+        for i in range(1, 6)
+    ]
+}
+
+SINGLE_CALL_BLOG = {
+    "title": "Remote Work Done Right",
+    "metaDescription": "m" * 157,
+    "introduction": "intro",
+    "sections": [{"heading": "Only", "content": "body"}],
+    "conclusion": "end",
+    "wordCount": 2000
+}
+
+
+def _respond(model, contents, config):
+    """Blog/outline JSON for schema requests, `words` filler words for text requests"""
+    if config.get("response_schema", {}).get("title") == "BlogPostOutput":
+        return json.dumps(SINGLE_CALL_BLOG)
+    if config.get("response_mime_type") == "application/json":
+        return json.dumps(OUTLINE)
+    words = int(contents.split("Write about ")[1].split(" words")[0])
+    return " ".join(["word"] * words)
+
+
+@pytest.fixture
+def long_form(monkeypatch, fake_genai_client):
+    from app.services import openai_service as module
+
+    monkeypatch.setattr(settings, "BLOG_LONG_FORM_ENABLED", True)
+    monkeypatch.setattr(settings, "BLOG_LONG_FORM_MIN_WORDS", 2000)
+    return module.openai_service, fake_genai_client(_respond, delay=0.1)
+
+
+class TestLongFormBlog:
+
+    @pytest.mark.asyncio
+    async def test_sections_generated_concurrently(self, long_form):
+        service, models = long_form
+
+        start = time.perf_counter()
+        result = await service.generate_blog_post(
+            topic="Remote work", keywords=["remote work"], tone="professional",
+            word_count=3310, include_examples=False
+        )
+        elapsed = time.perf_counter() - start
+
+        # outline + intro/5 sections/conclusion in one parallel wave ≈ 2 round trips, not 8
+        assert elapsed < 0.4
+        assert models.peak == 7
+        assert result["long_form"]["sections"] == 5
+
+    @pytest.mark.asyncio
+    async def test_free_tier_sections_overlap(self, long_form, monkeypatch):
+        service, models = long_form
+        monkeypatch.setattr(settings, "LLM_SCHEDULER_ENABLED", True)
+        monkeypatch.setattr(settings, "FREE_TIER_LLM_CONCURRENCY", 1)
+        llm_scheduler.reset()
+
+        llm_scheduler.bind_caller("user-1", SubscriptionPlan.of({"subscription": {"plan": "free"}}))
+        start = time.perf_counter()
+        try:
+            await service.generate_blog_post(
+                topic="Remote work", keywords=["remote work"], tone="professional",
+                word_count=3310, include_examples=False
+            )
+        finally:
+            llm_scheduler.reset()
+
+        # A one-call tier still runs the request's sections side by side
+        assert models.peak == 7
+        assert time.perf_counter() - start < 0.4
+
+    @pytest.mark.asyncio
+    async def test_parts_stitched_into_blog_schema(self, long_form):
+        service, models = long_form
+
+        result = await service.generate_blog_post(
+            topic="Remote work", keywords=["remote work"], tone="professional",
+            word_count=3310, include_examples=False
+        )
+        output = result["output"]
+
+        assert output["title"] == OUTLINE["title"]
+        assert [s["heading"] for s in output["sections"]] == [f"Part {i}" for i in range(1, 6)]
+        assert output["wordCount"] == 3310
+        assert result["validation"]["valid"] is True
+        assert result["tokensUsed"] == 800  # outline + 7 parts
+        # Every part shares the outline so sections don't overlap
+        assert all("5. Part 5 - point 5a; point 5b" in prompt for prompt in models.prompts[1:])
+
+    @pytest.mark.asyncio
+    async def test_short_posts_use_single_call(self, long_form, monkeypatch):
+        service, models = long_form
+        monkeypatch.setattr(settings, "BLOG_LONG_FORM_MIN_WORDS", 5000)
+
+        result = await service.generate_blog_post(
+            topic="Remote work", keywords=["remote work"], tone="professional",
+            word_count=2000, include_examples=False
+        )
+
+        assert len(models.prompts) == 1
+        assert "long_form" not in result
+        assert result["output"]["sections"][0]["heading"] == "Only"
+
+    @pytest.mark.asyncio
+    async def test_part_outputs_recorded_for_token_budgets(self, long_form, monkeypatch):
+        from app.services import openai_service as module
+
+        service, _ = long_form
+        recorded = []
+
+        async def record(content_type, tone, word_count, model_name, **kwargs):
+            recorded.append((content_type, word_count))
+        monkeypatch.setattr(module.token_estimator, "record", record)
+
+        await service.generate_blog_post(
+            topic="Remote work", keywords=["remote work"], tone="professional",
+            word_count=3310, include_examples=False
+        )
+
+        assert recorded[0] == ("blog_outline", None)
+        assert [content_type for content_type, _ in recorded[1:]] == ["blog_part"] * 7
+        assert sorted(words for _, words in recorded[1:])[0] == settings.BLOG_LONG_FORM_CONCLUSION_WORDS
+
+    def test_long_form_is_opt_in(self):
+        from app.config import Settings
+
+        assert Settings.model_fields["BLOG_LONG_FORM_ENABLED"].default is False
@@ -0,0 +1,165 @@
+"""
+Unit tests for streamed blog generation.
+Structured events must surface while the model is still writing.
+"""
+import asyncio
+import json
+import pytest
+
+from app.utils.json_stream import IncrementalJSONParser
+from app.utils.sse import emit, format_sse, start_streamed, suppress_events
+
+
+BLOG = {
+    "title": "Remote Work \"Done Right\"",
+    "metaDescription": "How distributed teams stay productive, {focused} and connected.",
+    "introduction": "Remote work is here to stay.",
+    "sections": [
+        {"heading": "Async first", "content": "Write things down, [always]."},
+        {"heading": "Tools", "content": "Pick few, use well."}
+    ],
+    "conclusion": "Start small and iterate.",
+    "wordCount": 42
+}
+
+
+def _chunks(text, size=7):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class TestIncrementalJSONParser:
+    """Parser reports fields and array items as soon as they close."""
+
+    def test_events_in_document_order(self):
+        parser = IncrementalJSONParser()
+        events = []
+        for chunk in _chunks(json.dumps(BLOG, indent=2)):
+            events.extend(parser.feed(chunk))
+
+        names = [e[1] if e[0] == "field" else f"{e[1]}[{e[2]}]" for e in events]
+        assert names == [
+            "title", "metaDescription", "introduction",
+            "sections[0]", "sections[1]", "sections",
+            "conclusion", "wordCount"
+        ]
+        assert events[0][2] == BLOG["title"]
+        assert events[3][3] == BLOG["sections"][0]
+        assert parser.finished
+        assert parser.result() == BLOG
+
+    def test_field_emitted_before_document_ends(self):
+        parser = IncrementalJSONParser()
+        text = json.dumps(BLOG)
+        cut = text.index('"metaDescription"')
+
+        events = parser.feed(text[:cut])
+
+        assert events == [("field", "title", BLOG["title"])]
+        assert not parser.finished
+
+    def test_ignores_markdown_fence(self):
+        parser = IncrementalJSONParser()
+        events = parser.feed("```json\n" + json.dumps({"title": "x", "wordCount": 3}) + "\n```")
+
+        assert events == [("field", "title", "x"), ("field", "wordCount", 3)]
+
+
+class TestSSEFormat:
+
+    def test_single_data_line_per_event(self):
+        frame = format_sse("section", {"content": "line one\nline two"})
+
+        assert frame.startswith("event: section\ndata: ")
+        assert frame.endswith("\n\n")
+        assert frame.count("\n") == 3
+
+
+class TestStreamBlogPost:
+    """OpenAIService.stream_blog_post relays tokens and structured events."""
+
+    @pytest.mark.asyncio
+    async def test_stream_emits_structured_events_then_result(self, fake_genai_client):
+        from app.services import openai_service as module
+
+        fake_genai_client(lambda model, contents, config: json.dumps(BLOG), delay=0.01, total_tokens=321)
+
+        events = []
+        async for event in module.openai_service.stream_blog_post(
+            topic="Remote work",
+            keywords=["remote work"],
+            tone="professional",
+            word_count=500,
+            include_examples=False
+        ):
+            events.append(event)
+
+        names = [e["event"] for e in events]
+        assert names[0] == "start"
+        assert names[1] == "token"
+        assert names.index("title") < names.index("section") < names.index("conclusion")
+        assert names[-1] == "complete"
+        assert "".join(e["data"]["text"] for e in events if e["event"] == "token") == json.dumps(BLOG)
+
+        sections = [e["data"] for e in events if e["event"] == "section"]
+        assert [s["index"] for s in sections] == [0, 1]
+        assert sections[1]["heading"] == "Tools"
+
+        result = events[-1]["data"]
+        assert result["output"]["title"] == BLOG["title"]
+        assert result["tokensUsed"] == 321
+        assert result["time_to_first_token"] is not None
+
+
+EMAIL = {"subject": "Spring sale", "preheader": "Up to 40% off", "body": "Hello!", "callToAction": "Shop now"}
+
+
+class TestStreamedGeneration:
+    """Blocking generators relay progress to the streaming request that started them."""
+
+    @pytest.mark.asyncio
+    async def test_events_reach_only_the_streaming_request(self):
+        async def work(name):
+            emit("field", {"name": name})
+
+            async def candidate():
+                suppress_events()
+                emit("field", {"name": "candidate"})
+            await asyncio.gather(candidate())
+            emit("field", {"name": f"{name}-after"})
+            return name
+
+        emit("field", {"name": "outside"})  # no streaming request: dropped
+        task, events = start_streamed(work("streamed"))
+        assert await task == "streamed"
+        assert await work("blocking") == "blocking"
+
+        received = []
+        while not events.empty():
+            received.append(events.get_nowait())
+        assert received == [("field", {"name": "streamed"}), ("field", {"name": "streamed-after"})]
+
+    @pytest.mark.asyncio
+    async def test_validated_json_emits_tokens_fields_and_retry(self, fake_genai_client):
+        from app.schemas.ai_schemas import EmailCampaignOutput
+        from app.services.openai_service import llm_client, openai_service
+
+        attempts = iter(['{"subject" 1}', json.dumps(EMAIL)])
+        client = fake_genai_client(lambda model, contents, config: next(attempts), chunk_size=7)
+
+        def open_stream():
+            return llm_client.stream_genai_content(client, model="gemini-2.5-flash", contents="", config={})
+
+        task, events = start_streamed(
+            openai_service._stream_validated_json(open_stream, "email", EmailCampaignOutput)
+        )
+        validator, _ = await task
+
+        received = []
+        while not events.empty():
+            received.append(events.get_nowait())
+        names = [event for event, _ in received]
+        assert validator.finished
+        assert "retry" in names
+        after_retry = received[names.index("retry") + 1:]
+        assert "".join(data["text"] for event, data in after_retry if event == "token") == json.dumps(EMAIL)
+        assert [data["name"] for event, data in after_retry if event == "field"] == list(EMAIL)
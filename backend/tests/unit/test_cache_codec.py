@@ -0,0 +1,69 @@
+"""
+Unit tests for the tagged cache codec (msgpack + zlib, legacy JSON compatibility).
+"""
+import json
+import pytest
+from datetime import datetime, timezone
+
+from app.utils.cache_codec import CacheCodec, CacheDecodeError, MAGIC
+
+BLOG = {
+    "output": {
+        "title": "10 Remote Work Tips",
+        "content": "Working remotely takes discipline and the right tools. " * 400,
+        "sections": [{"heading": f"Tip {i}", "content": "Set clear boundaries. " * 20} for i in range(10)]
+    },
+    "quality_score": {"overall": 8.7, "readability": 9.1, "originality": 8.2, "grade": "A"},
+    "ai_analysis": {"flagged": False, "scores": [0.12, 0.08, 0.3]},
+    "tokens_used": 5123
+}
+
+
+class TestCacheCodec:
+
+    @pytest.mark.parametrize("serializer", ["msgpack", "json"])
+    @pytest.mark.parametrize("compression", ["zlib", "none"])
+    def test_round_trip(self, serializer, compression):
+        codec = CacheCodec(serializer=serializer, compression=compression)
+
+        assert codec.decode(codec.encode(BLOG)) == BLOG
+
+    def test_large_entry_much_smaller_than_json(self):
+        codec = CacheCodec()
+        payload = codec.encode(BLOG)
+
+        assert payload[:3] == MAGIC + b"mz"
+        assert len(payload) < len(json.dumps(BLOG)) / 5
+
+    def test_small_entry_left_uncompressed(self):
+        codec = CacheCodec(compress_min_bytes=1024)
+
+        assert codec.encode({"enhanced": "short prompt"})[:3] == MAGIC + b"m-"
+
+    @pytest.mark.parametrize("legacy", [json.dumps(BLOG), json.dumps(BLOG).encode(), json.dumps([1, 2]), '"text"'])
+    def test_legacy_json_entries_still_decode(self, legacy):
+        assert CacheCodec().decode(legacy) == json.loads(legacy)
+
+    def test_decodes_entries_written_with_other_settings(self):
+        written = CacheCodec(serializer="json", compression="zlib", compress_min_bytes=0).encode(BLOG)
+
+        assert CacheCodec(serializer="msgpack", compression="none").decode(written) == BLOG
+
+    @pytest.mark.parametrize("payload", [MAGIC + b"mz" + b"not zlib", MAGIC + b"qq{}", b"{broken", MAGIC + b"m-\xc1"])
+    def test_corrupt_payload_raises(self, payload):
+        with pytest.raises(CacheDecodeError):
+            CacheCodec().decode(payload)
+
+    def test_unknown_settings_rejected(self):
+        with pytest.raises(ValueError):
+            CacheCodec(serializer="pickle")
+
+    def test_aware_datetimes_round_trip(self):
+        from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+        user = {"createdAt": DatetimeWithNanoseconds(2026, 10, 1, 12, 30, tzinfo=timezone.utc)}
+
+        assert CacheCodec().decode(CacheCodec().encode(user)) == user
+
+    def test_naive_datetime_rejected(self):
+        with pytest.raises(TypeError):
+            CacheCodec().encode({"createdAt": datetime(2026, 10, 1)})
@@ -0,0 +1,320 @@
+"""
+Unit tests for the async cache manager (shared redis.asyncio client, batched operations).
+"""
+import asyncio
+import json
+import pytest
+
+from app.config import settings
+from app.utils.cache_manager import CacheManager, LocalCache
+from app.utils.redis_client import redis_client
+
+
+class TestCacheManager:
+
+    @pytest.mark.asyncio
+    async def test_generation_round_trip(self, fake_redis):
+        cache = CacheManager()
+
+        assert await cache.cache_generation("blog", "prompt", {"content": "x"}, "user-1", ttl=60)
+        assert await cache.get_cached_generation("blog", "prompt", "user-1") == {"content": "x"}
+        assert await cache.get_cached_generation("blog", "prompt", "user-2") is None
+        assert fake_redis.ttls[cache.generation_cache_key("blog", "prompt", "user-1")] == 60
+
+    @pytest.mark.asyncio
+    async def test_mset_and_mget_use_one_round_trip_each(self, fake_redis):
+        cache = CacheManager()
+        items = {f"key:{i}": {"value": i} for i in range(10)}
+
+        assert await cache.mset(items, ttl=30)
+        found = await cache.mget(list(items) + ["key:missing"])
+
+        assert found == items
+        assert fake_redis.round_trips == 2
+        assert set(fake_redis.ttls.values()) == {30}
+
+    @pytest.mark.asyncio
+    async def test_batch_generation_lookup(self, fake_redis):
+        cache = CacheManager()
+        await cache.cache_generation("product", "mug", {"content": "mug copy"}, "user-1")
+
+        found = await cache.get_cached_generations("product", ["mug", "lamp"], "user-1")
+
+        assert found == {"mug": {"content": "mug copy"}}
+
+    @pytest.mark.asyncio
+    async def test_slow_redis_does_not_block_event_loop(self, fake_redis):
+        fake_redis.delay = 0.05
+        cache = CacheManager()
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            for _ in range(5):
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        await asyncio.gather(cache.get("generation:slow"), ticker())
+
+        assert ticks == 5
+
+    @pytest.mark.asyncio
+    async def test_unavailable_redis_degrades_to_misses(self, monkeypatch):
+        monkeypatch.setattr(redis_client, "_client", None)
+        cache = CacheManager()
+
+        assert await cache.get("generation:any") is None
+        assert await cache.set("generation:any", {"a": 1}) is False
+        assert await cache.mget(["a", "b"]) == {}
+        assert (await cache.get_stats())["available"] is False
+
+
+@pytest.fixture
+def l1_cache(fake_redis):
+    cache = CacheManager()
+    # Normally set once the invalidation listener has subscribed
+    cache._subscribed = True
+    return cache
+
+
+class TestLocalCache:
+
+    def test_lru_eviction(self):
+        local = LocalCache(max_entries=2)
+        local.set("a", "1", ttl=60)
+        local.set("b", "2", ttl=60)
+        local.get("a")
+        local.set("c", "3", ttl=60)
+
+        assert local.get("b") is None
+        assert local.get("a") == "1"
+        assert local.evictions == 1
+
+    def test_entries_expire(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr("app.utils.cache_manager.time.monotonic", lambda: now[0])
+        local = LocalCache(max_entries=10)
+        local.set("a", "1", ttl=5)
+
+        now[0] += 6
+
+        assert local.get("a") is None
+        assert len(local) == 0
+
+
+class TestTwoTierCache:
+
+    @pytest.mark.asyncio
+    async def test_l1_hit_skips_redis(self, l1_cache, fake_redis):
+        await l1_cache.set("prompt:abc", {"enhanced": "x"}, ttl=600)
+        trips = fake_redis.round_trips
+
+        assert await l1_cache.get("prompt:abc") == {"enhanced": "x"}
+        assert fake_redis.round_trips == trips
+
+    @pytest.mark.asyncio
+    async def test_l1_returns_copies(self, l1_cache):
+        await l1_cache.set("prompt:abc", {"enhanced": "x"})
+        (await l1_cache.get("prompt:abc"))["enhanced"] = "mutated"
+
+        assert await l1_cache.get("prompt:abc") == {"enhanced": "x"}
+
+    @pytest.mark.asyncio
+    async def test_l2_hit_populates_l1(self, l1_cache, fake_redis):
+        fake_redis.data["prompt:abc"] = json.dumps({"enhanced": "x"})
+
+        await l1_cache.get("prompt:abc")
+        await l1_cache.get("prompt:abc")
+
+        assert fake_redis.round_trips == 1
+
+    @pytest.mark.asyncio
+    async def test_prefix_ttl_caps_l1_lifetime(self, l1_cache, monkeypatch):
+        monkeypatch.setattr(settings, "L1_CACHE_PREFIX_TTLS", {"prompt": 300})
+        await l1_cache.set("prompt:abc", {"enhanced": "x"}, ttl=3600)
+        await l1_cache.set("prompt:short", {"enhanced": "y"}, ttl=10)
+
+        entries = l1_cache.local_cache._entries
+        assert entries["prompt:short"][0] < entries["prompt:abc"][0]
+        assert entries["prompt:abc"][0] - entries["prompt:short"][0] == pytest.approx(290, abs=1)
+
+    @pytest.mark.asyncio
+    async def test_unlisted_prefix_not_held_in_l1(self, l1_cache, fake_redis):
+        await l1_cache.set("generation:abc", {"content": "x"})
+        await l1_cache.get("generation:abc")
+
+        assert len(l1_cache.local_cache) == 0
+        assert fake_redis.published == []
+
+    @pytest.mark.asyncio
+    async def test_l1_bypassed_until_subscribed(self, fake_redis):
+        cache = CacheManager()
+        await cache.set("prompt:abc", {"enhanced": "x"})
+        await cache.get("prompt:abc")
+
+        assert len(cache.local_cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_set_and_delete_publish_invalidations(self, l1_cache, fake_redis):
+        await l1_cache.set("prompt:abc", {"enhanced": "x"})
+        await l1_cache.delete("prompt:abc")
+
+        assert [msg["keys"] for _, msg in fake_redis.published] == [["prompt:abc"], ["prompt:abc"]]
+        assert all(msg["origin"] == l1_cache.worker_id for _, msg in fake_redis.published)
+        assert await l1_cache.get("prompt:abc") is None
+
+    @pytest.mark.asyncio
+    async def test_other_worker_invalidation_drops_entry(self, l1_cache, fake_redis):
+        other = CacheManager()
+        await l1_cache.set("prompt:abc", {"enhanced": "old"})
+        fake_redis.data["prompt:abc"] = json.dumps({"enhanced": "new"})
+
+        l1_cache._apply_invalidation(json.dumps({"origin": other.worker_id, "keys": ["prompt:abc"]}))
+
+        assert await l1_cache.get("prompt:abc") == {"enhanced": "new"}
+
+    @pytest.mark.asyncio
+    async def test_own_invalidation_ignored(self, l1_cache):
+        await l1_cache.set("prompt:abc", {"enhanced": "x"})
+
+        l1_cache._apply_invalidation(json.dumps({"origin": l1_cache.worker_id, "keys": ["prompt:abc"]}))
+
+        assert len(l1_cache.local_cache) == 1
+
+    @pytest.mark.asyncio
+    async def test_mget_serves_l1_then_batches_rest(self, l1_cache, fake_redis):
+        await l1_cache.set("prompt:a", {"v": "a"})
+        fake_redis.data["prompt:b"] = json.dumps({"v": "b"})
+        trips = fake_redis.round_trips
+
+        found = await l1_cache.mget(["prompt:a", "prompt:b", "prompt:c"])
+
+        assert found == {"prompt:a": {"v": "a"}, "prompt:b": {"v": "b"}}
+        assert fake_redis.round_trips == trips + 1
+
+    @pytest.mark.asyncio
+    async def test_hit_rates_reported_per_tier(self, l1_cache, fake_redis):
+        fake_redis.data["prompt:abc"] = json.dumps({"enhanced": "x"})
+
+        await l1_cache.get("prompt:abc")      # L1 miss, L2 hit
+        await l1_cache.get("prompt:abc")      # L1 hit
+        await l1_cache.get("prompt:missing")  # L1 miss, L2 miss
+
+        tiers = l1_cache.tier_stats()
+        assert (tiers["l1"]["hits"], tiers["l1"]["misses"]) == (1, 2)
+        assert (tiers["l2"]["hits"], tiers["l2"]["misses"]) == (1, 1)
+        assert tiers["l1"]["hit_rate"] == pytest.approx(33.33)
+        assert tiers["l2"]["hit_rate"] == 50
+        assert tiers["l1"]["entries"] == 1
+
+
+class TestTagInvalidation:
+
+    @pytest.fixture(autouse=True)
+    def small_batches(self, monkeypatch):
+        monkeypatch.setattr(settings, "CACHE_SWEEP_BATCH_SIZE", 3)
+        monkeypatch.setattr(settings, "CACHE_SWEEP_PAUSE", 0)
+
+    @pytest.mark.asyncio
+    async def test_generations_tagged_and_swept_in_batches(self, fake_redis):
+        cache = CacheManager()
+        for i in range(7):
+            await cache.cache_generation("blog", f"topic {i}", {"content": i}, "user-1", ttl=60)
+        await cache.cache_generation("social", "post", {"content": "s"}, "user-1", ttl=60)
+
+        deleted = await cache.invalidate_tag("type:blog")
+
+        assert deleted == 7
+        assert fake_redis.batches == [3, 3, 1]
+        assert await cache.get_cached_generation("social", "post", "user-1") == {"content": "s"}
+        assert fake_redis.sets["cache:tag:type:blog"] == set()
+        assert fake_redis.ttls["cache:tag:user:user-1"] == 60
+
+    @pytest.mark.asyncio
+    async def test_user_tag_only_hits_that_user(self, fake_redis):
+        cache = CacheManager()
+        await cache.cache_generation("blog", "topic", {"content": 1}, "user-1")
+        await cache.cache_generation("blog", "topic", {"content": 2}, "user-2")
+
+        await cache.invalidate_tag("user:user-1")
+
+        assert await cache.get_cached_generation("blog", "topic", "user-1") is None
+        assert await cache.get_cached_generation("blog", "topic", "user-2") == {"content": 2}
+
+    @pytest.mark.asyncio
+    async def test_clear_pattern_uses_scan_batches(self, fake_redis):
+        cache = CacheManager()
+        await cache.mset({f"prompt:{i}": i for i in range(5)})
+        await cache.set("generation:keep", 1)
+
+        assert await cache.clear_pattern("prompt:*") == 5
+        assert fake_redis.batches == [2, 3]
+        assert list(fake_redis.data) == ["generation:keep"]
+
+    @pytest.mark.asyncio
+    async def test_template_version_bump_changes_key_and_sweeps_old(self, fake_redis, monkeypatch):
+        cache = CacheManager()
+        await cache._sweep_stale_templates()  # records the current versions
+        await cache.cache_generation("blog", "topic", {"content": "old"}, "user-1")
+        old_key = cache.generation_cache_key("blog", "topic", "user-1")
+
+        monkeypatch.setattr(settings, "CACHE_PROMPT_TEMPLATE_VERSIONS", {"blog": "2"})
+        assert cache.generation_cache_key("blog", "topic", "user-1") != old_key
+        await cache._sweep_stale_templates()
+
+        assert cache._sweep_queue.get_nowait() == ("tag", "template:blog:1")
+        assert fake_redis.hashes["cache:template_versions"]["blog"] == "2"
+        await cache.invalidate_tag("template:blog:1")
+        assert old_key not in fake_redis.data
+
+    @pytest.mark.asyncio
+    async def test_background_sweeper_runs_queued_invalidations(self, fake_redis, monkeypatch):
+        monkeypatch.setattr(settings, "L1_CACHE_ENABLED", False)
+        cache = CacheManager()
+        await cache.cache_generation("email", "welcome", {"content": 1}, "user-1")
+        cache.start()
+        try:
+            cache.schedule_invalidation(tags=["type:email"])
+            for _ in range(50):
+                if cache.sweep_stats["sweeps"]:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await cache.stop()
+
+        assert cache.sweep_stats == {"sweeps": 1, "keys_deleted": 1, "tag_members_pruned": 0}
+
+    @pytest.mark.asyncio
+    async def test_prune_drops_expired_keys_from_tag_sets(self, fake_redis):
+        cache = CacheManager()
+        for i in range(5):
+            await cache.cache_generation("blog", f"topic {i}", {"content": i}, "user-1", ttl=60)
+        expired = [cache.generation_cache_key("blog", f"topic {i}", "user-1") for i in range(4)]
+        for key in expired:
+            del fake_redis.data[key]  # TTL ran out; the tag sets still list the key
+
+        removed = await cache.prune_tags()
+
+        live = {cache.generation_cache_key("blog", "topic 4", "user-1")}
+        assert removed == 12  # 4 keys x (type, template, user) tags
+        assert fake_redis.sets["cache:tag:type:blog"] == live
+        assert fake_redis.sets["cache:tag:user:user-1"] == live
+        assert cache.sweep_stats["tag_members_pruned"] == 12
+
+    @pytest.mark.asyncio
+    async def test_background_sweeper_prunes_periodically(self, fake_redis, monkeypatch):
+        monkeypatch.setattr(settings, "L1_CACHE_ENABLED", False)
+        monkeypatch.setattr(settings, "CACHE_TAG_PRUNE_INTERVAL", 0.02)
+        cache = CacheManager()
+        await cache.cache_generation("email", "welcome", {"content": 1}, "user-1", ttl=60)
+        del fake_redis.data[cache.generation_cache_key("email", "welcome", "user-1")]
+        cache.start()
+        try:
+            for _ in range(50):
+                if cache.sweep_stats["tag_members_pruned"]:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await cache.stop()
+
+        assert fake_redis.sets["cache:tag:type:email"] == set()
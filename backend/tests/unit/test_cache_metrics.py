@@ -0,0 +1,77 @@
+"""
+Unit tests for application-level cache metrics (per prefix / content type, Prometheus export).
+"""
+import pytest
+
+from app.utils.cache_manager import CacheManager
+from app.utils.cache_metrics import CacheMetrics, cache_metrics
+
+
+@pytest.fixture
+def cache(fake_redis):
+    fake_redis.info_stats = {"keyspace_hits": 900, "keyspace_misses": 100}
+    cache_metrics.reset()
+    return CacheManager()
+
+
+class TestCacheMetrics:
+
+    @pytest.mark.asyncio
+    async def test_counters_split_by_prefix_and_content_type(self, cache):
+        await cache.cache_generation("blog", "topic", {"content": "x" * 2000}, "user-1")
+        await cache.get_cached_generation("blog", "topic", "user-1")
+        await cache.get_cached_generation("blog", "other", "user-1")
+        await cache.get_cached_prompt("social", "post")
+
+        stats = cache_metrics.snapshot()
+
+        blog = stats["by_content_type"]["blog"]
+        assert (blog["hits"], blog["misses"], blog["sets"]) == (1, 1, 1)
+        assert blog["hit_rate"] == 50.0
+        assert 0 < blog["bytes_written"] < 2000  # compressed
+        assert blog["bytes_read"] == blog["bytes_written"]
+        assert set(blog["avg_latency_ms"]) == {"get", "set"}
+        assert stats["by_content_type"]["social"]["misses"] == 1
+        assert set(stats["by_prefix"]) == {"generation", "prompt"}
+        assert (stats["hits"], stats["misses"]) == (1, 2)
+
+    @pytest.mark.asyncio
+    async def test_get_stats_separates_app_and_server_counters(self, cache):
+        await cache.get_cached_generation("email", "welcome", "user-1")
+
+        stats = await cache.get_stats()
+
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0
+        assert stats["server"]["hit_rate"] == 90.0
+        assert stats["by_content_type"]["email"]["misses"] == 1
+
+    def test_prometheus_exposition(self):
+        metrics = CacheMetrics()
+        metrics.record_get("generation", "blog", hit=True, nbytes=100, seconds=0.002)
+        metrics.record_get("generation", "blog", hit=True, tier="l1")
+        metrics.record_get("generation", "blog", hit=False, seconds=0.0004)
+        metrics.record_set("generation", "blog", nbytes=100, seconds=0.003)
+
+        text = metrics.prometheus()
+        labels = 'prefix="generation",content_type="blog"'
+
+        assert "# TYPE summarly_cache_requests_total counter" in text
+        assert f'summarly_cache_requests_total{{{labels},result="hit",tier="l1"}} 1' in text
+        assert f'summarly_cache_requests_total{{{labels},result="hit",tier="l2"}} 1' in text
+        assert f'summarly_cache_requests_total{{{labels},result="miss",tier="l2"}} 1' in text
+        assert f'summarly_cache_bytes_total{{{labels},direction="write"}} 100' in text
+        assert f'summarly_cache_operation_seconds_bucket{{{labels},operation="get",le="0.0005"}} 1' in text
+        assert f'summarly_cache_operation_seconds_bucket{{{labels},operation="get",le="+Inf"}} 2' in text
+        assert f'summarly_cache_operation_seconds_count{{{labels},operation="set"}} 1' in text
+        assert text.endswith("\n")
+
+    def test_unknown_content_type_only_in_prefix_view(self):
+        metrics = CacheMetrics()
+        metrics.record_get("semantic", None, hit=False)
+
+        stats = metrics.snapshot()
+
+        assert stats["by_prefix"]["semantic"]["misses"] == 1
+        assert stats["by_content_type"] == {}
+        assert 'content_type="-"' in metrics.prometheus()
@@ -0,0 +1,120 @@
+"""
+Unit tests for the provider circuit breaker.
+"""
+import asyncio
+import pytest
+
+from app.config import settings
+from app.services.circuit_breaker import CircuitBreaker
+from app.utils.redis_client import redis_client
+
+
+@pytest.fixture
+def breaker_settings(monkeypatch):
+    monkeypatch.setattr(settings, "CIRCUIT_BREAKER_ENABLED", True)
+    monkeypatch.setattr(settings, "CIRCUIT_BREAKER_FAILURE_THRESHOLD", 3)
+    monkeypatch.setattr(settings, "CIRCUIT_BREAKER_MIN_REQUESTS", 4)
+    monkeypatch.setattr(settings, "CIRCUIT_BREAKER_ERROR_RATE", 0.5)
+    monkeypatch.setattr(settings, "CIRCUIT_BREAKER_OPEN_SECONDS", 0.05)
+    monkeypatch.setattr(settings, "CIRCUIT_BREAKER_SYNC_INTERVAL", 0)
+
+
+@pytest.fixture
+def no_redis(monkeypatch):
+    monkeypatch.setattr(redis_client, "_client", None)
+
+
+def _outcome(result):
+    async def call():
+        return result
+    return call
+
+
+class TestCircuitBreaker:
+
+    @pytest.mark.asyncio
+    async def test_opens_after_consecutive_failures(self, breaker_settings, no_redis):
+        breaker = CircuitBreaker("gemini", "gemini-test")
+
+        for _ in range(3):
+            assert await breaker.allow_request()
+            await breaker.guard(_outcome(None))()
+
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not await breaker.allow_request()
+        assert breaker.stats["short_circuited"] == 1
+
+    @pytest.mark.asyncio
+    async def test_opens_on_error_rate(self, breaker_settings, no_redis):
+        breaker = CircuitBreaker("gemini", "gemini-test")
+
+        for result in [{"ok": 1}, None, {"ok": 1}, None]:
+            await breaker.guard(_outcome(result))()
+
+        assert breaker.state == CircuitBreaker.OPEN
+
+    @pytest.mark.asyncio
+    async def test_half_open_probe_closes_on_success(self, breaker_settings, no_redis):
+        breaker = CircuitBreaker("gemini", "gemini-test")
+        for _ in range(3):
+            await breaker.record_failure()
+
+        await asyncio.sleep(0.06)
+        assert await breaker.allow_request()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        # Only one probe at a time
+        assert not await breaker.allow_request()
+
+        await breaker.guard(_outcome({"ok": 1}))()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert await breaker.allow_request()
+
+    @pytest.mark.asyncio
+    async def test_failed_probe_reopens(self, breaker_settings, no_redis):
+        breaker = CircuitBreaker("gemini", "gemini-test")
+        for _ in range(3):
+            await breaker.record_failure()
+
+        await asyncio.sleep(0.06)
+        assert await breaker.allow_request()
+        await breaker.guard(_outcome(None))()
+
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not await breaker.allow_request()
+
+    @pytest.mark.asyncio
+    async def test_request_errors_do_not_count(self, breaker_settings, no_redis):
+        breaker = CircuitBreaker("gemini", "gemini-test")
+
+        async def bad_request():
+            raise ValueError("content policy")
+
+        for _ in range(5):
+            with pytest.raises(ValueError):
+                await breaker.guard(bad_request)()
+
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_state_is_shared_across_workers(self, breaker_settings, fake_redis):
+        worker_a = CircuitBreaker("gemini", "gemini-test")
+        worker_b = CircuitBreaker("gemini", "gemini-test")
+
+        for _ in range(3):
+            await worker_a.record_failure()
+
+        assert not await worker_b.allow_request()
+        assert worker_b.state == CircuitBreaker.OPEN
+
+        # Only one worker gets the half-open probe
+        await asyncio.sleep(0.06)
+        probes = [await worker_a.allow_request(), await worker_b.allow_request()]
+        assert probes.count(True) == 1
+
+        prober = worker_a if probes[0] else worker_b
+        other = worker_b if probes[0] else worker_a
+        await prober.record_success()
+
+        assert "circuit:gemini:gemini-test" not in fake_redis.data
+        assert await other.allow_request()
+        assert other.state == CircuitBreaker.CLOSED
@@ -0,0 +1,91 @@
+"""
+Unit tests for the pooled AI client registry.
+"""
+import asyncio
+import httpx
+import pytest
+
+from app.services.client_registry import ClientRegistry, _InstrumentedTransport
+
+
+@pytest.fixture
+def registry():
+    registry = ClientRegistry()
+    registry.reset_stats()
+    yield registry
+    registry.reset_stats()
+
+
+async def _keepalive_server():
+    """Minimal HTTP/1.1 server that keeps connections open between requests."""
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                request = await reader.readuntil(b"\r\n\r\n")
+                if not request:
+                    break
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: keep-alive\r\n\r\nok")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"http://127.0.0.1:{port}/"
+
+
+class TestClientRegistry:
+    """Registry hands out long-lived clients and counts reuse."""
+
+    def test_generative_model_is_reused(self, registry):
+        first = registry.get_generative_model("gemini-test-model")
+        second = registry.get_generative_model("gemini-test-model")
+
+        assert first is second
+        assert registry.stats["clients"]["generative_model"]["reused"] >= 1
+
+    def test_openai_client_is_shared(self, registry):
+        assert registry.get_openai_client() is registry.get_openai_client()
+        assert registry.stats["clients"]["openai_client"]["reused"] >= 1
+
+    def test_cached_model_keyed_by_handle(self, registry, monkeypatch):
+        import google.generativeai as genai
+
+        built = []
+        monkeypatch.setattr(
+            genai.GenerativeModel, "from_cached_content",
+            classmethod(lambda cls, cached: built.append(cached.name) or object())
+        )
+
+        class Handle:
+            def __init__(self, name):
+                self.name = name
+
+        a1 = registry.get_cached_model(Handle("cachedContents/a"))
+        a2 = registry.get_cached_model(Handle("cachedContents/a"))
+        b = registry.get_cached_model(Handle("cachedContents/b"))
+
+        assert a1 is a2
+        assert a1 is not b
+        assert built == ["cachedContents/a", "cachedContents/b"]
+        registry.evict_cached_model(Handle("cachedContents/a"))
+        registry.evict_cached_model(Handle("cachedContents/b"))
+
+    @pytest.mark.asyncio
+    async def test_connections_created_vs_reused(self, registry):
+        server, url = await _keepalive_server()
+        transport = _InstrumentedTransport(registry=registry, provider="gemini")
+
+        async with httpx.AsyncClient(transport=transport) as client:
+            for _ in range(3):
+                response = await client.get(url)
+                assert response.text == "ok"
+
+        server.close()
+        await server.wait_closed()
+
+        assert registry.stats["connections"]["gemini"] == {"created": 1, "reused": 2}
+        assert registry.get_stats()["connection_reuse_rate"] == pytest.approx(66.67)
@@ -0,0 +1,147 @@
+"""
+Unit tests for the shared Gemini context cache registry.
+"""
+import asyncio
+import datetime
+import itertools
+import threading
+import pytest
+
+from app.config import settings
+from app.services import context_cache as module
+from app.services.context_cache import ContextCacheRegistry
+from app.utils.redis_client import redis_client
+
+PROMPT = "You are an e-commerce copywriting expert. Always return valid JSON."
+MODEL = "gemini-2.5-flash"
+
+
+class FakeCachedContent:
+    """Server-side store of cached contents shared by every 'worker'."""
+
+    store = {}
+    creates = 0
+    threads = set()
+    _ids = itertools.count()
+
+    def __init__(self, name, ttl):
+        self.name = name
+        self.updates = 0
+        self._set_ttl(ttl)
+
+    def _set_ttl(self, ttl):
+        self.expire_time = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=ttl)
+
+    @classmethod
+    def create(cls, model, contents, ttl, display_name):
+        cls.creates += 1
+        cls.threads.add(threading.current_thread().name)
+        handle = cls(f"cachedContents/{next(cls._ids)}", ttl)
+        cls.store[handle.name] = handle
+        return handle
+
+    @classmethod
+    def get(cls, name):
+        cls.threads.add(threading.current_thread().name)
+        if name not in cls.store:
+            raise LookupError(name)
+        return cls.store[name]
+
+    def update(self, ttl):
+        self.updates += 1
+        self.threads.add(threading.current_thread().name)
+        self._set_ttl(ttl)
+
+
+@pytest.fixture
+def fake_genai(monkeypatch):
+    FakeCachedContent.store = {}
+    FakeCachedContent.creates = 0
+    FakeCachedContent.threads = set()
+    monkeypatch.setattr(module.genai.caching, "CachedContent", FakeCachedContent)
+
+
+class TestContextCacheRegistry:
+
+    @pytest.mark.asyncio
+    async def test_handle_shared_across_workers(self, fake_genai, fake_redis):
+        worker_a, worker_b = ContextCacheRegistry(), ContextCacheRegistry()
+
+        first = await worker_a.get("product", PROMPT, MODEL)
+        second = await worker_b.get("product", PROMPT, MODEL)
+        again = await worker_b.get("product", PROMPT, MODEL)
+
+        assert FakeCachedContent.creates == 1
+        assert first.name == second.name == again.name
+        assert worker_b.stats["shared_hits"] == 1
+        assert worker_b.stats["local_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_key_includes_model_and_prompt(self, fake_genai, fake_redis):
+        registry = ContextCacheRegistry()
+
+        await registry.get("product", PROMPT, MODEL)
+        await registry.get("product", PROMPT, "gemini-2.5-pro")
+        await registry.get("product", PROMPT + " Be concise.", MODEL)
+
+        assert FakeCachedContent.creates == 3
+
+    @pytest.mark.asyncio
+    async def test_concurrent_creation_is_single(self, fake_genai, fake_redis):
+        registry = ContextCacheRegistry()
+
+        handles = await asyncio.gather(*(registry.get("ad", PROMPT, MODEL) for _ in range(5)))
+
+        assert FakeCachedContent.creates == 1
+        assert len({handle.name for handle in handles}) == 1
+
+    @pytest.mark.asyncio
+    async def test_deleted_handle_is_recreated(self, fake_genai, fake_redis):
+        await ContextCacheRegistry().get("product", PROMPT, MODEL)
+        FakeCachedContent.store.clear()  # Expired/deleted server-side
+
+        handle = await ContextCacheRegistry().get("product", PROMPT, MODEL)
+
+        assert handle is not None
+        assert FakeCachedContent.creates == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_creation_not_retried_immediately(self, fake_genai, fake_redis, monkeypatch):
+        def fail(**kwargs):
+            FakeCachedContent.creates += 1
+            raise ValueError("Cached content is too small")
+        monkeypatch.setattr(FakeCachedContent, "create", staticmethod(fail))
+        registry = ContextCacheRegistry()
+
+        assert await registry.get("generic", PROMPT, MODEL) is None
+        assert await registry.get("generic", PROMPT, MODEL) is None
+        assert FakeCachedContent.creates == 1
+
+    @pytest.mark.asyncio
+    async def test_refresh_extends_expiring_handles(self, fake_genai, fake_redis, monkeypatch):
+        monkeypatch.setattr(settings, "CACHE_TTL_SYSTEM_PROMPTS", 3600)
+        monkeypatch.setattr(settings, "CONTEXT_CACHE_REFRESH_MARGIN", 7200)
+        worker_a, worker_b = ContextCacheRegistry(), ContextCacheRegistry()
+        handle = await worker_a.get("product", PROMPT, MODEL)
+        await worker_b.get("product", PROMPT, MODEL)
+
+        monkeypatch.setattr(settings, "CACHE_TTL_SYSTEM_PROMPTS", 604800)
+        assert await worker_a.refresh_expiring() == 1
+        # worker_b sees the extension in the registry instead of extending again
+        assert await worker_b.refresh_expiring() == 0
+        assert handle.updates == 1
+        assert worker_b.get_stats()["entries"][0]["expires_in"] > 600000
+        # create, get and update all ran on the bounded LLM executor
+        assert FakeCachedContent.threads and all(t.startswith("llm-call") for t in FakeCachedContent.threads)
+
+    @pytest.mark.asyncio
+    async def test_works_without_redis(self, fake_genai, monkeypatch):
+        monkeypatch.setattr(redis_client, "_client", None)
+        registry = ContextCacheRegistry()
+
+        ready = await registry.prewarm([("product", PROMPT, MODEL), ("ad", PROMPT, MODEL)])
+        await registry.get("product", PROMPT, MODEL)
+
+        assert ready == 2
+        assert FakeCachedContent.creates == 2
+        assert registry.get_stats()["shared"] is False
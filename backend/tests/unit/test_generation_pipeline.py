@@ -0,0 +1,96 @@
+"""
+Unit tests for the post-generation pipeline runner.
+"""
+import asyncio
+import time
+import pytest
+
+from app.services.generation_pipeline import GenerationPipeline
+
+
+def _stage(value, delay=0.0, log=None, error=None):
+    async def run(results):
+        if log is not None:
+            log.append(f"start {value}")
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return value
+    return run
+
+
+class TestGenerationPipeline:
+
+    @pytest.mark.asyncio
+    async def test_independent_stages_run_concurrently(self):
+        pipeline = (
+            GenerationPipeline("test")
+            .add("generate", _stage("blog"))
+            .add("ai_analysis", _stage("analysis", delay=0.1), depends_on=["generate"])
+            .add("fact_check", _stage("facts", delay=0.1), depends_on=["generate"])
+        )
+
+        start = time.perf_counter()
+        outcome = await pipeline.run()
+
+        assert time.perf_counter() - start < 0.18
+        assert outcome.results == {"generate": "blog", "ai_analysis": "analysis", "fact_check": "facts"}
+        assert set(outcome.timings) == {"generate", "ai_analysis", "fact_check"}
+        assert all(timing["status"] == "ok" for timing in outcome.timings.values())
+
+    @pytest.mark.asyncio
+    async def test_dependencies_see_upstream_results(self):
+        log = []
+
+        async def save(results):
+            log.append("start save")
+            return f"saved {results['fact_check']}"
+
+        pipeline = (
+            GenerationPipeline("test")
+            .add("fact_check", _stage("facts", delay=0.05, log=log))
+            .add("save", save, depends_on=["fact_check"])
+        )
+        outcome = await pipeline.run()
+
+        assert log == ["start facts", "start save"]
+        assert outcome.results["save"] == "saved facts"
+        assert outcome.timings["save"]["start_ms"] >= outcome.timings["fact_check"]["duration_ms"]
+
+    @pytest.mark.asyncio
+    async def test_optional_stage_timeout_uses_fallback(self):
+        pipeline = (
+            GenerationPipeline("test")
+            .add("ai_analysis", _stage("analysis", delay=1.0), timeout=0.05, fallback=None)
+            .add("fact_check", _stage("facts", error=RuntimeError("search quota")), fallback={"checked": False})
+            .add("save", _stage("saved"), depends_on=["ai_analysis", "fact_check"])
+        )
+        outcome = await pipeline.run()
+
+        assert outcome.results["ai_analysis"] is None
+        assert outcome.results["fact_check"] == {"checked": False}
+        assert outcome.results["save"] == "saved"
+        assert outcome.timings["ai_analysis"]["status"] == "timeout"
+        assert outcome.timings["fact_check"]["status"] == "failed"
+        assert outcome.timings_summary()["degraded"] == ["fact_check", "ai_analysis"]
+
+    @pytest.mark.asyncio
+    async def test_required_failure_aborts_pipeline(self):
+        log = []
+        pipeline = (
+            GenerationPipeline("test")
+            .add("save", _stage("saved", error=ValueError("firestore down")), required=True)
+            .add("increment_usage", _stage("counted", log=log), depends_on=["save"])
+            .add("ai_analysis", _stage("analysis", delay=1.0, log=log))
+        )
+
+        start = time.perf_counter()
+        with pytest.raises(ValueError):
+            await pipeline.run()
+
+        assert time.perf_counter() - start < 0.5  # Slow sibling was cancelled
+        assert "start counted" not in log
+
+    def test_unknown_dependency_rejected(self):
+        with pytest.raises(ValueError):
+            GenerationPipeline("test").add("save", _stage("saved"), depends_on=["generate"])
@@ -0,0 +1,148 @@
+"""
+Unit tests for hedged primary/fallback requests.
+"""
+import asyncio
+import time
+import pytest
+
+from app.config import settings
+from app.constants import SubscriptionPlan
+from app.services.hedging import HedgePolicy
+from app.services.llm_scheduler import llm_scheduler
+
+MODEL = "gemini-test"
+
+
+@pytest.fixture
+def policy(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_SAMPLES", 5)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_DELAY", 0.01)
+    monkeypatch.setattr(settings, "ENTERPRISE_TIER_HEDGE_BUDGET", 1.0)
+    monkeypatch.setattr(settings, "FREE_TIER_HEDGE_BUDGET", 0.0)
+
+    policy = HedgePolicy()
+    policy._latencies.clear()
+    policy._credits.clear()
+    policy.reset_stats()
+    for _ in range(10):
+        policy.record_latency(MODEL, 0.05)
+    yield policy
+    policy._latencies.clear()
+    policy._credits.clear()
+    policy.reset_stats()
+
+
+def _call(name, delay, log, result=True, error=None):
+    async def run():
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            log.append(f"{name} cancelled")
+            raise
+        if error:
+            raise error
+        return {"model": name} if result else None
+    return run
+
+
+class TestHedgePolicy:
+
+    def test_delay_follows_percentile(self, policy):
+        for _ in range(10):
+            policy.record_latency(MODEL, 1.0)
+
+        # 10 x 0.05s + 10 x 1.0s -> p95 lands in the slow half
+        assert policy.hedge_delay(MODEL) == 1.0
+        assert policy.hedge_delay("unknown-model") is None
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_never_hedges(self, policy):
+        log = []
+        result = await policy.execute(_call("gemini", 0.0, log), _call("openai", 0.0, log),
+                                      model_name=MODEL, user_tier="enterprise")
+
+        assert result == {"model": "gemini"}
+        assert policy.stats["enterprise"]["hedges_fired"] == 0
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_loses_to_hedge(self, policy):
+        log = []
+        start = time.perf_counter()
+        result = await policy.execute(_call("gemini", 1.0, log), _call("openai", 0.05, log),
+                                      model_name=MODEL, user_tier="enterprise")
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(0)
+
+        assert result == {"model": "openai"}
+        assert elapsed < 0.5
+        assert log == ["gemini cancelled"]
+        assert policy.stats["enterprise"]["hedge_wins"] == 1
+        assert policy.get_stats()["hedge_win_rate"] == 100.0
+
+    @pytest.mark.asyncio
+    async def test_primary_can_still_win_after_hedge(self, policy):
+        log = []
+        result = await policy.execute(_call("gemini", 0.15, log), _call("openai", 1.0, log),
+                                      model_name=MODEL, user_tier="enterprise")
+        await asyncio.sleep(0)
+
+        assert result == {"model": "gemini"}
+        assert log == ["openai cancelled"]
+        assert policy.stats["enterprise"]["primary_wins"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_primary_waits_for_hedge(self, policy):
+        log = []
+        result = await policy.execute(_call("gemini", 0.1, log, error=RuntimeError("boom")),
+                                      _call("openai", 0.2, log),
+                                      model_name=MODEL, user_tier="enterprise")
+
+        assert result == {"model": "openai"}
+
+    @pytest.mark.asyncio
+    async def test_tier_without_budget_is_not_hedged(self, policy):
+        log = []
+        result = await policy.execute(_call("gemini", 0.2, log), _call("openai", 0.0, log),
+                                      model_name=MODEL, user_tier="free")
+
+        assert result == {"model": "gemini"}
+        assert policy.stats["free"]["hedges_fired"] == 0
+        assert policy.stats["free"]["budget_denied"] == 1
+
+    @pytest.mark.asyncio
+    async def test_primary_none_falls_back_sequentially(self, policy):
+        log = []
+        result = await policy.execute(_call("gemini", 0.0, log, result=False), _call("openai", 0.0, log),
+                                      model_name=MODEL, user_tier="free")
+
+        assert result == {"model": "openai"}
+        assert policy.stats["free"]["primary_fallbacks"] == 1
+
+    @pytest.mark.asyncio
+    async def test_hedge_joins_request_at_user_cap(self, policy, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_SCHEDULER_ENABLED", True)
+        monkeypatch.setattr(settings, "HOBBY_TIER_LLM_CONCURRENCY", 1)
+        monkeypatch.setattr(settings, "HOBBY_TIER_HEDGE_BUDGET", 1.0)
+        llm_scheduler.reset()
+        log = []
+
+        def scheduled(provider, call):
+            async def run():
+                async with llm_scheduler.slot(provider):
+                    return await call()
+            return run
+
+        llm_scheduler.bind_caller("user-1", SubscriptionPlan.of({"subscription": {"plan": "hobby"}}))
+        start = time.perf_counter()
+        try:
+            result = await policy.execute(scheduled("gemini", _call("gemini", 1.0, log)),
+                                          scheduled("openai", _call("openai", 0.05, log)),
+                                          model_name=MODEL, user_tier="hobby")
+        finally:
+            llm_scheduler.reset()
+
+        # The backup doesn't queue behind the primary's slot on a 1-call tier
+        assert result == {"model": "openai"}
+        assert time.perf_counter() - start < 0.5
+        assert policy.stats["hobby"]["hedge_wins"] == 1
@@ -0,0 +1,139 @@
+"""
+Unit tests for streaming JSON validation (early abort of malformed structured output).
+"""
+import json
+import pytest
+
+from app.config import settings
+from app.schemas.ai_schemas import BlogPostOutput, EmailCampaignOutput
+from app.utils.json_stream import IncrementalJSONParser, SchemaStreamValidator, StreamValidationError
+
+EMAIL = {"subject": "Spring sale", "preheader": "Up to 40% off", "body": "Hello!", "callToAction": "Shop now"}
+
+
+def _feed_all(parser, text, size=5):
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return events
+
+
+class TestIncrementalJSONParserValidation:
+
+    @pytest.mark.parametrize("text", [
+        '{"a": tru}',         # bad literal
+        '{"a" 1}',            # missing colon
+        '{"a": 1,}',          # trailing comma
+        '{"a": [1, 2}',       # mismatched bracket
+        '{"a": "x\\q"}',      # invalid escape
+        '{"a": "line\nbreak"}',  # raw control character
+        '{a: 1}',             # unquoted key
+    ])
+    def test_invalid_json_raises_at_first_bad_char(self, text):
+        parser = IncrementalJSONParser()
+
+        with pytest.raises(StreamValidationError):
+            _feed_all(parser, text + ' "padding that is never read"')
+
+        assert parser.error.position < len(text)
+        with pytest.raises(StreamValidationError):
+            parser.feed("more")
+
+    def test_prose_instead_of_json_aborts(self):
+        parser = IncrementalJSONParser(max_preamble=50)
+
+        with pytest.raises(StreamValidationError):
+            _feed_all(parser, "I'm sorry, but I can't help with writing that product description. " * 3)
+
+    def test_fenced_json_extracted(self):
+        parser = IncrementalJSONParser()
+        _feed_all(parser, "Here you go:\n```json\n" + json.dumps(EMAIL) + "\n```")
+
+        assert parser.finished
+        assert json.loads(parser.json_text()) == EMAIL
+
+
+class TestSchemaStreamValidator:
+
+    def test_valid_fields_emitted_and_document_validated(self):
+        validator = SchemaStreamValidator(EmailCampaignOutput)
+        events = _feed_all(validator, json.dumps(EMAIL))
+
+        assert [e[1] for e in events] == ["subject", "preheader", "body", "callToAction"]
+        assert validator.validate().subject == "Spring sale"
+
+    def test_wrong_type_aborts_before_document_ends(self):
+        validator = SchemaStreamValidator(BlogPostOutput)
+
+        with pytest.raises(StreamValidationError, match="sections\\[0\\]"):
+            validator.feed('{"title": "T", "sections": [{"heading": 1, "content": "x"}, ')
+
+    def test_missing_required_field_fails_validation(self):
+        validator = SchemaStreamValidator(EmailCampaignOutput)
+        _feed_all(validator, json.dumps({"subject": "Hi"}))
+
+        with pytest.raises(StreamValidationError):
+            validator.validate()
+
+    def test_truncated_document_fails_validation(self):
+        validator = SchemaStreamValidator(EmailCampaignOutput)
+        validator.feed(json.dumps(EMAIL)[:30])
+
+        with pytest.raises(StreamValidationError, match="ended before"):
+            validator.validate()
+
+
+class _FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class _FakeStreamingModel:
+    """Old-SDK model: each call streams the next scripted response in 10-char chunks."""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = 0
+        self.chunks_sent = []
+
+    async def generate_content_async(self, contents, stream=False, **kwargs):
+        text = self.responses[self.calls]
+        self.calls += 1
+        self.chunks_sent.append(0)
+        call = len(self.chunks_sent) - 1
+
+        async def chunks():
+            for i in range(0, len(text), 10):
+                self.chunks_sent[call] += 1
+                yield _FakeChunk(text[i:i + 10])
+        return chunks()
+
+
+class TestGenerateWithAIEarlyAbort:
+
+    @pytest.fixture
+    def service(self, monkeypatch):
+        from app.services import openai_service as module
+
+        async def no_cache(**kwargs):
+            return None
+
+        service = module.openai_service
+        monkeypatch.setattr(settings, "CIRCUIT_BREAKER_ENABLED", False)
+        monkeypatch.setattr(settings, "LLM_HEDGE_ENABLED", False)
+        monkeypatch.setattr(settings, "STREAM_VALIDATION_RETRIES", 1)
+        monkeypatch.setattr(service, "_get_cached_system_content", no_cache)
+        return service
+
+    @pytest.mark.asyncio
+    async def test_malformed_output_cancelled_and_retried(self, service, monkeypatch):
+        broken = '{"shortDescription": "Great mug", oops' + " filler" * 200
+        model = _FakeStreamingModel([broken, "```json\n" + json.dumps(EMAIL) + "\n```"])
+        monkeypatch.setattr(service, "gemini_model", model)
+
+        result = await service._generate_with_ai("system", "prompt", max_tokens=500, content_type="product")
+
+        assert model.calls == 2
+        # First stream stopped at the bad token instead of running to the end
+        assert model.chunks_sent[0] < len(broken) // 10
+        assert json.loads(result["content"]) == EMAIL
@@ -0,0 +1,168 @@
+"""
+Unit tests for the tier-aware LLM scheduler.
+"""
+import asyncio
+import time
+import pytest
+
+from app.config import settings
+from app.constants import SubscriptionPlan
+from app.services.llm_scheduler import llm_scheduler
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_SCHEDULER_ENABLED", True)
+    monkeypatch.setattr(settings, "GEMINI_RPM_LIMIT", 10000)
+    monkeypatch.setattr(settings, "GEMINI_TPM_LIMIT", 10000000)
+    monkeypatch.setattr(settings, "LLM_MAX_CONCURRENCY_PER_PROVIDER", 1)
+    monkeypatch.setattr(settings, "FREE_TIER_LLM_CONCURRENCY", 1)
+    llm_scheduler.reset()
+    yield llm_scheduler
+    monkeypatch.undo()
+    llm_scheduler.reset()
+
+
+async def _call(user_id, plan, order, tokens=100, hold=0.0):
+    """One model call made while serving `user_id`"""
+    if user_id:
+        llm_scheduler.bind_caller(user_id, plan)
+    async with llm_scheduler.slot("gemini", tokens=tokens):
+        order.append(user_id)
+        await asyncio.sleep(hold)
+
+
+async def _blocked_start(calls):
+    """Queue `calls` behind a held slot so dispatch order is decided by the scheduler"""
+    order = []
+    gate = asyncio.Event()
+
+    async def blocker():
+        async with llm_scheduler.slot("gemini", tokens=1):
+            await gate.wait()
+
+    blocker_task = asyncio.create_task(blocker())
+    await asyncio.sleep(0)
+    tasks = []
+    for user_id, plan in calls:
+        tasks.append(asyncio.create_task(_call(user_id, plan, order)))
+        await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(blocker_task, *tasks)
+    return order
+
+
+class TestLLMScheduler:
+
+    @pytest.mark.asyncio
+    async def test_equal_tiers_are_interleaved(self, scheduler):
+        order = await _blocked_start([("alice", "free")] * 3 + [("bob", "free")] * 3)
+
+        assert order == ["alice", "bob", "alice", "bob", "alice", "bob"]
+
+    @pytest.mark.asyncio
+    async def test_higher_tier_gets_larger_share(self, scheduler):
+        order = await _blocked_start([("free-user", "free")] * 4 + [("pro-user", "pro")] * 4)
+
+        # pro weight is sqrt(1000/10)=10x free, so its queued calls finish first
+        assert order[:4] == ["pro-user"] * 4
+        assert scheduler.tier_weight("pro") == pytest.approx(10.0)
+
+    @pytest.mark.asyncio
+    async def test_per_user_concurrency_cap(self, scheduler, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_MAX_CONCURRENCY_PER_PROVIDER", 10)
+        in_flight = {"alice": 0, "bob": 0}
+        peak = {"alice": 0, "bob": 0}
+
+        async def call(user_id):
+            llm_scheduler.bind_caller(user_id, "free")
+            async with llm_scheduler.slot("gemini", tokens=10):
+                in_flight[user_id] += 1
+                peak[user_id] = max(peak[user_id], in_flight[user_id])
+                await asyncio.sleep(0.01)
+                in_flight[user_id] -= 1
+
+        await asyncio.gather(*[call("alice") for _ in range(3)], call("bob"))
+
+        assert peak == {"alice": 1, "bob": 1}
+
+    @pytest.mark.asyncio
+    async def test_calls_within_admitted_request_skip_user_cap(self, scheduler, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_MAX_CONCURRENCY_PER_PROVIDER", 10)
+        in_flight = {"first": 0, "second": 0}
+        peak = {"first": 0, "second": 0}
+        overlap = []
+
+        async def sub_call(request):
+            async with llm_scheduler.slot("gemini", tokens=10):
+                in_flight[request] += 1
+                peak[request] = max(peak[request], in_flight[request])
+                overlap.append(in_flight["first"] and in_flight["second"])
+                await asyncio.sleep(0.01)
+                in_flight[request] -= 1
+
+        async def request(name):
+            llm_scheduler.bind_caller("alice", "free")
+            await asyncio.gather(*[sub_call(name) for _ in range(3)])
+
+        await asyncio.gather(request("first"), request("second"))
+
+        # Each request's parallel calls run together, but the free cap keeps the requests apart
+        assert peak == {"first": 3, "second": 3}
+        assert not any(overlap)
+
+    def test_plan_read_from_subscription(self):
+        assert SubscriptionPlan.of({"subscription": {"plan": "pro"}}) == "pro"
+        assert SubscriptionPlan.of({"subscriptionPlan": "hobby"}) == "hobby"
+        assert SubscriptionPlan.of({"subscription": {}}) == "free"
+
+    @pytest.mark.asyncio
+    async def test_tpm_bucket_delays_calls(self, scheduler, monkeypatch):
+        monkeypatch.setattr(settings, "GEMINI_TPM_LIMIT", 6000)  # refills 100 tokens/s
+        scheduler.reset()
+        order = []
+
+        await _call(None, None, order, tokens=6000)
+        start = time.perf_counter()
+        await _call(None, None, order, tokens=5)
+
+        assert time.perf_counter() - start >= 0.04
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_queue(self, scheduler):
+        order = []
+        holder = asyncio.create_task(_call("alice", "free", order, hold=0.05))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(_call("bob", "free", order))
+        await asyncio.sleep(0)
+        assert scheduler.get_stats()["providers"]["gemini"]["queue_depth"] == 1
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await holder
+
+        stats = scheduler.get_stats()["providers"]["gemini"]
+        assert stats["queue_depth"] == 0
+        assert stats["active"] == 0
+        await _call("carol", "free", order)
+        assert order == ["alice", "carol"]
+
+    @pytest.mark.asyncio
+    async def test_wait_histogram_by_tier(self, scheduler):
+        await _blocked_start([("alice", "free"), ("dave", "hobby")])
+
+        waits = scheduler.get_stats()["wait_times"]
+        assert waits["free"]["count"] == 2  # includes the anonymous blocker
+        assert waits["hobby"]["count"] == 1
+        assert sum(waits["hobby"]["histogram"].values()) == 1
+
+    @pytest.mark.asyncio
+    async def test_disabled_scheduler_passes_through(self, scheduler, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_SCHEDULER_ENABLED", False)
+        order = []
+
+        await asyncio.gather(*[_call("alice", "free", order) for _ in range(3)])
+
+        assert order == ["alice"] * 3
+        assert scheduler.get_stats()["providers"]["gemini"]["dispatched"] == 0
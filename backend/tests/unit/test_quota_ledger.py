@@ -0,0 +1,270 @@
+"""
+Unit tests for the quota ledger (reserve / commit / refund, monthly periods, Firestore flush).
+Runs the in-process ledger; the Redis path is covered for its script wiring.
+"""
+import asyncio
+import pytest
+from datetime import datetime, timedelta, timezone
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.config import settings
+from app.utils.redis_client import redis_client
+from app.services.quota_ledger import QuotaLedger
+
+
+def _user(used=0, limit=3, reset_date=None, **usage):
+    return {
+        "uid": "user-1",
+        "usageThisMonth": {
+            "generations": used,
+            "limit": limit,
+            "resetDate": reset_date or datetime.now(timezone.utc) + timedelta(days=10),
+            **usage
+        }
+    }
+
+
+@pytest.fixture
+def ledger(monkeypatch):
+    monkeypatch.setattr(redis_client, "_client", None)
+    return QuotaLedger()
+
+
+class TestReservations:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_cannot_overshoot(self, ledger):
+        user = _user(used=1, limit=3)
+
+        reservations = await asyncio.gather(*(ledger.reserve(user, "generations") for _ in range(10)))
+
+        assert sum(r.granted for r in reservations) == 2
+        denied = next(r for r in reservations if not r.granted)
+        assert (denied.used, denied.limit) == (3, 3)
+
+    @pytest.mark.asyncio
+    async def test_refund_returns_quota(self, ledger):
+        user = _user(limit=1)
+        first = await ledger.reserve(user, "generations")
+        assert not (await ledger.reserve(user, "generations")).granted
+
+        await first.release()
+
+        assert (await ledger.reserve(user, "generations")).granted
+
+    @pytest.mark.asyncio
+    async def test_commit_counts_and_release_is_noop(self, ledger):
+        user = _user(used=2, limit=5)
+        reservation = await ledger.reserve(user, "generations")
+
+        assert await reservation.commit() == 3
+        await reservation.release()
+
+        assert await ledger.usage(user, "generations") == {"used": 3, "reserved": 0, "limit": 5, "remaining": 2}
+
+    @pytest.mark.asyncio
+    async def test_partial_commit_releases_the_rest(self, ledger):
+        user = _user(limit=5, socialGraphicsLimit=5)
+        reservation = await ledger.reserve(user, "graphics", 4)
+
+        assert await reservation.commit(3) == 3
+        assert (await ledger.usage(user, "graphics"))["remaining"] == 2
+
+    @pytest.mark.asyncio
+    async def test_expired_reservations_are_released(self, ledger, monkeypatch):
+        user = _user(limit=1)
+        monkeypatch.setattr(settings, "QUOTA_RESERVATION_TTL", -1)
+        abandoned = await ledger.reserve(user, "generations")
+        monkeypatch.setattr(settings, "QUOTA_RESERVATION_TTL", 600)
+
+        assert abandoned.granted
+        assert (await ledger.reserve(user, "generations")).granted
+
+    @pytest.mark.asyncio
+    async def test_kinds_are_independent(self, ledger):
+        user = _user(used=3, limit=3, humanizations=0, humanizationsLimit=2)
+
+        assert not (await ledger.reserve(user, "generations")).granted
+        assert (await ledger.reserve(user, "humanizations")).granted
+
+    @pytest.mark.asyncio
+    async def test_limit_change_applies_immediately(self, ledger):
+        await (await ledger.reserve(_user(limit=1), "generations")).commit()
+
+        assert not (await ledger.reserve(_user(limit=1), "generations")).granted
+        assert (await ledger.reserve(_user(limit=100), "generations")).granted
+
+    @pytest.mark.asyncio
+    async def test_save_timeout_does_not_refund_saved_work(self, ledger):
+        user = _user(used=1, limit=5)
+        reservation = await ledger.reserve(user, "generations")
+        saved = asyncio.Event()
+
+        async def save():
+            await asyncio.sleep(0.05)
+            saved.set()
+            return "generation-1"
+
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(reservation.commit_after(save()), timeout=0.01)
+        finally:
+            await reservation.release()
+
+        await saved.wait()
+        await asyncio.sleep(0)
+        assert (await ledger.usage(user, "generations"))["used"] == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_save_is_refunded(self, ledger):
+        user = _user(used=1, limit=5)
+        reservation = await ledger.reserve(user, "generations")
+
+        async def save():
+            raise RuntimeError("firestore down")
+
+        with pytest.raises(RuntimeError):
+            await reservation.commit_after(save())
+        await reservation.release()
+
+        assert await ledger.usage(user, "generations") == {"used": 1, "reserved": 0, "limit": 5, "remaining": 4}
+
+
+class TestPeriods:
+
+    @pytest.mark.asyncio
+    async def test_seeded_from_user_document_once(self, ledger):
+        await ledger.reserve(_user(used=2, limit=3), "generations")
+
+        # A stale (lower) count on a later request doesn't reset the ledger
+        assert not (await ledger.reserve(_user(used=0, limit=3), "generations")).granted
+
+    @pytest.mark.asyncio
+    async def test_passed_reset_date_starts_new_period(self, firestore, ledger):
+        firestore.docs["user-1"]["usageThisMonth"].update({"generations": 5, "humanizations": 2})
+        user = _user(used=5, limit=5, reset_date=datetime.now(timezone.utc) - timedelta(days=1))
+
+        first = await ledger.reserve(user, "generations")
+        second = await ledger.reserve(user, "generations")
+
+        assert first.granted and second.granted
+        assert first.reset_date > datetime.now(timezone.utc)
+        usage = firestore.docs["user-1"]["usageThisMonth"]
+        assert (usage["generations"], usage["humanizations"]) == (0, 0)
+        assert usage["resetDate"] == first.reset_date
+
+
+class TestFlush:
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_counts_in_one_batch(self, firestore, ledger):
+        user = _user(used=1, limit=5, socialGraphicsLimit=5)
+        await (await ledger.reserve(user, "generations")).commit()
+        await (await ledger.reserve(user, "graphics", 2)).commit()
+
+        assert await ledger.flush() == 1
+        assert firestore.commits == 1
+        usage = firestore.docs["user-1"]["usageThisMonth"]
+        assert (usage["generations"], usage["socialGraphics"]) == (2, 2)
+        assert await ledger.flush() == 0
+
+    @pytest.mark.asyncio
+    async def test_deleted_user_does_not_block_flush(self, firestore, ledger):
+        ghost = _user(limit=5)
+        ghost["uid"] = "ghost"  # No document - the batch fails with NotFound
+        await (await ledger.reserve(ghost, "generations")).commit()
+        await (await ledger.reserve(_user(used=1, limit=5), "generations")).commit()
+
+        assert await ledger.flush() == 1
+        assert firestore.docs["user-1"]["usageThisMonth"]["generations"] == 2
+        assert not ledger._local_dirty
+        assert "ghost" not in firestore.docs
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_users_dirty(self, firestore, ledger, monkeypatch):
+        await (await ledger.reserve(_user(limit=5), "generations")).commit()
+
+        async def unavailable(self, data):
+            raise ConnectionError("firestore unavailable")
+
+        async def failed_commit(self):
+            raise ConnectionError("firestore unavailable")
+
+        monkeypatch.setattr(type(firestore.document("user-1")), "update", unavailable)
+        monkeypatch.setattr(type(firestore.batch()), "commit", failed_commit)
+
+        assert await ledger.flush() == 0
+        assert len(ledger._local_dirty) == 1
+
+
+class TestRedisScripts:
+
+    @pytest.mark.asyncio
+    async def test_reserve_runs_one_script_per_call(self, monkeypatch):
+        calls = []
+
+        class FakeScriptClient:
+
+            def register_script(self, source):
+                async def run(keys, args):
+                    calls.append((keys, args))
+                    return [0, 4, 1]
+                return run
+
+        monkeypatch.setattr(redis_client, "_client", FakeScriptClient())
+
+        reservation = await QuotaLedger().reserve(_user(used=4, limit=5), "generations")
+
+        keys, args = calls[0]
+        assert not reservation.granted
+        assert reservation.used == 5
+        assert keys[0].startswith("quota:user-1:") and keys[1] == f"{keys[0]}:res"
+        assert args[:4] == ["generations", 1, 5, 4]
+
+    @pytest.mark.asyncio
+    async def test_redis_errors_fall_back_to_in_process_ledger(self, firestore, monkeypatch):
+
+        class BrokenScriptClient:
+            """Every command fails like a dropped connection"""
+
+            def __getattr__(self, name):
+                async def unavailable(*args, **kwargs):
+                    raise RedisConnectionError("connection reset")
+                return unavailable
+
+            def register_script(self, source):
+                return self.evalsha
+
+        monkeypatch.setattr(redis_client, "_client", BrokenScriptClient())
+        ledger = QuotaLedger()
+        user = _user(used=1, limit=2)
+
+        first = await ledger.reserve(user, "generations")
+        second = await ledger.reserve(user, "generations")
+
+        assert first.granted and first.local
+        assert not second.granted
+        assert await first.commit() == 2
+        assert await ledger.flush() == 1
+        assert firestore.docs["user-1"]["usageThisMonth"]["generations"] == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_commit_script_counts_in_process(self, monkeypatch):
+
+        class FlakyScriptClient:
+
+            def register_script(self, source):
+                async def run(keys, args):
+                    if "HSETNX" in source:  # reserve
+                        return [1, 3, 1]
+                    raise RedisConnectionError("connection reset")
+                return run
+
+        monkeypatch.setattr(redis_client, "_client", FlakyScriptClient())
+        ledger = QuotaLedger()
+
+        reservation = await ledger.reserve(_user(used=3, limit=5), "generations")
+
+        assert reservation.granted and not reservation.local
+        assert await reservation.commit() == 4
+        assert len(ledger._local_dirty) == 1
@@ -0,0 +1,155 @@
+"""
+Unit tests for the sliding-window rate limiter and its route dependency.
+"""
+import pytest
+from types import SimpleNamespace
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.utils.redis_client import redis_client
+from app.services import rate_limiter as rate_limiter_module
+from app.services.rate_limiter import RateLimiter, HOUR, DAY
+
+
+class Clock:
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Start 10 minutes into an hour bucket (and a day bucket)
+    clock = Clock(DAY * 20000 + 600)
+    monkeypatch.setattr(rate_limiter_module, "time", SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture
+def limiter(monkeypatch, clock):
+    monkeypatch.setattr(redis_client, "_client", None)
+    monkeypatch.setattr(settings, "FREE_TIER_LIMIT_HOURLY", 3)
+    monkeypatch.setattr(settings, "FREE_TIER_LIMIT_DAILY", 5)
+    return RateLimiter()
+
+
+class TestSlidingWindow:
+
+    @pytest.mark.asyncio
+    async def test_allows_up_to_limit_then_rejects(self, limiter):
+        decisions = [await limiter.hit("user-1", "free") for _ in range(4)]
+
+        assert [d.allowed for d in decisions] == [True, True, True, False]
+        assert decisions[2].headers()["X-RateLimit-Remaining"] == "0"
+        rejected = decisions[3].headers()
+        assert rejected["X-RateLimit-Limit"] == "3"
+        assert int(rejected["Retry-After"]) == HOUR - 600
+
+    @pytest.mark.asyncio
+    async def test_previous_bucket_slides_out(self, limiter, clock):
+        for _ in range(3):
+            await limiter.hit("user-1", "free")
+
+        # Next hour bucket, 10 minutes in: 3 × 50/60 = 2.5 still counted
+        clock.now += HOUR
+        assert not (await limiter.hit("user-1", "free")).allowed
+
+        # 30 minutes in: 1.5 counted
+        clock.now += 1200
+        assert (await limiter.hit("user-1", "free")).allowed
+
+    @pytest.mark.asyncio
+    async def test_retry_after_for_sliding_previous_bucket(self, limiter, clock):
+        for _ in range(3):
+            await limiter.hit("user-1", "free")
+        clock.now += HOUR
+
+        decision = await limiter.hit("user-1", "free")
+
+        # Needs 0.5 of the previous bucket's 3 requests to slide out: 600s
+        assert decision.retry_after == 600
+
+    @pytest.mark.asyncio
+    async def test_daily_window_applies(self, limiter, clock):
+        allowed = 0
+        for hour in range(4):
+            clock.now += HOUR * 2 if hour else 0
+            for _ in range(3):
+                allowed += (await limiter.hit("user-1", "free")).allowed
+
+        assert allowed == 5
+
+    @pytest.mark.asyncio
+    async def test_users_and_tiers_are_separate(self, limiter):
+        for _ in range(3):
+            await limiter.hit("user-1", "free")
+
+        assert (await limiter.hit("user-2", "free")).allowed
+        assert (await limiter.hit("user-3", "pro")).windows[0].limit == settings.PRO_TIER_LIMIT_HOURLY
+
+    @pytest.mark.asyncio
+    async def test_redis_errors_fall_back_to_local(self, limiter, monkeypatch):
+        class BrokenRedis:
+
+            def register_script(self, source):
+                async def run(keys, args):
+                    raise ConnectionError("redis down")
+                return run
+
+        monkeypatch.setattr(redis_client, "_client", BrokenRedis())
+
+        assert [(await limiter.hit("user-1", "free")).allowed for _ in range(4)] == [True, True, True, False]
+
+    @pytest.mark.asyncio
+    async def test_script_gets_both_buckets_per_window(self, limiter, monkeypatch):
+        calls = []
+
+        class ScriptRedis:
+
+            def register_script(self, source):
+                async def run(keys, args):
+                    calls.append((keys, args))
+                    return [1, 1, 0, 1, 0]
+                return run
+
+        monkeypatch.setattr(redis_client, "_client", ScriptRedis())
+
+        decision = await limiter.hit("user-1", "free")
+
+        keys, args = calls[0]
+        assert decision.allowed
+        assert len(keys) == 4 and keys[0].startswith(f"ratelimit:user-1:{HOUR}:")
+        assert args[:4] == [2, HOUR, 3, 600]
+
+
+class TestRateLimitDependency:
+
+    @pytest.fixture
+    def client(self, limiter, firebase_service):
+        # app.dependencies needs firebase_service, so import it once that is initialized
+        from app.dependencies import enforce_rate_limit, get_current_user
+        app = FastAPI()
+
+        @app.post("/work", dependencies=[Depends(enforce_rate_limit)])
+        async def work():
+            return {"ok": True}
+
+        app.dependency_overrides[get_current_user] = lambda: {"uid": "user-1", "subscriptionPlan": "free"}
+        return TestClient(app)
+
+    def test_headers_and_429(self, client):
+        responses = [client.post("/work") for _ in range(4)]
+
+        assert [r.status_code for r in responses] == [200, 200, 200, 429]
+        assert responses[0].headers["X-RateLimit-Remaining"] == "2"
+        assert responses[3].headers["Retry-After"] == str(HOUR - 600)
+        assert responses[3].json()["detail"]["error"] == "rate_limit_exceeded"
+
+    def test_disabled(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+
+        assert all(client.post("/work").status_code == 200 for _ in range(5))
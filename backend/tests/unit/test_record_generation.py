@@ -0,0 +1,86 @@
+"""
+Unit tests for FirebaseService.record_generation (generation + counters in one commit).
+"""
+import pytest
+from google.api_core.exceptions import NotFound
+
+
+def _generation(overall_score=0):
+    return {
+        "userId": "user-1",
+        "contentType": "blog",
+        "userInput": {"topic": "Remote work"},
+        "output": {"title": "Remote work", "content": "..."},
+        "qualityMetrics": {"overall_score": overall_score}
+    }
+
+
+class TestRecordGeneration:
+
+    @pytest.mark.asyncio
+    async def test_one_transaction_one_read(self, firestore, firebase_service):
+        generation_id, counters = await firebase_service.record_generation(_generation(8.0))
+
+        assert firestore.transactions == 1
+        assert firestore.commits == 1
+        assert firestore.reads == 1
+        assert firestore.docs[generation_id]["contentType"] == "blog"
+        assert counters == {
+            "generations": 1, "totalGenerations": 1, "qualityScoreCount": 1, "averageQualityScore": 8.0
+        }
+
+    @pytest.mark.asyncio
+    async def test_running_average(self, firestore, firebase_service):
+        service = firebase_service
+        for score in (8.0, 6.0, 7.0):
+            _, counters = await service.record_generation(_generation(score))
+
+        assert counters["generations"] == 3
+        assert counters["averageQualityScore"] == 7.0
+        stats = (await service.get_user("user-1"))["allTimeStats"]
+        assert stats["averageQualityScore"] == 7.0
+
+    @pytest.mark.asyncio
+    async def test_unscored_generation_counted_but_not_averaged(self, firestore, firebase_service):
+        service = firebase_service
+        await service.record_generation(_generation(9.0))
+
+        _, counters = await service.record_generation(_generation(0))
+
+        assert counters["totalGenerations"] == 2
+        assert counters["qualityScoreCount"] is None
+        assert (await service.get_user("user-1"))["allTimeStats"]["averageQualityScore"] == 9.0
+
+    @pytest.mark.asyncio
+    async def test_invalidates_user_cache(self, firestore, firebase_service):
+        service = firebase_service
+        await service.get_user("user-1")
+
+        await service.record_generation(_generation(5.0))
+
+        assert (await service.get_user("user-1"))["usageThisMonth"]["generations"] == 1
+
+    @pytest.mark.asyncio
+    async def test_missing_user_writes_nothing(self, firestore, firebase_service):
+        data = _generation(5.0)
+        data["userId"] = "ghost"
+
+        with pytest.raises(NotFound):
+            await firebase_service.record_generation(data)
+
+        assert set(firestore.docs) == {"user-1"}
+
+    @pytest.mark.asyncio
+    async def test_counters_continue_from_stored_values(self, firestore, firebase_service):
+        firestore.docs["user-1"]["usageThisMonth"]["generations"] = 4
+        firestore.docs["user-1"]["allTimeStats"] = {
+            "totalGenerations": 40, "qualityScoreSum": 30.0, "qualityScoreCount": 4
+        }
+
+        _, counters = await firebase_service.record_generation(_generation(10.0))
+
+        assert counters == {
+            "generations": 5, "totalGenerations": 41, "qualityScoreCount": 5, "averageQualityScore": 8.0
+        }
+        stats = firestore.docs["user-1"]["allTimeStats"]
+        assert (stats["qualityScoreSum"], stats["qualityScoreCount"]) == (40.0, 5)
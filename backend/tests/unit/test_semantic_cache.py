@@ -0,0 +1,147 @@
+"""
+Unit tests for the semantic (near-duplicate) generation cache.
+"""
+import json
+import pytest
+
+from app.config import settings
+from app.services import openai_service as service_module
+from app.utils.cache_manager import cache_manager
+from app.utils.prompt_enhancer import improve_prompt, ContentType as PromptContentType
+from app.utils.semantic_cache import MinHasher, SemanticCache, normalize_text
+
+
+@pytest.fixture
+def cache(monkeypatch, fake_redis):
+    monkeypatch.setattr(settings, "SEMANTIC_CACHE_ENABLED", True)
+    monkeypatch.setattr(cache_manager, "cache_enabled", True)
+    return SemanticCache()
+
+
+BLOG_PARAMS = {"tone": "professional", "word_count": 1000}
+RESULT = {"output": {"title": "10 Remote Work Tips"}, "cached": False}
+
+
+class TestFingerprints:
+
+    def test_normalization_ignores_wording_noise(self):
+        assert set(normalize_text("10 tips for remote work")) == set(normalize_text("10 Tips for Working Remotely!"))
+
+    def test_similarity_separates_topics(self):
+        hasher = MinHasher()
+        base = hasher.signature(normalize_text("best practices for managing a remote team"))
+        reworded = hasher.signature(normalize_text("Managing remote teams: best practice"))
+        unrelated = hasher.signature(normalize_text("best sourdough bread recipe"))
+
+        assert MinHasher.similarity(base, reworded) == 1.0
+        assert MinHasher.similarity(base, unrelated) < 0.5
+
+
+class TestSemanticCache:
+
+    @pytest.mark.asyncio
+    async def test_reworded_request_hits(self, cache):
+        await cache.store("blog", "10 tips for remote work", "user-1", RESULT, params=BLOG_PARAMS, keywords=["remote"])
+
+        hit = await cache.lookup("blog", "10 Tips for Working Remotely", "user-1", params=BLOG_PARAMS, keywords=["remote"])
+
+        assert hit["output"] == RESULT["output"]
+        assert hit["cached"] is True
+        assert hit["semantic_similarity"] == 1.0
+        assert RESULT["cached"] is False  # Stored result isn't mutated
+
+    @pytest.mark.asyncio
+    async def test_different_topic_misses(self, cache):
+        await cache.store("blog", "10 tips for remote work", "user-1", RESULT, params=BLOG_PARAMS)
+
+        assert await cache.lookup("blog", "10 tips for growing tomatoes", "user-1", params=BLOG_PARAMS) is None
+
+    @pytest.mark.asyncio
+    async def test_exact_params_partition_entries(self, cache):
+        await cache.store("blog", "10 tips for remote work", "user-1", RESULT, params=BLOG_PARAMS)
+
+        assert await cache.lookup("blog", "10 tips for remote work", "user-1",
+                                  params={"tone": "casual", "word_count": 1000}) is None
+        assert await cache.lookup("blog", "10 tips for remote work", "user-2", params=BLOG_PARAMS) is None
+        # Word counts are bucketed, so 1020 lands with 1000
+        assert await cache.lookup("blog", "10 tips for remote work", "user-1",
+                                  params={"tone": "professional", "word_count": 1020}) is not None
+
+    @pytest.mark.asyncio
+    async def test_per_content_type_threshold(self, cache, monkeypatch):
+        monkeypatch.setattr(settings, "SEMANTIC_CACHE_THRESHOLD_AD", 1.0)
+        await cache.store("ad", "ergonomic office chair for developers", "user-1", RESULT)
+
+        # One extra word drops similarity below a strict threshold
+        assert await cache.lookup("ad", "ergonomic mesh office chair for developers", "user-1") is None
+        monkeypatch.setattr(settings, "SEMANTIC_CACHE_THRESHOLD_AD", 0.6)
+        assert await cache.lookup("ad", "ergonomic mesh office chair for developers", "user-1") is not None
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_default(self, cache, monkeypatch):
+        monkeypatch.setattr(settings, "SEMANTIC_CACHE_ENABLED", False)
+
+        assert await cache.store("blog", "10 tips for remote work", "user-1", RESULT) is False
+        assert await cache.lookup("blog", "10 tips for remote work", "user-1") is None
+
+    @pytest.mark.asyncio
+    async def test_hit_rate_metrics(self, cache):
+        await cache.store("social", "launching our new app", "user-1", RESULT)
+        await cache.lookup("social", "Launching our new app!", "user-1")
+        await cache.lookup("social", "quarterly earnings recap", "user-1")
+
+        stats = cache.get_stats()
+        assert stats["by_content_type"]["social"]["lookups"] == 2
+        assert stats["by_content_type"]["social"]["hits"] == 1
+        assert stats["by_content_type"]["social"]["hit_rate"] == 50.0
+        assert stats["hit_rate"] == 50.0
+
+
+BLOG_OUTPUT = {
+    "title": "Post",
+    "metaDescription": "m" * 157,
+    "introduction": "intro",
+    "sections": [{"heading": "Only", "content": "body"}],
+    "conclusion": "end",
+    "wordCount": 1000
+}
+
+
+class TestServiceFingerprint:
+
+    @staticmethod
+    def _enhanced(topic):
+        """What the blog endpoint hands the service as `topic`"""
+        return improve_prompt(
+            user_prompt=topic,
+            content_type=PromptContentType.BLOG_POST.value,
+            tone="professional",
+            word_count=1000,
+            additional_context={"keywords": []}
+        )
+
+    @pytest.mark.asyncio
+    async def test_unrelated_topics_miss_after_enhancement(self, cache, fake_genai_client):
+        client = fake_genai_client(lambda model, contents, config: json.dumps(BLOG_OUTPUT))
+        service = service_module.openai_service
+
+        async def generate(topic):
+            return await service.generate_blog_post(
+                topic=self._enhanced(topic), keywords=[], tone="professional", word_count=1000,
+                user_id="user-1", include_examples=False, request_text=topic
+            )
+
+        # The enhancer's shared template makes the enhanced prompts near-identical...
+        hasher = MinHasher()
+        enhanced = [hasher.signature(normalize_text(self._enhanced(topic)))
+                    for topic in ("10 tips for remote work", "best sourdough bread recipe")]
+        assert MinHasher.similarity(*enhanced) >= settings.SEMANTIC_CACHE_THRESHOLD_BLOG
+
+        # ...so the cache fingerprints the user's topic instead
+        await generate("10 tips for remote work")
+        unrelated = await generate("best sourdough bread recipe")
+        reworded = await generate("10 Tips for Working Remotely")
+
+        assert len(client.prompts) == 2
+        assert unrelated["cached"] is False
+        assert reworded["cached"] is True
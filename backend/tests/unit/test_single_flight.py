@@ -0,0 +1,135 @@
+"""
+Unit tests for single-flight coalescing of identical generations.
+"""
+import asyncio
+import pytest
+
+from app.config import settings
+from app.services.single_flight import SingleFlight
+from app.utils.redis_client import redis_client
+
+
+@pytest.fixture
+def flight_settings(monkeypatch):
+    monkeypatch.setattr(settings, "SINGLE_FLIGHT_ENABLED", True)
+    monkeypatch.setattr(settings, "SINGLE_FLIGHT_WAIT_TIMEOUT", 2.0)
+
+
+@pytest.fixture
+def no_redis(monkeypatch):
+    monkeypatch.setattr(redis_client, "_client", None)
+
+
+def _generation(calls, delay=0.05, error=None):
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return {"content": "shared", "tokens": 10}
+    return call
+
+
+class TestSingleFlight:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_requests_share_one_call(self, flight_settings, no_redis):
+        flight = SingleFlight()
+        calls = []
+
+        results = await asyncio.gather(*[flight.run("generation:abc", _generation(calls)) for _ in range(5)])
+
+        assert len(calls) == 1
+        assert all(result == {"content": "shared", "tokens": 10} for result in results)
+        # Followers get copies so callers can't mutate each other's result
+        assert len({id(result) for result in results}) == 5
+        assert flight.stats["local_followers"] == 4
+        assert flight.get_stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_different_keys_run_separately(self, flight_settings, no_redis):
+        flight = SingleFlight()
+        calls = []
+
+        await asyncio.gather(flight.run("generation:a", _generation(calls)),
+                             flight.run("generation:b", _generation(calls)))
+
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_leader_error_reaches_followers(self, flight_settings, no_redis):
+        flight = SingleFlight()
+        calls = []
+        call = _generation(calls, error=RuntimeError("quota"))
+
+        results = await asyncio.gather(flight.run("generation:abc", call),
+                                       flight.run("generation:abc", call),
+                                       return_exceptions=True)
+
+        assert len(calls) == 1
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+        # Nothing left in flight - the next request starts fresh
+        await flight.run("generation:abc", _generation(calls))
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_hands_call_to_followers(self, flight_settings, no_redis):
+        flight = SingleFlight()
+        calls = []
+
+        leader = asyncio.create_task(flight.run("generation:abc", _generation(calls)))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(flight.run("generation:abc", _generation(calls))) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        results = await asyncio.gather(*followers)
+
+        assert leader.cancelled()
+        # One follower took over; the other joined it instead of being cancelled
+        assert len(calls) == 2
+        assert results == [{"content": "shared", "tokens": 10}] * 2
+        assert flight.stats["local_followers"] == 1
+        assert flight.get_stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_follower_in_other_worker_gets_leader_result(self, flight_settings, fake_redis):
+        worker_a, worker_b = SingleFlight(), SingleFlight()
+        calls = []
+
+        results = await asyncio.gather(worker_a.run("generation:abc", _generation(calls)),
+                                       worker_b.run("generation:abc", _generation(calls)))
+
+        assert len(calls) == 1
+        assert results[0] == results[1]
+        assert worker_b.stats["remote_followers"] == 1
+        assert "singleflight:generation:abc:lock" not in fake_redis.data
+
+    @pytest.mark.asyncio
+    async def test_follower_generates_when_leader_fails(self, flight_settings, fake_redis):
+        worker_a, worker_b = SingleFlight(), SingleFlight()
+        calls = []
+
+        results = await asyncio.gather(
+            worker_a.run("generation:abc", _generation(calls, error=RuntimeError("boom"))),
+            worker_b.run("generation:abc", _generation(calls)),
+            return_exceptions=True
+        )
+
+        assert isinstance(results[0], RuntimeError)
+        assert results[1] == {"content": "shared", "tokens": 10}
+        assert worker_b.stats["remote_fallbacks"] == 1
+
+    @pytest.mark.asyncio
+    async def test_late_follower_reads_stored_result(self, flight_settings, fake_redis):
+        worker_a, worker_b = SingleFlight(), SingleFlight()
+        calls = []
+        await worker_a.run("generation:abc", _generation(calls, delay=0))
+        # Leader finished, but a follower that saw the lock would still find the result
+        fake_redis.data["singleflight:generation:abc:lock"] = "other-worker"
+
+        result = await worker_b.run("generation:abc", _generation(calls))
+
+        assert len(calls) == 1
+        assert result == {"content": "shared", "tokens": 10}
@@ -0,0 +1,79 @@
+"""
+Unit tests for adaptive max_output_tokens (observed output length percentiles).
+"""
+import pytest
+
+from app.config import settings
+from app.services.token_budget import OutputTokenEstimator
+from app.utils.redis_client import redis_client
+
+MODEL = "gemini-2.5-flash"
+
+
+@pytest.fixture
+def estimator(monkeypatch):
+    monkeypatch.setattr(redis_client, "_client", None)
+    monkeypatch.setattr(settings, "TOKEN_ESTIMATOR_ENABLED", True)
+    monkeypatch.setattr(settings, "TOKEN_ESTIMATOR_MIN_SAMPLES", 5)
+    monkeypatch.setattr(settings, "TOKEN_ESTIMATOR_PERCENTILE", 90.0)
+    monkeypatch.setattr(settings, "TOKEN_ESTIMATOR_HEADROOM", 0.1)
+    return OutputTokenEstimator()
+
+
+async def _record(estimator, outputs, max_tokens=8000, finish_reason="STOP", word_count=1000):
+    for output in outputs:
+        await estimator.record("blog", "casual", word_count, MODEL, output, max_tokens, finish_reason)
+
+
+class TestOutputTokenEstimator:
+
+    @pytest.mark.asyncio
+    async def test_static_budget_until_min_samples(self, estimator):
+        await _record(estimator, [2000, 2100, 2200, 2300])
+
+        assert estimator.max_tokens("blog", "casual", 1000, MODEL, default=8000) == 8000
+
+    @pytest.mark.asyncio
+    async def test_percentile_plus_headroom(self, estimator):
+        await _record(estimator, [2000, 2100, 2200, 2300, 2400, 2500, 2600, 2700, 2800, 3000])
+
+        # p90 of 10 samples is the 9th (2800), plus 10% headroom
+        assert estimator.max_tokens("blog", "casual", 1000, MODEL, default=8000) == 3080
+        # Other buckets and tones keep their own (static) budgets
+        assert estimator.max_tokens("blog", "casual", 2000, MODEL, default=12000) == 12000
+        assert estimator.max_tokens("blog", "formal", 1000, MODEL, default=8000) == 8000
+
+    @pytest.mark.asyncio
+    async def test_truncation_raises_budget(self, estimator, monkeypatch):
+        monkeypatch.setattr(settings, "TOKEN_ESTIMATOR_TRUNCATION_BOOST", 1.5)
+        await _record(estimator, [2000] * 10)
+        budget = estimator.max_tokens("blog", "casual", 1000, MODEL, default=8000)
+
+        await _record(estimator, [budget], max_tokens=budget, finish_reason="FinishReason.MAX_TOKENS")
+
+        # A single truncation is below p90 but the next budget still clears it
+        assert estimator.max_tokens("blog", "casual", 1000, MODEL, default=8000) == int(budget * 1.5)
+        stats = estimator.get_stats()["keys"][f"blog:casual:1000:{MODEL}"]
+        assert stats["truncated"] == 1
+
+    @pytest.mark.asyncio
+    async def test_samples_shared_through_redis(self, estimator, fake_redis):
+        await _record(estimator, [1500, 1600, 1700, 1800, 1900, 5000], finish_reason=None)
+
+        restarted = OutputTokenEstimator()
+        await restarted._sync(restarted.key("blog", "casual", 1000, MODEL))
+
+        assert restarted.estimate(restarted.key("blog", "casual", 1000, MODEL)) == 5500
+
+    @pytest.mark.asyncio
+    async def test_disabled_uses_static_budget(self, estimator, monkeypatch):
+        await _record(estimator, [2000] * 10)
+        monkeypatch.setattr(settings, "TOKEN_ESTIMATOR_ENABLED", False)
+
+        assert estimator.max_tokens("blog", "casual", 1000, MODEL, default=8000) == 8000
+
+    def test_word_count_buckets(self):
+        assert OutputTokenEstimator.bucket(None) == 0
+        assert OutputTokenEstimator.bucket(1) == 500
+        assert OutputTokenEstimator.bucket(1000) == 1000
+        assert OutputTokenEstimator.bucket(1001) == 1500
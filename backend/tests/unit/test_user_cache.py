@@ -0,0 +1,62 @@
+"""
+Unit tests for the authenticated-user cache in FirebaseService.
+"""
+import pytest
+from datetime import datetime, timezone
+
+from app.config import settings
+
+
+class TestUserCache:
+
+    @pytest.mark.asyncio
+    async def test_repeated_reads_served_from_cache(self, firestore, firebase_service):
+        service = firebase_service
+
+        first = await service.get_user("user-1")
+        for _ in range(5):
+            assert await service.get_user("user-1") == first
+
+        assert firestore.reads == 1
+        assert first["subscription"]["currentPeriodStart"] == datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+    @pytest.mark.asyncio
+    async def test_increment_usage_invalidates(self, firestore, firebase_service):
+        service = firebase_service
+        await service.get_user("user-1")
+
+        await service.increment_usage("user-1")
+
+        assert (await service.get_user("user-1"))["usageThisMonth"]["generations"] == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("write", [
+        lambda s: s.update_user("user-1", {"displayName": "New"}),
+        lambda s: s.update_subscription("user-1", {"plan": "pro"}),
+        lambda s: s.update_usage_limits("user-1", {"generations": 100}),
+    ])
+    async def test_writes_invalidate(self, firestore, firebase_service, write):
+        service = firebase_service
+        await service.get_user("user-1")
+
+        await write(service)
+        await service.get_user("user-1")
+
+        assert firestore.reads == 2
+
+    @pytest.mark.asyncio
+    async def test_cached_copy_not_shared(self, firestore, firebase_service):
+        service = firebase_service
+        (await service.get_user("user-1"))["usageThisMonth"]["generations"] = 99
+
+        assert (await service.get_user("user-1"))["usageThisMonth"]["generations"] == 0
+
+    @pytest.mark.asyncio
+    async def test_disabled_or_bypassed(self, firestore, firebase_service, monkeypatch):
+        service = firebase_service
+        await service.get_user("user-1")
+        await service.get_user("user-1", use_cache=False)
+        monkeypatch.setattr(settings, "USER_CACHE_TTL", 0)
+        await service.get_user("user-1")
+
+        assert firestore.reads == 3